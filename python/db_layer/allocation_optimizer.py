@@ -0,0 +1,108 @@
+import numpy as np
+
+
+def build_stock_matrix(index, item_ids):
+    """
+    Builds the (item x location) stock matrix of a LocationIndex for the
+    given items.
+    Returns (location_ids, stock), where column j of stock holds the units of
+    every item at location_ids[j].
+    """
+    location_ids = np.array(sorted(index.locations), dtype=np.int64)
+    column = {location_id: j for j, location_id in enumerate(location_ids)}
+    stock = np.zeros((len(item_ids), len(location_ids)), dtype=np.int64)
+    for i, item_id in enumerate(item_ids):
+        _, by_location = index.stock.get(item_id, (None, {}))
+        for location_id, quantity in by_location.items():
+            if location_id in column:
+                stock[i, column[location_id]] = quantity
+    return location_ids, stock
+
+
+def greedy_cover(feasible, distances):
+    """
+    Greedy set cover: repeatedly opens the location that can ship the most
+    uncovered lines, the nearest one on ties.
+    Returns the list of opened columns.
+    """
+    uncovered = feasible.any(axis=1)
+    opened = []
+    while uncovered.any():
+        counts = feasible[uncovered].sum(axis=0)
+        best = np.lexsort((distances, -counts))[0]
+        opened.append(int(best))
+        uncovered &= ~feasible[:, best]
+    return opened
+
+
+def improve_cover(feasible, distances, opened):
+    """
+    Improves a cover until no move applies:
+      - drop an opened location whose lines the others can also ship;
+      - replace two opened locations by one that ships all lines only they
+        could ship.
+    Returns the improved list of opened columns.
+    """
+    coverable = feasible.any(axis=1)
+    improved = True
+    while improved:
+        improved = False
+        # Try dropping the farthest locations first.
+        for j in sorted(opened, key=lambda j: -distances[j]):
+            rest = [k for k in opened if k != j]
+            if (feasible[:, rest].any(axis=1) | ~coverable).all():
+                opened = rest
+                improved = True
+                break
+        if improved:
+            continue
+        for a in range(len(opened)):
+            for b in range(a + 1, len(opened)):
+                rest = [k for n, k in enumerate(opened) if n != a and n != b]
+                need = coverable & ~feasible[:, rest].any(axis=1)
+                replacements = np.flatnonzero(feasible[need].all(axis=0))
+                if len(replacements):
+                    nearest = replacements[np.argmin(distances[replacements])]
+                    opened = rest + [int(nearest)]
+                    improved = True
+                    break
+            if improved:
+                break
+    return opened
+
+
+def optimize_allocation(stock, quantities, distances):
+    """
+    Computes a minimal-shipment allocation for an order over an
+    (item x location) stock matrix.
+
+    Every line is shipped in full from one location. A greedy cover picks
+    the locations, an improvement pass removes or merges locations where
+    possible, and each line then ships from the nearest opened location
+    that holds it.
+
+    :param stock: int array (n_items, n_locations) of available units.
+    :param quantities: int array (n_items,) of ordered units.
+    :param distances: float array (n_locations,) of distances to the
+        destination.
+    :return: int array (n_items,) with the location column of every line,
+        or -1 for lines no single location can ship.
+    """
+    quantities = np.asarray(quantities)
+    # Locations without a comparable zip code rank last but stay usable.
+    distances = np.nan_to_num(
+        np.asarray(distances, dtype=np.float64),
+        posinf=np.finfo(np.float64).max,
+    )
+    feasible = stock >= quantities[:, None]
+    opened = improve_cover(
+        feasible, distances, greedy_cover(feasible, distances)
+    )
+    assignment = np.full(len(quantities), -1, dtype=np.int64)
+    if not opened:
+        return assignment
+    opened = np.array(opened)
+    cost = np.where(feasible[:, opened], distances[opened], np.inf)
+    covered = feasible[:, opened].any(axis=1)
+    assignment[covered] = opened[np.argmin(cost[covered], axis=1)]
+    return assignment
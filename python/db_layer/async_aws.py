@@ -0,0 +1,75 @@
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+import boto3
+
+# Concurrent calls per wrapped client. botocore keeps 10 pooled HTTP
+# connections per client by default; more calls would only queue there.
+MAX_CONCURRENT_CALLS = int(os.environ.get("AWS_MAX_CONCURRENT_CALLS", 10))
+
+_loop = None
+
+
+class AsyncClient:
+    """
+    Wraps a boto3 client (S3, SNS, Step Functions, ...) so each API method
+    returns an awaitable. Calls run on the client's own worker threads and
+    overlap with each other and with async database work, e.g.
+
+        sns = AsyncClient(boto3.client("sns"))
+        await asyncio.gather(*(sns.publish(**kwargs) for kwargs in batch))
+
+    Methods are looked up on the wrapped client at call time.
+    """
+
+    def __init__(self, client, max_concurrency=MAX_CONCURRENT_CALLS):
+        self.client = client
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency)
+
+    def __getattr__(self, name):
+        method = getattr(self.client, name)
+        if not callable(method):
+            return method
+
+        async def call(*args, **kwargs):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._executor, functools.partial(method, *args, **kwargs)
+            )
+
+        return call
+
+
+def async_client(service_name, **kwargs):
+    """
+    Returns an AsyncClient around a new boto3 client, e.g.
+    async_client("stepfunctions", region_name="eu-north-1").
+    """
+    return AsyncClient(boto3.client(service_name, **kwargs))
+
+
+def get_event_loop():
+    """
+    Returns the event loop shared by all invocations in this execution
+    environment, creating it on first use.
+    """
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+    return _loop
+
+
+def async_handler(handler):
+    """
+    Adapts an `async def handler(event, context)` to the synchronous Lambda
+    handler interface.
+    Warm invocations reuse the same event loop, so async engine pools and
+    client connections opened by earlier invocations stay usable.
+    """
+
+    @functools.wraps(handler)
+    def wrapper(event, context):
+        return get_event_loop().run_until_complete(handler(event, context))
+
+    return wrapper
@@ -0,0 +1,53 @@
+import os
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+# Async engines are created on first use, so modules importing this one do
+# not need asyncpg until they open a session.
+_engines = {}
+_sessionmakers = {}
+
+
+def return_async_engine(host=None):
+    """
+    Returns a new asyncio engine for the PostgreSQL database using the
+    asyncpg driver and credentials stored in environment variables.
+    Pass `host` to connect to another instance with the same credentials,
+    e.g. a read replica.
+    """
+    host = host or os.environ.get("DB_HOST")
+    dbname = os.environ.get("DB_NAME")
+    port = os.environ.get("DB_PORT", 5432)
+    user = os.environ.get("DB_USER")
+    password = os.environ.get("DB_PASSWORD")
+    DATABASE_URL = (
+        f"postgresql+asyncpg://{user}:{password}@{host}:{port}/{dbname}"
+    )
+    return create_async_engine(DATABASE_URL)
+
+
+def get_async_engine(read_only=False):
+    """
+    Returns the shared async engine, bound to the read replica for
+    read-only use when DB_REPLICA_HOST is configured.
+    """
+    host = os.environ.get("DB_REPLICA_HOST") if read_only else None
+    if host not in _engines:
+        _engines[host] = return_async_engine(host)
+    return _engines[host]
+
+
+def get_async_session(read_only=False):
+    """
+    Returns a new AsyncSession, the asyncio counterpart of get_session().
+    Objects are not expired on commit, so their attributes stay readable
+    without another round trip.
+    Pooled connections belong to the event loop that opened them; run
+    handlers through async_aws.async_handler, which keeps one loop per
+    execution environment.
+    """
+    engine = get_async_engine(read_only)
+    if engine not in _sessionmakers:
+        _sessionmakers[engine] = async_sessionmaker(
+            engine, autoflush=False, expire_on_commit=False
+        )
+    return _sessionmakers[engine]()
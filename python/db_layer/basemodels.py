@@ -1,6 +1,9 @@
 from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy import BigInteger, Date, Float, ForeignKeyConstraint, Index
+from sqlalchemy import Computed, DDL, event
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from datetime import datetime
-from sqlalchemy.orm import declarative_base
+from sqlalchemy.orm import declarative_base, deferred
 from sqlalchemy.orm import relationship
 
 Base = declarative_base()
@@ -13,17 +16,200 @@ CREATE TABLE item_stock (
     quantity INTEGER NOT NULL DEFAULT 0,
     FOREIGN KEY (location_id) REFERENCES location(id)
 );
+CREATE INDEX ix_item_stock_item_id_location_id
+    ON item_stock (item_id, location_id);
 """
 
 
 class ItemStock(Base):
     __tablename__ = "item_stock"
+    __table_args__ = (
+        Index("ix_item_stock_item_id_location_id", "item_id", "location_id"),
+    )
     id = Column(Integer, primary_key=True)
     item_id = Column(Integer, nullable=False)
     location_id = Column(Integer, ForeignKey("locations.id"), nullable=False)
     quantity = Column(Integer, nullable=False)
 
 
+"""
+CREATE TABLE item_stock_totals (
+    item_id INTEGER PRIMARY KEY,
+    total_quantity INTEGER NOT NULL DEFAULT 0,
+    location_count INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+class ItemStockTotal(Base):
+    """
+    Per-item stock summed over all locations. Maintained by the
+    item_stock_totals_trigger on item_stock, never written by handlers.
+    """
+
+    __tablename__ = "item_stock_totals"
+    item_id = Column(Integer, primary_key=True)
+    total_quantity = Column(Integer, nullable=False, default=0)
+    location_count = Column(Integer, nullable=False, default=0)
+
+
+ITEM_STOCK_TOTALS_TRIGGER = """
+CREATE OR REPLACE FUNCTION item_stock_totals_apply() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' AND OLD.item_id = NEW.item_id THEN
+        UPDATE item_stock_totals
+        SET total_quantity = total_quantity + NEW.quantity - OLD.quantity
+        WHERE item_id = NEW.item_id;
+        RETURN NULL;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE item_stock_totals
+        SET total_quantity = total_quantity - OLD.quantity,
+            location_count = location_count - 1
+        WHERE item_id = OLD.item_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO item_stock_totals (item_id, total_quantity, location_count)
+        VALUES (NEW.item_id, NEW.quantity, 1)
+        ON CONFLICT (item_id) DO UPDATE
+        SET total_quantity = item_stock_totals.total_quantity
+                + EXCLUDED.total_quantity,
+            location_count = item_stock_totals.location_count + 1;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS item_stock_totals_trigger ON item_stock;
+CREATE TRIGGER item_stock_totals_trigger
+AFTER INSERT OR UPDATE OR DELETE ON item_stock
+FOR EACH ROW EXECUTE FUNCTION item_stock_totals_apply();
+"""
+
+# Rebuilds item_stock_totals from item_stock when scripts/migrate_schema.py
+# installs the trigger on an existing database.
+ITEM_STOCK_TOTALS_BACKFILL = """
+INSERT INTO item_stock_totals (item_id, total_quantity, location_count)
+SELECT item_id, SUM(quantity), COUNT(*) FROM item_stock GROUP BY item_id
+ON CONFLICT (item_id) DO UPDATE
+SET total_quantity = EXCLUDED.total_quantity,
+    location_count = EXCLUDED.location_count;
+"""
+
+event.listen(
+    Base.metadata,
+    "after_create",
+    DDL(ITEM_STOCK_TOTALS_TRIGGER).execute_if(dialect="postgresql"),
+)
+
+
+"""
+CREATE TABLE stock_thresholds (
+    item_id INTEGER NOT NULL,
+    location_id INTEGER NOT NULL,
+    avg_daily_demand DOUBLE PRECISION NOT NULL,
+    safety_stock INTEGER NOT NULL,
+    reorder_point INTEGER NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (item_id, location_id)
+);
+"""
+
+
+class StockThreshold(Base):
+    """
+    Per (item, location) reorder point computed by the demand_forecast job
+    and used by update_stock for low-stock alerts.
+    """
+
+    __tablename__ = "stock_thresholds"
+    item_id = Column(Integer, primary_key=True)
+    location_id = Column(Integer, primary_key=True)
+    avg_daily_demand = Column(Float, nullable=False)
+    safety_stock = Column(Integer, nullable=False)
+    reorder_point = Column(Integer, nullable=False)
+    updated_at = Column(DateTime, default=datetime.now)
+
+
+"""
+CREATE TABLE sales_daily (
+    day DATE NOT NULL,
+    item_id INTEGER NOT NULL,
+    location_id INTEGER NOT NULL,
+    units_sold INTEGER NOT NULL DEFAULT 0,
+    order_lines INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, item_id, location_id)
+);
+"""
+
+
+class SalesDaily(Base):
+    """
+    Units sold per day, item and location. Maintained incrementally by
+    purchase_post and purchase_error through db_layer.sales_rollup.
+    """
+
+    __tablename__ = "sales_daily"
+    day = Column(Date, primary_key=True)
+    item_id = Column(Integer, primary_key=True)
+    location_id = Column(Integer, primary_key=True)
+    units_sold = Column(Integer, nullable=False, default=0)
+    order_lines = Column(Integer, nullable=False, default=0)
+
+
+"""
+CREATE TABLE table_versions (
+    table_name TEXT PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0
+);
+"""
+
+
+class TableVersion(Base):
+    """
+    Change counter per table, bumped by a statement-level trigger on every
+    write. Used to derive ETags for rarely changing tables.
+    """
+
+    __tablename__ = "table_versions"
+    table_name = Column(String, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+
+
+TABLE_VERSION_TRIGGER = """
+CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO table_versions (table_name, version)
+    VALUES (TG_TABLE_NAME, 1)
+    ON CONFLICT (table_name) DO UPDATE
+    SET version = table_versions.version + 1;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS items_version_trigger ON items;
+CREATE TRIGGER items_version_trigger
+AFTER INSERT OR UPDATE OR DELETE ON items
+FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+
+DROP TRIGGER IF EXISTS locations_version_trigger ON locations;
+CREATE TRIGGER locations_version_trigger
+AFTER INSERT OR UPDATE OR DELETE ON locations
+FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+
+DROP TRIGGER IF EXISTS image_derivatives_version_trigger ON image_derivatives;
+CREATE TRIGGER image_derivatives_version_trigger
+AFTER INSERT OR UPDATE OR DELETE ON image_derivatives
+FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+"""
+
+event.listen(
+    Base.metadata,
+    "after_create",
+    DDL(TABLE_VERSION_TRIGGER).execute_if(dialect="postgresql"),
+)
+
+
 """
 CREATE TABLE locations (
     id SERIAL PRIMARY KEY,
@@ -57,18 +243,163 @@ class Location(Base):
 #     id SERIAL PRIMARY KEY,
 #     name VARCHAR(255) NOT NULL,
 #     description TEXT NOT NULL,
-#     price INTEGER NOT NULL DEFAULT 0
+#     price INTEGER NOT NULL DEFAULT 0,
+#     s3_key VARCHAR,
+#     search_vector TSVECTOR GENERATED ALWAYS AS (
+#         setweight(to_tsvector('english', name), 'A')
+#         || setweight(to_tsvector('english', description), 'B')
+#     ) STORED
 # );
+# CREATE INDEX ix_items_search_vector ON items USING gin (search_vector)
+#     WITH (fastupdate = off);
+# Existing databases get the column and index from scripts/migrate_schema.py.
 """
 
+# Text search configuration of Item.search_vector; queries against it must
+# use the same one.
+ITEM_SEARCH_CONFIG = "english"
+
 
 class Item(Base):
+    """
+    search_vector is computed by PostgreSQL from name (weight A) and
+    description (weight B) on every write. It is deferred so listings do
+    not load it. Its GIN index is built without a pending list: item writes
+    are rare next to searches, which then never scan unmerged entries.
+    """
+
     __tablename__ = "items"
+    __table_args__ = (
+        Index(
+            "ix_items_search_vector",
+            "search_vector",
+            postgresql_using="gin",
+            postgresql_with={"fastupdate": "off"},
+        ),
+    )
     id = Column(Integer, primary_key=True)
     name = Column(String, nullable=False)
     description = Column(String, nullable=False)
     price = Column(Integer, nullable=False)
     s3_key = Column(String)
+    search_vector = deferred(
+        Column(
+            TSVECTOR,
+            Computed(
+                f"setweight(to_tsvector('{ITEM_SEARCH_CONFIG}', name), 'A')"
+                f" || setweight(to_tsvector('{ITEM_SEARCH_CONFIG}', "
+                "description), 'B')",
+                persisted=True,
+            ),
+        )
+    )
+
+
+# Trigram index serving the ILIKE '%...%' name matches of autocomplete.
+# pg_trgm is optional: without it the index is skipped with a notice and
+# autocomplete scans items instead. The operator class is qualified with
+# the extension's schema, which need not be on the search_path.
+# format() placeholders are escaped for DDL's %-formatting.
+ITEM_NAME_TRGM_INDEX = """
+DO $$
+DECLARE
+    trgm_schema TEXT;
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'
+    ) THEN
+        RAISE NOTICE 'pg_trgm is not available, skipping ix_items_name_trgm';
+        RETURN;
+    END IF;
+    CREATE EXTENSION IF NOT EXISTS pg_trgm;
+    SELECT n.nspname INTO trgm_schema
+    FROM pg_extension e JOIN pg_namespace n ON n.oid = e.extnamespace
+    WHERE e.extname = 'pg_trgm';
+    EXECUTE format(
+        'CREATE INDEX IF NOT EXISTS ix_items_name_trgm ON items '
+        'USING gin (name %%I.gin_trgm_ops) WITH (fastupdate = off)',
+        trgm_schema
+    );
+END;
+$$;
+"""
+
+event.listen(
+    Base.metadata,
+    "after_create",
+    DDL(ITEM_NAME_TRGM_INDEX).execute_if(dialect="postgresql"),
+)
+
+
+"""
+CREATE TABLE image_objects (
+    sha256 CHAR(64) PRIMARY KEY,
+    s3_key VARCHAR NOT NULL UNIQUE,
+    content_type VARCHAR NOT NULL,
+    size BIGINT NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    ref_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP,
+    unreferenced_at TIMESTAMP
+);
+CREATE INDEX ix_image_objects_unreferenced_at
+    ON image_objects (unreferenced_at) WHERE ref_count = 0;
+"""
+
+
+class ImageObject(Base):
+    """
+    One stored image per content hash, shared by every item showing it.
+    ref_count counts the items whose s3_key points at it. Objects with no
+    references since unreferenced_at are collected by the image_gc job.
+    """
+
+    __tablename__ = "image_objects"
+    __table_args__ = (
+        Index(
+            "ix_image_objects_unreferenced_at",
+            "unreferenced_at",
+            postgresql_where="ref_count = 0",
+        ),
+    )
+    sha256 = Column(String(64), primary_key=True)
+    s3_key = Column(String, nullable=False, unique=True)
+    content_type = Column(String, nullable=False)
+    size = Column(BigInteger, nullable=False)
+    status = Column(String(20), nullable=False, default="pending")
+    ref_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.now)
+    unreferenced_at = Column(DateTime, default=datetime.now)
+
+
+"""
+CREATE TABLE image_derivatives (
+    source_key VARCHAR NOT NULL,
+    name VARCHAR(20) NOT NULL,
+    s3_key VARCHAR NOT NULL,
+    width INTEGER NOT NULL,
+    height INTEGER NOT NULL,
+    size BIGINT NOT NULL,
+    created_at TIMESTAMP,
+    PRIMARY KEY (source_key, name)
+);
+"""
+
+
+class ImageDerivative(Base):
+    """
+    Resized WebP rendition of an item image, one per named size in
+    db_layer.image_derivatives.DERIVATIVE_SIZES.
+    """
+
+    __tablename__ = "image_derivatives"
+    source_key = Column(String, primary_key=True)
+    name = Column(String(20), primary_key=True)
+    s3_key = Column(String, nullable=False)
+    width = Column(Integer, nullable=False)
+    height = Column(Integer, nullable=False)
+    size = Column(BigInteger, nullable=False)
+    created_at = Column(DateTime, default=datetime.now)
 
 
 """
@@ -77,18 +408,32 @@ CREATE TABLE reservations (
     user_id VARCHAR(255) NOT NULL,
     status VARCHAR(50) DEFAULT 'pending',
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    request_id VARCHAR
 );
+CREATE INDEX ix_reservations_user_id_id ON reservations (user_id, id);
+CREATE INDEX ix_reservations_status_created_at
+    ON reservations (status, created_at);
+CREATE UNIQUE INDEX ix_reservations_request_id ON reservations (request_id);
 """
 
 
 class Reservation(Base):
     __tablename__ = "reservations"
+    # Per-user listings ordered by id, sweepers scanning one status by age,
+    # and clients polling for the reservation of a queued request.
+    __table_args__ = (
+        Index("ix_reservations_user_id_id", "user_id", "id"),
+        Index("ix_reservations_status_created_at", "status", "created_at"),
+        Index("ix_reservations_request_id", "request_id", unique=True),
+    )
     id = Column(Integer, primary_key=True)
     user_id = Column(String, nullable=False)
     status = Column(String, default="pending")
     created_at = Column(DateTime, default=datetime.now)
     updated_at = Column(DateTime, default=datetime.now)
+    # Id returned by POST /reservations in batching mode; NULL otherwise.
+    request_id = Column(String)
 
     # This relationship references the ReservedItem model
     reserved_items = relationship(
@@ -100,24 +445,44 @@ class Reservation(Base):
 
 """
 CREATE TABLE purchases (
-    id SERIAL PRIMARY KEY,
+    id SERIAL NOT NULL,
     user_id VARCHAR(255) NOT NULL,
     payment_token VARCHAR(255),
     status VARCHAR(50) DEFAULT 'pending'
-    purchase_date TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
-);
+    purchase_date TIMESTAMP NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, purchase_date)
+) PARTITION BY RANGE (purchase_date);
+CREATE INDEX ix_purchases_user_id_id ON purchases (user_id, id);
+CREATE INDEX ix_purchases_status_purchase_date
+    ON purchases (status, purchase_date);
+CREATE INDEX ix_purchases_reservation_id ON purchases (reservation_id);
 """
 
 
 class Purchase(Base):
+    """
+    Purchases, range partitioned by month on purchase_date. The partition
+    key is part of the primary key, as PostgreSQL requires; see
+    db_layer.partitions for partition maintenance.
+    """
+
     __tablename__ = "purchases"
-    id = Column(Integer, primary_key=True)
+    # Indexes on the partitioned table are created on every partition.
+    __table_args__ = (
+        Index("ix_purchases_user_id_id", "user_id", "id"),
+        Index("ix_purchases_status_purchase_date", "status", "purchase_date"),
+        Index("ix_purchases_reservation_id", "reservation_id"),
+        {"postgresql_partition_by": "RANGE (purchase_date)"},
+    )
+    id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(String, nullable=False)
     reservation_id = Column(Integer)
     payment_token = Column(String)
     status = Column(String, default="pending")
-    purchase_date = Column(DateTime, default=datetime.now)
+    purchase_date = Column(
+        DateTime, primary_key=True, nullable=False, default=datetime.now
+    )
     updated_at = Column(DateTime, default=datetime.now)
 
     purchased_items = relationship(
@@ -156,16 +521,73 @@ CREATE TABLE purchased_items (
     purchase_id INTEGER NOT NULL,
     item_id INTEGER NOT NULL,
     quantity INTEGER NOT NULL,
-    PRIMARY KEY (purchase_id, item_id),
-    FOREIGN KEY (purchase_id) REFERENCES purchases(id)
-);
+    location_id INTEGER NOT NULL,
+    purchase_date TIMESTAMP NOT NULL,
+    PRIMARY KEY (purchase_id, item_id, purchase_date),
+    FOREIGN KEY (purchase_id, purchase_date)
+        REFERENCES purchases(id, purchase_date)
+) PARTITION BY RANGE (purchase_date);
 """
 
 
 class PurchasedItem(Base):
+    """
+    Purchased items, partitioned like purchases. purchase_date repeats the
+    date of the parent purchase so both tables prune and detach together.
+    """
+
     __tablename__ = "purchased_items"
-    purchase_id = Column(Integer, ForeignKey("purchases.id"), primary_key=True)
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ["purchase_id", "purchase_date"],
+            ["purchases.id", "purchases.purchase_date"],
+        ),
+        {"postgresql_partition_by": "RANGE (purchase_date)"},
+    )
+    purchase_id = Column(Integer, primary_key=True)
     item_id = Column(Integer, primary_key=True)
     quantity = Column(Integer, nullable=False)
     location_id = Column(Integer, nullable=False)
+    purchase_date = Column(DateTime, primary_key=True)
     purchase = relationship("Purchase", back_populates="purchased_items")
+
+
+# Creates the monthly partitions of purchases and purchased_items around the
+# current month, plus default partitions catching rows outside them. The
+# format() placeholders are escaped for DDL's %-formatting.
+PURCHASE_PARTITIONS_DDL = """
+CREATE OR REPLACE FUNCTION ensure_purchase_partitions(
+    months_ahead INTEGER DEFAULT 3, months_back INTEGER DEFAULT 0
+) RETURNS void AS $$
+DECLARE
+    month_start DATE;
+    parent TEXT;
+BEGIN
+    FOR offset_months IN -months_back..months_ahead LOOP
+        month_start := (date_trunc('month', now())
+            + make_interval(months => offset_months))::date;
+        FOREACH parent IN ARRAY ARRAY['purchases', 'purchased_items'] LOOP
+            EXECUTE format(
+                'CREATE TABLE IF NOT EXISTS %%I PARTITION OF %%I '
+                'FOR VALUES FROM (%%L) TO (%%L)',
+                parent || '_p' || to_char(month_start, 'YYYYMM'),
+                parent,
+                month_start,
+                (month_start + interval '1 month')::date
+            );
+        END LOOP;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TABLE IF NOT EXISTS purchases_default PARTITION OF purchases DEFAULT;
+CREATE TABLE IF NOT EXISTS purchased_items_default
+    PARTITION OF purchased_items DEFAULT;
+SELECT ensure_purchase_partitions(3, 0);
+"""
+
+event.listen(
+    PurchasedItem.__table__,
+    "after_create",
+    DDL(PURCHASE_PARTITIONS_DDL).execute_if(dialect="postgresql"),
+)
@@ -4,12 +4,14 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
 
-def return_engine():
+def return_engine(host=None):
     """
     Returns a new connection to the PostgreSQL database using
     credentials stored in environment variables.
+    Pass `host` to connect to another instance with the same credentials,
+    e.g. a read replica.
     """
-    host = os.environ.get("DB_HOST")
+    host = host or os.environ.get("DB_HOST")
     dbname = os.environ.get("DB_NAME")
     port = os.environ.get("DB_PORT", 5432)
     user = os.environ.get("DB_USER")
@@ -25,14 +27,47 @@ engine = return_engine()
 # Create a sessionmaker bound to the engine
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Optional read replica for read-only handlers. Without DB_REPLICA_HOST all
+# sessions use the primary.
+DB_REPLICA_HOST = os.environ.get("DB_REPLICA_HOST")
+replica_engine = return_engine(DB_REPLICA_HOST) if DB_REPLICA_HOST else engine
+ReplicaSessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, bind=replica_engine
+)
 
-def get_session():
+# Header / query parameter a client sends to read its own writes.
+READ_YOUR_WRITES_HEADER = "x-read-your-writes"
+
+
+def get_session(read_only=False):
     """
     Returns a new session instance.
+    Read-only sessions are bound to the read replica when one is configured.
+    Writes and saga steps must use the default primary session.
     """
+    if read_only:
+        return ReplicaSessionLocal()
     return SessionLocal()
 
 
+def use_replica(event):
+    """
+    Returns whether a read-only request may be served by the replica.
+    A client that just made a mutation forces the primary (read-your-writes)
+    with the 'X-Read-Your-Writes: true' header or the 'consistent=true'
+    query parameter.
+    """
+    headers = {
+        key.lower(): value
+        for key, value in (event.get("headers") or {}).items()
+    }
+    query_params = event.get("queryStringParameters") or {}
+    forced = headers.get(READ_YOUR_WRITES_HEADER) or query_params.get(
+        "consistent"
+    )
+    return str(forced).lower() not in ("true", "1")
+
+
 def get_connection():
     """
     Returns a new connection to the PostgreSQL database using
@@ -0,0 +1,41 @@
+"""
+Sparse fieldsets: the comma separated "fields" query parameter picks the
+attributes of each resource in a listing, and handlers select only the
+columns those attributes are built from.
+"""
+
+
+def parse_fields(event, available, always=("id",)):
+    """
+    Returns the fields requested with the "fields" query parameter in the
+    order of `available`, always including the `always` fields. Without
+    the parameter every available field is returned.
+    Raises ValueError naming unknown fields.
+    """
+    value = (event.get("queryStringParameters") or {}).get("fields")
+    if value is None:
+        return list(available)
+    requested = {name.strip() for name in value.split(",") if name.strip()}
+    unknown = requested.difference(available)
+    if unknown:
+        raise ValueError(
+            f"Unknown fields: {', '.join(sorted(unknown))}. "
+            f"Available: {', '.join(available)}"
+        )
+    return [
+        name for name in available if name in requested or name in always
+    ]
+
+
+def field_columns(model, fields, columns_by_field):
+    """
+    Returns the columns of `model` the given fields are built from, each
+    once. `columns_by_field` maps a field to its column names; fields
+    missing from it are columns of the same name.
+    """
+    names = dict.fromkeys(
+        name
+        for field in fields
+        for name in columns_by_field.get(field, [field])
+    )
+    return [getattr(model, name) for name in names]
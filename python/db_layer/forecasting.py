@@ -0,0 +1,153 @@
+import numpy as np
+
+# z-scores for common cycle service levels.
+SERVICE_LEVEL_Z = {
+    0.8: 0.842,
+    0.9: 1.282,
+    0.95: 1.645,
+    0.98: 2.054,
+    0.99: 2.326,
+}
+
+
+def aggregate_daily_demand(series_index, day_index, quantities, n_days):
+    """
+    Sums sparse history records into one record per series and day.
+    Only days with sales are kept, so memory grows with the number of
+    records rather than with series x days.
+
+    :param series_index: Array with the series of every history record.
+    :param day_index: Array with the day of every history record.
+    :param quantities: Array with the units of every history record.
+    :param n_days: Number of days in the history window.
+    :return: Tuple of arrays (series, days, units) ordered by series and
+        day.
+    """
+    keys = np.asarray(series_index, dtype=np.int64) * n_days + np.asarray(
+        day_index, dtype=np.int64
+    )
+    keys, inverse = np.unique(keys, return_inverse=True)
+    units = np.bincount(
+        inverse.ravel(), weights=np.asarray(quantities, dtype=np.float64)
+    )
+    return keys // n_days, keys % n_days, units
+
+
+def moving_average_forecast(series, days, units, n_series, n_days, window=28):
+    """
+    Forecasts daily demand as the mean of the last `window` days, from
+    aggregated history where days without a record sold nothing.
+    Returns (forecast, sigma) arrays with one value per series, where sigma
+    is the standard deviation of daily demand over the window.
+    """
+    window = min(window, n_days)
+    recent = days >= n_days - window
+    totals = np.bincount(
+        series[recent], weights=units[recent], minlength=n_series
+    )
+    squares = np.bincount(
+        series[recent], weights=units[recent] ** 2, minlength=n_series
+    )
+    forecast = totals / window
+    variance = np.maximum(squares / window - forecast**2, 0)
+    return forecast, np.sqrt(variance)
+
+
+def exponential_smoothing_forecast(
+    series, days, units, n_series, n_days, alpha=0.2
+):
+    """
+    Forecasts daily demand with simple exponential smoothing, from
+    aggregated history where days without a record sold nothing.
+    Every day with sales updates only the series sold that day. The days
+    without sales since a series' previous record are applied in one step:
+    after g such days the level decays to level * (1 - alpha) ** g and the
+    variance to decay * (variance + level ** 2 * (1 - decay)), with
+    decay = (1 - alpha) ** g.
+    Returns (forecast, sigma) arrays with one value per series, where sigma
+    is the exponentially weighted standard deviation of forecast errors.
+    """
+    level = np.zeros(n_series)
+    variance = np.zeros(n_series)
+    # Day through which each series' state is up to date.
+    current = np.zeros(n_series, dtype=np.int64)
+
+    def skip_to(index, day):
+        decay = (1 - alpha) ** (day - current[index])
+        variance[index] = decay * (
+            variance[index] + level[index] ** 2 * (1 - decay)
+        )
+        level[index] *= decay
+        current[index] = day
+
+    order = np.argsort(days, kind="stable")
+    days, series, units = days[order], series[order], units[order]
+    # The first day seeds the level.
+    seeded = np.searchsorted(days, 1)
+    level[series[:seeded]] = units[:seeded]
+    sale_days, starts = np.unique(days[seeded:], return_index=True)
+    starts += seeded
+    ends = np.append(starts[1:], len(days))
+    for day, start, end in zip(sale_days.tolist(), starts, ends):
+        index = series[start:end]
+        skip_to(index, day - 1)
+        error = units[start:end] - level[index]
+        level[index] += alpha * error
+        variance[index] = (1 - alpha) * (variance[index] + alpha * error**2)
+        current[index] = day
+    skip_to(np.arange(n_series), n_days - 1)
+    return level, np.sqrt(variance)
+
+
+def compute_reorder_points(
+    series_index,
+    day_index,
+    quantities,
+    n_series,
+    n_days,
+    lead_time_days=7,
+    service_level=0.95,
+    method="exponential_smoothing",
+    alpha=0.2,
+    window=28,
+):
+    """
+    Computes demand forecast, safety stock and reorder point for every
+    series of a sparse sales history (see aggregate_daily_demand), without
+    materializing a (series x day) matrix.
+
+    safety stock = z * sigma * sqrt(lead time)
+    reorder point = forecast * lead time + safety stock
+
+    :return: Tuple of arrays (forecast, safety_stock, reorder_point); the
+        last two are rounded up to whole units.
+    """
+    history = aggregate_daily_demand(
+        series_index, day_index, quantities, n_days
+    )
+    if method == "moving_average":
+        forecast, sigma = moving_average_forecast(
+            *history, n_series, n_days, window
+        )
+    elif method == "exponential_smoothing":
+        forecast, sigma = exponential_smoothing_forecast(
+            *history, n_series, n_days, alpha
+        )
+    else:
+        raise ValueError(
+            "Invalid method. Expected 'moving_average' or "
+            "'exponential_smoothing'."
+        )
+    z = SERVICE_LEVEL_Z.get(service_level)
+    if z is None:
+        raise ValueError(
+            f"Unsupported service level. Expected one of "
+            f"{sorted(SERVICE_LEVEL_Z)}."
+        )
+    safety_stock = np.ceil(z * sigma * np.sqrt(lead_time_days))
+    reorder_point = np.ceil(forecast * lead_time_days + safety_stock)
+    return (
+        forecast,
+        safety_stock.astype(np.int64),
+        reorder_point.astype(np.int64),
+    )
@@ -1,18 +1,24 @@
 import boto3
 
 
-def generate_presigned_url(bucket_name, object_key, expiration=3600):
+def generate_presigned_url(
+    bucket_name, object_key, expiration=3600, s3_client=None
+):
     """
     Generate a pre-signed URL to share an S3 object
 
     :param bucket_name: Name of the S3 bucket.
     :param object_key: Key of the S3 object.
     :param expiration: Time in seconds for the pre-signed URL to remain valid.
+    :param s3_client: Client to sign with. Signing is local, so handlers
+        presigning many keys should pass their module-level client instead
+        of paying for a new client per URL.
     :return: Pre-signed URL as string. If error, returns None.
     """
     if object_key is None:
         return None
-    s3_client = boto3.client("s3", region_name="eu-north-1")
+    if s3_client is None:
+        s3_client = boto3.client("s3", region_name="eu-north-1")
     try:
         response = s3_client.generate_presigned_url(
             "get_object",
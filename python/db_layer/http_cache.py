@@ -0,0 +1,83 @@
+import hashlib
+import os
+import time
+from db_layer.basemodels import TableVersion
+
+# Seconds clients and API Gateway may reuse a response without revalidating.
+CACHE_MAX_AGE = int(os.environ.get("CACHE_MAX_AGE", 60))
+# Lifetime of the pre-signed image URLs embedded in cached bodies.
+PRESIGNED_URL_EXPIRATION = 3600
+
+
+def get_table_versions(session, table_names):
+    """
+    Returns the change counters of the given tables as a dict. Tables that
+    were never written since the trigger was installed report version 0.
+    """
+    rows = (
+        session.query(TableVersion)
+        .filter(TableVersion.table_name.in_(table_names))
+        .all()
+    )
+    versions = {row.table_name: row.version for row in rows}
+    return {name: versions.get(name, 0) for name in table_names}
+
+
+def presigned_url_epoch():
+    """
+    Returns a counter that changes twice per pre-signed URL lifetime.
+    Mixing it into the ETag of responses that embed pre-signed URLs makes
+    clients refetch before the cached URLs expire.
+    """
+    return int(time.time()) // (PRESIGNED_URL_EXPIRATION // 2)
+
+
+def make_etag(*parts):
+    """
+    Builds a weak ETag from the given parts, e.g. a table version and the
+    query parameters that shape the response.
+    """
+    digest = hashlib.sha1(
+        "|".join(str(part) for part in parts).encode()
+    ).hexdigest()
+    return f'W/"{digest[:20]}"'
+
+
+def get_if_none_match(event):
+    """
+    Returns the If-None-Match request header, if any.
+    """
+    for key, value in (event.get("headers") or {}).items():
+        if key.lower() == "if-none-match":
+            return value
+    return None
+
+
+def is_not_modified(if_none_match, etag):
+    """
+    Weak comparison of an If-None-Match header against the current ETag.
+    """
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    if "*" in candidates:
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.removeprefix("W/") == opaque for tag in candidates)
+
+
+def cache_headers(etag):
+    """
+    Returns the ETag and Cache-Control headers for a cacheable response.
+    """
+    return {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={CACHE_MAX_AGE}",
+    }
+
+
+def not_modified_response(etag):
+    """
+    Returns a 304 Not Modified response for the given ETag.
+    """
+    return {"statusCode": 304, "headers": cache_headers(etag), "body": ""}
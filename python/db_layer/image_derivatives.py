@@ -0,0 +1,124 @@
+import io
+import posixpath
+from datetime import datetime
+from sqlalchemy.dialects.postgresql import insert
+from db_layer.basemodels import ImageDerivative
+
+# Named derivative sizes as the longest edge in pixels. Smaller images are
+# re-encoded but never upscaled.
+DERIVATIVE_SIZES = {"thumb": 160, "small": 480, "medium": 1024}
+# Size listing responses link to unless the client asks for another one.
+LISTING_SIZE = "small"
+ORIGINAL_SIZE = "original"
+# Derivatives live under their own prefix, so S3 notifications on the
+# originals' prefix never fire for them.
+DERIVATIVE_PREFIX = "derivatives/"
+DERIVATIVE_CONTENT_TYPE = "image/webp"
+WEBP_QUALITY = 80
+# Derivative keys change with their source, so caches may keep them.
+DERIVATIVE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def derivative_key(source_key, name):
+    """
+    Returns the S3 key of the `name` derivative of an image, e.g.
+    derivatives/images/sha256/<digest>/small.webp.
+    """
+    stem, _ = posixpath.splitext(source_key)
+    return f"{DERIVATIVE_PREFIX}{stem}/{name}.webp"
+
+
+def render_derivatives(data, names):
+    """
+    Decodes an image once and renders the named sizes as WebP.
+    Returns a dict of name to (bytes, (width, height)).
+    """
+    # Imported here so listing handlers that only look derivatives up do
+    # not load Pillow on cold start.
+    from PIL import Image, ImageOps
+
+    largest = max(DERIVATIVE_SIZES[name] for name in names)
+    with Image.open(io.BytesIO(data)) as source:
+        # Lets the JPEG decoder scale down by up to 8x while decoding.
+        source.draft("RGB", (largest, largest))
+        source = ImageOps.exif_transpose(source)
+        if source.mode not in ("RGB", "RGBA"):
+            source = source.convert(
+                "RGBA" if "A" in source.getbands() else "RGB"
+            )
+        rendered = {}
+        for name in sorted(names, key=lambda n: -DERIVATIVE_SIZES[n]):
+            edge = DERIVATIVE_SIZES[name]
+            image = source.copy()
+            image.thumbnail((edge, edge), Image.Resampling.LANCZOS)
+            buffer = io.BytesIO()
+            image.save(buffer, "WEBP", quality=WEBP_QUALITY, method=4)
+            rendered[name] = (buffer.getvalue(), image.size)
+    return rendered
+
+
+def generate_derivatives(
+    session, s3_client, bucket_name, source_key, names=None
+):
+    """
+    Makes sure the named derivatives (default: all sizes) of an image
+    exist, rendering and uploading the missing ones from one download of
+    the original. The caller commits.
+    Returns a dict of name to derivative S3 key.
+    """
+    names = list(names or DERIVATIVE_SIZES)
+    keys = {
+        row.name: row.s3_key
+        for row in session.query(ImageDerivative)
+        .filter(ImageDerivative.source_key == source_key)
+        .filter(ImageDerivative.name.in_(names))
+        .all()
+    }
+    missing = [name for name in names if name not in keys]
+    if not missing:
+        return keys
+
+    response = s3_client.get_object(Bucket=bucket_name, Key=source_key)
+    rendered = render_derivatives(response["Body"].read(), missing)
+    for name, (body, (width, height)) in rendered.items():
+        key = derivative_key(source_key, name)
+        s3_client.put_object(
+            Bucket=bucket_name,
+            Key=key,
+            Body=body,
+            ContentType=DERIVATIVE_CONTENT_TYPE,
+            CacheControl=DERIVATIVE_CACHE_CONTROL,
+        )
+        session.execute(
+            insert(ImageDerivative)
+            .values(
+                source_key=source_key,
+                name=name,
+                s3_key=key,
+                width=width,
+                height=height,
+                size=len(body),
+                created_at=datetime.now(),
+            )
+            .on_conflict_do_nothing(index_elements=["source_key", "name"])
+        )
+        keys[name] = key
+    return keys
+
+
+def get_derivative_keys(session, source_keys, name):
+    """
+    Returns the S3 keys of the `name` derivatives of the given images as
+    a dict of source key to derivative key, in one query. Images without
+    that derivative are left out.
+    """
+    source_keys = [key for key in set(source_keys) if key]
+    if not source_keys:
+        return {}
+    rows = (
+        session.query(ImageDerivative.source_key, ImageDerivative.s3_key)
+        .filter(ImageDerivative.source_key.in_(source_keys))
+        .filter(ImageDerivative.name == name)
+        .all()
+    )
+    return {row.source_key: row.s3_key for row in rows}
@@ -0,0 +1,167 @@
+import base64
+import re
+from datetime import datetime, timedelta
+from sqlalchemy import case, delete, select, update
+from sqlalchemy.dialects.postgresql import insert
+from db_layer.basemodels import ImageDerivative, ImageObject
+
+IMAGE_KEY_PREFIX = "images/sha256/"
+# S3 DeleteObjects accepts at most 1000 keys per request.
+DELETE_BATCH_SIZE = 1000
+# Unreferenced images are kept this long before they are collected, so an
+# item re-using an image shortly after the last one let go of it finds it.
+DEFAULT_GC_GRACE = timedelta(hours=24)
+
+_SHA256_HEX = re.compile(r"^[0-9a-f]{64}$")
+
+
+def is_sha256(value):
+    """
+    Returns whether `value` is a lowercase hex SHA-256 digest.
+    """
+    return isinstance(value, str) and bool(_SHA256_HEX.match(value))
+
+
+def image_key(sha256, extension):
+    """
+    Returns the content-addressed S3 key of an image.
+    """
+    return f"{IMAGE_KEY_PREFIX}{sha256}.{extension}"
+
+
+def sha256_base64(sha256):
+    """
+    Converts a hex SHA-256 digest to the base64 form S3 uses in
+    x-amz-checksum-sha256.
+    """
+    return base64.b64encode(bytes.fromhex(sha256)).decode()
+
+
+def reserve_image(session, sha256, s3_key, content_type, size):
+    """
+    Returns the ImageObject for a content hash, registering a pending one
+    for an image not seen before. A stored object means the upload can be
+    skipped. Pending objects start unreferenced, so abandoned uploads are
+    collected like any other unreferenced image.
+    """
+    session.execute(
+        insert(ImageObject)
+        .values(
+            sha256=sha256,
+            s3_key=s3_key,
+            content_type=content_type,
+            size=size,
+            status="pending",
+            ref_count=0,
+            created_at=datetime.now(),
+            unreferenced_at=datetime.now(),
+        )
+        .on_conflict_do_nothing(index_elements=["sha256"])
+    )
+    return session.get(ImageObject, sha256)
+
+
+def acquire_image(session, s3_key):
+    """
+    Adds a reference to a stored image.
+    Returns False if `s3_key` is not a stored image.
+    """
+    result = session.execute(
+        update(ImageObject)
+        .where(ImageObject.s3_key == s3_key)
+        .where(ImageObject.status == "stored")
+        .values(ref_count=ImageObject.ref_count + 1, unreferenced_at=None)
+    )
+    return result.rowcount == 1
+
+
+def release_image(session, s3_key):
+    """
+    Drops a reference to an image. The image becomes collectable when its
+    last reference goes. Keys not tracked in image_objects, e.g. images
+    uploaded before content addressing, are ignored.
+    """
+    if s3_key is None:
+        return
+    session.execute(
+        update(ImageObject)
+        .where(ImageObject.s3_key == s3_key)
+        .where(ImageObject.ref_count > 0)
+        .values(
+            ref_count=ImageObject.ref_count - 1,
+            unreferenced_at=case(
+                (ImageObject.ref_count == 1, datetime.now()),
+                else_=None,
+            ),
+        )
+    )
+
+
+def collect_unreferenced(
+    session,
+    s3_client,
+    bucket_name,
+    grace=DEFAULT_GC_GRACE,
+    batch_size=DELETE_BATCH_SIZE,
+):
+    """
+    Deletes images that have had no references for longer than `grace`.
+    Each batch deletes up to `batch_size` image rows with their
+    derivatives, removes the objects with DeleteObjects and then commits.
+    A failed S3 delete rolls the batch back, so it is retried on the next
+    run.
+    Returns the number of images collected.
+    """
+    cutoff = datetime.now() - grace
+    collected = 0
+    while True:
+        stale = (
+            select(ImageObject.sha256)
+            .where(ImageObject.ref_count == 0)
+            .where(ImageObject.unreferenced_at < cutoff)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        keys = (
+            session.execute(
+                delete(ImageObject)
+                .where(ImageObject.sha256.in_(stale.scalar_subquery()))
+                .where(ImageObject.ref_count == 0)
+                .returning(ImageObject.s3_key)
+            )
+            .scalars()
+            .all()
+        )
+        if not keys:
+            session.commit()
+            return collected
+        derivative_keys = (
+            session.execute(
+                delete(ImageDerivative)
+                .where(ImageDerivative.source_key.in_(keys))
+                .returning(ImageDerivative.s3_key)
+            )
+            .scalars()
+            .all()
+        )
+        object_keys = keys + derivative_keys
+        for start in range(0, len(object_keys), DELETE_BATCH_SIZE):
+            end = start + DELETE_BATCH_SIZE
+            chunk = object_keys[start:end]
+            response = s3_client.delete_objects(
+                Bucket=bucket_name,
+                Delete={
+                    "Objects": [{"Key": key} for key in chunk],
+                    "Quiet": True,
+                },
+            )
+            if response.get("Errors"):
+                session.rollback()
+                raise RuntimeError(
+                    f"Failed to delete {len(response['Errors'])} images: "
+                    f"{response['Errors'][:3]}"
+                )
+        session.commit()
+        collected += len(keys)
+        if len(keys) < batch_size:
+            return collected
@@ -0,0 +1,145 @@
+import os
+import re
+import time
+from db_layer.basemodels import ItemStock, Location
+from db_layer.http_cache import get_table_versions
+
+# Seconds cached stock levels of an item are reused before being reloaded.
+STOCK_TTL = float(os.environ.get("LOCATION_INDEX_STOCK_TTL", 5))
+
+
+def zip_distance(zip_code, other_zip_code):
+    """
+    Approximates the distance between two postal codes by the difference of
+    their numeric parts; nearby areas share leading digits. Codes without
+    digits are treated as infinitely far away.
+    """
+    digits = re.sub(r"\D", "", zip_code or "")
+    other_digits = re.sub(r"\D", "", other_zip_code or "")
+    if not digits or not other_digits:
+        return float("inf")
+    width = max(len(digits), len(other_digits))
+    return abs(
+        int(digits.ljust(width, "0")) - int(other_digits.ljust(width, "0"))
+    )
+
+
+class LocationIndex:
+    """
+    In-memory index of locations and their stock, kept in the module scope so
+    warm Lambda invocations reuse it.
+    Locations are reloaded only when the locations table version changes.
+    Stock is tracked per item and only items older than `stock_ttl` seconds
+    are reloaded, in a single query.
+    """
+
+    def __init__(self, stock_ttl=STOCK_TTL):
+        self.stock_ttl = stock_ttl
+        self.locations_version = None
+        self.locations = {}
+        # item_id -> (loaded_at, {location_id: quantity})
+        self.stock = {}
+
+    def refresh_locations(self, session):
+        version = get_table_versions(session, ["locations"])["locations"]
+        if version == self.locations_version and self.locations:
+            return
+        self.locations = {
+            location.id: location.zip_code
+            for location in session.query(Location).all()
+        }
+        self.locations_version = version
+
+    def refresh_stock(self, session, item_ids):
+        now = time.monotonic()
+        stale = [
+            item_id
+            for item_id in set(item_ids)
+            if item_id not in self.stock
+            or now - self.stock[item_id][0] > self.stock_ttl
+        ]
+        if not stale:
+            return
+        levels = {item_id: {} for item_id in stale}
+        rows = (
+            session.query(ItemStock)
+            .filter(ItemStock.item_id.in_(stale))
+            .filter(ItemStock.quantity > 0)
+            .all()
+        )
+        for row in rows:
+            levels[row.item_id][row.location_id] = row.quantity
+        for item_id, by_location in levels.items():
+            self.stock[item_id] = (now, by_location)
+
+    def refresh(self, session, item_ids):
+        """
+        Brings the locations and the stock of `item_ids` up to date.
+        """
+        self.refresh_locations(session)
+        self.refresh_stock(session, item_ids)
+
+    def allocate(self, order, zip_code):
+        """
+        Assigns every order line to one location with enough stock for the
+        whole line (reserved and purchased items are keyed by item, so a
+        line cannot be split), minimizing the number of shipments first and
+        the distance to `zip_code` second.
+
+        Greedily picks the location that can ship the most remaining lines,
+        preferring the nearest one on ties, until all lines are assigned or
+        no location can ship any of them. A location that holds the whole
+        order is therefore always chosen on its own.
+
+        :param order: Dict mapping item id to the quantity ordered.
+        :param zip_code: Destination postal code.
+        :return: Tuple (shipments, unallocated). Each shipment is a dict with
+            location_id, distance and items; unallocated maps the item ids
+            no single location can ship to the quantity ordered.
+        """
+        remaining = dict(order)
+        # location_id -> item ids it can ship in full.
+        candidates = {}
+        for item_id, quantity in order.items():
+            _, by_location = self.stock.get(item_id, (None, {}))
+            for location_id, available in by_location.items():
+                if location_id in self.locations and available >= quantity:
+                    candidates.setdefault(location_id, set()).add(item_id)
+        distances = {
+            location_id: zip_distance(self.locations[location_id], zip_code)
+            for location_id in candidates
+        }
+
+        shipments = []
+        while remaining and candidates:
+            best_id = min(
+                candidates,
+                key=lambda location_id: (
+                    -len(candidates[location_id]),
+                    distances[location_id],
+                    location_id,
+                ),
+            )
+            item_ids = sorted(candidates.pop(best_id))
+            shipments.append(
+                {
+                    "location_id": best_id,
+                    "distance": distances[best_id],
+                    "items": [
+                        {
+                            "item_id": item_id,
+                            "quantity": remaining.pop(item_id),
+                        }
+                        for item_id in item_ids
+                    ],
+                }
+            )
+            for location_id in list(candidates):
+                candidates[location_id] -= set(item_ids)
+                if not candidates[location_id]:
+                    del candidates[location_id]
+        return shipments, remaining
+
+
+# Shared across warm invocations of the same container.
+location_index = LocationIndex()
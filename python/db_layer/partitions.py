@@ -0,0 +1,162 @@
+from datetime import date
+from sqlalchemy import text
+from db_layer.basemodels import Purchase, PurchasedItem
+from db_layer.s3_multipart import S3MultipartWriter
+
+# Detach order matters: purchased_items references purchases.
+PARTITIONED_TABLES = ("purchased_items", "purchases")
+
+
+def partition_name(table_name, month):
+    """
+    Returns the name of the monthly partition of `table_name` holding
+    `month` (any date within the month).
+    """
+    return f"{table_name}_p{month:%Y%m}"
+
+
+def ensure_partitions(session, months_ahead=3, months_back=0):
+    """
+    Creates any missing monthly partitions from `months_back` months ago up
+    to `months_ahead` months from now.
+    """
+    session.execute(
+        text("SELECT ensure_purchase_partitions(:ahead, :back)"),
+        {"ahead": months_ahead, "back": months_back},
+    )
+    session.commit()
+
+
+def list_partitions(session, table_name):
+    """
+    Returns the months of the attached monthly partitions of `table_name`
+    as a sorted list of first-of-month dates. The default partition is
+    skipped.
+    """
+    rows = session.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = CAST(:table AS regclass)"
+        ),
+        {"table": table_name},
+    ).all()
+    prefix = f"{table_name}_p"
+    months = []
+    for (name,) in rows:
+        suffix = name.removeprefix(prefix)
+        if name.startswith(prefix) and len(suffix) == 6 and suffix.isdigit():
+            months.append(date(int(suffix[:4]), int(suffix[4:]), 1))
+    return sorted(months)
+
+
+def archive_partition(
+    session, table_name, month, bucket_name, prefix="", s3_client=None
+):
+    """
+    Streams one monthly partition to S3 as CSV with a header row using
+    COPY, without loading it into memory.
+    Returns the S3 key of the archive.
+    """
+    name = partition_name(table_name, month)
+    key = f"{prefix}{table_name}/{name}.csv"
+    cursor = session.connection().connection.cursor()
+    try:
+        with S3MultipartWriter(
+            bucket_name, key, "text/csv", s3_client=s3_client
+        ) as writer:
+            cursor.copy_expert(
+                f'COPY (SELECT * FROM "{name}") TO STDOUT WITH CSV HEADER',
+                writer,
+            )
+    finally:
+        cursor.close()
+    return key
+
+
+def detach_partition(session, table_name, month, drop=False):
+    """
+    Detaches one monthly partition so it no longer takes part in queries
+    and vacuum of the parent table, and drops it if `drop` is set.
+    The detached table keeps copies of the parent's foreign keys; they are
+    dropped, so the referenced partitions can be detached and dropped as
+    well. Detach purchased_items before purchases, which it references.
+    """
+    name = partition_name(table_name, month)
+    session.execute(
+        text(f'ALTER TABLE {table_name} DETACH PARTITION "{name}"')
+    )
+    foreign_keys = session.execute(
+        text(
+            "SELECT conname FROM pg_constraint "
+            "WHERE conrelid = CAST(:name AS regclass) AND contype = 'f'"
+        ),
+        {"name": f'"{name}"'},
+    ).scalars()
+    for constraint in list(foreign_keys):
+        session.execute(
+            text(f'ALTER TABLE "{name}" DROP CONSTRAINT "{constraint}"')
+        )
+    if drop:
+        session.execute(text(f'DROP TABLE "{name}"'))
+    session.commit()
+
+
+def migrate_to_partitioned(connection, drop_old=True):
+    """
+    Converts existing unpartitioned purchases and purchased_items tables to
+    the partitioned layout in one transaction: renames the old tables,
+    creates the partitioned ones with partitions covering all existing
+    purchase dates, copies the rows and moves the id sequence along.
+    """
+    connection.execute(
+        text(
+            "ALTER TABLE purchased_items RENAME TO purchased_items_old;"
+            "ALTER TABLE purchased_items_old "
+            "RENAME CONSTRAINT purchased_items_pkey "
+            "TO purchased_items_old_pkey;"
+            "ALTER TABLE purchases RENAME TO purchases_old;"
+            "ALTER TABLE purchases_old "
+            "RENAME CONSTRAINT purchases_pkey TO purchases_old_pkey;"
+            "ALTER SEQUENCE IF EXISTS purchases_id_seq "
+            "RENAME TO purchases_old_id_seq;"
+        )
+    )
+    # Index names are schema-wide; the old tables' copies would clash.
+    for index in Purchase.__table__.indexes:
+        connection.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+    Purchase.__table__.create(connection)
+    PurchasedItem.__table__.create(connection)
+    oldest = connection.execute(
+        text("SELECT MIN(purchase_date) FROM purchases_old")
+    ).scalar()
+    today = date.today()
+    months_back = (
+        (today.year - oldest.year) * 12 + today.month - oldest.month
+        if oldest
+        else 0
+    )
+    connection.execute(
+        text("SELECT ensure_purchase_partitions(3, :back)"),
+        {"back": months_back},
+    )
+    connection.execute(
+        text(
+            "INSERT INTO purchases (id, user_id, reservation_id, "
+            "payment_token, status, purchase_date, updated_at) "
+            "SELECT id, user_id, reservation_id, payment_token, status, "
+            "COALESCE(purchase_date, now()), updated_at FROM purchases_old;"
+            "INSERT INTO purchased_items (purchase_id, item_id, quantity, "
+            "location_id, purchase_date) "
+            "SELECT pi.purchase_id, pi.item_id, pi.quantity, "
+            "pi.location_id, p.purchase_date "
+            "FROM purchased_items_old pi "
+            "JOIN purchases p ON p.id = pi.purchase_id;"
+            "SELECT setval(pg_get_serial_sequence('purchases', 'id'), "
+            "COALESCE((SELECT MAX(id) FROM purchases), 0) + 1, false);"
+        )
+    )
+    if drop_old:
+        connection.execute(
+            text("DROP TABLE purchased_items_old; DROP TABLE purchases_old;")
+        )
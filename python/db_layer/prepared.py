@@ -0,0 +1,149 @@
+import os
+import re
+import uuid
+from collections import Counter
+from psycopg2 import errorcodes
+from sqlalchemy import exc, text
+
+# Set to "off" behind a transaction-mode pooler (e.g. PgBouncer with
+# pool_mode=transaction), where consecutive transactions may run on
+# different server connections and named statements are not shared.
+PREPARED_STATEMENTS = os.environ.get("DB_PREPARED_STATEMENTS", "on") != "off"
+
+# Hot statements as (parameter types, SQL with $n placeholders).
+HOT_STATEMENTS = {
+    "stock_deduct": (
+        "integer, integer, integer",
+        "UPDATE item_stock SET quantity = quantity - $3 "
+        "WHERE item_id = $1 AND location_id = $2 RETURNING id, quantity",
+    ),
+    "stock_add": (
+        "integer, integer, integer",
+        "UPDATE item_stock SET quantity = quantity + $3 "
+        "WHERE item_id = $1 AND location_id = $2 RETURNING id, quantity",
+    ),
+    "stock_reset": (
+        "integer, integer, integer",
+        "UPDATE item_stock SET quantity = $3 "
+        "WHERE item_id = $1 AND location_id = $2 RETURNING id, quantity",
+    ),
+    "item_by_id": (
+        "integer",
+        "SELECT id, name, description, price, s3_key FROM items WHERE id = $1",
+    ),
+    "reservation_by_id": (
+        "integer",
+        "SELECT id, user_id, status FROM reservations WHERE id = $1",
+    ),
+}
+
+# Process-wide counters per statement name, see get_prepared_metrics().
+PREPARE_COUNTS = Counter()
+EXECUTE_COUNTS = Counter()
+FALLBACK_COUNTS = Counter()
+
+# Key in the pooled connection's info dict holding its prepared names.
+_INFO_KEY = "prepared_statements"
+_PLACEHOLDER = re.compile(r"\$(\d+)")
+_disabled = not PREPARED_STATEMENTS
+
+
+def _plain_sql(sql):
+    return text(_PLACEHOLDER.sub(r":p\1", sql))
+
+
+def _execute_plain(session, name, params):
+    FALLBACK_COUNTS[name] += 1
+    return session.execute(
+        _plain_sql(HOT_STATEMENTS[name][1]),
+        {f"p{n}": value for n, value in enumerate(params, start=1)},
+    )
+
+
+_STATEMENT_UNAVAILABLE = (
+    errorcodes.INVALID_SQL_STATEMENT_NAME,
+    errorcodes.DUPLICATE_PREPARED_STATEMENT,
+)
+
+
+def _disable(info, statement_name, error):
+    global _disabled
+    print(
+        f"Prepared statement {statement_name} unavailable, "
+        "falling back to plain SQL:",
+        str(error),
+    )
+    _disabled = True
+    info.pop(_INFO_KEY, None)
+
+
+def execute_prepared(session, name, *params):
+    """
+    Runs one of the HOT_STATEMENTS in the session's transaction and returns
+    the result.
+
+    Every pooled connection prepares a statement on first use and then
+    only sends EXECUTE, so PostgreSQL parses and plans it once per
+    connection. Prepared names carry a per-connection token and never
+    collide on a shared server connection.
+
+    With prepared statements off, the plain parameterized SQL runs
+    instead. The first use runs in a savepoint: if the server rejects the
+    statement, e.g. behind a transaction-mode pooler, the savepoint is
+    rolled back, prepared statements are switched off for the rest of the
+    process and the plain SQL runs in its place. Later calls send the
+    EXECUTE alone. If the server has lost the statement by then, the
+    transaction is aborted: prepared statements are switched off and the
+    error is raised, so the caller's retry runs the plain SQL.
+    """
+    if _disabled:
+        return _execute_plain(session, name, params)
+
+    info = session.connection().connection.info
+    prepared = info.get(_INFO_KEY)
+    if not isinstance(prepared, dict):
+        prepared = info[_INFO_KEY] = {"token": uuid.uuid4().hex[:8]}
+    statement_name = f"{name}_{prepared['token']}"
+    placeholders = ", ".join(f":p{n}" for n in range(1, len(params) + 1))
+    execute = text(f"EXECUTE {statement_name}({placeholders})")
+    values = {f"p{n}": value for n, value in enumerate(params, start=1)}
+    if name in prepared:
+        try:
+            result = session.execute(execute, values)
+        except exc.DBAPIError as e:
+            if getattr(e.orig, "pgcode", None) in _STATEMENT_UNAVAILABLE:
+                _disable(info, statement_name, e)
+            raise
+        EXECUTE_COUNTS[name] += 1
+        return result
+
+    types, sql = HOT_STATEMENTS[name]
+    try:
+        with session.begin_nested():
+            session.execute(
+                text(f"PREPARE {statement_name} ({types}) AS {sql}")
+            )
+            # A prepared statement outlives a rollback of its savepoint.
+            prepared[name] = True
+            PREPARE_COUNTS[name] += 1
+            result = session.execute(execute, values)
+    except exc.DBAPIError as e:
+        if getattr(e.orig, "pgcode", None) not in _STATEMENT_UNAVAILABLE:
+            raise
+        _disable(info, statement_name, e)
+        return _execute_plain(session, name, params)
+    EXECUTE_COUNTS[name] += 1
+    return result
+
+
+def get_prepared_metrics():
+    """
+    Returns prepare, execute and fallback counts per statement name for
+    this process, e.g. to log at the end of an invocation.
+    """
+    return {
+        "enabled": not _disabled,
+        "prepare": dict(PREPARE_COUNTS),
+        "execute": dict(EXECUTE_COUNTS),
+        "fallback": dict(FALLBACK_COUNTS),
+    }
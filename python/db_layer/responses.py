@@ -0,0 +1,23 @@
+import json
+
+
+def json_response(status_code, body, headers=None):
+    """
+    Builds a Lambda proxy integration response with a JSON body.
+    Compression is left to API Gateway: bodies of at least
+    x-amazon-apigateway-minimum-compression-size bytes (see the API
+    definition) are compressed with a coding the client's Accept-Encoding
+    allows, so the handler always returns plain text.
+
+    :param status_code: HTTP status code.
+    :param body: JSON serialisable response body.
+    :param headers: Optional extra response headers.
+    :return: Response dict for the Lambda proxy integration.
+    """
+    response_headers = {"Content-Type": "application/json"}
+    response_headers.update(headers or {})
+    return {
+        "statusCode": status_code,
+        "headers": response_headers,
+        "body": json.dumps(body),
+    }
@@ -0,0 +1,101 @@
+import boto3
+
+# S3 requires every part except the last to be at least 5 MiB.
+MIN_PART_SIZE = 5 * 1024 * 1024
+
+
+class S3MultipartWriter:
+    """
+    File-like writer that streams data to an S3 object with a multipart
+    upload, so that memory use is bounded by the part size regardless of the
+    total object size.
+
+    Use as a context manager: the upload is completed on a clean exit and
+    aborted if an exception is raised.
+    """
+
+    def __init__(
+        self,
+        bucket_name,
+        object_key,
+        content_type="application/octet-stream",
+        part_size=8 * 1024 * 1024,
+        s3_client=None,
+    ):
+        self.bucket_name = bucket_name
+        self.object_key = object_key
+        self.content_type = content_type
+        self.part_size = max(part_size, MIN_PART_SIZE)
+        self.s3_client = s3_client or boto3.client(
+            "s3", region_name="eu-north-1"
+        )
+        self.upload_id = None
+        self.parts = []
+        self.buffer = bytearray()
+        self.bytes_written = 0
+
+    def __enter__(self):
+        response = self.s3_client.create_multipart_upload(
+            Bucket=self.bucket_name,
+            Key=self.object_key,
+            ContentType=self.content_type,
+        )
+        self.upload_id = response["UploadId"]
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+    def write(self, data):
+        """
+        Buffers `data` (str or bytes) and uploads a part whenever the buffer
+        reaches the part size.
+        """
+        if isinstance(data, str):
+            data = data.encode()
+        self.buffer.extend(data)
+        self.bytes_written += len(data)
+        if len(self.buffer) >= self.part_size:
+            self._upload_part()
+
+    def _upload_part(self):
+        part_number = len(self.parts) + 1
+        response = self.s3_client.upload_part(
+            Bucket=self.bucket_name,
+            Key=self.object_key,
+            UploadId=self.upload_id,
+            PartNumber=part_number,
+            Body=bytes(self.buffer),
+        )
+        self.parts.append(
+            {"ETag": response["ETag"], "PartNumber": part_number}
+        )
+        self.buffer.clear()
+
+    def close(self):
+        """
+        Uploads the remaining buffer and completes the multipart upload.
+        """
+        if self.buffer or not self.parts:
+            self._upload_part()
+        self.s3_client.complete_multipart_upload(
+            Bucket=self.bucket_name,
+            Key=self.object_key,
+            UploadId=self.upload_id,
+            MultipartUpload={"Parts": self.parts},
+        )
+
+    def abort(self):
+        """
+        Aborts the multipart upload and discards the uploaded parts.
+        """
+        if self.upload_id is not None:
+            self.s3_client.abort_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=self.object_key,
+                UploadId=self.upload_id,
+            )
@@ -0,0 +1,71 @@
+from datetime import datetime
+from sqlalchemy.dialects.postgresql import insert
+from db_layer.basemodels import SalesDaily
+
+# Rebuilds sales_daily from the raw line items; run by
+# scripts/migrate_schema.py when deploying the rollup on an existing
+# database.
+SALES_DAILY_BACKFILL = """
+INSERT INTO sales_daily (day, item_id, location_id, units_sold, order_lines)
+SELECT CAST(p.purchase_date AS DATE), pi.item_id, pi.location_id,
+       SUM(pi.quantity), COUNT(*)
+FROM purchased_items pi JOIN purchases p ON p.id = pi.purchase_id
+GROUP BY 1, 2, 3
+ON CONFLICT (day, item_id, location_id) DO UPDATE
+SET units_sold = EXCLUDED.units_sold,
+    order_lines = EXCLUDED.order_lines;
+"""
+
+
+def apply_sales(session, purchase_date, items, sign=1):
+    """
+    Adds (sign=1) or subtracts (sign=-1) purchased items to the daily sales
+    buckets in one upsert. Runs in the caller's transaction, so the rollup
+    commits or rolls back together with the purchase.
+
+    :param session: Database session.
+    :param purchase_date: Datetime of the purchase; selects the bucket.
+    :param items: Purchased items, as dicts or PurchasedItem rows with
+        item_id, location_id and quantity.
+    :param sign: 1 for new purchases, -1 for compensations.
+    """
+    day = (purchase_date or datetime.now()).date()
+    buckets = {}
+    for item in items:
+        if isinstance(item, dict):
+            key = (item["item_id"], item["location_id"])
+            quantity = item["quantity"]
+        else:
+            key = (item.item_id, item.location_id)
+            quantity = item.quantity
+        units, lines = buckets.get(key, (0, 0))
+        buckets[key] = (units + sign * quantity, lines + sign)
+    if not buckets:
+        return
+    # One row per bucket: ON CONFLICT cannot update the same row twice.
+    stmt = insert(SalesDaily).values(
+        [
+            {
+                "day": day,
+                "item_id": item_id,
+                "location_id": location_id,
+                "units_sold": units,
+                "order_lines": lines,
+            }
+            for (item_id, location_id), (units, lines) in buckets.items()
+        ]
+    )
+    session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[
+                SalesDaily.day,
+                SalesDaily.item_id,
+                SalesDaily.location_id,
+            ],
+            set_={
+                "units_sold": SalesDaily.units_sold + stmt.excluded.units_sold,
+                "order_lines": SalesDaily.order_lines
+                + stmt.excluded.order_lines,
+            },
+        )
+    )
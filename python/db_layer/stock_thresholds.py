@@ -0,0 +1,29 @@
+from sqlalchemy import tuple_
+from db_layer.basemodels import StockThreshold
+
+# Alert threshold for items without a computed reorder point.
+DEFAULT_LOW_STOCK_THRESHOLD = 10
+
+
+def get_reorder_points(session, pairs):
+    """
+    Looks up the reorder points computed by the demand_forecast job.
+
+    :param session: Database session.
+    :param pairs: Iterable of (item_id, location_id) tuples.
+    :return: Dict mapping (item_id, location_id) to the reorder point.
+        Pairs without a computed threshold are absent.
+    """
+    pairs = list(pairs)
+    if not pairs:
+        return {}
+    rows = (
+        session.query(StockThreshold)
+        .filter(
+            tuple_(StockThreshold.item_id, StockThreshold.location_id).in_(
+                pairs
+            )
+        )
+        .all()
+    )
+    return {(row.item_id, row.location_id): row.reorder_point for row in rows}
@@ -0,0 +1,22 @@
+from db_layer.basemodels import ItemStockTotal
+
+
+def get_stock_totals(session, item_ids):
+    """
+    Looks up the stock totals across all locations for the given items in
+    the trigger-maintained item_stock_totals table.
+
+    :param session: Database session.
+    :param item_ids: Iterable of item ids.
+    :return: Dict mapping item id to its total quantity. Items without any
+        stock rows are absent.
+    """
+    item_ids = [int(item_id) for item_id in item_ids]
+    if not item_ids:
+        return {}
+    rows = (
+        session.query(ItemStockTotal)
+        .filter(ItemStockTotal.item_id.in_(item_ids))
+        .all()
+    )
+    return {row.item_id: row.total_quantity for row in rows}
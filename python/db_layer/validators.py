@@ -0,0 +1,636 @@
+"""
+Request body validators generated from the API definition by
+scripts/generate_validators.py. Do not edit; re-run the script instead.
+
+Every validate_<definition>(value, path) returns a list of error messages,
+empty when the value is valid.
+"""
+
+import json
+import re
+
+# Errors reported in one response; validation still checks everything.
+MAX_REPORTED_ERRORS = 20
+_PATTERN_1 = re.compile("^[0-9a-fA-F]{64}$")
+_IMAGE_UPLOAD_REQUEST_CONTENT_TYPE_VALUES = (
+    "image/jpeg",
+    "image/png",
+    "image/webp",
+)
+_ITEM_LOOKUP_REQUEST_IMAGE_SIZE_VALUES = (
+    "thumb",
+    "small",
+    "medium",
+    "original",
+)
+_RESERVATION_UPDATE_STATUS_VALUES = (
+    "pending",
+    "reserved",
+    "confirmed",
+    "altered",
+    "paid",
+    "completed",
+    "cancelled",
+)
+_UPDATE_STOCK_STOCK_OPERATION_VALUES = ("deduct", "add", "reset")
+
+
+def validate_array_of_item(value, path="body"):
+    """Checks a value against the ArrayOfItem definition."""
+    if not isinstance(value, list):
+        return [f"{path}: expected array"]
+    errors = []
+    for index, item in enumerate(value):
+        errors.extend(validate_item(item, f"{path}[{index}]"))
+    return errors
+
+
+def validate_image_upload_confirm(value, path="body"):
+    """Checks a value against the ImageUploadConfirm definition."""
+    if not isinstance(value, dict):
+        return [f"{path}: expected object"]
+    errors = []
+    if "key" not in value:
+        errors.append(f"{path}.key: is required")
+    if "key" in value:
+        field = value["key"]
+        if not isinstance(field, str):
+            errors.append(f"{path}.key: expected string")
+    return errors
+
+
+def validate_image_upload_request(value, path="body"):
+    """Checks a value against the ImageUploadRequest definition."""
+    if not isinstance(value, dict):
+        return [f"{path}: expected object"]
+    errors = []
+    if "sha256" not in value:
+        errors.append(f"{path}.sha256: is required")
+    if "size" not in value:
+        errors.append(f"{path}.size: is required")
+    if "sha256" in value:
+        field = value["sha256"]
+        if not isinstance(field, str):
+            errors.append(f"{path}.sha256: expected string")
+        elif not _PATTERN_1.search(field):
+            errors.append(f"{path}.sha256: does not match the expected format")
+    if "size" in value:
+        field = value["size"]
+        if not isinstance(field, int) or isinstance(field, bool):
+            errors.append(f"{path}.size: expected integer")
+        elif field < 1:
+            errors.append(f"{path}.size: must be >= 1")
+        elif field > 9223372036854775807:
+            errors.append(f"{path}.size: must be <= 9223372036854775807")
+    if "content_type" in value:
+        field = value["content_type"]
+        if not isinstance(field, str):
+            errors.append(f"{path}.content_type: expected string")
+        elif field not in _IMAGE_UPLOAD_REQUEST_CONTENT_TYPE_VALUES:
+            errors.append(
+                f"{path}.content_type: expected one of image/jpeg, image/png,"
+                " image/webp"
+            )
+    return errors
+
+
+def validate_item(value, path="body"):
+    """Checks a value against the Item definition."""
+    if not isinstance(value, dict):
+        return [f"{path}: expected object"]
+    errors = []
+    if "description" not in value:
+        errors.append(f"{path}.description: is required")
+    if "name" not in value:
+        errors.append(f"{path}.name: is required")
+    if "price" not in value:
+        errors.append(f"{path}.price: is required")
+    if "id" in value:
+        field = value["id"]
+        if not isinstance(field, int) or isinstance(field, bool):
+            errors.append(f"{path}.id: expected integer")
+        elif field < -2147483648:
+            errors.append(f"{path}.id: must be >= -2147483648")
+        elif field > 2147483647:
+            errors.append(f"{path}.id: must be <= 2147483647")
+    if "name" in value:
+        field = value["name"]
+        if not isinstance(field, str):
+            errors.append(f"{path}.name: expected string")
+    if "description" in value:
+        field = value["description"]
+        if not isinstance(field, str):
+            errors.append(f"{path}.description: expected string")
+    if "price" in value:
+        field = value["price"]
+        if not isinstance(field, int) or isinstance(field, bool):
+            errors.append(f"{path}.price: expected integer")
+        elif field < -2147483648:
+            errors.append(f"{path}.price: must be >= -2147483648")
+        elif field > 2147483647:
+            errors.append(f"{path}.price: must be <= 2147483647")
+    if "image_data" in value:
+        field = value["image_data"]
+        if not isinstance(field, str):
+            errors.append(f"{path}.image_data: expected string")
+    return errors
+
+
+def _validate_item_lookup_request_ids(value, path):
+    if not isinstance(value, list):
+        return [f"{path}: expected array"]
+    errors = []
+    if len(value) < 1:
+        errors.append(f"{path}: expected at least 1 items")
+    if len(value) > 500:
+        errors.append(f"{path}: expected at most 500 items")
+    for index, item in enumerate(value):
+        if not isinstance(item, int) or isinstance(item, bool):
+            errors.append(f"{path}[{index}]: expected integer")
+        elif item < 1:
+            errors.append(f"{path}[{index}]: must be >= 1")
+        elif item > 2147483647:
+            errors.append(f"{path}[{index}]: must be <= 2147483647")
+    return errors
+
+
+def validate_item_lookup_request(value, path="body"):
+    """Checks a value against the ItemLookupRequest definition."""
+    if not isinstance(value, dict):
+        return [f"{path}: expected object"]
+    errors = []
+    if "ids" not in value:
+        errors.append(f"{path}.ids: is required")
+    if "ids" in value:
+        field = value["ids"]
+        errors.extend(_validate_item_lookup_request_ids(field, f"{path}.ids"))
+    if "image_size" in value:
+        field = value["image_size"]
+        if not isinstance(field, str):
+            errors.append(f"{path}.image_size: expected string")
+        elif field not in _ITEM_LOOKUP_REQUEST_IMAGE_SIZE_VALUES:
+            errors.append(
+                f"{path}.image_size: expected one of thumb, small, medium,"
+                " original"
+            )
+    return errors
+
+
+def validate_item_update(value, path="body"):
+    """Checks a value against the ItemUpdate definition."""
+    if not isinstance(value, dict):
+        return [f"{path}: expected object"]
+    errors = []
+    if "name" in value:
+        field = value["name"]
+        if not isinstance(field, str):
+            errors.append(f"{path}.name: expected string")
+    if "description" in value:
+        field = value["description"]
+        if not isinstance(field, str):
+            errors.append(f"{path}.description: expected string")
+    return errors
+
+
+def validate_location(value, path="body"):
+    """Checks a value against the Location definition."""
+    if not isinstance(value, dict):
+        return [f"{path}: expected object"]
+    errors = []
+    if "address" not in value:
+        errors.append(f"{path}.address: is required")
+    if "city" not in value:
+        errors.append(f"{path}.city: is required")
+    if "number" not in value:
+        errors.append(f"{path}.number: is required")
+    if "state" not in value:
+        errors.append(f"{path}.state: is required")
+    if "street" not in value:
+        errors.append(f"{path}.street: is required")
+    if "type" not in value:
+        errors.append(f"{path}.type: is required")
+    if "zip_code" not in value:
+        errors.append(f"{path}.zip_code: is required")
+    if "id" in value:
+        field = value["id"]
+        if not isinstance(field, int) or isinstance(field, bool):
+            errors.append(f"{path}.id: expected integer")
+        elif field < -2147483648:
+            errors.append(f"{path}.id: must be >= -2147483648")
+        elif field > 2147483647:
+            errors.append(f"{path}.id: must be <= 2147483647")
+    if "address" in value:
+        field = value["address"]
+        if not isinstance(field, str):
+            errors.append(f"{path}.address: expected string")
+    if "zip_code" in value:
+        field = value["zip_code"]
+        if not isinstance(field, str):
+            errors.append(f"{path}.zip_code: expected string")
+    if "city" in value:
+        field = value["city"]
+        if not isinstance(field, str):
+            errors.append(f"{path}.city: expected string")
+    if "street" in value:
+        field = value["street"]
+        if not isinstance(field, str):
+            errors.append(f"{path}.street: expected string")
+    if "state" in value:
+        field = value["state"]
+        if not isinstance(field, str):
+            errors.append(f"{path}.state: expected string")
+    if "number" in value:
+        field = value["number"]
+        if not isinstance(field, int) or isinstance(field, bool):
+            errors.append(f"{path}.number: expected integer")
+        elif field < -2147483648:
+            errors.append(f"{path}.number: must be >= -2147483648")
+        elif field > 2147483647:
+            errors.append(f"{path}.number: must be <= 2147483647")
+    if "addition" in value:
+        field = value["addition"]
+        if not isinstance(field, str):
+            errors.append(f"{path}.addition: expected string")
+    if "type" in value:
+        field = value["type"]
+        if not isinstance(field, str):
+            errors.append(f"{path}.type: expected string")
+    return errors
+
+
+def _validate_purchase_request_items_item(value, path):
+    if not isinstance(value, dict):
+        return [f"{path}: expected object"]
+    errors = []
+    if "item_id" not in value:
+        errors.append(f"{path}.item_id: is required")
+    if "location_id" not in value:
+        errors.append(f"{path}.location_id: is required")
+    if "quantity" not in value:
+        errors.append(f"{path}.quantity: is required")
+    if "item_id" in value:
+        field = value["item_id"]
+        if not isinstance(field, int) or isinstance(field, bool):
+            errors.append(f"{path}.item_id: expected integer")
+        elif field < -2147483648:
+            errors.append(f"{path}.item_id: must be >= -2147483648")
+        elif field > 2147483647:
+            errors.append(f"{path}.item_id: must be <= 2147483647")
+    if "location_id" in value:
+        field = value["location_id"]
+        if not isinstance(field, int) or isinstance(field, bool):
+            errors.append(f"{path}.location_id: expected integer")
+        elif field < 1:
+            errors.append(f"{path}.location_id: must be >= 1")
+        elif field > 2147483647:
+            errors.append(f"{path}.location_id: must be <= 2147483647")
+    if "quantity" in value:
+        field = value["quantity"]
+        if not isinstance(field, int) or isinstance(field, bool):
+            errors.append(f"{path}.quantity: expected integer")
+        elif field < 1:
+            errors.append(f"{path}.quantity: must be >= 1")
+        elif field > 2147483647:
+            errors.append(f"{path}.quantity: must be <= 2147483647")
+    return errors
+
+
+def _validate_purchase_request_items(value, path):
+    if not isinstance(value, list):
+        return [f"{path}: expected array"]
+    errors = []
+    for index, item in enumerate(value):
+        errors.extend(
+            _validate_purchase_request_items_item(item, f"{path}[{index}]")
+        )
+    return errors
+
+
+def validate_purchase_request(value, path="body"):
+    """Checks a value against the PurchaseRequest definition."""
+    if not isinstance(value, dict):
+        return [f"{path}: expected object"]
+    errors = []
+    if "payment_token" not in value:
+        errors.append(f"{path}.payment_token: is required")
+    if "user_id" not in value:
+        errors.append(f"{path}.user_id: is required")
+    if "user_id" in value:
+        field = value["user_id"]
+        if not isinstance(field, str):
+            errors.append(f"{path}.user_id: expected string")
+    if "payment_token" in value:
+        field = value["payment_token"]
+        if not isinstance(field, str):
+            errors.append(f"{path}.payment_token: expected string")
+    if "reservation_id" in value:
+        field = value["reservation_id"]
+        if not isinstance(field, int) or isinstance(field, bool):
+            errors.append(f"{path}.reservation_id: expected integer")
+    if "status" in value:
+        field = value["status"]
+        if not isinstance(field, str):
+            errors.append(f"{path}.status: expected string")
+    if "items" in value:
+        field = value["items"]
+        errors.extend(_validate_purchase_request_items(field, f"{path}.items"))
+    return errors
+
+
+def _validate_reservation_request_items_item(value, path):
+    if not isinstance(value, dict):
+        return [f"{path}: expected object"]
+    errors = []
+    if "item_id" not in value:
+        errors.append(f"{path}.item_id: is required")
+    if "quantity" not in value:
+        errors.append(f"{path}.quantity: is required")
+    if "item_id" in value:
+        field = value["item_id"]
+        if not isinstance(field, int) or isinstance(field, bool):
+            errors.append(f"{path}.item_id: expected integer")
+        elif field < -2147483648:
+            errors.append(f"{path}.item_id: must be >= -2147483648")
+        elif field > 2147483647:
+            errors.append(f"{path}.item_id: must be <= 2147483647")
+    if "location_id" in value:
+        field = value["location_id"]
+        if not isinstance(field, int) or isinstance(field, bool):
+            errors.append(f"{path}.location_id: expected integer")
+        elif field < 1:
+            errors.append(f"{path}.location_id: must be >= 1")
+        elif field > 2147483647:
+            errors.append(f"{path}.location_id: must be <= 2147483647")
+    if "quantity" in value:
+        field = value["quantity"]
+        if not isinstance(field, int) or isinstance(field, bool):
+            errors.append(f"{path}.quantity: expected integer")
+        elif field < 1:
+            errors.append(f"{path}.quantity: must be >= 1")
+        elif field > 2147483647:
+            errors.append(f"{path}.quantity: must be <= 2147483647")
+    return errors
+
+
+def _validate_reservation_request_items(value, path):
+    if not isinstance(value, list):
+        return [f"{path}: expected array"]
+    errors = []
+    for index, item in enumerate(value):
+        errors.extend(
+            _validate_reservation_request_items_item(item, f"{path}[{index}]")
+        )
+    return errors
+
+
+def validate_reservation_request(value, path="body"):
+    """Checks a value against the ReservationRequest definition."""
+    if not isinstance(value, dict):
+        return [f"{path}: expected object"]
+    errors = []
+    if "items" not in value:
+        errors.append(f"{path}.items: is required")
+    if "user_id" not in value:
+        errors.append(f"{path}.user_id: is required")
+    if "user_id" in value:
+        field = value["user_id"]
+        if not isinstance(field, str):
+            errors.append(f"{path}.user_id: expected string")
+    if "items" in value:
+        field = value["items"]
+        errors.extend(
+            _validate_reservation_request_items(field, f"{path}.items")
+        )
+    return errors
+
+
+def validate_reservation_update(value, path="body"):
+    """Checks a value against the ReservationUpdate definition."""
+    if not isinstance(value, dict):
+        return [f"{path}: expected object"]
+    errors = []
+    if "status" not in value:
+        errors.append(f"{path}.status: is required")
+    if "status" in value:
+        field = value["status"]
+        if not isinstance(field, str):
+            errors.append(f"{path}.status: expected string")
+        elif field not in _RESERVATION_UPDATE_STATUS_VALUES:
+            errors.append(
+                f"{path}.status: expected one of pending, reserved, confirmed,"
+                " altered, paid, completed, cancelled"
+            )
+    if "user_id" in value:
+        field = value["user_id"]
+        if not isinstance(field, str):
+            errors.append(f"{path}.user_id: expected string")
+    return errors
+
+
+def _validate_stock_availability_request_lines_item(value, path):
+    if not isinstance(value, dict):
+        return [f"{path}: expected object"]
+    errors = []
+    if "item_id" not in value:
+        errors.append(f"{path}.item_id: is required")
+    if "location_id" not in value:
+        errors.append(f"{path}.location_id: is required")
+    if "quantity" not in value:
+        errors.append(f"{path}.quantity: is required")
+    if "item_id" in value:
+        field = value["item_id"]
+        if not isinstance(field, int) or isinstance(field, bool):
+            errors.append(f"{path}.item_id: expected integer")
+        elif field < 1:
+            errors.append(f"{path}.item_id: must be >= 1")
+        elif field > 2147483647:
+            errors.append(f"{path}.item_id: must be <= 2147483647")
+    if "location_id" in value:
+        field = value["location_id"]
+        if not isinstance(field, int) or isinstance(field, bool):
+            errors.append(f"{path}.location_id: expected integer")
+        elif field < 1:
+            errors.append(f"{path}.location_id: must be >= 1")
+        elif field > 2147483647:
+            errors.append(f"{path}.location_id: must be <= 2147483647")
+    if "quantity" in value:
+        field = value["quantity"]
+        if not isinstance(field, int) or isinstance(field, bool):
+            errors.append(f"{path}.quantity: expected integer")
+        elif field < 1:
+            errors.append(f"{path}.quantity: must be >= 1")
+        elif field > 2147483647:
+            errors.append(f"{path}.quantity: must be <= 2147483647")
+    return errors
+
+
+def _validate_stock_availability_request_lines(value, path):
+    if not isinstance(value, list):
+        return [f"{path}: expected array"]
+    errors = []
+    if len(value) < 1:
+        errors.append(f"{path}: expected at least 1 items")
+    if len(value) > 500:
+        errors.append(f"{path}: expected at most 500 items")
+    for index, item in enumerate(value):
+        errors.extend(
+            _validate_stock_availability_request_lines_item(
+                item, f"{path}[{index}]"
+            )
+        )
+    return errors
+
+
+def validate_stock_availability_request(value, path="body"):
+    """Checks a value against the StockAvailabilityRequest definition."""
+    if not isinstance(value, dict):
+        return [f"{path}: expected object"]
+    errors = []
+    if "lines" not in value:
+        errors.append(f"{path}.lines: is required")
+    if "lines" in value:
+        field = value["lines"]
+        errors.extend(
+            _validate_stock_availability_request_lines(field, f"{path}.lines")
+        )
+    return errors
+
+
+def _validate_stock_item_items_item(value, path):
+    if not isinstance(value, dict):
+        return [f"{path}: expected object"]
+    errors = []
+    if "item_id" not in value:
+        errors.append(f"{path}.item_id: is required")
+    if "location_id" not in value:
+        errors.append(f"{path}.location_id: is required")
+    if "quantity" not in value:
+        errors.append(f"{path}.quantity: is required")
+    if "item_id" in value:
+        field = value["item_id"]
+        if not isinstance(field, int) or isinstance(field, bool):
+            errors.append(f"{path}.item_id: expected integer")
+        elif field < 0:
+            errors.append(f"{path}.item_id: must be >= 0")
+    if "quantity" in value:
+        field = value["quantity"]
+        if not isinstance(field, int) or isinstance(field, bool):
+            errors.append(f"{path}.quantity: expected integer")
+        elif field < 1:
+            errors.append(f"{path}.quantity: must be >= 1")
+    if "location_id" in value:
+        field = value["location_id"]
+        if not isinstance(field, int) or isinstance(field, bool):
+            errors.append(f"{path}.location_id: expected integer")
+        elif field < 0:
+            errors.append(f"{path}.location_id: must be >= 0")
+    return errors
+
+
+def _validate_stock_item_items(value, path):
+    if not isinstance(value, list):
+        return [f"{path}: expected array"]
+    errors = []
+    for index, item in enumerate(value):
+        errors.extend(
+            _validate_stock_item_items_item(item, f"{path}[{index}]")
+        )
+    return errors
+
+
+def validate_stock_item(value, path="body"):
+    """Checks a value against the stockItem definition."""
+    if not isinstance(value, dict):
+        return [f"{path}: expected object"]
+    errors = []
+    if "items" not in value:
+        errors.append(f"{path}.items: is required")
+    if "items" in value:
+        field = value["items"]
+        errors.extend(_validate_stock_item_items(field, f"{path}.items"))
+    return errors
+
+
+def validate_update_stock(value, path="body"):
+    """Checks a value against the updateStock definition."""
+    if not isinstance(value, dict):
+        return [f"{path}: expected object"]
+    errors = []
+    if "item_id" not in value:
+        errors.append(f"{path}.item_id: is required")
+    if "location_id" not in value:
+        errors.append(f"{path}.location_id: is required")
+    if "quantity" not in value:
+        errors.append(f"{path}.quantity: is required")
+    if "stock_operation" in value:
+        field = value["stock_operation"]
+        if not isinstance(field, str):
+            errors.append(f"{path}.stock_operation: expected string")
+        elif field not in _UPDATE_STOCK_STOCK_OPERATION_VALUES:
+            errors.append(
+                f"{path}.stock_operation: expected one of deduct, add, reset"
+            )
+    if "quantity" in value:
+        field = value["quantity"]
+        if not isinstance(field, int) or isinstance(field, bool):
+            errors.append(f"{path}.quantity: expected integer")
+        elif field < -2147483648:
+            errors.append(f"{path}.quantity: must be >= -2147483648")
+        elif field > 2147483647:
+            errors.append(f"{path}.quantity: must be <= 2147483647")
+    if "item_id" in value:
+        field = value["item_id"]
+        if not isinstance(field, int) or isinstance(field, bool):
+            errors.append(f"{path}.item_id: expected integer")
+        elif field < -2147483648:
+            errors.append(f"{path}.item_id: must be >= -2147483648")
+        elif field > 2147483647:
+            errors.append(f"{path}.item_id: must be <= 2147483647")
+    if "location_id" in value:
+        field = value["location_id"]
+        if not isinstance(field, int) or isinstance(field, bool):
+            errors.append(f"{path}.location_id: expected integer")
+        elif field < -2147483648:
+            errors.append(f"{path}.location_id: must be >= -2147483648")
+        elif field > 2147483647:
+            errors.append(f"{path}.location_id: must be <= 2147483647")
+    return errors
+
+
+BODY_VALIDATORS = {
+    ("POST", "/items"): validate_array_of_item,
+    ("POST", "/items/lookup"): validate_item_lookup_request,
+    ("PUT", "/items/{item_id}"): validate_item_update,
+    ("POST", "/items/{item_id}/image"): validate_image_upload_request,
+    ("POST", "/items/{item_id}/image/confirm"): validate_image_upload_confirm,
+    ("POST", "/locations"): validate_location,
+    ("POST", "/purchases"): validate_purchase_request,
+    ("POST", "/reservations"): validate_reservation_request,
+    ("PUT", "/reservations/{reservation_id}"): validate_reservation_update,
+    ("POST", "/stock"): validate_stock_item,
+    ("POST", "/stock/availability"): validate_stock_availability_request,
+    ("PUT", "/stock/{item_id}"): validate_update_stock,
+}
+
+
+def validate_request_body(method, resource, body):
+    """
+    Validates a parsed request body against the API definition of the
+    route. Returns a 400 response listing the errors, or None if the body
+    is valid or the route takes no body.
+    """
+    validator = BODY_VALIDATORS.get((method, resource))
+    if validator is None:
+        return None
+    errors = validator(body)
+    if not errors:
+        return None
+    return {
+        "statusCode": 400,
+        "body": json.dumps(
+            {
+                "message": "Invalid request body",
+                "errors": errors[:MAX_REPORTED_ERRORS],
+            }
+        ),
+    }
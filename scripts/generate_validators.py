@@ -0,0 +1,389 @@
+"""
+Generates python/db_layer/validators.py from the request body schemas in
+the API definition.
+
+Each definition becomes a plain Python function with the checks written
+out, so handlers validate requests without parsing YAML or interpreting
+schemas at runtime. Re-run after changing the API definition:
+
+    python scripts/generate_validators.py
+
+tests/test_validators.py fails while the generated module is out of date.
+"""
+
+import json
+import os
+import re
+import sys
+
+import yaml
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SWAGGER_PATH = os.path.join(
+    REPO_ROOT, "Inventory Management API-v1-swagger-apigateway.yaml"
+)
+OUTPUT_PATH = os.path.join(REPO_ROOT, "python", "db_layer", "validators.py")
+
+# Conditions under which a value does not have the schema type.
+TYPE_MISMATCHES = {
+    "object": "not isinstance({0}, dict)",
+    "array": "not isinstance({0}, list)",
+    "string": "not isinstance({0}, str)",
+    "integer": "not isinstance({0}, int) or isinstance({0}, bool)",
+    "number": "not isinstance({0}, (int, float)) or isinstance({0}, bool)",
+    "boolean": "not isinstance({0}, bool)",
+}
+# Bounds of the integer formats, so out of range values are rejected
+# here instead of by the database.
+FORMAT_BOUNDS = {
+    "int32": (-(2**31), 2**31 - 1),
+    "int64": (-(2**63), 2**63 - 1),
+}
+LINE_LENGTH = 79
+
+HEADER = '''"""
+Request body validators generated from the API definition by
+scripts/generate_validators.py. Do not edit; re-run the script instead.
+
+Every validate_<definition>(value, path) returns a list of error messages,
+empty when the value is valid.
+"""
+
+import json
+import re
+
+# Errors reported in one response; validation still checks everything.
+MAX_REPORTED_ERRORS = 20
+'''
+
+FOOTER = '''
+
+def validate_request_body(method, resource, body):
+    """
+    Validates a parsed request body against the API definition of the
+    route. Returns a 400 response listing the errors, or None if the body
+    is valid or the route takes no body.
+    """
+    validator = BODY_VALIDATORS.get((method, resource))
+    if validator is None:
+        return None
+    errors = validator(body)
+    if not errors:
+        return None
+    return {
+        "statusCode": 400,
+        "body": json.dumps(
+            {
+                "message": "Invalid request body",
+                "errors": errors[:MAX_REPORTED_ERRORS],
+            }
+        ),
+    }
+'''
+
+
+def snake_case(name):
+    return re.sub(r"(?<!^)(?=[A-Z])", "_", name).lower()
+
+
+def literal(value):
+    """
+    Returns a Python literal for a YAML scalar, with double quotes.
+    """
+    if isinstance(value, str):
+        return json.dumps(value)
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return repr(value)
+
+
+def wrap(pad, opening, inner, closing):
+    """
+    Returns `opening + inner + closing` as one line, or split inside the
+    brackets when it is too long.
+    """
+    line = f"{pad}{opening}{inner}{closing}"
+    if len(line) <= LINE_LENGTH:
+        return [line]
+    return [f"{pad}{opening}", f"{pad}    {inner}", f"{pad}{closing}"]
+
+
+def function_name(ref):
+    return "validate_" + snake_case(ref.rsplit("/", 1)[-1])
+
+
+class ValidatorWriter:
+    """
+    Writes one validator function per schema definition, and a private
+    helper per nested object or array, so checks stay flat.
+    """
+
+    def __init__(self):
+        self.constants = []
+        self.patterns = {}
+        self.functions = []
+
+    def error(self, pad, template, message):
+        """
+        Returns the lines appending an error message. Messages too long
+        for one line are split into implicitly concatenated literals.
+        """
+        lines = wrap(pad, "errors.append(", f'f"{template}{message}"', ")")
+        if all(len(line) <= LINE_LENGTH for line in lines):
+            return lines
+        width = LINE_LENGTH - len(pad) - 7
+        chunks = [""]
+        for word in re.findall(r"\s*\S+", template + message):
+            if chunks[-1] and len(chunks[-1]) + len(word) > width:
+                chunks.append(word)
+            else:
+                chunks[-1] += word
+        return (
+            [f"{pad}errors.append("]
+            + [
+                f'{pad}    {"f" if "{" in chunk else ""}"{chunk}"'
+                for chunk in chunks
+            ]
+            + [f"{pad})"]
+        )
+
+    def enum_constant(self, name, options):
+        constant = f"_{name.upper()}_VALUES"
+        values = [literal(option) for option in options]
+        trailing_comma = "," if len(values) == 1 else ""
+        line = f"{constant} = ({', '.join(values)}{trailing_comma})"
+        if len(line) <= LINE_LENGTH:
+            self.constants.append(line)
+        else:
+            self.constants.append(f"{constant} = (")
+            self.constants += [f"    {value}," for value in values]
+            self.constants.append(")")
+        return constant
+
+    def pattern_constant(self, pattern):
+        if pattern not in self.patterns:
+            self.patterns[pattern] = f"_PATTERN_{len(self.patterns) + 1}"
+        return self.patterns[pattern]
+
+    def check_lines(self, schema, name, value, template, pad):
+        """
+        Returns the lines checking `value` against `schema`. `name` names
+        helpers and constants, `template` is the f-string of its path.
+        """
+        if "$ref" in schema or schema.get("type") in ("object", "array"):
+            if "$ref" in schema:
+                function = function_name(schema["$ref"])
+            else:
+                function = "_" + function_name(name)
+                self.write_function(function, schema, name)
+            lines = wrap(
+                pad,
+                "errors.extend(",
+                f'{function}({value}, f"{template}")',
+                ")",
+            )
+            if all(len(line) <= LINE_LENGTH for line in lines):
+                return lines
+            return (
+                [f"{pad}errors.extend("]
+                + wrap(
+                    pad + "    ",
+                    f"{function}(",
+                    f'{value}, f"{template}"',
+                    ")",
+                )
+                + [f"{pad})"]
+            )
+
+        branches = []
+        kind = schema.get("type")
+        if kind in TYPE_MISMATCHES:
+            branches.append(
+                (TYPE_MISMATCHES[kind].format(value), f": expected {kind}")
+            )
+        low, high = FORMAT_BOUNDS.get(schema.get("format"), (None, None))
+        if "minimum" in schema:
+            low = int(schema["minimum"])
+        if "maximum" in schema:
+            high = int(schema["maximum"])
+        if low is not None:
+            branches.append((f"{value} < {low}", f": must be >= {low}"))
+        if high is not None:
+            branches.append((f"{value} > {high}", f": must be <= {high}"))
+        if "enum" in schema:
+            constant = self.enum_constant(name, schema["enum"])
+            branches.append(
+                (
+                    f"{value} not in {constant}",
+                    ": expected one of "
+                    + ", ".join(str(option) for option in schema["enum"]),
+                )
+            )
+        if "pattern" in schema:
+            constant = self.pattern_constant(schema["pattern"])
+            branches.append(
+                (
+                    f"not {constant}.search({value})",
+                    ": does not match the expected format",
+                )
+            )
+        if "minLength" in schema:
+            bound = int(schema["minLength"])
+            branches.append(
+                (f"len({value}) < {bound}", f": expected >= {bound} chars")
+            )
+        if "maxLength" in schema:
+            bound = int(schema["maxLength"])
+            branches.append(
+                (f"len({value}) > {bound}", f": expected <= {bound} chars")
+            )
+
+        lines = []
+        for number, (condition, message) in enumerate(branches):
+            keyword = "if" if number == 0 else "elif"
+            line = f"{pad}{keyword} {condition}:"
+            if len(line) <= LINE_LENGTH:
+                lines.append(line)
+            else:
+                lines += wrap(pad, f"{keyword} (", condition, "):")
+            lines += self.error(pad + "    ", template, message)
+        return lines
+
+    def body_lines(self, schema, name):
+        """
+        Returns the body of the function validating `value` at `path`.
+        """
+        kind = schema.get("type")
+        if kind not in ("object", "array"):
+            return (
+                ["    errors = []"]
+                + self.check_lines(schema, name, "value", "{path}", "    ")
+                + ["    return errors"]
+            )
+
+        lines = [
+            f"    if {TYPE_MISMATCHES[kind].format('value')}:",
+            f'        return [f"{{path}}: expected {kind}"]',
+            "    errors = []",
+        ]
+        if kind == "array":
+            for key, operator, message in (
+                ("minItems", "<", "at least"),
+                ("maxItems", ">", "at most"),
+            ):
+                if key in schema:
+                    bound = int(schema[key])
+                    lines.append(f"    if len(value) {operator} {bound}:")
+                    lines += self.error(
+                        "        ",
+                        "{path}",
+                        f": expected {message} {bound} items",
+                    )
+            if "items" in schema:
+                lines.append("    for index, item in enumerate(value):")
+                lines += self.check_lines(
+                    schema["items"],
+                    f"{name}_item",
+                    "item",
+                    "{path}[{index}]",
+                    "        ",
+                )
+        else:
+            for field in schema.get("required", []):
+                lines.append(f"    if {literal(field)} not in value:")
+                lines += self.error(
+                    "        ", "{path}", f".{field}: is required"
+                )
+            for field, child in schema.get("properties", {}).items():
+                lines.append(f"    if {literal(field)} in value:")
+                lines.append(f"        field = value[{literal(field)}]")
+                lines += self.check_lines(
+                    child,
+                    f"{name}_{field}",
+                    "field",
+                    f"{{path}}.{field}",
+                    "        ",
+                )
+        lines.append("    return errors")
+        return lines
+
+    def write_function(self, function, schema, name, docstring=None):
+        signature = f"def {function}(value, path):"
+        if docstring:
+            signature = f'def {function}(value, path="body"):'
+        lines = ["", "", signature]
+        if docstring:
+            lines.append(f'    """{docstring}"""')
+        lines += self.body_lines(schema, name)
+        self.functions.append("\n".join(lines) + "\n")
+
+    def write_definition(self, name, schema):
+        self.write_function(
+            function_name(name),
+            schema,
+            snake_case(name),
+            f"Checks a value against the {name} definition.",
+        )
+
+
+def body_schemas(swagger):
+    """
+    Yields (method, resource, schema) for every operation with a body.
+    """
+    for resource, operations in swagger["paths"].items():
+        for method, operation in operations.items():
+            if not isinstance(operation, dict):
+                continue
+            for parameter in operation.get("parameters", []):
+                if parameter.get("in") == "body":
+                    yield method.upper(), resource, parameter["schema"]
+
+
+def generate(swagger):
+    """
+    Returns the source of the validators module for a parsed definition.
+    """
+    writer = ValidatorWriter()
+    for name, schema in sorted(swagger.get("definitions", {}).items()):
+        writer.write_definition(name, schema)
+
+    routes = ["", "", "BODY_VALIDATORS = {"]
+    for method, resource, schema in body_schemas(swagger):
+        if "$ref" not in schema:
+            raise ValueError(
+                f"{method} {resource}: body schemas must be definitions"
+            )
+        route = f"({literal(method)}, {literal(resource)})"
+        line = f"    {route}: {function_name(schema['$ref'])},"
+        if len(line) <= LINE_LENGTH:
+            routes.append(line)
+        else:
+            routes += wrap(
+                "    ", f"{route}: (", function_name(schema["$ref"]), "),"
+            )
+    routes.append("}")
+
+    constants = [
+        f"{name} = re.compile({literal(pattern)})"
+        for pattern, name in writer.patterns.items()
+    ] + writer.constants
+    return (
+        HEADER
+        + "".join(f"{line}\n" for line in constants)
+        + "".join(writer.functions)
+        + "\n".join(routes)
+        + "\n"
+        + FOOTER
+    )
+
+
+def main():
+    with open(SWAGGER_PATH) as f:
+        source = generate(yaml.safe_load(f))
+    with open(OUTPUT_PATH, "w") as f:
+        f.write(source)
+    print(f"Wrote {os.path.relpath(OUTPUT_PATH, REPO_ROOT)}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
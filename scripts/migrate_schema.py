@@ -0,0 +1,119 @@
+"""
+Brings an existing database up to the schema of python/db_layer/basemodels.
+
+Base.metadata.create_all only creates missing tables, so columns, indexes
+and backfills added to existing tables are applied here:
+
+- purchases and purchased_items, if they are still plain tables, are
+  converted to monthly partitions (see db_layer.partitions);
+- item_stock_totals and its trigger on item_stock, backfilled from
+  item_stock;
+- table_versions and the triggers bumping it on items, locations and
+  image_derivatives;
+- the generated items.search_vector column and its GIN index;
+- sales_daily, backfilled from purchased_items;
+- reservations.request_id and its unique index;
+- the listing indexes ix_item_stock_item_id_location_id,
+  ix_reservations_user_id_id, ix_reservations_status_created_at,
+  ix_purchases_user_id_id, ix_purchases_status_purchase_date and
+  ix_purchases_reservation_id.
+
+Everything runs in one transaction; installing the triggers locks their
+tables against writes until the backfills have committed. Safe to re-run.
+Connects with the DB_* environment variables of the Lambdas:
+
+    python scripts/migrate_schema.py
+"""
+
+import os
+import sys
+
+from sqlalchemy import text
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(REPO_ROOT, "python"))
+
+from db_layer.basemodels import (  # noqa: E402
+    ITEM_STOCK_TOTALS_BACKFILL,
+    Base,
+    Item,
+)
+from db_layer.partitions import migrate_to_partitioned  # noqa: E402
+from db_layer.sales_rollup import SALES_DAILY_BACKFILL  # noqa: E402
+
+# 'r' for a plain table, 'p' for a partitioned one, NULL if missing.
+PURCHASES_RELKIND = (
+    "SELECT relkind FROM pg_class WHERE oid = to_regclass('purchases')"
+)
+
+# The column definition is the model's, so both stay in sync.
+ITEM_SEARCH_VECTOR_COLUMN = (
+    "ALTER TABLE items ADD COLUMN IF NOT EXISTS search_vector TSVECTOR "
+    "GENERATED ALWAYS AS ({}) STORED"
+).format(Item.__table__.c.search_vector.computed.sqltext)
+
+ITEM_SEARCH_VECTOR_INDEX = (
+    "CREATE INDEX IF NOT EXISTS ix_items_search_vector ON items "
+    "USING gin (search_vector) WITH (fastupdate = off)"
+)
+
+RESERVATION_REQUEST_ID_COLUMN = (
+    "ALTER TABLE reservations ADD COLUMN IF NOT EXISTS request_id VARCHAR"
+)
+
+RESERVATION_REQUEST_ID_INDEX = (
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_reservations_request_id "
+    "ON reservations (request_id)"
+)
+
+# Indexes on purchases are created on every partition.
+LISTING_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS ix_item_stock_item_id_location_id "
+    "ON item_stock (item_id, location_id)",
+    "CREATE INDEX IF NOT EXISTS ix_reservations_user_id_id "
+    "ON reservations (user_id, id)",
+    "CREATE INDEX IF NOT EXISTS ix_reservations_status_created_at "
+    "ON reservations (status, created_at)",
+    "CREATE INDEX IF NOT EXISTS ix_purchases_user_id_id "
+    "ON purchases (user_id, id)",
+    "CREATE INDEX IF NOT EXISTS ix_purchases_status_purchase_date "
+    "ON purchases (status, purchase_date)",
+    "CREATE INDEX IF NOT EXISTS ix_purchases_reservation_id "
+    "ON purchases (reservation_id)",
+)
+
+
+def upgrade(connection):
+    """
+    Applies the migration on `connection`, in its current transaction.
+    """
+    if connection.execute(text(PURCHASES_RELKIND)).scalar() == "r":
+        migrate_to_partitioned(connection)
+    # Creates the missing tables; the metadata's after_create DDL
+    # (re)installs the triggers and the optional trigram index.
+    Base.metadata.create_all(connection)
+    connection.execute(text(ITEM_SEARCH_VECTOR_COLUMN))
+    connection.execute(text(ITEM_SEARCH_VECTOR_INDEX))
+    connection.execute(text(RESERVATION_REQUEST_ID_COLUMN))
+    connection.execute(text(RESERVATION_REQUEST_ID_INDEX))
+    for index in LISTING_INDEXES:
+        connection.execute(text(index))
+    connection.execute(text(ITEM_STOCK_TOTALS_BACKFILL))
+    # Purchases keep adding to sales_daily while it is rebuilt; block them
+    # until the backfill has committed.
+    connection.execute(
+        text("LOCK TABLE purchases, purchased_items IN SHARE MODE")
+    )
+    connection.execute(text(SALES_DAILY_BACKFILL))
+
+
+def main():
+    from db_layer.db_connect import engine
+
+    with engine.begin() as connection:
+        upgrade(connection)
+    print("Schema is up to date.")
+
+
+if __name__ == "__main__":
+    main()
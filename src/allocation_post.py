@@ -0,0 +1,184 @@
+import json
+import math
+from db_layer.db_connect import get_session
+from db_layer.location_index import location_index, zip_distance
+from db_layer.allocation_optimizer import (
+    build_stock_matrix,
+    optimize_allocation,
+)
+
+# Orders larger than this are rejected to bound the allocation time.
+MAX_ORDER_LINES = 200
+# Line limit for /allocations/optimize, meant for large B2B orders.
+MAX_OPTIMIZE_ORDER_LINES = 5000
+
+
+def parse_order(items, max_lines=MAX_ORDER_LINES):
+    """
+    Merges the order lines into a dict of item id to quantity.
+    Raises ValueError for malformed lines.
+    """
+    if not isinstance(items, list) or not items:
+        raise ValueError("Expected a non-empty list of items")
+    if len(items) > max_lines:
+        raise ValueError(f"At most {max_lines} items are allowed")
+    order = {}
+    for item in items:
+        item_id = int(item["item_id"])
+        quantity = int(item["quantity"])
+        if quantity <= 0:
+            raise ValueError(f"Invalid quantity for item {item_id}")
+        order[item_id] = order.get(item_id, 0) + quantity
+    return order
+
+
+def refresh_index(order):
+    """
+    Brings the shared location index up to date for the ordered items.
+    """
+    session = get_session(read_only=True)
+    try:
+        location_index.refresh(session, order)
+    finally:
+        session.close()
+
+
+def allocation_body(shipments, unallocated):
+    """
+    Builds the response body from the shipments per location. "items"
+    lists every line with its location_id, ready to be submitted.
+    """
+    for shipment in shipments:
+        if math.isinf(shipment["distance"]):
+            shipment["distance"] = None
+    return {
+        "shipments": shipments,
+        "items": [
+            {
+                "item_id": item["item_id"],
+                "location_id": shipment["location_id"],
+                "quantity": item["quantity"],
+            }
+            for shipment in shipments
+            for item in shipment["items"]
+        ],
+        "unallocated": [
+            {"item_id": item_id, "quantity": quantity}
+            for item_id, quantity in unallocated.items()
+        ],
+    }
+
+
+def allocate_order(order, zip_code):
+    """
+    Picks the locations to fulfil `order` from, nearest to `zip_code` with
+    the fewest shipments.
+    Returns a dict with the shipments, the resulting reservation items
+    (item_id, location_id, quantity) and the unallocated lines.
+    """
+    refresh_index(order)
+    return allocation_body(*location_index.allocate(order, zip_code))
+
+
+def optimize_order(order, zip_code):
+    """
+    Plans a large order over the (item x location) stock matrix with the
+    vectorized greedy-plus-improvement optimizer.
+    Returns the same structure as allocate_order.
+    """
+    refresh_index(order)
+    item_ids = list(order)
+    location_ids, stock = build_stock_matrix(location_index, item_ids)
+    distances = [
+        zip_distance(location_index.locations[location_id], zip_code)
+        for location_id in location_ids.tolist()
+    ]
+    assignment = optimize_allocation(
+        stock, [order[item_id] for item_id in item_ids], distances
+    )
+
+    shipments = {}
+    unallocated = {}
+    for item_id, column in zip(item_ids, assignment.tolist()):
+        if column < 0:
+            unallocated[item_id] = order[item_id]
+            continue
+        shipment = shipments.setdefault(
+            column,
+            {
+                "location_id": int(location_ids[column]),
+                "distance": distances[column],
+                "items": [],
+            },
+        )
+        shipment["items"].append(
+            {"item_id": item_id, "quantity": order[item_id]}
+        )
+    return allocation_body(
+        sorted(shipments.values(), key=lambda s: s["distance"]), unallocated
+    )
+
+
+def lambda_handler(event, context):
+    """
+    Lambda handler for POST /allocations and POST /allocations/optimize.
+    Expects a JSON body with "zip_code" (the destination) and "items", a list
+    of objects with 'item_id' and 'quantity'.
+    /allocations/optimize accepts orders of up to MAX_OPTIMIZE_ORDER_LINES
+    lines and, given a "user_id", also returns a "reservation" payload that
+    can be submitted to /reservations as is.
+    Returns 200 with the allocation, whose "items" can be passed on as the
+    items of a reservation or purchase, or 409 with the partial allocation
+    if some lines cannot be shipped from any single location.
+    """
+    resource = event.get("resource")
+    if (
+        resource not in ("/allocations", "/allocations/optimize")
+        or event.get("httpMethod") != "POST"
+    ):
+        return {
+            "statusCode": 404,
+            "body": json.dumps({"message": "Not Found"}),
+        }
+    optimize = resource == "/allocations/optimize"
+    try:
+        body = json.loads(event.get("body") or "{}")
+        zip_code = body.get("zip_code")
+        if not zip_code:
+            raise ValueError("Missing zip_code")
+        order = parse_order(
+            body.get("items"),
+            MAX_OPTIMIZE_ORDER_LINES if optimize else MAX_ORDER_LINES,
+        )
+    except (ValueError, KeyError, TypeError) as e:
+        return {
+            "statusCode": 400,
+            "body": json.dumps(
+                {"message": "Invalid allocation request", "error": str(e)}
+            ),
+        }
+
+    try:
+        if optimize:
+            allocation = optimize_order(order, zip_code)
+            if body.get("user_id"):
+                allocation["reservation"] = {
+                    "user_id": body["user_id"],
+                    "items": allocation["items"],
+                }
+        else:
+            allocation = allocate_order(order, zip_code)
+    except Exception as e:
+        print("Error allocating order:", str(e))
+        return {
+            "statusCode": 500,
+            "body": json.dumps(
+                {"message": "Error allocating order", "error": str(e)}
+            ),
+        }
+    status_code = 409 if allocation["unallocated"] else 200
+    return {
+        "statusCode": status_code,
+        "headers": {"Content-Type": "application/json"},
+        "body": json.dumps(allocation),
+    }
@@ -1,10 +1,55 @@
 from db_layer.db_connect import get_session
 from db_layer.basemodels import Reservation
+from db_layer.prepared import execute_prepared
+from sqlalchemy import select
+
+
+def check_reservation_batch(data):
+    """
+    Batch variant for reservations written by the batching mode.
+    Returns the items of every reservation in the batch that still exists so
+    that they can be added back to stock with a single update. Reservations
+    cancelled by update_stock never had their stock deducted and are
+    skipped.
+    """
+    reservation_ids = data.get("reservation_ids") or []
+    if not reservation_ids:
+        raise ValueError("Missing reservation_ids in event data")
+
+    session = get_session()
+    try:
+        existing_ids = set(
+            session.scalars(
+                select(Reservation.id)
+                .where(Reservation.id.in_(reservation_ids))
+                .where(Reservation.status != "cancelled")
+            ).all()
+        )
+        if not existing_ids:
+            return {"reservationExists": False}
+
+        items = [
+            item
+            for item in data.get("response_body", {}).get("items", [])
+            if item.get("reservation_id") in existing_ids
+        ]
+        return {
+            "stock_operation": "add",
+            "reservationExists": True,
+            "reservation_ids": sorted(existing_ids),
+            "items": items,
+        }
+    except Exception as e:
+        raise e
+    finally:
+        session.close()
 
 
 def lambda_handler(event, context):
     # Expecting a 'reservationId' in the event payload
     data = event.get("data") or {}
+    if "reservation_ids" in data:
+        return check_reservation_batch(data)
     reservation_id = data.get("reservation_id")
 
     if not reservation_id:
@@ -12,11 +57,9 @@ def lambda_handler(event, context):
 
     session = get_session()
     try:
-        reservation = (
-            session.query(Reservation)
-            .filter(Reservation.id == reservation_id)
-            .first()
-        )
+        reservation = execute_prepared(
+            session, "reservation_by_id", int(reservation_id)
+        ).first()
 
         if reservation:
             return {
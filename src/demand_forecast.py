@@ -0,0 +1,170 @@
+import os
+from datetime import date, timedelta
+import numpy as np
+from sqlalchemy import cast, Date, func, select
+from sqlalchemy.dialects.postgresql import insert
+from db_layer.db_connect import get_session
+from db_layer.basemodels import Purchase, PurchasedItem, StockThreshold
+from db_layer.forecasting import compute_reorder_points
+
+HISTORY_DAYS = int(os.environ.get("FORECAST_HISTORY_DAYS", 365))
+LEAD_TIME_DAYS = int(os.environ.get("FORECAST_LEAD_TIME_DAYS", 7))
+SERVICE_LEVEL = float(os.environ.get("FORECAST_SERVICE_LEVEL", 0.95))
+FORECAST_METHOD = os.environ.get("FORECAST_METHOD", "exponential_smoothing")
+# Rows per multi-row upsert into stock_thresholds.
+UPSERT_CHUNK_SIZE = 5000
+
+
+def load_demand_history(session, start_date):
+    """
+    Loads units sold per item, location and day since `start_date`.
+    Aggregation happens in the database, so one row per series and day is
+    transferred instead of every purchased item.
+    Returns (item_ids, location_ids, days, quantities) as NumPy arrays,
+    where days count from `start_date`.
+    """
+    day = cast(Purchase.purchase_date, Date)
+    query = (
+        select(
+            PurchasedItem.item_id,
+            PurchasedItem.location_id,
+            day.label("day"),
+            func.sum(PurchasedItem.quantity),
+        )
+        .join(Purchase, Purchase.id == PurchasedItem.purchase_id)
+        .where(Purchase.purchase_date >= start_date)
+        .where(Purchase.status != "cancelled")
+        .group_by(PurchasedItem.item_id, PurchasedItem.location_id, day)
+    )
+    rows = session.execute(query).all()
+    if not rows:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, empty, empty
+    item_ids, location_ids, days, quantities = zip(*rows)
+    day_offsets = np.array(
+        [(d - start_date).days for d in days], dtype=np.int64
+    )
+    return (
+        np.array(item_ids, dtype=np.int64),
+        np.array(location_ids, dtype=np.int64),
+        day_offsets,
+        np.array(quantities, dtype=np.int64),
+    )
+
+
+def compute_thresholds(
+    item_ids, location_ids, days, quantities, n_days, **forecast_options
+):
+    """
+    Groups the history into (item, location) series and computes the
+    reorder point of every series at once.
+    Returns a list of dicts ready to upsert into stock_thresholds.
+    """
+    if len(item_ids) == 0:
+        return []
+    # Pack each pair into one int64 key; a 1-d unique is much faster than
+    # np.unique(axis=0) on 2-d rows.
+    keys = (item_ids.astype(np.int64) << 32) | location_ids.astype(np.int64)
+    series, series_index = np.unique(keys, return_inverse=True)
+    forecast, safety_stock, reorder_point = compute_reorder_points(
+        series_index.ravel(),
+        days,
+        quantities,
+        len(series),
+        n_days,
+        **forecast_options,
+    )
+    return [
+        {
+            "item_id": item_id,
+            "location_id": location_id,
+            "avg_daily_demand": avg,
+            "safety_stock": safety,
+            "reorder_point": reorder,
+        }
+        for item_id, location_id, avg, safety, reorder in zip(
+            (series >> 32).tolist(),
+            (series & 0xFFFFFFFF).tolist(),
+            forecast.tolist(),
+            safety_stock.tolist(),
+            reorder_point.tolist(),
+        )
+    ]
+
+
+def save_thresholds(session, thresholds):
+    """
+    Upserts the computed thresholds in chunks of multi-row inserts.
+    """
+    for start in range(0, len(thresholds), UPSERT_CHUNK_SIZE):
+        stmt = insert(StockThreshold).values(
+            thresholds[start : start + UPSERT_CHUNK_SIZE]
+        )
+        session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[
+                    StockThreshold.item_id,
+                    StockThreshold.location_id,
+                ],
+                set_={
+                    "avg_daily_demand": stmt.excluded.avg_daily_demand,
+                    "safety_stock": stmt.excluded.safety_stock,
+                    "reorder_point": stmt.excluded.reorder_point,
+                    "updated_at": func.now(),
+                },
+            )
+        )
+    session.commit()
+
+
+def run_forecast(
+    history_days=HISTORY_DAYS,
+    lead_time_days=LEAD_TIME_DAYS,
+    service_level=SERVICE_LEVEL,
+    method=FORECAST_METHOD,
+):
+    """
+    Recomputes the reorder point of every (item, location) with sales in
+    the last `history_days` days and stores them in stock_thresholds.
+    Returns the number of thresholds written.
+    """
+    start_date = date.today() - timedelta(days=history_days - 1)
+    session = get_session()
+    try:
+        history = load_demand_history(session, start_date)
+        thresholds = compute_thresholds(
+            *history,
+            history_days,
+            lead_time_days=lead_time_days,
+            service_level=service_level,
+            method=method,
+        )
+        save_thresholds(session, thresholds)
+        return len(thresholds)
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+def lambda_handler(event, context):
+    """
+    Scheduled Lambda that refreshes the per item and location reorder
+    points used by update_stock for low-stock alerts.
+    Optionally accepts "history_days", "lead_time_days", "service_level"
+    and "method" in the event.
+    """
+    print("Received event:", event)
+    try:
+        count = run_forecast(
+            history_days=int(event.get("history_days", HISTORY_DAYS)),
+            lead_time_days=int(event.get("lead_time_days", LEAD_TIME_DAYS)),
+            service_level=float(event.get("service_level", SERVICE_LEVEL)),
+            method=event.get("method", FORECAST_METHOD),
+        )
+        print(f"Updated {count} reorder points.")
+        return {"statusCode": 200, "thresholds": count}
+    except Exception as e:
+        print("Error computing reorder points:", str(e))
+        raise e
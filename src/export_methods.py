@@ -0,0 +1,342 @@
+import csv
+import json
+import os
+import re
+import uuid
+from datetime import date, datetime
+import boto3
+from botocore.exceptions import ClientError
+from sqlalchemy import select
+from db_layer.db_connect import get_session, use_replica
+from db_layer.basemodels import (
+    ItemStock,
+    Purchase,
+    PurchasedItem,
+    Reservation,
+    ReservedItem,
+)
+from db_layer.generate_s3_url import generate_presigned_url
+from db_layer.s3_multipart import S3MultipartWriter
+
+s3_client = boto3.client("s3", region_name="eu-north-1")
+lambda_client = boto3.client("lambda", region_name="eu-north-1")
+S3_BUCKET = os.environ.get("S3_BUCKET")
+# Exports run in an asynchronous invocation of this same function; the
+# Lambda runtime sets its name.
+EXPORT_FUNCTION_NAME = os.environ.get("AWS_LAMBDA_FUNCTION_NAME")
+# Rows fetched per round trip from the server-side cursor.
+EXPORT_CHUNK_SIZE = int(os.environ.get("EXPORT_CHUNK_SIZE", 5000))
+# Validity in seconds of the returned download link.
+EXPORT_URL_EXPIRATION = int(os.environ.get("EXPORT_URL_EXPIRATION", 3600))
+
+# Export ids as generated by start_export; other ids are never looked up.
+EXPORT_ID_PATTERN = re.compile(r"^\d{8}T\d{6}-[0-9a-f]{32}$")
+
+FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv", "csv"),
+}
+
+
+def export_query(resource, query_params):
+    """
+    Returns the flat, ordered select statement for an export resource.
+    Purchases and reservations are exported as one row per line item.
+    """
+    user_id = query_params.get("user_id")
+    if resource == "purchases":
+        query = (
+            select(
+                Purchase.id.label("purchase_id"),
+                Purchase.user_id,
+                Purchase.reservation_id,
+                Purchase.status,
+                Purchase.purchase_date,
+                PurchasedItem.item_id,
+                PurchasedItem.location_id,
+                PurchasedItem.quantity,
+            )
+            .outerjoin(PurchasedItem, PurchasedItem.purchase_id == Purchase.id)
+            .order_by(Purchase.id)
+        )
+        if user_id:
+            query = query.where(Purchase.user_id == user_id)
+        return query
+    if resource == "reservations":
+        query = (
+            select(
+                Reservation.id.label("reservation_id"),
+                Reservation.user_id,
+                Reservation.status,
+                Reservation.created_at,
+                Reservation.updated_at,
+                ReservedItem.item_id,
+                ReservedItem.location_id,
+                ReservedItem.quantity,
+            )
+            .outerjoin(
+                ReservedItem, ReservedItem.reservation_id == Reservation.id
+            )
+            .order_by(Reservation.id)
+        )
+        if user_id:
+            query = query.where(Reservation.user_id == user_id)
+        return query
+    if resource == "stock":
+        query = select(
+            ItemStock.id,
+            ItemStock.item_id,
+            ItemStock.location_id,
+            ItemStock.quantity,
+        ).order_by(ItemStock.id)
+        location_id = query_params.get("location_id")
+        if location_id:
+            query = query.where(ItemStock.location_id == location_id)
+        return query
+    return None
+
+
+def serialize_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def write_rows(rows, writer, export_format):
+    """
+    Writes result rows to `writer` as NDJSON or CSV, one row at a time.
+    Returns the number of rows written.
+    """
+    count = 0
+    csv_writer = None
+    for row in rows:
+        record = {
+            key: serialize_value(value) for key, value in row._mapping.items()
+        }
+        if export_format == "csv":
+            if csv_writer is None:
+                csv_writer = csv.DictWriter(writer, fieldnames=list(record))
+                csv_writer.writeheader()
+            csv_writer.writerow(record)
+        else:
+            writer.write(json.dumps(record) + "\n")
+        count += 1
+    return count
+
+
+def status_key(resource, export_id):
+    return f"exports/{resource}/{export_id}.json"
+
+
+def write_status(resource, export_id, status):
+    """
+    Records the state of an export in its status object next to the
+    export.
+    """
+    s3_client.put_object(
+        Bucket=S3_BUCKET,
+        Key=status_key(resource, export_id),
+        Body=json.dumps(status),
+        ContentType="application/json",
+    )
+
+
+def read_status(resource, export_id):
+    """
+    Returns the recorded state of an export, or None for an unknown one.
+    """
+    try:
+        response = s3_client.get_object(
+            Bucket=S3_BUCKET, Key=status_key(resource, export_id)
+        )
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey"):
+            return None
+        raise
+    return json.loads(response["Body"].read())
+
+
+def start_export(event, resource):
+    """
+    Validates an export request, records it as pending and starts it in an
+    asynchronous invocation of this function, so the export is bound by the
+    function timeout instead of API Gateway's 29 seconds.
+    Supports the query string parameters "format" (ndjson or csv, default
+    ndjson), and "user_id" or "location_id" filters.
+    Returns 202 with the export id and the URL that returns the download
+    link once the export has completed.
+    """
+    query_params = event.get("queryStringParameters") or {}
+    export_format = query_params.get("format", "ndjson")
+    if export_format not in FORMATS:
+        return {
+            "statusCode": 400,
+            "body": json.dumps(
+                {
+                    "message": "Invalid export format",
+                    "error": f"Expected one of {sorted(FORMATS)}",
+                }
+            ),
+        }
+    if export_query(resource, query_params) is None:
+        return {
+            "statusCode": 404,
+            "body": json.dumps({"message": f"Unknown export {resource}"}),
+        }
+
+    timestamp = datetime.now().strftime("%Y%m%dT%H%M%S")
+    export_id = f"{timestamp}-{uuid.uuid4().hex}"
+    job = {
+        "resource": resource,
+        "export_id": export_id,
+        "format": export_format,
+        "filters": {
+            key: query_params[key]
+            for key in ("user_id", "location_id")
+            if query_params.get(key)
+        },
+        "read_only": use_replica(event),
+    }
+    try:
+        write_status(
+            resource, export_id, {"status": "pending", "format": export_format}
+        )
+        lambda_client.invoke(
+            FunctionName=EXPORT_FUNCTION_NAME,
+            InvocationType="Event",
+            Payload=json.dumps({"export": job}),
+        )
+    except Exception as e:
+        print("Error starting export of", resource, str(e))
+        return {
+            "statusCode": 500,
+            "body": json.dumps(
+                {"message": f"Error exporting {resource}", "error": str(e)}
+            ),
+        }
+
+    status_url = f"/exports/{resource}/{export_id}"
+    return {
+        "statusCode": 202,
+        "headers": {
+            "Content-Type": "application/json",
+            "Location": status_url,
+        },
+        "body": json.dumps(
+            {
+                "message": "Export started",
+                "resource": resource,
+                "format": export_format,
+                "export_id": export_id,
+                "status_url": status_url,
+            }
+        ),
+    }
+
+
+def run_export(job):
+    """
+    Streams a full table export to S3, as started by start_export, and
+    records the outcome in the export's status object.
+    Rows are read through a server-side cursor in chunks of
+    EXPORT_CHUNK_SIZE and uploaded in multipart chunks, so memory stays flat
+    regardless of the table size.
+    """
+    resource = job["resource"]
+    export_id = job["export_id"]
+    export_format = job["format"]
+    content_type, extension = FORMATS[export_format]
+    object_key = f"exports/{resource}/{export_id}.{extension}"
+
+    session = get_session(read_only=job.get("read_only", True))
+    try:
+        rows = session.execute(
+            export_query(resource, job.get("filters") or {}).execution_options(
+                yield_per=EXPORT_CHUNK_SIZE
+            )
+        )
+        with S3MultipartWriter(
+            S3_BUCKET,
+            object_key,
+            content_type=content_type,
+            s3_client=s3_client,
+        ) as writer:
+            row_count = write_rows(rows, writer, export_format)
+        status = {
+            "status": "completed",
+            "format": export_format,
+            "rows": row_count,
+            "s3_key": object_key,
+        }
+    except Exception as e:
+        print("Error exporting", resource, str(e))
+        status = {"status": "failed", "format": export_format, "error": str(e)}
+    finally:
+        session.close()
+    write_status(resource, export_id, status)
+    return status
+
+
+def get_export(resource, export_id):
+    """
+    Returns the state of an export: 202 while it runs, and once it has
+    completed the row count and a pre-signed link to the export.
+    """
+    if not EXPORT_ID_PATTERN.match(export_id):
+        return {
+            "statusCode": 404,
+            "body": json.dumps({"message": "Export not found"}),
+        }
+    try:
+        status = read_status(resource, export_id)
+    except Exception as e:
+        print("Error reading export status", export_id, str(e))
+        return {
+            "statusCode": 500,
+            "body": json.dumps(
+                {"message": "Error reading export status", "error": str(e)}
+            ),
+        }
+    if status is None:
+        return {
+            "statusCode": 404,
+            "body": json.dumps({"message": "Export not found"}),
+        }
+    if status["status"] == "completed":
+        status["url"] = generate_presigned_url(
+            S3_BUCKET,
+            status["s3_key"],
+            EXPORT_URL_EXPIRATION,
+            s3_client=s3_client,
+        )
+    return {
+        "statusCode": 202 if status["status"] == "pending" else 200,
+        "headers": {"Content-Type": "application/json"},
+        "body": json.dumps(
+            {"resource": resource, "export_id": export_id, **status}
+        ),
+    }
+
+
+def lambda_handler(event, context):
+    """
+    Main Lambda handler for the /exports/{resource} and
+    /exports/{resource}/{export_id} endpoints, and for the asynchronous
+    invocations running the exports.
+    Assumes API Gateway is set up with Lambda proxy integration.
+    """
+    if "export" in event:
+        return run_export(event["export"])
+
+    http_method = event.get("httpMethod", "")
+    path_params = event.get("pathParameters") or {}
+    resource = path_params.get("resource")
+    export_id = path_params.get("export_id")
+
+    if http_method == "GET" and resource and export_id:
+        return get_export(resource, export_id)
+    if http_method == "GET" and resource:
+        return start_export(event, resource)
+
+    # If the request doesn't match any endpoint, return 404.
+    return {"statusCode": 404, "body": json.dumps({"message": "Not Found"})}
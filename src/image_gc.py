@@ -0,0 +1,38 @@
+import os
+from datetime import timedelta
+import boto3
+from db_layer.db_connect import get_session
+from db_layer.image_store import DELETE_BATCH_SIZE, collect_unreferenced
+
+s3_client = boto3.client("s3", region_name="eu-north-1")
+S3_BUCKET = os.environ.get("S3_BUCKET")
+# Hours an image stays unreferenced before it is deleted.
+IMAGE_GC_GRACE_HOURS = int(os.environ.get("IMAGE_GC_GRACE_HOURS", 24))
+
+
+def lambda_handler(event, context):
+    """
+    Scheduled Lambda deleting item images no item references any more,
+    and uploads that were never confirmed, in batches of DeleteObjects.
+    Optionally accepts "grace_hours" and "batch_size" in the event.
+    """
+    print("Received event:", event)
+    session = get_session()
+    try:
+        collected = collect_unreferenced(
+            session,
+            s3_client,
+            S3_BUCKET,
+            grace=timedelta(
+                hours=int(event.get("grace_hours", IMAGE_GC_GRACE_HOURS))
+            ),
+            batch_size=int(event.get("batch_size", DELETE_BATCH_SIZE)),
+        )
+        print("Unreferenced images collected:", collected)
+        return {"statusCode": 200, "collected": collected}
+    except Exception as e:
+        session.rollback()
+        print("Error collecting images:", str(e))
+        raise e
+    finally:
+        session.close()
@@ -0,0 +1,199 @@
+import os
+from datetime import date, datetime
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pyarrow import fs
+from sqlalchemy import cast, Date, func, literal, select
+from db_layer.db_connect import get_session
+from db_layer.basemodels import (
+    ItemStock,
+    Purchase,
+    PurchasedItem,
+    Reservation,
+    ReservedItem,
+)
+
+# Root of the snapshots: an s3://bucket/prefix URI or a local directory.
+SNAPSHOT_TARGET = os.environ.get("SNAPSHOT_TARGET", "/tmp/snapshots")
+# Rows fetched from the server-side cursor and written per Parquet file.
+SNAPSHOT_CHUNK_SIZE = int(os.environ.get("SNAPSHOT_CHUNK_SIZE", 100000))
+PARTITION_COLUMNS = ["location_id", "date"]
+
+
+def snapshot_queries(snapshot_date):
+    """
+    Returns the select statement and Arrow schema per snapshot table.
+    Every statement yields a location_id and a date column to partition on:
+    the snapshot date for stock levels, the purchase or reservation date for
+    line items.
+    """
+    return {
+        "item_stock": (
+            select(
+                ItemStock.id,
+                ItemStock.item_id,
+                ItemStock.quantity,
+                ItemStock.location_id,
+                literal(snapshot_date, Date).label("date"),
+            ).order_by(ItemStock.location_id, ItemStock.id),
+            pa.schema(
+                [
+                    ("id", pa.int32()),
+                    ("item_id", pa.int32()),
+                    ("quantity", pa.int32()),
+                    ("location_id", pa.int32()),
+                    ("date", pa.date32()),
+                ]
+            ),
+        ),
+        "purchased_items": (
+            select(
+                PurchasedItem.purchase_id,
+                PurchasedItem.item_id,
+                PurchasedItem.quantity,
+                Purchase.user_id,
+                Purchase.status,
+                Purchase.purchase_date,
+                PurchasedItem.location_id,
+                cast(Purchase.purchase_date, Date).label("date"),
+            )
+            .join(Purchase, Purchase.id == PurchasedItem.purchase_id)
+            .order_by(PurchasedItem.location_id, Purchase.purchase_date),
+            pa.schema(
+                [
+                    ("purchase_id", pa.int32()),
+                    ("item_id", pa.int32()),
+                    ("quantity", pa.int32()),
+                    ("user_id", pa.string()),
+                    ("status", pa.string()),
+                    ("purchase_date", pa.timestamp("us")),
+                    ("location_id", pa.int32()),
+                    ("date", pa.date32()),
+                ]
+            ),
+        ),
+        "reserved_items": (
+            select(
+                ReservedItem.reservation_id,
+                ReservedItem.item_id,
+                ReservedItem.quantity,
+                Reservation.user_id,
+                Reservation.status,
+                Reservation.created_at,
+                ReservedItem.location_id,
+                cast(
+                    func.coalesce(Reservation.created_at, snapshot_date), Date
+                ).label("date"),
+            )
+            .join(Reservation, Reservation.id == ReservedItem.reservation_id)
+            .order_by(ReservedItem.location_id, Reservation.created_at),
+            pa.schema(
+                [
+                    ("reservation_id", pa.int32()),
+                    ("item_id", pa.int32()),
+                    ("quantity", pa.int32()),
+                    ("user_id", pa.string()),
+                    ("status", pa.string()),
+                    ("created_at", pa.timestamp("us")),
+                    ("location_id", pa.int32()),
+                    ("date", pa.date32()),
+                ]
+            ),
+        ),
+    }
+
+
+def rows_to_table(rows, schema):
+    """
+    Converts a chunk of result rows into an Arrow table with `schema`.
+    """
+    columns = list(zip(*rows)) if rows else [[] for _ in schema]
+    return pa.Table.from_arrays(
+        [
+            pa.array(column, type=field.type)
+            for column, field in zip(columns, schema)
+        ],
+        schema=schema,
+    )
+
+
+def write_table_snapshot(session, query, schema, filesystem, root_path):
+    """
+    Reads `query` chunk by chunk through a server-side cursor and writes
+    every chunk as zstd-compressed Parquet files partitioned by location and
+    date under `root_path`.
+    Returns the number of rows written.
+    """
+    result = session.execute(
+        query.execution_options(yield_per=SNAPSHOT_CHUNK_SIZE)
+    )
+    row_count = 0
+    for chunk_number, rows in enumerate(result.partitions()):
+        pq.write_to_dataset(
+            rows_to_table(rows, schema),
+            root_path,
+            partition_cols=PARTITION_COLUMNS,
+            filesystem=filesystem,
+            basename_template=f"part-{chunk_number}-{{i}}.parquet",
+            compression="zstd",
+        )
+        row_count += len(rows)
+    return row_count
+
+
+def create_snapshot(target=None, tables=None, snapshot_date=None):
+    """
+    Writes a columnar snapshot of item_stock, purchased_items and
+    reserved_items to `target` (an s3:// URI or a local directory).
+    Each run goes to its own <target>/<timestamp>/<table>/ directory.
+    Raises ValueError, before anything is written, if `tables` names a
+    table that has no snapshot query.
+    Returns a dict with the snapshot root and the row count per table.
+    """
+    snapshot_date = snapshot_date or date.today()
+    filesystem, base_path = fs.FileSystem.from_uri(target or SNAPSHOT_TARGET)
+    snapshot_path = f"{base_path.rstrip('/')}/{datetime.now():%Y%m%dT%H%M%S}"
+    queries = snapshot_queries(snapshot_date)
+    tables = tables or list(queries)
+    # Checked up front so a typo does not leave a partial snapshot behind.
+    unknown = [name for name in tables if name not in queries]
+    if unknown:
+        raise ValueError(
+            f"Unknown snapshot tables: {', '.join(map(str, unknown))}. "
+            f"Valid tables: {', '.join(queries)}"
+        )
+
+    session = get_session(read_only=True)
+    try:
+        row_counts = {}
+        for table_name in tables:
+            query, schema = queries[table_name]
+            row_counts[table_name] = write_table_snapshot(
+                session,
+                query,
+                schema,
+                filesystem,
+                f"{snapshot_path}/{table_name}",
+            )
+        return {"snapshot_path": snapshot_path, "rows": row_counts}
+    finally:
+        session.close()
+
+
+def lambda_handler(event, context):
+    """
+    Scheduled Lambda that writes the inventory snapshot.
+    Optionally accepts "target" and "tables" in the event to override
+    SNAPSHOT_TARGET and the tables to export.
+    Needs pyarrow, e.g. from the AWS SDK for pandas layer, next to db_layer.
+    """
+    print("Received event:", event)
+    try:
+        result = create_snapshot(
+            target=event.get("target"), tables=event.get("tables")
+        )
+        print("Snapshot written:", result)
+        return {"statusCode": 200, **result}
+    except Exception as e:
+        print("Error creating snapshot:", str(e))
+        raise e
@@ -1,10 +1,15 @@
 import json
 import boto3
 import os
+from db_layer.validators import validate_request_body
 
 # Initialize Step Functions client
 sfn_client = boto3.client("stepfunctions")
 STATE_MACHINE_ARN = os.environ.get("STATE_MACHINE_ARN")
+IMAGE_DATA_DEPRECATION = (
+    "image_data is deprecated and will be removed. Create the item, then "
+    "upload its image with POST /items/{item_id}/image"
+)
 
 
 def lambda_handler(event, context):
@@ -24,6 +29,15 @@ def lambda_handler(event, context):
                     }
                 ),
             }
+        invalid = validate_request_body("POST", "/items", body)
+        if invalid:
+            return invalid
+        # Images are uploaded directly to S3 through
+        # POST /items/{item_id}/image. Inline image_data is still accepted
+        # during its deprecation period, flagged with a Deprecation header.
+        deprecated = any(
+            isinstance(item, dict) and "image_data" in item for item in body
+        )
         state_machine_input = json.dumps({"data": {"items": body}})
         # Start the execution of the state machine
         if STATE_MACHINE_ARN is not None:
@@ -32,14 +46,17 @@ def lambda_handler(event, context):
                 stateMachineArn=STATE_MACHINE_ARN,
                 input=state_machine_input,
             )
+            response_body = {
+                "message": "Saga triggered successfully",
+                "executionArn": response.get("executionArn"),
+            }
+            if not deprecated:
+                return {"statusCode": 200, "body": json.dumps(response_body)}
+            response_body["warning"] = IMAGE_DATA_DEPRECATION
             return {
                 "statusCode": 200,
-                "body": json.dumps(
-                    {
-                        "message": "Saga triggered successfully",
-                        "executionArn": response.get("executionArn"),
-                    }
-                ),
+                "headers": {"Deprecation": "true"},
+                "body": json.dumps(response_body),
             }
         else:
             return {
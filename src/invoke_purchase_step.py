@@ -1,6 +1,7 @@
 import json
 import boto3
 import os
+from db_layer.validators import validate_request_body
 
 # Initialize Step Functions client
 sfn_client = boto3.client("stepfunctions")
@@ -24,6 +25,9 @@ def lambda_handler(event, context):
                     }
                 ),
             }
+        invalid = validate_request_body("POST", "/purchases", body)
+        if invalid:
+            return invalid
         body["stock_operation"] = "deduct"
         state_machine_input = json.dumps({"data": body})
 
@@ -0,0 +1,66 @@
+import json
+import boto3
+import os
+import uuid
+
+# Initialize Step Functions client
+sfn_client = boto3.client("stepfunctions")
+STATE_MACHINE_ARN = os.environ.get("STATE_MACHINE_ARN")
+# Upper bound on the reservations started in one execution. The buffering
+# window itself is the SQS event source mapping's BatchSize and
+# MaximumBatchingWindowInSeconds.
+MAX_BATCH_SIZE = int(os.environ.get("RESERVATION_BATCH_SIZE", 50))
+
+
+def start_batch(batch):
+    """
+    Starts a single state machine execution for a batch of queued
+    reservation requests.
+    Returns the execution ARN.
+    """
+    state_machine_input = json.dumps(
+        {"data": {"batch": batch, "stock_operation": "deduct"}}
+    )
+    response = sfn_client.start_execution(
+        stateMachineArn=STATE_MACHINE_ARN,
+        name=f"reservation-batch-{uuid.uuid4().hex}",
+        input=state_machine_input,
+    )
+    return response.get("executionArn")
+
+
+def lambda_handler(event, context):
+    """
+    SQS-triggered Lambda for the reservation batching mode.
+    Groups the buffered reservation requests into batches of at most
+    MAX_BATCH_SIZE and starts one saga execution per batch. Records that
+    cannot be parsed, and records of a batch that could not be started,
+    are reported as failures so SQS redelivers only those.
+    """
+    records = event.get("Records", [])
+
+    if STATE_MACHINE_ARN is None:
+        raise ValueError("STATE_MACHINE_ARN environment variable not set")
+
+    execution_arns = []
+    failures = []
+    parsed = []
+    for record in records:
+        try:
+            parsed.append((record, json.loads(record["body"])))
+        except (KeyError, TypeError, ValueError) as e:
+            print("Malformed reservation request:", record, str(e))
+            failures.append({"itemIdentifier": record["messageId"]})
+
+    for start in range(0, len(parsed), MAX_BATCH_SIZE):
+        chunk = parsed[start : start + MAX_BATCH_SIZE]
+        try:
+            execution_arns.append(start_batch([body for _, body in chunk]))
+        except Exception as e:
+            print("Error starting reservation batch:", str(e))
+            failures.extend(
+                {"itemIdentifier": record["messageId"]} for record, _ in chunk
+            )
+
+    print("Started reservation batches:", execution_arns)
+    return {"batchItemFailures": failures}
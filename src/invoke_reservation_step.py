@@ -1,10 +1,33 @@
 import json
 import boto3
 import os
+import uuid
+from db_layer.validators import validate_request_body
 
 # Initialize Step Functions client
 sfn_client = boto3.client("stepfunctions")
+sqs_client = boto3.client("sqs")
 STATE_MACHINE_ARN = os.environ.get("STATE_MACHINE_ARN")
+# When set, reservations are buffered on this queue and started in batches
+# by invoke_reservation_batch instead of one execution per request.
+# A batch shares one saga execution. A reservation whose stock lines fail is
+# cancelled on its own (see update_stock), but a step that fails as a whole,
+# e.g. on a database error, compensates every reservation in the batch.
+RESERVATION_QUEUE_URL = os.environ.get("RESERVATION_QUEUE_URL")
+
+
+def enqueue_reservation(body):
+    """
+    Buffers a reservation request on the batching queue.
+    Returns the request id the reservation is stored with, which the caller
+    polls with GET /reservations?request_id=<id>.
+    """
+    request_id = uuid.uuid4().hex
+    sqs_client.send_message(
+        QueueUrl=RESERVATION_QUEUE_URL,
+        MessageBody=json.dumps({**body, "request_id": request_id}),
+    )
+    return request_id
 
 
 def lambda_handler(event, context):
@@ -24,6 +47,24 @@ def lambda_handler(event, context):
                     }
                 ),
             }
+        invalid = validate_request_body("POST", "/reservations", body)
+        if invalid:
+            return invalid
+        if RESERVATION_QUEUE_URL:
+            request_id = enqueue_reservation(body)
+            status_url = f"/reservations?request_id={request_id}"
+            return {
+                "statusCode": 202,
+                "headers": {"Location": status_url},
+                "body": json.dumps(
+                    {
+                        "message": "Reservation queued for processing",
+                        "requestId": request_id,
+                        "statusUrl": status_url,
+                    }
+                ),
+            }
+
         body["stock_operation"] = "deduct"
         state_machine_input = json.dumps({"data": body})
 
@@ -0,0 +1,128 @@
+import json
+import os
+from urllib.parse import unquote_plus
+import boto3
+from db_layer.db_connect import get_session
+from db_layer.basemodels import Item
+from db_layer.generate_s3_url import generate_presigned_url
+from db_layer.http_cache import PRESIGNED_URL_EXPIRATION
+from db_layer.image_derivatives import (
+    DERIVATIVE_SIZES,
+    ORIGINAL_SIZE,
+    generate_derivatives,
+)
+
+s3_client = boto3.client("s3", region_name="eu-north-1")
+S3_BUCKET = os.environ.get("S3_BUCKET")
+
+
+def handle_upload_event(event):
+    """
+    Renders all derivative sizes of images uploaded to the bucket.
+    Expects an S3 ObjectCreated notification for the originals' prefix.
+    """
+    generated = {}
+    for record in event["Records"]:
+        bucket_name = record["s3"]["bucket"]["name"]
+        key = unquote_plus(record["s3"]["object"]["key"])
+        session = get_session()
+        try:
+            generated[key] = generate_derivatives(
+                session, s3_client, bucket_name, key
+            )
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+    print("Derivatives generated:", generated)
+    return {"statusCode": 200, "generated": generated}
+
+
+def get_item_image(item_id, size):
+    """
+    Redirects to a pre-signed URL of an item's image in the requested size,
+    rendering the derivative on its first request.
+    """
+    if size != ORIGINAL_SIZE and size not in DERIVATIVE_SIZES:
+        return {
+            "statusCode": 400,
+            "body": json.dumps(
+                {
+                    "message": "Invalid image size",
+                    "error": f"Expected one of "
+                    f"{sorted(DERIVATIVE_SIZES) + [ORIGINAL_SIZE]}",
+                }
+            ),
+        }
+
+    session = get_session()
+    try:
+        item = session.get(Item, item_id)
+        if item is None or not item.s3_key:
+            return {
+                "statusCode": 404,
+                "body": json.dumps({"message": "Image not found"}),
+            }
+        key = item.s3_key
+        if size != ORIGINAL_SIZE:
+            key = generate_derivatives(
+                session, s3_client, S3_BUCKET, item.s3_key, [size]
+            )[size]
+            session.commit()
+        return {
+            "statusCode": 302,
+            "headers": {
+                "Location": generate_presigned_url(
+                    S3_BUCKET,
+                    key,
+                    expiration=PRESIGNED_URL_EXPIRATION,
+                    s3_client=s3_client,
+                ),
+                "Cache-Control": "private, max-age=60",
+            },
+            "body": "",
+        }
+    except Exception as e:
+        session.rollback()
+        print("Error in get_item_image:", str(e))
+        return {
+            "statusCode": 500,
+            "body": json.dumps(
+                {"message": "Error fetching image", "error": str(e)}
+            ),
+        }
+    finally:
+        session.close()
+
+
+def lambda_handler(event, context):
+    """
+    Main Lambda handler for image derivatives:
+      - S3 ObjectCreated notifications render every size at upload;
+      - GET /items/{item_id}/image/{size} redirects to the requested size,
+        rendering it first if it is missing.
+    """
+    if "Records" in event:
+        return handle_upload_event(event)
+
+    if (
+        event.get("resource") != "/items/{item_id}/image/{size}"
+        or event.get("httpMethod") != "GET"
+    ):
+        return {
+            "statusCode": 404,
+            "body": json.dumps({"message": "Not Found"}),
+        }
+    path_params = event.get("pathParameters") or {}
+    try:
+        item_id = int(path_params.get("item_id"))
+    except (TypeError, ValueError) as e:
+        return {
+            "statusCode": 400,
+            "body": json.dumps(
+                {"message": "Invalid item_id", "error": str(e)}
+            ),
+        }
+    return get_item_image(item_id, path_params.get("size"))
@@ -0,0 +1,255 @@
+import json
+import os
+import boto3
+from botocore.exceptions import ClientError
+from db_layer.db_connect import get_session
+from db_layer.basemodels import ImageObject, Item
+from db_layer.generate_s3_url import generate_presigned_url
+from db_layer.image_store import (
+    acquire_image,
+    image_key,
+    is_sha256,
+    release_image,
+    reserve_image,
+    sha256_base64,
+)
+from db_layer.validators import validate_request_body
+
+s3_client = boto3.client("s3", region_name="eu-north-1")
+S3_BUCKET = os.environ.get("S3_BUCKET")
+
+# Image types accepted for upload and the key extension of each.
+IMAGE_CONTENT_TYPES = {
+    "image/jpeg": "jpg",
+    "image/png": "png",
+    "image/webp": "webp",
+}
+# Largest image accepted for upload.
+MAX_IMAGE_BYTES = int(os.environ.get("MAX_IMAGE_BYTES", 10 * 1024 * 1024))
+# Seconds the upload URL stays valid.
+UPLOAD_URL_EXPIRATION = 900
+
+
+def parse_upload_request(payload):
+    """
+    Validates an upload request: "sha256" (hex digest of the file),
+    "size" (bytes) and "content_type", one of IMAGE_CONTENT_TYPES.
+    Returns (sha256, size, content_type) or raises ValueError.
+    """
+    content_type = payload.get("content_type", "image/jpeg")
+    if content_type not in IMAGE_CONTENT_TYPES:
+        raise ValueError(
+            f"Expected content_type in {sorted(IMAGE_CONTENT_TYPES)}"
+        )
+    sha256 = str(payload.get("sha256", "")).lower()
+    if not is_sha256(sha256):
+        raise ValueError("Expected sha256 to be a hex SHA-256 digest")
+    size = int(payload.get("size", 0))
+    if not 0 < size <= MAX_IMAGE_BYTES:
+        raise ValueError(f"Expected size between 1 and {MAX_IMAGE_BYTES}")
+    return sha256, size, content_type
+
+
+def create_upload(item_id, payload):
+    """
+    Prepares the upload of one image of an item. Images are stored once
+    per content hash:
+      - if the same image is already stored, returns its key with
+        "exists": true and nothing needs uploading;
+      - otherwise returns a presigned PUT URL and the headers to send
+        with it. The signature pins the key, type, size and SHA-256, so
+        S3 rejects any other content.
+    """
+    try:
+        sha256, size, content_type = parse_upload_request(payload)
+    except (TypeError, ValueError) as e:
+        return {
+            "statusCode": 400,
+            "body": json.dumps(
+                {"message": "Invalid upload request", "error": str(e)}
+            ),
+        }
+
+    session = get_session()
+    try:
+        if session.get(Item, item_id) is None:
+            return {
+                "statusCode": 404,
+                "body": json.dumps({"message": "Item not found"}),
+            }
+        image = reserve_image(
+            session,
+            sha256,
+            image_key(sha256, IMAGE_CONTENT_TYPES[content_type]),
+            content_type,
+            size,
+        )
+        session.commit()
+        if image.status == "stored":
+            body = {"key": image.s3_key, "exists": True}
+        else:
+            # The pending object may have been registered by an earlier
+            # request, so sign what was registered.
+            headers = {
+                "Content-Type": image.content_type,
+                "Content-Length": str(image.size),
+                "x-amz-checksum-sha256": sha256_base64(image.sha256),
+            }
+            url = s3_client.generate_presigned_url(
+                "put_object",
+                Params={
+                    "Bucket": S3_BUCKET,
+                    "Key": image.s3_key,
+                    "ContentType": image.content_type,
+                    "ContentLength": image.size,
+                    "ChecksumSHA256": headers["x-amz-checksum-sha256"],
+                },
+                ExpiresIn=UPLOAD_URL_EXPIRATION,
+            )
+            body = {
+                "key": image.s3_key,
+                "exists": False,
+                "url": url,
+                "method": "PUT",
+                "headers": headers,
+                "expires_in": UPLOAD_URL_EXPIRATION,
+            }
+        return {
+            "statusCode": 201,
+            "headers": {"Content-Type": "application/json"},
+            "body": json.dumps(body),
+        }
+    except Exception as e:
+        session.rollback()
+        print("Error in create_upload:", str(e))
+        return {
+            "statusCode": 500,
+            "body": json.dumps(
+                {"message": "Error creating upload", "error": str(e)}
+            ),
+        }
+    finally:
+        session.close()
+
+
+def verify_upload(image):
+    """
+    Returns whether the object of a pending image is in S3 with the
+    expected SHA-256 checksum.
+    """
+    try:
+        head = s3_client.head_object(
+            Bucket=S3_BUCKET, Key=image.s3_key, ChecksumMode="ENABLED"
+        )
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey"):
+            return False
+        raise
+    return head.get("ChecksumSHA256") == sha256_base64(image.sha256)
+
+
+def confirm_upload(item_id, payload):
+    """
+    Attaches an image to an item. Expects `payload` to hold the "key"
+    returned by create_upload. A pending image is checked in S3 first.
+    The item takes a reference on the image and releases the one it
+    replaces.
+    """
+    key = payload.get("key")
+    session = get_session()
+    try:
+        item = session.get(Item, item_id)
+        if item is None:
+            return {
+                "statusCode": 404,
+                "body": json.dumps({"message": "Item not found"}),
+            }
+        image = (
+            session.query(ImageObject)
+            .filter(ImageObject.s3_key == key)
+            .first()
+        )
+        if image is None:
+            return {
+                "statusCode": 404,
+                "body": json.dumps({"message": "Image not found"}),
+            }
+        if image.status != "stored":
+            if not verify_upload(image):
+                return {
+                    "statusCode": 409,
+                    "body": json.dumps({"message": "Image not uploaded yet"}),
+                }
+            image.status = "stored"
+            session.flush()
+
+        if item.s3_key != key:
+            if not acquire_image(session, key):
+                raise RuntimeError(f"Image {key} is not stored")
+            release_image(session, item.s3_key)
+            item.s3_key = key
+        session.commit()
+        return {
+            "statusCode": 200,
+            "headers": {"Content-Type": "application/json"},
+            "body": json.dumps(
+                {
+                    "id": item.id,
+                    "s3_key": key,
+                    "image_url": generate_presigned_url(
+                        S3_BUCKET, key, s3_client=s3_client
+                    ),
+                }
+            ),
+        }
+    except Exception as e:
+        session.rollback()
+        print("Error in confirm_upload:", str(e))
+        return {
+            "statusCode": 500,
+            "body": json.dumps(
+                {"message": "Error confirming upload", "error": str(e)}
+            ),
+        }
+    finally:
+        session.close()
+
+
+def lambda_handler(event, context):
+    """
+    Main Lambda handler for item image uploads. Image bytes go straight
+    from the client to S3 and never pass through the API:
+      - POST /items/{item_id}/image with the file's sha256, size and
+        content_type returns a presigned PUT URL, or "exists": true when
+        the image is already stored;
+      - the client PUTs the file to "url" with the returned "headers";
+      - POST /items/{item_id}/image/confirm with the "key" attaches it.
+    """
+    routes = {
+        "/items/{item_id}/image": create_upload,
+        "/items/{item_id}/image/confirm": confirm_upload,
+    }
+    resource = event.get("resource", "")
+    if resource not in routes or event.get("httpMethod") != "POST":
+        return {
+            "statusCode": 404,
+            "body": json.dumps({"message": "Not Found"}),
+        }
+
+    item_id = (event.get("pathParameters") or {}).get("item_id")
+    try:
+        item_id = int(item_id)
+        payload = json.loads(event.get("body") or "{}")
+        if not isinstance(payload, dict):
+            raise ValueError("Expected a JSON object")
+    except (TypeError, ValueError) as e:
+        return {
+            "statusCode": 400,
+            "body": json.dumps(
+                {"message": "Invalid image request", "error": str(e)}
+            ),
+        }
+    invalid = validate_request_body("POST", resource, payload)
+    if invalid:
+        return invalid
+    return routes[resource](item_id, payload)
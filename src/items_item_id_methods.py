@@ -1,27 +1,75 @@
 import json
-from db_layer.db_connect import get_session
+from db_layer.db_connect import get_session, use_replica
 from db_layer.basemodels import Item
 from db_layer.generate_s3_url import generate_presigned_url
+from db_layer.image_derivatives import (
+    DERIVATIVE_SIZES,
+    ORIGINAL_SIZE,
+    get_derivative_keys,
+)
+from db_layer.image_store import release_image
+from db_layer.validators import validate_request_body
+from db_layer.stock_totals import get_stock_totals
+from db_layer.prepared import execute_prepared
+from db_layer.http_cache import (
+    cache_headers,
+    get_if_none_match,
+    get_table_versions,
+    is_not_modified,
+    make_etag,
+    not_modified_response,
+    presigned_url_epoch,
+)
 import os
 
 S3_BUCKET = os.environ.get("S3_BUCKET")
 
 
-def get_item(item_id):
-    session = get_session()
+def get_item(
+    item_id, read_only=True, if_none_match=None, image_size=ORIGINAL_SIZE
+):
+    session = get_session(read_only=read_only)
     try:
-        item = session.query(Item).filter(Item.id == item_id).first()
+        # The ETag only needs the items table version and the stock total,
+        # both primary key lookups, so a revalidation skips the item query
+        # and the pre-signing.
+        versions = get_table_versions(session, ["items", "image_derivatives"])
+        total_quantity = get_stock_totals(session, [item_id]).get(
+            int(item_id), 0
+        )
+        etag = make_etag(
+            "item",
+            item_id,
+            versions["items"],
+            versions["image_derivatives"],
+            image_size,
+            total_quantity,
+            presigned_url_epoch(),
+        )
+        if is_not_modified(if_none_match, etag):
+            return not_modified_response(etag)
+
+        item = execute_prepared(session, "item_by_id", int(item_id)).first()
         if item:
+            image_key = item.s3_key
+            if image_size != ORIGINAL_SIZE:
+                image_key = get_derivative_keys(
+                    session, [item.s3_key], image_size
+                ).get(item.s3_key, item.s3_key)
             response_body = {
                 "id": item.id,
                 "name": item.name,
                 "description": item.description,
                 "price": item.price,
-                "image_url": generate_presigned_url(S3_BUCKET, item.s3_key),
+                "image_url": generate_presigned_url(S3_BUCKET, image_key),
+                "total_quantity": total_quantity,
             }
             return {
                 "statusCode": 200,
-                "headers": {"Content-Type": "application/json"},
+                "headers": {
+                    "Content-Type": "application/json",
+                    **cache_headers(etag),
+                },
                 "body": json.dumps(response_body),
             }
         else:
@@ -55,6 +103,7 @@ def delete_item(item_id):
             "name": item.name,
             "description": item.description,
         }
+        release_image(session, item.s3_key)
         session.delete(item)
         session.commit()
         return {
@@ -128,9 +177,30 @@ def lambda_handler(event, context):
             "statusCode": 400,
             "body": json.dumps({"message": "Missing item_id in path"}),
         }
+    try:
+        item_id = int(item_id)
+    except ValueError as e:
+        return {
+            "statusCode": 400,
+            "body": json.dumps(
+                {"message": "Invalid item_id", "error": str(e)}
+            ),
+        }
 
     if http_method == "GET":
-        return get_item(item_id)
+        query_params = event.get("queryStringParameters") or {}
+        image_size = query_params.get("image_size") or ORIGINAL_SIZE
+        if image_size != ORIGINAL_SIZE and image_size not in DERIVATIVE_SIZES:
+            return {
+                "statusCode": 400,
+                "body": json.dumps({"message": "Invalid image_size"}),
+            }
+        return get_item(
+            item_id,
+            read_only=use_replica(event),
+            if_none_match=get_if_none_match(event),
+            image_size=image_size,
+        )
     elif http_method == "DELETE":
         return delete_item(item_id)
     elif http_method == "PUT":
@@ -143,6 +213,9 @@ def lambda_handler(event, context):
                     {"message": "Invalid JSON", "error": str(e)}
                 ),
             }
+        invalid = validate_request_body("PUT", "/items/{item_id}", payload)
+        if invalid:
+            return invalid
         return update_item(item_id, payload)
     else:
         return {
@@ -1,14 +1,60 @@
+import base64
+import binascii
 import json
 import os
+import time
 import boto3
-from db_layer.db_connect import get_session
+from sqlalchemy import Integer, and_, any_, bindparam, cast, func, select
+from sqlalchemy import tuple_
+from sqlalchemy.dialects.postgresql import ARRAY, REAL
+from db_layer.db_connect import get_session, use_replica
 from db_layer.generate_s3_url import generate_presigned_url
+from db_layer.image_derivatives import (
+    DERIVATIVE_SIZES,
+    LISTING_SIZE,
+    ORIGINAL_SIZE,
+    get_derivative_keys,
+)
+from db_layer.http_cache import (
+    cache_headers,
+    get_if_none_match,
+    get_table_versions,
+    is_not_modified,
+    make_etag,
+    not_modified_response,
+    presigned_url_epoch,
+)
+from db_layer.fields import field_columns, parse_fields
+from db_layer.responses import json_response
+from db_layer.validators import validate_request_body
 from db_layer.basemodels import (
+    ITEM_SEARCH_CONFIG,
+    ImageDerivative,
     Item,
+    ItemStockTotal,
 )
 
 s3_client = boto3.client("s3")
 S3_BUCKET = os.environ.get("S3_BUCKET")
+# Fields of items in listings, and the columns of those not named after one.
+ITEM_FIELDS = ("id", "name", "description", "price", "image_url")
+ITEM_FIELD_COLUMNS = {"image_url": ["s3_key"]}
+# Most ids one lookup accepts, matching maxItems of ItemLookupRequest.
+MAX_LOOKUP_IDS = 500
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+# ts_headline options of the highlighted snippets in search results.
+HEADLINE_OPTIONS = "StartSel=<mark>, StopSel=</mark>, MaxWords=35, MinWords=15"
+# Seconds autocomplete suggestions are reused by warm invocations.
+AUTOCOMPLETE_TTL = float(os.environ.get("AUTOCOMPLETE_TTL", 30))
+AUTOCOMPLETE_CACHE_SIZE = 4096
+# Shorter prefixes have no trigram to look up and match most names.
+MIN_AUTOCOMPLETE_LENGTH = 3
+DEFAULT_AUTOCOMPLETE_LIMIT = 10
+MAX_AUTOCOMPLETE_LIMIT = 25
+
+# (lowercased prefix, limit) -> (loaded_at, suggestions), oldest first.
+autocomplete_cache = {}
 
 
 def get_items(event):
@@ -16,8 +62,26 @@ def get_items(event):
     Retrieves a list of items from the database with pagination.
     Expects query string parameters "skip" and "limit" for pagination.
     Defaults: skip=0, limit=100.
+    Image URLs point at the "image_size" derivative of each image, the
+    small one by default, or at the original with image_size=original.
+    Images without that derivative yet link to the original.
+    "fields" picks the returned fields out of ITEM_FIELDS, e.g.
+    fields=id,price; only their columns are selected, and images are only
+    looked up and presigned when image_url is requested.
+    Responses carry a weak ETag derived from the items table version; a
+    matching If-None-Match header is answered with 304 before querying.
     """
-    session = get_session()
+    try:
+        fields = parse_fields(event, ITEM_FIELDS)
+    except ValueError as e:
+        return {
+            "statusCode": 400,
+            "body": json.dumps(
+                {"message": "Invalid fields parameter", "error": str(e)}
+            ),
+        }
+    with_images = "image_url" in fields
+    session = get_session(read_only=use_replica(event))
     try:
         query_params = event.get("queryStringParameters") or {}
         try:
@@ -28,36 +92,427 @@ def get_items(event):
             limit = 100
         if limit > 1000:
             limit = 1000
+        image_size = query_params.get("image_size") or LISTING_SIZE
+        if image_size != ORIGINAL_SIZE and image_size not in DERIVATIVE_SIZES:
+            return {
+                "statusCode": 400,
+                "body": json.dumps({"message": "Invalid image_size"}),
+            }
+
+        versions = get_table_versions(session, ["items", "image_derivatives"])
+        etag = make_etag(
+            "items",
+            versions["items"],
+            versions["image_derivatives"],
+            skip,
+            limit,
+            ",".join(fields),
+            image_size,
+            presigned_url_epoch() if with_images else None,
+        )
+        if is_not_modified(get_if_none_match(event), etag):
+            return not_modified_response(etag)
+
+        items = (
+            session.query(*field_columns(Item, fields, ITEM_FIELD_COLUMNS))
+            .offset(skip)
+            .limit(limit)
+            .all()
+        )
+        derivatives = (
+            {}
+            if image_size == ORIGINAL_SIZE or not with_images
+            else get_derivative_keys(
+                session, [item.s3_key for item in items], image_size
+            )
+        )
+        # Convert each row to a dictionary of the requested fields.
+        items_list = []
+        for item in items:
+            item_dict = {
+                field: getattr(item, field)
+                for field in fields
+                if field != "image_url"
+            }
+            if with_images:
+                item_dict["image_url"] = generate_presigned_url(
+                    S3_BUCKET,
+                    derivatives.get(item.s3_key, item.s3_key),
+                    s3_client=s3_client,
+                )
+            items_list.append(item_dict)
+        return json_response(200, items_list, headers=cache_headers(etag))
+    except Exception as e:
+        print("Error fetching items:", str(e))
+        return {
+            "statusCode": 500,
+            "body": json.dumps(
+                {"message": "Error fetching items", "error": str(e)}
+            ),
+        }
+    finally:
+        session.close()
+
+
+def encode_search_cursor(rank, item_id):
+    """
+    Returns the opaque continuation token of a search result page ending at
+    the given rank and item id.
+    """
+    token = json.dumps([rank, item_id]).encode()
+    return base64.urlsafe_b64encode(token).decode()
+
+
+def decode_search_cursor(cursor):
+    """
+    Returns the (rank, item_id) of a continuation token.
+    Raises ValueError for tokens not made by encode_search_cursor.
+    """
+    try:
+        rank, item_id = json.loads(base64.urlsafe_b64decode(cursor))
+    except (binascii.Error, TypeError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+    if not isinstance(rank, (int, float)) or not isinstance(item_id, int):
+        raise ValueError("Invalid cursor")
+    return rank, item_id
+
+
+def query_search_page(session, search, limit, after=None):
+    """
+    Returns up to `limit` items matching the web search syntax query
+    `search`, best ranked first, as rows of (Item, rank, name headline,
+    description headline).
+    Matches come from the GIN index on search_vector. The page is picked
+    in a subquery, so snippets are only rendered for the returned rows.
+    `after` is the (rank, item_id) of the last row of the previous page.
+    """
+    ts_query = func.websearch_to_tsquery(ITEM_SEARCH_CONFIG, search)
+    rank = func.ts_rank_cd(Item.search_vector, ts_query)
+    page = select(Item.id, rank.label("rank")).where(
+        Item.search_vector.op("@@")(ts_query)
+    )
+    if after is not None:
+        after_rank, after_id = after
+        page = page.where(
+            tuple_(rank, Item.id) < tuple_(cast(after_rank, REAL), after_id)
+        )
+    page = page.order_by(rank.desc(), Item.id.desc()).limit(limit).subquery()
+    return (
+        session.query(
+            Item,
+            page.c.rank,
+            func.ts_headline(
+                ITEM_SEARCH_CONFIG, Item.name, ts_query, HEADLINE_OPTIONS
+            ),
+            func.ts_headline(
+                ITEM_SEARCH_CONFIG,
+                Item.description,
+                ts_query,
+                HEADLINE_OPTIONS,
+            ),
+        )
+        .join(page, page.c.id == Item.id)
+        .order_by(page.c.rank.desc(), Item.id.desc())
+        .all()
+    )
+
+
+def search_items(event):
+    """
+    Searches item names and descriptions with the "q" query parameter,
+    which takes web search syntax ("quoted phrases", or, -excluded).
+    Returns {"items": [...], "next_cursor": ...}, best matches first, each
+    item with its rank and <mark>-highlighted name and description
+    snippets. Pass next_cursor as "cursor" for the next page; it is null
+    on the last one. "limit" defaults to 20, at most 100.
+    Image URLs and ETags work as in get_items.
+    """
+    query_params = event.get("queryStringParameters") or {}
+    search = (query_params.get("q") or "").strip()
+    if not search:
+        return {
+            "statusCode": 400,
+            "body": json.dumps({"message": "Empty search query"}),
+        }
+    try:
+        limit = int(query_params.get("limit", DEFAULT_SEARCH_LIMIT))
+    except ValueError:
+        limit = DEFAULT_SEARCH_LIMIT
+    limit = min(max(limit, 1), MAX_SEARCH_LIMIT)
+    cursor = query_params.get("cursor")
+    try:
+        after = decode_search_cursor(cursor) if cursor else None
+    except ValueError as e:
+        return {
+            "statusCode": 400,
+            "body": json.dumps({"message": "Invalid cursor", "error": str(e)}),
+        }
+    image_size = query_params.get("image_size") or LISTING_SIZE
+    if image_size != ORIGINAL_SIZE and image_size not in DERIVATIVE_SIZES:
+        return {
+            "statusCode": 400,
+            "body": json.dumps({"message": "Invalid image_size"}),
+        }
 
-        items = session.query(Item).offset(skip).limit(limit).all()
-        # Convert each Item object to a dictionary.
+    session = get_session(read_only=use_replica(event))
+    try:
+        versions = get_table_versions(session, ["items", "image_derivatives"])
+        etag = make_etag(
+            "items-search",
+            versions["items"],
+            versions["image_derivatives"],
+            search,
+            cursor,
+            limit,
+            image_size,
+            presigned_url_epoch(),
+        )
+        if is_not_modified(get_if_none_match(event), etag):
+            return not_modified_response(etag)
+
+        # One extra row tells whether there is a next page.
+        rows = query_search_page(session, search, limit + 1, after)
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last_item, last_rank = rows[-1][:2]
+            next_cursor = encode_search_cursor(last_rank, last_item.id)
+        derivatives = (
+            {}
+            if image_size == ORIGINAL_SIZE
+            else get_derivative_keys(
+                session, [row[0].s3_key for row in rows], image_size
+            )
+        )
         items_list = [
             {
                 "id": item.id,
                 "name": item.name,
                 "description": item.description,
                 "price": item.price,
-                "image_url": generate_presigned_url(S3_BUCKET, item.s3_key),
+                "image_url": generate_presigned_url(
+                    S3_BUCKET,
+                    derivatives.get(item.s3_key, item.s3_key),
+                    s3_client=s3_client,
+                ),
+                "rank": rank,
+                "highlights": {
+                    "name": name_headline,
+                    "description": description_headline,
+                },
             }
-            for item in items
+            for item, rank, name_headline, description_headline in rows
+        ]
+        return json_response(
+            200,
+            {"items": items_list, "next_cursor": next_cursor},
+            headers=cache_headers(etag),
+        )
+    except Exception as e:
+        print("Error searching items:", str(e))
+        return {
+            "statusCode": 500,
+            "body": json.dumps(
+                {"message": "Error searching items", "error": str(e)}
+            ),
+        }
+    finally:
+        session.close()
+
+
+def query_name_suggestions(session, prefix, limit):
+    """
+    Returns (id, name) of up to `limit` items whose name contains
+    `prefix`, ignoring case; names starting with it come first, shorter
+    names before longer ones. The ILIKE match is served by the trigram
+    index ix_items_name_trgm.
+    """
+    return (
+        session.query(Item.id, Item.name)
+        .filter(Item.name.icontains(prefix, autoescape=True))
+        .order_by(
+            Item.name.istartswith(prefix, autoescape=True).desc(),
+            func.length(Item.name),
+            Item.name,
+            Item.id,
+        )
+        .limit(limit)
+        .all()
+    )
+
+
+def autocomplete_items(event):
+    """
+    Suggests items for a search box from the "q" query parameter, as a list
+    of {"id", "name"}. "limit" defaults to 10, at most 25. Prefixes shorter
+    than MIN_AUTOCOMPLETE_LENGTH characters get no suggestions.
+    Suggestions are cached in-process per prefix for AUTOCOMPLETE_TTL
+    seconds, so repeated keystrokes across users rarely reach the database.
+    """
+    query_params = event.get("queryStringParameters") or {}
+    prefix = " ".join((query_params.get("q") or "").split()).lower()
+    try:
+        limit = int(query_params.get("limit", DEFAULT_AUTOCOMPLETE_LIMIT))
+    except ValueError:
+        limit = DEFAULT_AUTOCOMPLETE_LIMIT
+    limit = min(max(limit, 1), MAX_AUTOCOMPLETE_LIMIT)
+    headers = {"Cache-Control": f"public, max-age={int(AUTOCOMPLETE_TTL)}"}
+    if len(prefix) < MIN_AUTOCOMPLETE_LENGTH:
+        return json_response(200, [], headers=headers)
+
+    key = (prefix, limit)
+    now = time.monotonic()
+    cached = autocomplete_cache.get(key)
+    if cached is not None and now - cached[0] <= AUTOCOMPLETE_TTL:
+        return json_response(200, cached[1], headers=headers)
+
+    session = get_session(read_only=use_replica(event))
+    try:
+        suggestions = [
+            {"id": item_id, "name": name}
+            for item_id, name in query_name_suggestions(session, prefix, limit)
         ]
+    except Exception as e:
+        print("Error fetching suggestions:", str(e))
+        return {
+            "statusCode": 500,
+            "body": json.dumps(
+                {"message": "Error fetching suggestions", "error": str(e)}
+            ),
+        }
+    finally:
+        session.close()
+
+    autocomplete_cache.pop(key, None)
+    autocomplete_cache[key] = (now, suggestions)
+    while len(autocomplete_cache) > AUTOCOMPLETE_CACHE_SIZE:
+        del autocomplete_cache[next(iter(autocomplete_cache))]
+    return json_response(200, suggestions, headers=headers)
+
+
+def parse_item_ids(value):
+    """
+    Parses the comma separated "ids" query parameter into a list of unique
+    item ids in request order. Raises ValueError for malformed lists.
+    """
+    item_ids = []
+    for part in value.split(","):
+        item_id = int(part)
+        if item_id < 1:
+            raise ValueError(f"Invalid item id: {part}")
+        item_ids.append(item_id)
+    return list(dict.fromkeys(item_ids))
+
+
+def query_items_by_id(session, item_ids, image_size):
+    """
+    Fetches the items with their stock totals and `image_size` derivative
+    keys in one query. The ids are bound as one array parameter, so the
+    statement is the same for any number of ids.
+    Returns rows of (Item, total_quantity, derivative_key).
+    """
+    return (
+        session.query(
+            Item, ItemStockTotal.total_quantity, ImageDerivative.s3_key
+        )
+        .outerjoin(ItemStockTotal, ItemStockTotal.item_id == Item.id)
+        .outerjoin(
+            ImageDerivative,
+            and_(
+                ImageDerivative.source_key == Item.s3_key,
+                ImageDerivative.name == image_size,
+            ),
+        )
+        .filter(
+            Item.id
+            == any_(bindparam("item_ids", item_ids, type_=ARRAY(Integer)))
+        )
+        .all()
+    )
+
+
+def get_items_by_id(event, item_ids, image_size):
+    """
+    Retrieves the given items keyed by id, with their total stock and
+    image URLs, in a single query. Each distinct image is presigned once.
+    Ids without an item are listed under "missing".
+    """
+    if not item_ids:
         return {
-            "statusCode": 200,
-            "headers": {"Content-Type": "application/json"},
-            "body": json.dumps(items_list),
+            "statusCode": 400,
+            "body": json.dumps({"message": "No item ids given"}),
+        }
+    if len(item_ids) > MAX_LOOKUP_IDS:
+        return {
+            "statusCode": 400,
+            "body": json.dumps(
+                {"message": f"At most {MAX_LOOKUP_IDS} ids per lookup"}
+            ),
         }
+    image_size = image_size or LISTING_SIZE
+    if image_size != ORIGINAL_SIZE and image_size not in DERIVATIVE_SIZES:
+        return {
+            "statusCode": 400,
+            "body": json.dumps({"message": "Invalid image_size"}),
+        }
+
+    session = get_session(read_only=use_replica(event))
+    try:
+        rows = query_items_by_id(session, item_ids, image_size)
+        image_urls = {}
+        items = {}
+        for item, total_quantity, derivative_key in rows:
+            image_key = derivative_key or item.s3_key
+            if image_key not in image_urls:
+                image_urls[image_key] = generate_presigned_url(
+                    S3_BUCKET, image_key, s3_client=s3_client
+                )
+            items[str(item.id)] = {
+                "id": item.id,
+                "name": item.name,
+                "description": item.description,
+                "price": item.price,
+                "image_url": image_urls[image_key],
+                "total_quantity": total_quantity or 0,
+            }
+        missing = [
+            item_id for item_id in item_ids if str(item_id) not in items
+        ]
+        return json_response(200, {"items": items, "missing": missing})
     except Exception as e:
-        print("Error fetching items:", str(e))
+        print("Error looking up items:", str(e))
         return {
             "statusCode": 500,
             "body": json.dumps(
-                {"message": "Error fetching items", "error": str(e)}
+                {"message": "Error looking up items", "error": str(e)}
             ),
         }
     finally:
         session.close()
 
 
+def lookup_items(event):
+    """
+    Handles POST /items/lookup, the body variant of GET /items?ids= for
+    id lists too long for a URL. Expects {"ids": [...], "image_size"}.
+    """
+    try:
+        data = json.loads(event.get("body") or "{}")
+    except json.JSONDecodeError as e:
+        return {
+            "statusCode": 400,
+            "body": json.dumps(
+                {"message": "Invalid JSON in request body", "error": str(e)}
+            ),
+        }
+    invalid = validate_request_body("POST", "/items/lookup", data)
+    if invalid:
+        return invalid
+    return get_items_by_id(
+        event, list(dict.fromkeys(data["ids"])), data.get("image_size")
+    )
+
+
 def lambda_handler(event, context):
     """
     Main Lambda handler. Routes requests based on HTTP method.
@@ -69,9 +524,27 @@ def lambda_handler(event, context):
     # Route for /items endpoint.
     if resource == "/items":
         if http_method == "GET":
+            query_params = event.get("queryStringParameters") or {}
+            if "ids" in query_params:
+                try:
+                    item_ids = parse_item_ids(query_params["ids"])
+                except ValueError as e:
+                    return {
+                        "statusCode": 400,
+                        "body": json.dumps(
+                            {"message": "Invalid ids", "error": str(e)}
+                        ),
+                    }
+                return get_items_by_id(
+                    event, item_ids, query_params.get("image_size")
+                )
+            if "q" in query_params:
+                return search_items(event)
             return get_items(event)
-        http_method = event.get("httpMethod", "")
-    resource = event.get("resource", "")
+    if resource == "/items/lookup" and http_method == "POST":
+        return lookup_items(event)
+    if resource == "/items/autocomplete" and http_method == "GET":
+        return autocomplete_items(event)
 
     # If the request doesn't match any endpoint, return 404.
     return {"statusCode": 404, "body": json.dumps({"message": "Not Found"})}
@@ -1,79 +1,190 @@
+import asyncio
+import base64
+import hashlib
 import os
+from datetime import datetime
 import boto3
-import base64
-import uuid
-from db_layer.db_connect import get_session
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from db_layer.async_aws import AsyncClient, async_handler
+from db_layer.async_db import get_async_session
 from db_layer.basemodels import (
+    ImageObject,
     Item,
 )
+from db_layer.image_store import image_key
 
 s3_client = boto3.client("s3", region_name="eu-north-1")
+async_s3 = AsyncClient(s3_client)
 S3_BUCKET = os.environ.get("S3_BUCKET")
 
 
-def add_items(items):
+async def upload_image(s3_key, image_data):
+    """
+    Uploads one decoded item image to S3.
+    """
+    await async_s3.put_object(
+        Bucket=S3_BUCKET,
+        Key=s3_key,
+        Body=image_data,
+        ContentType="image/jpeg",
+    )
+
+
+async def reserve_images(session, images):
+    """
+    Registers images not seen before as pending and commits, so an upload
+    stays tracked, and is collected, even if its items are rolled back.
+    Returns the content hashes that still need an upload. Stored images are
+    locked against collection until the items are committed.
+    Expects `images` to map content hashes to (s3_key, size, references).
+    """
+    if not images:
+        return []
+    await session.execute(
+        insert(ImageObject)
+        .values(
+            [
+                {
+                    "sha256": sha256,
+                    "s3_key": s3_key,
+                    "content_type": "image/jpeg",
+                    "size": size,
+                    "status": "pending",
+                    "ref_count": 0,
+                    "created_at": datetime.now(),
+                    "unreferenced_at": datetime.now(),
+                }
+                for sha256, (s3_key, size, _) in images.items()
+            ]
+        )
+        .on_conflict_do_nothing(index_elements=[ImageObject.sha256])
+    )
+    await session.commit()
+    result = await session.execute(
+        select(ImageObject.sha256)
+        .where(ImageObject.sha256.in_(list(images)))
+        .where(ImageObject.status == "stored")
+        .with_for_update(read=True)
+    )
+    stored = set(result.scalars())
+    return [sha256 for sha256 in images if sha256 not in stored]
+
+
+async def register_images(session, images):
+    """
+    Records uploaded images in image_objects as stored, with one reference
+    per item showing them, in a single upsert.
+    Expects `images` to map content hashes to (s3_key, size, references).
+    """
+    if not images:
+        return
+    stmt = insert(ImageObject).values(
+        [
+            {
+                "sha256": sha256,
+                "s3_key": s3_key,
+                "content_type": "image/jpeg",
+                "size": size,
+                "status": "stored",
+                "ref_count": references,
+                "created_at": datetime.now(),
+                "unreferenced_at": None,
+            }
+            for sha256, (s3_key, size, references) in images.items()
+        ]
+    )
+    await session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[ImageObject.sha256],
+            set_={
+                "status": "stored",
+                "ref_count": ImageObject.ref_count + stmt.excluded.ref_count,
+                "unreferenced_at": None,
+            },
+        )
+    )
+
+
+async def add_items(items):
     """
-    Inserts multiple new items into the database.
-    Expects `items` to be a list of dicts, each with at least 'name' and
-    'price'.
-    Optionally, each item can include a 'description' key and a
-    base64-encoded 'image_data'.
-    If image_data is provided, the image is uploaded to S3 and its key
-    is added to the response.
+    Inserts multiple new items into the database in one transaction.
+    Expects `items` to be a list of dicts, each with 'name', 'description'
+    and 'price'.
+    Clients upload images directly to S3 once the item exists (see
+    item_image_methods). During its deprecation period an item may still
+    carry a base64-encoded JPEG in 'image_data': it is stored under its
+    content-addressed key and its key is added to the response. Images
+    already stored are not uploaded again; new ones are registered as
+    pending first. The uploads run concurrently with the inserts, and the
+    items are committed once every upload has succeeded.
     """
-    session = get_session()
-    added_items = []
+    session = get_async_session()
+    new_items = []
+    images = {}
+    image_bodies = {}
+    item_keys = []
 
     try:
         for item in items:
-
             s3_key = None
             if "image_data" in item:
                 image_data = base64.b64decode(item["image_data"])
-                s3_key = f"items/item_{uuid.uuid4().hex}.jpg"
-                s3_client.put_object(
-                    Bucket=S3_BUCKET,
-                    Key=s3_key,
-                    Body=image_data,
-                    ContentType="image/jpeg",
-                )
-            if s3_key:
-                new_item = Item(
-                    name=item["name"],
-                    description=item["description"],
-                    price=item["price"],
-                    s3_key=s3_key,
-                )
-            else:
-                new_item = Item(
-                    name=item["name"],
-                    description=["description"],
-                    price=item["price"],
+                sha256 = hashlib.sha256(image_data).hexdigest()
+                s3_key = image_key(sha256, "jpg")
+                image_bodies[sha256] = image_data
+                _, size, references = images.get(
+                    sha256, (s3_key, len(image_data), 0)
                 )
+                images[sha256] = (s3_key, size, references + 1)
+            item_keys.append(s3_key)
+        uploads = [
+            upload_image(images[sha256][0], image_bodies[sha256])
+            for sha256 in await reserve_images(session, images)
+        ]
+
+        for item, s3_key in zip(items, item_keys):
+            new_item = Item(
+                name=item["name"],
+                description=item["description"],
+                price=item["price"],
+                s3_key=s3_key,
+            )
             session.add(new_item)
-            session.commit()
-            session.refresh(new_item)
+            new_items.append(new_item)
+
+        # Wait for every call before raising, so no flush is still running
+        # on the session when it is rolled back.
+        results = await asyncio.gather(
+            session.flush(), *uploads, return_exceptions=True
+        )
+        errors = [r for r in results if isinstance(r, BaseException)]
+        if errors:
+            raise errors[0]
+        await register_images(session, images)
+        await session.commit()
 
+        added_items = []
+        for new_item in new_items:
             response_item = {
                 "id": new_item.id,
                 "name": new_item.name,
                 "description": new_item.description,
                 "price": new_item.price,
             }
-            if s3_key:
-                response_item["s3_key"] = s3_key
-
+            if new_item.s3_key:
+                response_item["s3_key"] = new_item.s3_key
             added_items.append(response_item)
-
         return added_items
     except Exception as e:
-        session.rollback()
+        await session.rollback()
         raise e
     finally:
-        session.close()
+        await session.close()
 
 
-def lambda_handler(event, context):
+@async_handler
+async def lambda_handler(event, context):
     """
     Main Lambda handler. Routes requests based on HTTP method.
     Assumes API Gateway is set up with Lambda proxy integration.
@@ -90,7 +201,7 @@ def lambda_handler(event, context):
                     "error": "Expected 'items' to be a list",
                 },
             }
-        added_items = add_items(items)
+        added_items = await add_items(items)
         return {"added_items": added_items, "statusCode": 201}
     except Exception as e:
         raise e
@@ -1,16 +1,30 @@
 import json
-from db_layer.db_connect import get_session
+from db_layer.db_connect import get_session, use_replica
 from db_layer.basemodels import Location
+from db_layer.http_cache import (
+    cache_headers,
+    get_if_none_match,
+    get_table_versions,
+    is_not_modified,
+    make_etag,
+    not_modified_response,
+)
 
 
-def get_location(location_id):
+def get_location(location_id, read_only=True, if_none_match=None):
     """
     Retrieves a location by its ID.
     Returns a JSON response with "id", "name" (address), and "description"
     (zip_code).
+    A matching If-None-Match header is answered with 304 before querying.
     """
-    session = get_session()
+    session = get_session(read_only=read_only)
     try:
+        versions = get_table_versions(session, ["locations"])
+        etag = make_etag("location", location_id, versions["locations"])
+        if is_not_modified(if_none_match, etag):
+            return not_modified_response(etag)
+
         location = (
             session.query(Location).filter(Location.id == location_id).first()
         )
@@ -29,7 +43,10 @@ def get_location(location_id):
             }
             return {
                 "statusCode": 200,
-                "headers": {"Content-Type": "application/json"},
+                "headers": {
+                    "Content-Type": "application/json",
+                    **cache_headers(etag),
+                },
                 "body": json.dumps(response_body),
             }
         else:
@@ -157,7 +174,11 @@ def lambda_handler(event, context):
         }
 
     if http_method == "GET":
-        return get_location(location_id)
+        return get_location(
+            location_id,
+            read_only=use_replica(event),
+            if_none_match=get_if_none_match(event),
+        )
     elif http_method == "DELETE":
         # Even if the DELETE method receives a body, we ignore it.
         return delete_location(location_id)
@@ -1,6 +1,29 @@
 import json
-from db_layer.db_connect import get_session
+from db_layer.db_connect import get_session, use_replica
 from db_layer.basemodels import Location
+from db_layer.http_cache import (
+    cache_headers,
+    get_if_none_match,
+    get_table_versions,
+    is_not_modified,
+    make_etag,
+    not_modified_response,
+)
+from db_layer.fields import field_columns, parse_fields
+from db_layer.responses import json_response
+from db_layer.validators import validate_request_body
+
+LOCATION_FIELDS = (
+    "id",
+    "address",
+    "zip_code",
+    "city",
+    "street",
+    "state",
+    "number",
+    "addition",
+    "type",
+)
 
 
 def get_locations(event):
@@ -8,8 +31,21 @@ def get_locations(event):
     Retrieves a list of locations from the database with pagination.
     Expects query string parameters "skip" and "limit" for pagination.
     Defaults: skip=0, limit=100.
+    "fields" picks the returned fields out of LOCATION_FIELDS, e.g.
+    fields=id,zip_code; only their columns are selected.
+    Responses carry a weak ETag derived from the locations table version; a
+    matching If-None-Match header is answered with 304 before querying.
     """
-    session = get_session()
+    try:
+        fields = parse_fields(event, LOCATION_FIELDS)
+    except ValueError as e:
+        return {
+            "statusCode": 400,
+            "body": json.dumps(
+                {"message": "Invalid fields parameter", "error": str(e)}
+            ),
+        }
+    session = get_session(read_only=use_replica(event))
     try:
         query_params = event.get("queryStringParameters") or {}
         try:
@@ -21,27 +57,25 @@ def get_locations(event):
         if limit > 1000:
             limit = 1000
 
-        locations = session.query(Location).offset(skip).limit(limit).all()
+        versions = get_table_versions(session, ["locations"])
+        etag = make_etag(
+            "locations", versions["locations"], skip, limit, ",".join(fields)
+        )
+        if is_not_modified(get_if_none_match(event), etag):
+            return not_modified_response(etag)
+
+        locations = (
+            session.query(*field_columns(Location, fields, {}))
+            .offset(skip)
+            .limit(limit)
+            .all()
+        )
         locations_list = [
-            {
-                "id": loc.id,
-                "address": loc.address,
-                "zip_code": loc.zip_code,
-                "city": loc.city,
-                "street": loc.street,
-                "state": loc.state,
-                "number": loc.number,
-                "addition": loc.addition,
-                "type": loc.type,
-            }
+            {field: getattr(loc, field) for field in fields}
             for loc in locations
         ]
 
-        return {
-            "statusCode": 200,
-            "headers": {"Content-Type": "application/json"},
-            "body": json.dumps(locations_list),
-        }
+        return json_response(200, locations_list, headers=cache_headers(etag))
     except Exception as e:
         print("Error fetching location:", str(e))
         return {
@@ -142,6 +176,9 @@ def lambda_handler(event, context):
                         }
                     ),
                 }
+            invalid = validate_request_body("POST", "/locations", location)
+            if invalid:
+                return invalid
             return add_location(location)
 
     # If the request doesn't match any endpoint, return 404
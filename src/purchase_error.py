@@ -1,22 +1,36 @@
 from db_layer.db_connect import get_session
 from db_layer.basemodels import Purchase, PurchasedItem
+from db_layer.sales_rollup import apply_sales
 
 
 def cancel_purchase(purchase_id):
     """
     Reverses or cancels the purchase in the database.
-    Implementation: Deletes associated purchased items and the purchase record.
+    Implementation: Subtracts the purchased items from the daily sales
+    rollup, then deletes them and the purchase record.
     """
     session = get_session()
     try:
-        # Delete associated purchased items.
-        session.query(PurchasedItem).filter(
-            PurchasedItem.purchase_id == purchase_id
-        ).delete()
-        # Retrieve and delete the purchase record.
         purchase = (
             session.query(Purchase).filter(Purchase.id == purchase_id).first()
         )
+        # Restricting on purchase_date limits the item queries to the
+        # partition of the purchase.
+        item_filter = [PurchasedItem.purchase_id == purchase_id]
+        if purchase:
+            item_filter.append(
+                PurchasedItem.purchase_date == purchase.purchase_date
+            )
+        purchased_items = (
+            session.query(PurchasedItem).filter(*item_filter).all()
+        )
+        if purchase and purchased_items:
+            apply_sales(
+                session, purchase.purchase_date, purchased_items, sign=-1
+            )
+        # Delete associated purchased items.
+        session.query(PurchasedItem).filter(*item_filter).delete()
+        # Delete the purchase record.
         if purchase:
             session.delete(purchase)
         session.commit()
@@ -0,0 +1,97 @@
+import os
+from datetime import date
+from db_layer.db_connect import get_session
+from db_layer.partitions import (
+    PARTITIONED_TABLES,
+    archive_partition,
+    detach_partition,
+    ensure_partitions,
+    list_partitions,
+)
+
+# Monthly partitions created ahead of time.
+PARTITION_MONTHS_AHEAD = int(os.environ.get("PARTITION_MONTHS_AHEAD", 3))
+# Months of purchases kept attached; older partitions are archived.
+PARTITION_RETENTION_MONTHS = int(
+    os.environ.get("PARTITION_RETENTION_MONTHS", 24)
+)
+ARCHIVE_BUCKET = os.environ.get("PARTITION_ARCHIVE_BUCKET")
+ARCHIVE_PREFIX = os.environ.get("PARTITION_ARCHIVE_PREFIX", "archive/")
+# Drop detached partitions once archived instead of keeping them around.
+DROP_DETACHED = os.environ.get("PARTITION_DROP_DETACHED", "false") == "true"
+
+
+def retention_cutoff(today, retention_months):
+    """
+    Returns the first day of the oldest month that stays attached.
+    """
+    months = today.year * 12 + today.month - 1 - retention_months
+    return date(months // 12, months % 12 + 1, 1)
+
+
+def maintain_partitions(
+    months_ahead=PARTITION_MONTHS_AHEAD,
+    retention_months=PARTITION_RETENTION_MONTHS,
+    bucket_name=ARCHIVE_BUCKET,
+    drop=DROP_DETACHED,
+):
+    """
+    Creates upcoming monthly partitions, then archives partitions older
+    than the retention period to S3 and detaches them.
+    Partitions are only dropped after a successful archive.
+    Returns a dict with the archived S3 keys and detached partitions.
+    """
+    cutoff = retention_cutoff(date.today(), retention_months)
+    session = get_session()
+    try:
+        ensure_partitions(session, months_ahead=months_ahead)
+        archived = []
+        detached = []
+        for month in list_partitions(session, "purchases"):
+            if month >= cutoff:
+                continue
+            for table_name in PARTITIONED_TABLES:
+                if bucket_name:
+                    archived.append(
+                        archive_partition(
+                            session,
+                            table_name,
+                            month,
+                            bucket_name,
+                            prefix=ARCHIVE_PREFIX,
+                        )
+                    )
+                detach_partition(
+                    session, table_name, month, drop=drop and bool(bucket_name)
+                )
+                detached.append(f"{table_name}_p{month:%Y%m}")
+        return {"archived": archived, "detached": detached}
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+def lambda_handler(event, context):
+    """
+    Scheduled Lambda for purchases partition maintenance.
+    Optionally accepts "months_ahead", "retention_months" and "bucket" in
+    the event.
+    """
+    print("Received event:", event)
+    try:
+        result = maintain_partitions(
+            months_ahead=int(
+                event.get("months_ahead", PARTITION_MONTHS_AHEAD)
+            ),
+            retention_months=int(
+                event.get("retention_months", PARTITION_RETENTION_MONTHS)
+            ),
+            bucket_name=event.get("bucket", ARCHIVE_BUCKET),
+        )
+        print("Partition maintenance done:", result)
+        return {"statusCode": 200, **result}
+    except Exception as e:
+        print("Error maintaining partitions:", str(e))
+        raise e
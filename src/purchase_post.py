@@ -1,11 +1,13 @@
 from db_layer.db_connect import get_session
 from db_layer.basemodels import Purchase, PurchasedItem
+from db_layer.sales_rollup import apply_sales
+from db_layer.validators import validate_purchase_request
 
 
 def add_purchase(purchase):
     """
     Inserts a new purchase into the database and its associated purchased
-    items.
+    items, and adds them to the daily sales rollup.
     After successfully committing, it publishes an event to update inventory.
     Returns a dict with the purchase details and inserted items.
     """
@@ -15,7 +17,7 @@ def add_purchase(purchase):
         new_purchase = Purchase(
             user_id=purchase["user_id"],
             payment_token=purchase["payment_token"],
-            status=purchase["status"],
+            status=purchase.get("status", "pending"),
         )
         session.add(new_purchase)
         session.commit()
@@ -33,8 +35,12 @@ def add_purchase(purchase):
                     location_id=item["location_id"],
                     quantity=item["quantity"],
                 )
+                # Line items live in the partition of their purchase.
+                purchased_item.purchase_date = new_purchase.purchase_date
                 purchased_items_objects.append(purchased_item)
             session.add_all(purchased_items_objects)
+            # Count the sale in the daily rollup in the same transaction.
+            apply_sales(session, new_purchase.purchase_date, items)
             session.commit()
 
             # Build a list of inserted items for the response.
@@ -78,6 +84,11 @@ def lambda_handler(event, context):
     print("Received event:", event)
     try:
         purchase_data = event.get("data")
+        # Reject malformed input before the purchase row is written, so a
+        # bad line item never leaves a purchase to compensate.
+        errors = validate_purchase_request(purchase_data, "data")
+        if errors:
+            raise ValueError(f"Invalid purchase: {'; '.join(errors)}")
 
         # Insert the purchase and associated purchased items.
         response_body = add_purchase(purchase_data)
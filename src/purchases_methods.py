@@ -1,7 +1,26 @@
 import json
-from sqlalchemy.orm import joinedload
-from db_layer.db_connect import get_session
-from db_layer.basemodels import Purchase
+from datetime import datetime, timedelta
+from sqlalchemy.orm import joinedload, load_only
+from db_layer.db_connect import get_session, use_replica
+from db_layer.basemodels import Purchase, PurchasedItem
+from db_layer.fields import field_columns, parse_fields
+from db_layer.responses import json_response
+
+PURCHASE_FIELDS = ("id", "user_id", "items")
+
+
+def parse_date_param(value, end_of_day=False):
+    """
+    Parses an ISO date or datetime query parameter, or returns None.
+    With `end_of_day`, a date without a time stands for the end of that
+    day, so an exclusive upper bound still includes the whole day.
+    """
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value)
+    if end_of_day and "T" not in value and " " not in value:
+        parsed += timedelta(days=1)
+    return parsed
 
 
 def get_purchases(event):
@@ -10,8 +29,22 @@ def get_purchases(event):
     reserved items.
     Expects query string parameters "skip" and "limit" for pagination.
     Defaults: skip=0, limit=100.
+    Optional "since" and "until" (ISO dates or datetimes) bound
+    purchase_date, so only the matching monthly partitions are scanned.
+    A date-only "until" includes that whole day.
+    "fields" picks the returned fields out of PURCHASE_FIELDS; only their
+    columns are loaded, and purchased items are only joined for "items".
     """
-    session = get_session()
+    try:
+        fields = parse_fields(event, PURCHASE_FIELDS)
+    except ValueError as e:
+        return {
+            "statusCode": 400,
+            "body": json.dumps(
+                {"message": "Invalid fields parameter", "error": str(e)}
+            ),
+        }
+    session = get_session(read_only=use_replica(event))
     try:
         query_params = event.get("queryStringParameters") or {}
         try:
@@ -23,43 +56,62 @@ def get_purchases(event):
         if limit > 1000:
             limit = 1000
 
+        conditions = []
         user_id = query_params.get("user_id")
         if user_id:
-            purchases = (
-                session.query(Purchase)
-                .options(joinedload(Purchase.purchased_items))
-                .filter(Purchase.user_id == user_id)
-                .offset(skip)
-                .limit(limit)
-                .all()
+            conditions.append(Purchase.user_id == user_id)
+        try:
+            since = parse_date_param(query_params.get("since"))
+            until = parse_date_param(
+                query_params.get("until"), end_of_day=True
+            )
+        except ValueError as e:
+            return {
+                "statusCode": 400,
+                "body": json.dumps(
+                    {"message": "Invalid date parameter", "error": str(e)}
+                ),
+            }
+        if since is not None:
+            conditions.append(Purchase.purchase_date >= since)
+        if until is not None:
+            conditions.append(Purchase.purchase_date < until)
+
+        options = [
+            load_only(
+                *field_columns(
+                    Purchase, [f for f in fields if f != "items"], {}
+                )
             )
-        else:
-            purchases = (
-                session.query(Purchase)
-                .options(joinedload(Purchase.purchased_items))
-                .offset(skip)
-                .limit(limit)
-                .all()
+        ]
+        if "items" in fields:
+            options.append(
+                joinedload(Purchase.purchased_items).load_only(
+                    PurchasedItem.item_id, PurchasedItem.quantity
+                )
             )
+        query = session.query(Purchase).options(*options)
+        if conditions:
+            query = query.filter(*conditions)
+        # Order by id so pages are stable and served from the
+        # (user_id, id) index.
+        purchases = query.order_by(Purchase.id).offset(skip).limit(limit).all()
 
         purchases_list = []
         for purchase in purchases:
-            purchases_list.append(
-                {
-                    "id": purchase.id,
-                    "user_id": purchase.user_id,
-                    "items": [
-                        {"item_id": item.item_id, "quantity": item.quantity}
-                        for item in purchase.purchased_items
-                    ],
-                }
-            )
+            purchase_dict = {
+                field: getattr(purchase, field)
+                for field in fields
+                if field != "items"
+            }
+            if "items" in fields:
+                purchase_dict["items"] = [
+                    {"item_id": item.item_id, "quantity": item.quantity}
+                    for item in purchase.purchased_items
+                ]
+            purchases_list.append(purchase_dict)
 
-        return {
-            "statusCode": 200,
-            "headers": {"Content-Type": "application/json"},
-            "body": json.dumps(purchases_list),
-        }
+        return json_response(200, purchases_list)
     except Exception as e:
         print("Error fetching purchases:", str(e))
         return {
@@ -1,11 +1,12 @@
 import json
 from sqlalchemy.orm import joinedload
-from db_layer.db_connect import get_session
+from db_layer.db_connect import get_session, use_replica
 from db_layer.basemodels import Purchase, PurchasedItem
+from db_layer.sales_rollup import apply_sales
 
 
-def get_purchase(purchase_id):
-    session = get_session()
+def get_purchase(purchase_id, read_only=True):
+    session = get_session(read_only=read_only)
     try:
         # Fetch purchase along with associated purchased items
         purchase = (
@@ -71,10 +72,21 @@ def delete_purchase(purchase_id):
                 "statusCode": 404,
                 "body": json.dumps({"message": "Purchase not found"}),
             }
+        # Restricting on purchase_date limits the item queries to the
+        # partition of the purchase.
+        item_filter = [
+            PurchasedItem.purchase_id == purchase_id,
+            PurchasedItem.purchase_date == purchase.purchase_date,
+        ]
+        purchased_items = (
+            session.query(PurchasedItem).filter(*item_filter).all()
+        )
+        if purchased_items:
+            apply_sales(
+                session, purchase.purchase_date, purchased_items, sign=-1
+            )
         # Delete associated purchased items first.
-        session.query(PurchasedItem).filter(
-            PurchasedItem.purchase_id == purchase_id
-        ).delete()
+        session.query(PurchasedItem).filter(*item_filter).delete()
         # Prepare response data before deletion.
         response_data = {
             "id": purchase.id,
@@ -158,7 +170,7 @@ def lambda_handler(event, context):
         }
 
     if http_method == "GET":
-        return get_purchase(purchase_id)
+        return get_purchase(purchase_id, read_only=use_replica(event))
     elif http_method == "DELETE":
         # For DELETE, we ignore the request body.
         return delete_purchase(purchase_id)
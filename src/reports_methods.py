@@ -0,0 +1,226 @@
+import json
+from datetime import date, timedelta
+from sqlalchemy import func
+from db_layer.db_connect import get_session, use_replica
+from db_layer.basemodels import ItemStock, SalesDaily
+from db_layer.responses import json_response
+
+# Default report window when no "from" date is given.
+DEFAULT_REPORT_DAYS = 30
+# Longest date range a single report may span.
+MAX_REPORT_DAYS = 366
+GROUP_BY_COLUMNS = {
+    "day": SalesDaily.day,
+    "item": SalesDaily.item_id,
+    "location": SalesDaily.location_id,
+}
+
+
+def parse_report_params(query_params):
+    """
+    Parses the shared report filters from the query string:
+    "from" and "to" (ISO dates, inclusive, default the last 30 days),
+    "location_id" and "item_id".
+    Raises ValueError for invalid values.
+    """
+    end = date.fromisoformat(
+        query_params.get("to") or date.today().isoformat()
+    )
+    start = (
+        date.fromisoformat(query_params["from"])
+        if query_params.get("from")
+        else end - timedelta(days=DEFAULT_REPORT_DAYS - 1)
+    )
+    if start > end:
+        raise ValueError("'from' must not be after 'to'")
+    if (end - start).days >= MAX_REPORT_DAYS:
+        raise ValueError(f"At most {MAX_REPORT_DAYS} days can be requested")
+    location_id = query_params.get("location_id")
+    item_id = query_params.get("item_id")
+    return {
+        "start": start,
+        "end": end,
+        "location_id": int(location_id) if location_id else None,
+        "item_id": int(item_id) if item_id else None,
+    }
+
+
+def filter_sales(query, params):
+    """
+    Applies the date range, location and item filters to a sales query.
+    """
+    query = query.filter(
+        SalesDaily.day.between(params["start"], params["end"])
+    )
+    if params["location_id"] is not None:
+        query = query.filter(SalesDaily.location_id == params["location_id"])
+    if params["item_id"] is not None:
+        query = query.filter(SalesDaily.item_id == params["item_id"])
+    return query
+
+
+def get_sales_report(event, params):
+    """
+    Units sold from the sales_daily rollup, summed per the comma separated
+    "group_by" dimensions (day, item, location; default day,item,location).
+    """
+    query_params = event.get("queryStringParameters") or {}
+    group_by = [
+        name.strip()
+        for name in (
+            query_params.get("group_by") or "day,item,location"
+        ).split(",")
+        if name.strip()
+    ]
+    invalid = [name for name in group_by if name not in GROUP_BY_COLUMNS]
+    if invalid or not group_by:
+        return {
+            "statusCode": 400,
+            "body": json.dumps(
+                {
+                    "message": "Invalid group_by parameter",
+                    "error": f"Expected any of {sorted(GROUP_BY_COLUMNS)}",
+                }
+            ),
+        }
+    columns = [GROUP_BY_COLUMNS[name].label(name) for name in group_by]
+
+    session = get_session(read_only=use_replica(event))
+    try:
+        query = filter_sales(
+            session.query(
+                *columns,
+                func.sum(SalesDaily.units_sold).label("units_sold"),
+                func.sum(SalesDaily.order_lines).label("order_lines"),
+            ),
+            params,
+        )
+        rows = (
+            query.group_by(*columns)
+            .having(func.sum(SalesDaily.order_lines) > 0)
+            .order_by(*columns)
+            .all()
+        )
+        report = [
+            {
+                **{
+                    name: (value.isoformat() if name == "day" else value)
+                    for name, value in zip(group_by, row)
+                },
+                "units_sold": int(row.units_sold),
+                "order_lines": int(row.order_lines),
+            }
+            for row in rows
+        ]
+        return json_response(200, report)
+    except Exception as e:
+        print("Error fetching sales report:", str(e))
+        return {
+            "statusCode": 500,
+            "body": json.dumps(
+                {"message": "Error fetching sales report", "error": str(e)}
+            ),
+        }
+    finally:
+        session.close()
+
+
+def get_turnover_report(event, params):
+    """
+    Stock turnover per item and location: units sold in the date range
+    from the sales_daily rollup against the current stock level, with the
+    days of cover left at the average daily sales rate.
+    """
+    days = (params["end"] - params["start"]).days + 1
+    session = get_session(read_only=use_replica(event))
+    try:
+        sales = (
+            filter_sales(
+                session.query(
+                    SalesDaily.item_id,
+                    SalesDaily.location_id,
+                    func.sum(SalesDaily.units_sold).label("units_sold"),
+                ),
+                params,
+            )
+            .group_by(SalesDaily.item_id, SalesDaily.location_id)
+            .subquery()
+        )
+        rows = (
+            session.query(
+                sales.c.item_id,
+                sales.c.location_id,
+                sales.c.units_sold,
+                func.coalesce(ItemStock.quantity, 0).label("quantity"),
+            )
+            .outerjoin(
+                ItemStock,
+                (ItemStock.item_id == sales.c.item_id)
+                & (ItemStock.location_id == sales.c.location_id),
+            )
+            .order_by(sales.c.item_id, sales.c.location_id)
+            .all()
+        )
+        report = []
+        for row in rows:
+            units_sold = int(row.units_sold)
+            daily_rate = units_sold / days
+            report.append(
+                {
+                    "item_id": row.item_id,
+                    "location_id": row.location_id,
+                    "units_sold": units_sold,
+                    "quantity": row.quantity,
+                    "turnover": (
+                        round(units_sold / row.quantity, 4)
+                        if row.quantity
+                        else None
+                    ),
+                    "days_of_cover": (
+                        round(row.quantity / daily_rate, 1)
+                        if daily_rate > 0
+                        else None
+                    ),
+                }
+            )
+        return json_response(200, report)
+    except Exception as e:
+        print("Error fetching turnover report:", str(e))
+        return {
+            "statusCode": 500,
+            "body": json.dumps(
+                {"message": "Error fetching turnover report", "error": str(e)}
+            ),
+        }
+    finally:
+        session.close()
+
+
+def lambda_handler(event, context):
+    """
+    Main Lambda handler for the /reports endpoints.
+    GET /reports/sales and GET /reports/turnover accept the query string
+    parameters "from", "to", "location_id" and "item_id".
+    """
+    http_method = event.get("httpMethod", "")
+    resource = event.get("resource", "")
+    routes = {
+        "/reports/sales": get_sales_report,
+        "/reports/turnover": get_turnover_report,
+    }
+    if resource not in routes or http_method != "GET":
+        return {
+            "statusCode": 404,
+            "body": json.dumps({"message": "Not Found"}),
+        }
+
+    try:
+        params = parse_report_params(event.get("queryStringParameters") or {})
+    except ValueError as e:
+        return {
+            "statusCode": 400,
+            "body": json.dumps(
+                {"message": "Invalid report parameters", "error": str(e)}
+            ),
+        }
+    return routes[resource](event, params)
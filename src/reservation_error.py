@@ -30,14 +30,48 @@ def cancel_reservation(reservation_id):
         session.close()
 
 
+def cancel_reservations(reservation_ids):
+    """
+    Cancels every reservation of a batch in a single transaction. Runs
+    when a batch step fails as a whole; reservations whose own stock lines
+    failed were already cancelled by update_stock.
+    """
+    session = get_session()
+    try:
+        session.query(ReservedItem).filter(
+            ReservedItem.reservation_id.in_(reservation_ids)
+        ).delete(synchronize_session=False)
+        session.query(Reservation).filter(
+            Reservation.id.in_(reservation_ids)
+        ).delete(synchronize_session=False)
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        raise e
+    finally:
+        session.close()
+
+
 def lambda_handler(event, context):
     """
     A compensation Lambda that is triggered if a reservation step fails.
-    Expects the event to contain a 'reservation_id' key nested under
-    event['data'].
+    Expects the event to contain a 'reservation_id' key (or
+    'reservation_ids' for a batch) nested under event['data'].
     """
     print("Received compensation event:", event)
     try:
+        reservation_ids = event.get("data", {}).get("reservation_ids")
+        if reservation_ids:
+            cancel_reservations(reservation_ids)
+            return {
+                "statusCode": 200,
+                "body": {
+                    "message": f"Reservations {reservation_ids} cancelled "
+                    "successfully."
+                },
+                "data": event.get("data"),
+            }
+
         reservation_id = event.get("data", {}).get("reservation_id")
         if not reservation_id:
             return {
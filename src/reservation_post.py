@@ -1,5 +1,10 @@
 from db_layer.db_connect import get_session
 from db_layer.basemodels import Reservation, ReservedItem
+from db_layer.validators import (
+    MAX_REPORTED_ERRORS,
+    validate_reservation_request,
+)
+from sqlalchemy import insert
 import boto3
 import os
 
@@ -66,6 +71,91 @@ def update_reservation_items(user_id, items):
         session.close()
 
 
+def add_reservations_batch(requests):
+    """
+    Inserts a batch of reservations buffered by invoke_reservation_batch.
+    All reservations are written with a single multi-row insert, followed by
+    a single multi-row insert into reserved_items, in one transaction.
+    Expects `requests` to be a list of dicts with 'request_id', 'user_id' and
+    'items'. Each request is validated on its own; invalid ones are reported
+    back with an 'error' instead of failing the whole batch. The request id
+    is stored on the reservation so the caller can look it up.
+    Returns a dict with one result per request and the combined item list.
+    """
+    results = []
+    valid = []
+    for request in requests:
+        errors = validate_reservation_request(request, "request")
+        if errors:
+            error = "; ".join(errors[:MAX_REPORTED_ERRORS])
+        elif not request["user_id"]:
+            error = "Missing user_id in input"
+        elif not request["items"]:
+            error = "No items provided to update"
+        else:
+            valid.append(request)
+            continue
+        request_id = (
+            request.get("request_id") if isinstance(request, dict) else None
+        )
+        results.append({"request_id": request_id, "error": error})
+
+    inserted_items = []
+    if not valid:
+        return {"reservations": results, "items": inserted_items}
+
+    session = get_session()
+    try:
+        reservation_ids = session.scalars(
+            insert(Reservation).returning(
+                Reservation.id, sort_by_parameter_order=True
+            ),
+            [
+                {
+                    "user_id": request["user_id"],
+                    "status": "reserved",
+                    "request_id": request.get("request_id"),
+                }
+                for request in valid
+            ],
+        ).all()
+
+        reserved_rows = []
+        for request, reservation_id in zip(valid, reservation_ids):
+            request_items = [
+                {
+                    "reservation_id": reservation_id,
+                    "item_id": item["item_id"],
+                    "location_id": item.get("location_id"),
+                    "quantity": item["quantity"],
+                }
+                for item in request["items"]
+            ]
+            reserved_rows.extend(request_items)
+            results.append(
+                {
+                    "request_id": request.get("request_id"),
+                    "reservation": {
+                        "id": reservation_id,
+                        "user_id": request["user_id"],
+                        "status": "reserved",
+                    },
+                    "items": request_items,
+                }
+            )
+        session.execute(insert(ReservedItem), reserved_rows)
+        session.commit()
+        inserted_items = reserved_rows
+
+        return {"reservations": results, "items": inserted_items}
+    except Exception as e:
+        session.rollback()
+        print("Error adding reservation batch:", str(e))
+        raise e
+    finally:
+        session.close()
+
+
 def lambda_handler(event, context):
     """
     Lambda function to update reservation items.
@@ -73,12 +163,26 @@ def lambda_handler(event, context):
       - data.user_id: the ID of the user making the reservation
       - data.items: a list of objects with 'item_id', 'quantity' and
       optionally 'location_id'
+    In batching mode the event carries data.batch, a list of such requests
+    (each with a 'request_id'), which are inserted together.
     Returns the reservation data that can be passed to the next state in the
     state machine.
     """
     print("Received event:", event)
     try:
         data = event.get("data", {})
+        if "batch" in data:
+            response_data = add_reservations_batch(data["batch"])
+            return {
+                "response_body": response_data,
+                "reservation_ids": [
+                    result["reservation"]["id"]
+                    for result in response_data["reservations"]
+                    if "reservation" in result
+                ],
+                "statusCode": 201,
+            }
+
         user_id = data.get("user_id")
         items = data.get("items", [])
 
@@ -87,6 +191,9 @@ def lambda_handler(event, context):
             raise ValueError("Missing user_id in input")
         if not items:
             raise ValueError("No items provided to update")
+        errors = validate_reservation_request(data, "data")
+        if errors:
+            raise ValueError(f"Invalid reservation: {'; '.join(errors)}")
 
         response_data = update_reservation_items(user_id, items)
 
@@ -1,6 +1,7 @@
 import json
-from db_layer.db_connect import get_session
+from db_layer.db_connect import get_session, use_replica
 from db_layer.basemodels import Reservation
+from db_layer.responses import json_response
 from sqlalchemy.orm import joinedload
 
 
@@ -10,8 +11,10 @@ def get_reservations(event):
     including reserved items.
     Expects query string parameters "skip" and "limit" for pagination.
     Defaults: skip=0, limit=100.
+    "request_id" returns the reservation made for a request queued in
+    batching mode, or an empty list while it is still being processed.
     """
-    session = get_session()
+    session = get_session(read_only=use_replica(event))
     try:
         query_params = event.get("queryStringParameters") or {}
         try:
@@ -23,23 +26,19 @@ def get_reservations(event):
         if limit > 1000:
             limit = 1000
         user_id = query_params.get("user_id")
+        request_id = query_params.get("request_id")
+        query = session.query(Reservation).options(
+            joinedload(Reservation.reserved_items)
+        )
         if user_id:
-            reservations = (
-                session.query(Reservation)
-                .options(joinedload(Reservation.reserved_items))
-                .filter(Reservation.user_id == user_id)
-                .offset(skip)
-                .limit(limit)
-                .all()
-            )
-        else:
-            reservations = (
-                session.query(Reservation)
-                .options(joinedload(Reservation.reserved_items))
-                .offset(skip)
-                .limit(limit)
-                .all()
-            )
+            query = query.filter(Reservation.user_id == user_id)
+        if request_id:
+            query = query.filter(Reservation.request_id == request_id)
+        # Order by id so pages are stable and served from the
+        # (user_id, id) index.
+        reservations = (
+            query.order_by(Reservation.id).offset(skip).limit(limit).all()
+        )
 
         reservations_list = []
         for res in reservations:
@@ -54,11 +53,7 @@ def get_reservations(event):
                 }
             )
 
-        return {
-            "statusCode": 200,
-            "headers": {"Content-Type": "application/json"},
-            "body": json.dumps(reservations_list),
-        }
+        return json_response(200, reservations_list)
     except Exception as e:
         print("Error fetching reservations:", str(e))
         return {
@@ -1,13 +1,14 @@
 import json
-from db_layer.db_connect import get_session
+from db_layer.db_connect import get_session, use_replica
 from db_layer.basemodels import Reservation, ReservedItem
+from db_layer.validators import validate_request_body
 
 
-def get_reservation(reservation_id):
+def get_reservation(reservation_id, read_only=True):
     """
     Retrieves a reservation along with its reserved items.
     """
-    session = get_session()
+    session = get_session(read_only=read_only)
     try:
         reservation = (
             session.query(Reservation)
@@ -190,7 +191,7 @@ def lambda_handler(event, context):
         }
 
     if http_method == "GET":
-        return get_reservation(reservation_id)
+        return get_reservation(reservation_id, read_only=use_replica(event))
     elif http_method == "DELETE":
         return delete_reservation(reservation_id)
     elif http_method == "PUT":
@@ -203,6 +204,11 @@ def lambda_handler(event, context):
                     {"message": "Invalid JSON", "error": str(e)}
                 ),
             }
+        invalid = validate_request_body(
+            "PUT", "/reservations/{reservation_id}", payload
+        )
+        if invalid:
+            return invalid
         return update_reservation(reservation_id, payload)
     else:
         return {
@@ -1,6 +1,8 @@
 import json
-from db_layer.db_connect import get_session
+from db_layer.db_connect import get_session, use_replica
 from db_layer.basemodels import ItemStock
+from db_layer.stock_totals import get_stock_totals
+from db_layer.validators import validate_request_body
 import boto3
 import os
 
@@ -8,18 +10,20 @@ sfn_client = boto3.client("stepfunctions")
 STATE_MACHINE_ARN = os.environ.get("STATE_MACHINE_ARN")
 
 
-def get_item(item_id, location_id):
+def get_item(item_id, location_id, read_only=True):
     """
     Retrieves an item from the item_stock table.
     Optionally filters by location_id.
+    The response includes the item's total quantity across all locations.
     """
-    session = get_session()
+    session = get_session(read_only=read_only)
     try:
         query = session.query(ItemStock).filter(ItemStock.item_id == item_id)
         if location_id is not None:
             query = query.filter(ItemStock.location_id == location_id)
         item = query.first()
         if item:
+            stock_totals = get_stock_totals(session, [item.item_id])
             return {
                 "statusCode": 200,
                 "headers": {"Content-Type": "application/json"},
@@ -29,6 +33,7 @@ def get_item(item_id, location_id):
                         "item_id": item.item_id,
                         "location_id": item.location_id,
                         "quantity": item.quantity,
+                        "total_quantity": stock_totals.get(item.item_id, 0),
                     }
                 ),
             }
@@ -158,11 +163,15 @@ def lambda_handler(event, context):
             "body": json.dumps({"message": "Invalid JSON", "error": str(e)}),
         }
     if http_method == "GET":
-        return get_item(item_id, payload.get("location_id"))
+        return get_item(
+            item_id, payload.get("location_id"), read_only=use_replica(event)
+        )
     elif http_method == "DELETE":
         return delete_item(item_id, payload.get("location_id"))
     elif http_method == "PUT":
-
+        invalid = validate_request_body("PUT", "/stock/{item_id}", payload)
+        if invalid:
+            return invalid
         stock_operation = payload.get("stock_operation", "reset")
         try:
             updated_item = update_stock(payload, stock_operation)
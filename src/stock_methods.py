@@ -1,6 +1,11 @@
 import json
-from db_layer.db_connect import get_session
+from sqlalchemy import Integer, and_, bindparam, func, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from db_layer.db_connect import get_session, use_replica
 from db_layer.basemodels import ItemStock
+from db_layer.stock_totals import get_stock_totals
+from db_layer.responses import json_response
+from db_layer.validators import validate_request_body
 
 
 def get_items(event):
@@ -9,7 +14,7 @@ def get_items(event):
     Expects query string parameters "skip" and "limit" for pagination.
     Optionally filters by location_id.
     """
-    session = get_session()
+    session = get_session(read_only=use_replica(event))
     try:
         # Extract query parameters (if any)
         query_params = event.get("queryStringParameters") or {}
@@ -39,11 +44,7 @@ def get_items(event):
             }
             for item in items
         ]
-        return {
-            "statusCode": 200,
-            "headers": {"Content-Type": "application/json"},
-            "body": json.dumps(items_list),
-        }
+        return json_response(200, items_list)
     except Exception as e:
         print("Error fetching items:", str(e))
         return {
@@ -56,6 +57,157 @@ def get_items(event):
         session.close()
 
 
+def get_totals(event):
+    """
+    Retrieves the total stock across all locations for many items at once.
+    Expects a comma separated "item_ids" query string parameter.
+    Items without stock are reported with a total of 0.
+    """
+    query_params = event.get("queryStringParameters") or {}
+    try:
+        item_ids = [
+            int(item_id)
+            for item_id in (query_params.get("item_ids") or "").split(",")
+            if item_id.strip()
+        ]
+    except ValueError as e:
+        return {
+            "statusCode": 400,
+            "body": json.dumps(
+                {"message": "Invalid item_ids parameter", "error": str(e)}
+            ),
+        }
+    if not item_ids:
+        return {
+            "statusCode": 400,
+            "body": json.dumps({"message": "Missing item_ids parameter"}),
+        }
+    if len(item_ids) > 1000:
+        return {
+            "statusCode": 400,
+            "body": json.dumps(
+                {"message": "At most 1000 item_ids can be requested"}
+            ),
+        }
+
+    session = get_session(read_only=use_replica(event))
+    try:
+        stock_totals = get_stock_totals(session, item_ids)
+        totals_list = [
+            {
+                "item_id": item_id,
+                "total_quantity": stock_totals.get(item_id, 0),
+            }
+            for item_id in item_ids
+        ]
+        return json_response(200, totals_list)
+    except Exception as e:
+        print("Error fetching stock totals:", str(e))
+        return {
+            "statusCode": 500,
+            "body": json.dumps(
+                {"message": "Error fetching stock totals", "error": str(e)}
+            ),
+        }
+    finally:
+        session.close()
+
+
+def get_stock_levels(session, pairs):
+    """
+    Looks up the stock of many (item_id, location_id) pairs with one
+    query, joining item_stock to the pairs unnested from two array
+    parameters.
+    Returns a dict mapping each pair to its quantity; pairs without stock
+    map to 0.
+    """
+    pairs = list(dict.fromkeys(pairs))
+    lines = (
+        func.unnest(
+            bindparam(
+                "item_ids",
+                [item_id for item_id, _ in pairs],
+                type_=ARRAY(Integer),
+            ),
+            bindparam(
+                "location_ids",
+                [location_id for _, location_id in pairs],
+                type_=ARRAY(Integer),
+            ),
+        )
+        .table_valued("item_id", "location_id")
+        .render_derived(name="lines")
+    )
+    rows = session.execute(
+        select(
+            lines.c.item_id,
+            lines.c.location_id,
+            func.coalesce(func.sum(ItemStock.quantity), 0),
+        )
+        .select_from(
+            lines.outerjoin(
+                ItemStock,
+                and_(
+                    ItemStock.item_id == lines.c.item_id,
+                    ItemStock.location_id == lines.c.location_id,
+                ),
+            )
+        )
+        .group_by(lines.c.item_id, lines.c.location_id)
+    ).all()
+    return {
+        (item_id, location_id): quantity
+        for item_id, location_id, quantity in rows
+    }
+
+
+def check_availability(event, lines):
+    """
+    Checks whether every (item_id, location_id, quantity) line can be
+    served from stock, e.g. a cart before it is submitted to /purchases.
+    Lines for the same item and location draw on the same stock in
+    request order. Each line reports the quantity still available to it
+    and its shortfall; "in_stock" is true when no line falls short.
+    """
+    session = get_session(read_only=use_replica(event))
+    try:
+        stock = get_stock_levels(
+            session,
+            [(line["item_id"], line["location_id"]) for line in lines],
+        )
+        results = []
+        for line in lines:
+            pair = (line["item_id"], line["location_id"])
+            available = stock[pair]
+            stock[pair] = max(available - line["quantity"], 0)
+            results.append(
+                {
+                    "item_id": line["item_id"],
+                    "location_id": line["location_id"],
+                    "quantity": line["quantity"],
+                    "available": available,
+                    "shortfall": max(line["quantity"] - available, 0),
+                }
+            )
+        return json_response(
+            200,
+            {
+                "in_stock": all(r["shortfall"] == 0 for r in results),
+                "lines": results,
+            },
+        )
+    except Exception as e:
+        print("Error checking availability:", str(e))
+        return {
+            "statusCode": 500,
+            "body": json.dumps(
+                {"message": "Error checking availability", "error": str(e)}
+            ),
+        }
+    finally:
+        session.close()
+
+
 def add_items(items):
     """
     Inserts multiple items into the item_stock table.
@@ -123,10 +275,6 @@ def lambda_handler(event, context):
             # Expect the request body to contain JSON data.
             try:
                 body = json.loads(event.get("body", "{}"))
-                items = body.get("items", [])
-                # Ensure we have a list of items.
-                if not isinstance(items, list):
-                    items = [items]
             except Exception as e:
                 return {
                     "statusCode": 400,
@@ -137,7 +285,33 @@ def lambda_handler(event, context):
                         }
                     ),
                 }
-            return add_items(items)
+            invalid = validate_request_body("POST", "/stock", body)
+            if invalid:
+                return invalid
+            return add_items(body["items"])
+
+    # Route for /stock/totals endpoint.
+    if resource == "/stock/totals" and http_method == "GET":
+        return get_totals(event)
+
+    # Route for /stock/availability endpoint.
+    if resource == "/stock/availability" and http_method == "POST":
+        try:
+            body = json.loads(event.get("body") or "{}")
+        except json.JSONDecodeError as e:
+            return {
+                "statusCode": 400,
+                "body": json.dumps(
+                    {
+                        "message": "Invalid JSON in request body",
+                        "error": str(e),
+                    }
+                ),
+            }
+        invalid = validate_request_body("POST", "/stock/availability", body)
+        if invalid:
+            return invalid
+        return check_availability(event, body["lines"])
 
     # If the request doesn't match any endpoint, return 404.
     return {"statusCode": 404, "body": json.dumps({"message": "Not Found"})}
@@ -1,10 +1,25 @@
+import asyncio
 import os
+from datetime import datetime
 import boto3
+from sqlalchemy import delete, update
+from sqlalchemy.exc import MultipleResultsFound
+from db_layer.async_aws import AsyncClient, get_event_loop
+from db_layer.basemodels import Reservation, ReservedItem
 from db_layer.db_connect import get_session
-from db_layer.basemodels import ItemStock
+from db_layer.prepared import execute_prepared, get_prepared_metrics
+from db_layer.stock_thresholds import (
+    DEFAULT_LOW_STOCK_THRESHOLD,
+    get_reorder_points,
+)
 
 sns_client = boto3.client("sns", region_name="eu-north-1")
+async_sns = AsyncClient(sns_client)
 SNS_TOPIC_ARN = os.environ.get("STOCK_ALERT_TOPIC_ARN")
+# Errors caused by the lines of one request, e.g. duplicate stock rows or
+# ids that are not numbers. In a reservation batch they cancel only the
+# reservation of that request.
+LINE_ERRORS = (MultipleResultsFound, KeyError, TypeError, ValueError)
 
 
 def update_stock_for_item(session, item, operation):
@@ -16,37 +31,105 @@ def update_stock_for_item(session, item, operation):
     Expects `item` to be a dict with 'item_id', 'location_id', and 'quantity'.
     Returns the updated row as a dict.
     """
-    # Query for the item stock record
-    item_stock = (
-        session.query(ItemStock)
-        .filter_by(item_id=item["item_id"], location_id=item["location_id"])
-        .one_or_none()
-    )
-
-    if item_stock is None:
-        return None
-
-    # Update the quantity based on the operation
-    if operation == "deduct":
-        item_stock.quantity -= item["quantity"]
-    elif operation == "add":
-        item_stock.quantity += item["quantity"]
-    elif operation == "reset":
-        item_stock.quantity = item["quantity"]
-    else:
+    if operation not in ("deduct", "add", "reset"):
         raise ValueError(
             "Invalid operation. Expected 'deduct', 'add', or 'reset'."
         )
 
-    # Flush changes so that they are sent to the DB, then refresh to get
-    # updated values.
-    session.flush()
-    session.refresh(item_stock)
+    # One prepared UPDATE ... RETURNING per item instead of a select, an
+    # update and a refresh. Duplicate stock rows raise MultipleResultsFound
+    # and the caller rolls the update back.
+    item_stock = execute_prepared(
+        session,
+        f"stock_{operation}",
+        int(item["item_id"]),
+        int(item["location_id"]),
+        int(item["quantity"]),
+    ).one_or_none()
+
+    if item_stock is None:
+        return None
 
     return {"id": item_stock.id, "quantity": item_stock.quantity}
 
 
-def send_stock_alert(item_id, stock):
+def update_items(session, items, operation):
+    """
+    Updates the stock of every item in `items`.
+    Returns the updated rows and their (item_id, location_id) pairs.
+    """
+    updated_items = []
+    updated_pairs = []
+    for item in items:
+        updated = update_stock_for_item(session, item, operation)
+        if updated is None:
+            print(
+                f"Item with ID {item.get('item_id')} at location {item.get('location_id')} not found or update failed."
+            )
+        else:
+            updated_items.append(updated)
+            # Thresholds are keyed by integer ids; events may carry them as
+            # strings.
+            updated_pairs.append(
+                (int(item["item_id"]), int(item["location_id"]))
+            )
+    return updated_items, updated_pairs
+
+
+def cancel_failed_reservation(session, reservation_id):
+    """
+    Cancels a batched reservation whose stock could not be updated: its
+    reserved items are removed and it is marked cancelled, so the caller
+    polling for its request id learns the outcome.
+    """
+    session.execute(
+        delete(ReservedItem).where(
+            ReservedItem.reservation_id == reservation_id
+        )
+    )
+    session.execute(
+        update(Reservation)
+        .where(Reservation.id == reservation_id)
+        .values(status="cancelled", updated_at=datetime.now())
+    )
+
+
+def update_batch_items(session, items, operation):
+    """
+    Updates the stock of a reservation batch with one savepoint per
+    reservation. A reservation whose lines fail is rolled back to its
+    savepoint and cancelled, and the rest of the batch goes ahead.
+    Returns the updated rows, their (item_id, location_id) pairs and the
+    ids of the cancelled reservations.
+    """
+    by_reservation = {}
+    for item in items:
+        by_reservation.setdefault(item.get("reservation_id"), []).append(item)
+
+    updated_items = []
+    updated_pairs = []
+    failed_ids = []
+    for reservation_id, reservation_items in by_reservation.items():
+        try:
+            with session.begin_nested():
+                updated, pairs = update_items(
+                    session, reservation_items, operation
+                )
+        except LINE_ERRORS as e:
+            print(
+                f"Stock update failed for reservation {reservation_id}, "
+                "cancelling it:",
+                str(e),
+            )
+            cancel_failed_reservation(session, reservation_id)
+            failed_ids.append(reservation_id)
+            continue
+        updated_items.extend(updated)
+        updated_pairs.extend(pairs)
+    return updated_items, updated_pairs, failed_ids
+
+
+async def send_stock_alert(item_id, stock):
     """
     Publishes an SNS notification if stock is below threshold.
     """
@@ -54,12 +137,22 @@ def send_stock_alert(item_id, stock):
         f"Alert: Stock for item {item_id} is low. Current stock: {stock}."
     )
 
-    response = sns_client.publish(
+    response = await async_sns.publish(
         TopicArn=SNS_TOPIC_ARN, Message=message, Subject="Low Stock Alert"
     )
     print("SNS publish response:", response)
 
 
+async def send_stock_alerts(alerts):
+    """
+    Publishes the low-stock alerts for (item_id, stock) pairs
+    concurrently.
+    """
+    await asyncio.gather(
+        *(send_stock_alert(item_id, stock) for item_id, stock in alerts)
+    )
+
+
 def lambda_handler(event, context):
     """
     Lambda handler to update inventory based on data from the state machine.
@@ -70,7 +163,11 @@ def lambda_handler(event, context):
           "deduct" for purchases (default),
           "add" for cancellations,
           "reset" to set a new quantity.
-      - Optionally, "reservation_id" and/or "purchase_id" keys.
+      - Optionally, "reservation_id" (or "reservation_ids" for a batch)
+        and/or "purchase_id" keys.
+    A batch deducts the stock of each reservation on its own. A reservation
+    whose lines fail is cancelled and listed in "failed_reservation_ids";
+    the others stay in "reservation_ids".
     """
     print("Received event:", event)
     session = get_session()
@@ -85,27 +182,38 @@ def lambda_handler(event, context):
         if not items:
             raise ValueError("No items provided in the event input.")
 
-        updated_items = []
+        failed_ids = []
         # Update stock for each item.
-        for item in items:
-            updated = update_stock_for_item(session, item, operation)
-            if updated is None:
-                print(
-                    f"Item with ID {item.get('item_id')} at location {item.get('location_id')} not found or update failed."
-                )
-            else:
-                updated_items.append(updated)
+        if "reservation_ids" in data and operation == "deduct":
+            updated_items, updated_pairs, failed_ids = update_batch_items(
+                session, items, operation
+            )
+        else:
+            updated_items, updated_pairs = update_items(
+                session, items, operation
+            )
 
         # Commit all updates.
         session.commit()
 
-        # Send alerts for low stock if deducting.
+        # Send alerts for low stock if deducting. Items alert below their
+        # forecast reorder point, or the default threshold without one.
+        # The database work above is synchronous; only the SNS publishes
+        # run on the event loop, concurrently.
         if operation == "deduct":
-            for updated in updated_items:
-                if updated.get("quantity", 0) < 10:
-                    send_stock_alert(updated["id"], updated["quantity"])
+            reorder_points = get_reorder_points(session, updated_pairs)
+            alerts = []
+            for updated, pair in zip(updated_items, updated_pairs):
+                threshold = reorder_points.get(
+                    pair, DEFAULT_LOW_STOCK_THRESHOLD
+                )
+                if updated.get("quantity", 0) < threshold:
+                    alerts.append((updated["id"], updated["quantity"]))
+            if alerts:
+                get_event_loop().run_until_complete(send_stock_alerts(alerts))
 
         print("Stock updated for items:", updated_items)
+        print("Prepared statement metrics:", get_prepared_metrics())
 
         # Build response.
         response = {
@@ -115,6 +223,14 @@ def lambda_handler(event, context):
         }
         if "reservation_id" in data:
             response["reservation_id"] = data["reservation_id"]
+        if "reservation_ids" in data:
+            response["reservation_ids"] = [
+                reservation_id
+                for reservation_id in data["reservation_ids"]
+                if reservation_id not in failed_ids
+            ]
+        if failed_ids:
+            response["failed_reservation_ids"] = failed_ids
         if "purchase_id" in data:
             response["purchase_id"] = data["purchase_id"]
 
@@ -8,5 +8,10 @@ os.environ.setdefault("AWS_DEFAULT_REGION", "eu-north-1")
 repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 if repo_root not in sys.path:
     sys.path.insert(0, repo_root)
+# The Lambda layer's packages (db_layer) live under python/, as in the
+# deployed layer.
+layer_root = os.path.join(repo_root, "python")
+if layer_root not in sys.path:
+    sys.path.insert(0, layer_root)
 
 print("sys.path:", sys.path)
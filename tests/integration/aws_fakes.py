@@ -0,0 +1,221 @@
+"""
+In-memory stand-ins for the AWS clients used by the handlers.
+
+They implement only the calls the handlers make, with the response shapes
+and error codes of the real services, and keep everything they receive so
+tests can assert on it.
+"""
+
+import base64
+import hashlib
+import io
+import json
+import uuid
+
+from botocore.exceptions import ClientError
+
+
+def client_error(code, message, operation):
+    return ClientError(
+        {"Error": {"Code": code, "Message": message}}, operation
+    )
+
+
+class FakeS3:
+    def __init__(self):
+        # (bucket, key) -> dict(Body, ContentType, CacheControl, checksum)
+        self.objects = {}
+        self.uploads = {}
+
+    def put_object(
+        self,
+        Bucket,
+        Key,
+        Body=b"",
+        ContentType="binary/octet-stream",
+        CacheControl=None,
+        ChecksumSHA256=None,
+        **kwargs,
+    ):
+        body = Body.encode() if isinstance(Body, str) else bytes(Body)
+        checksum = base64.b64encode(hashlib.sha256(body).digest()).decode()
+        if ChecksumSHA256 is not None and ChecksumSHA256 != checksum:
+            raise client_error(
+                "BadDigest", "The SHA256 you specified did not match", "Put"
+            )
+        self.objects[(Bucket, Key)] = {
+            "Body": body,
+            "ContentType": ContentType,
+            "CacheControl": CacheControl,
+            "ChecksumSHA256": ChecksumSHA256,
+        }
+        return {"ETag": f'"{hashlib.md5(body).hexdigest()}"'}
+
+    def _get(self, Bucket, Key, code, operation):
+        if (Bucket, Key) not in self.objects:
+            raise client_error(code, "Not Found", operation)
+        return self.objects[(Bucket, Key)]
+
+    def get_object(self, Bucket, Key, **kwargs):
+        stored = self._get(Bucket, Key, "NoSuchKey", "GetObject")
+        return {
+            "Body": io.BytesIO(stored["Body"]),
+            "ContentType": stored["ContentType"],
+            "ContentLength": len(stored["Body"]),
+        }
+
+    def head_object(self, Bucket, Key, ChecksumMode=None, **kwargs):
+        stored = self._get(Bucket, Key, "404", "HeadObject")
+        head = {
+            "ContentType": stored["ContentType"],
+            "ContentLength": len(stored["Body"]),
+        }
+        if ChecksumMode == "ENABLED" and stored["ChecksumSHA256"]:
+            head["ChecksumSHA256"] = stored["ChecksumSHA256"]
+        return head
+
+    def delete_objects(self, Bucket, Delete):
+        deleted = []
+        for obj in Delete["Objects"]:
+            self.objects.pop((Bucket, obj["Key"]), None)
+            deleted.append({"Key": obj["Key"]})
+        return {} if Delete.get("Quiet") else {"Deleted": deleted}
+
+    def generate_presigned_url(self, ClientMethod, Params, ExpiresIn=3600):
+        return (
+            f"https://{Params['Bucket']}.s3.fake/{Params['Key']}"
+            f"?method={ClientMethod}&expires={ExpiresIn}"
+        )
+
+    def generate_presigned_post(self, Bucket, Key, Fields=None, **kwargs):
+        return {
+            "url": f"https://{Bucket}.s3.fake/",
+            "fields": {**(Fields or {}), "key": Key},
+        }
+
+    def create_multipart_upload(self, Bucket, Key, ContentType=None):
+        upload_id = uuid.uuid4().hex
+        self.uploads[upload_id] = {"ContentType": ContentType, "parts": {}}
+        return {"UploadId": upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        self.uploads[UploadId]["parts"][PartNumber] = bytes(Body)
+        return {"ETag": f'"{PartNumber}"'}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, **kwargs):
+        upload = self.uploads.pop(UploadId)
+        body = b"".join(part for _, part in sorted(upload["parts"].items()))
+        self.put_object(Bucket, Key, body, upload["ContentType"])
+        return {"Key": Key}
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.uploads.pop(UploadId, None)
+        return {}
+
+    def client_upload(self, url_or_key, body, bucket=None, headers=None):
+        """
+        Plays the client's direct upload to a presigned URL: stores `body`
+        under the URL's key, verifying x-amz-checksum-sha256 like S3.
+        """
+        headers = headers or {}
+        if url_or_key.startswith("https://"):
+            host, _, rest = url_or_key.removeprefix("https://").partition("/")
+            bucket = host.split(".s3.fake")[0]
+            key = rest.split("?")[0]
+        else:
+            key = url_or_key
+        return self.put_object(
+            bucket,
+            key,
+            body,
+            ContentType=headers.get("Content-Type", "binary/octet-stream"),
+            ChecksumSHA256=headers.get("x-amz-checksum-sha256"),
+        )
+
+
+class FakeSNS:
+    def __init__(self):
+        self.published = []
+
+    def publish(self, TopicArn=None, Message=None, Subject=None, **kwargs):
+        message_id = uuid.uuid4().hex
+        self.published.append(
+            {
+                "TopicArn": TopicArn,
+                "Message": Message,
+                "Subject": Subject,
+                "MessageId": message_id,
+            }
+        )
+        return {"MessageId": message_id}
+
+
+class FakeSQS:
+    def __init__(self):
+        self.messages = []
+
+    def send_message(self, QueueUrl, MessageBody, **kwargs):
+        message_id = uuid.uuid4().hex
+        self.messages.append(
+            {
+                "QueueUrl": QueueUrl,
+                "Body": MessageBody,
+                "MessageId": message_id,
+            }
+        )
+        return {"MessageId": message_id}
+
+
+class FakeStepFunctions:
+    """
+    Records started executions. Executions stay RUNNING until a test calls
+    finish() with their output.
+    """
+
+    def __init__(self):
+        self.executions = {}
+
+    def start_execution(self, stateMachineArn, input="{}", name=None):
+        name = name or uuid.uuid4().hex
+        arn = f"{stateMachineArn}:execution:{name}"
+        self.executions[arn] = {
+            "executionArn": arn,
+            "stateMachineArn": stateMachineArn,
+            "input": json.loads(input),
+            "status": "RUNNING",
+            "output": None,
+        }
+        return {"executionArn": arn}
+
+    def describe_execution(self, executionArn):
+        if executionArn not in self.executions:
+            raise client_error(
+                "ExecutionDoesNotExist", executionArn, "DescribeExecution"
+            )
+        return dict(self.executions[executionArn])
+
+    def finish(self, executionArn, output, status="SUCCEEDED"):
+        self.executions[executionArn].update(
+            status=status, output=json.dumps(output)
+        )
+
+
+class FakeAWS:
+    """
+    One fake per service, handed out by service name like boto3.client.
+    """
+
+    def __init__(self):
+        self.s3 = FakeS3()
+        self.sns = FakeSNS()
+        self.sqs = FakeSQS()
+        self.stepfunctions = FakeStepFunctions()
+        self.by_service = {
+            "s3": self.s3,
+            "sns": self.sns,
+            "sqs": self.sqs,
+            "stepfunctions": self.stepfunctions,
+        }
+
+    def client(self, service_name, *args, **kwargs):
+        return self.by_service[service_name]
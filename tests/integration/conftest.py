@@ -0,0 +1,341 @@
+"""
+Fixtures for running the Lambda handlers end to end against PostgreSQL and
+in-memory AWS fakes.
+
+The database is TEST_DATABASE_URL when set, otherwise a throwaway cluster
+started with the initdb/pg_ctl found in PG_BIN, through pg_config or
+on PATH; without either the tests are skipped. The schema is created
+from basemodels once per session in its own "integration" schema.
+
+Every test runs in one transaction that is rolled back at the end. Handler
+sessions join it through savepoints, so their commits and rollbacks behave
+as in production while nothing outlives the test.
+"""
+
+import glob
+import importlib
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import tempfile
+import time
+from contextlib import contextmanager
+
+import boto3
+import pytest
+from botocore.client import BaseClient
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+
+from aws_fakes import FakeAWS
+from db_layer import async_aws, async_db, db_connect, prepared
+from db_layer.basemodels import Base
+from db_layer.location_index import location_index
+
+SCHEMA = "integration"
+BOTO3_CLIENT = boto3.client
+# Handler module constants read from the environment at import time, and
+# the values tests run with. They replace whatever value the module got,
+# e.g. from unit tests importing it first with their own environment.
+HANDLER_SETTINGS = {
+    "S3_BUCKET": "integration-bucket",
+    "SNS_TOPIC_ARN": "arn:aws:sns:eu-north-1:000000000000:stock-alerts",
+    "STATE_MACHINE_ARN": (
+        "arn:aws:states:eu-north-1:000000000000:stateMachine:integration"
+    ),
+}
+
+
+def find_pg_bin():
+    """
+    Returns the directory holding initdb and pg_ctl, or None.
+    """
+    candidates = [os.environ.get("PG_BIN")]
+    if shutil.which("pg_config"):
+        result = subprocess.run(
+            ["pg_config", "--bindir"], capture_output=True, text=True
+        )
+        candidates.append(result.stdout.strip())
+    candidates.append(os.path.dirname(shutil.which("initdb") or ""))
+    # Debian and Ubuntu keep the server binaries off PATH.
+    candidates.extend(sorted(glob.glob("/usr/lib/postgresql/*/bin"))[::-1])
+    for bindir in candidates:
+        if bindir and all(
+            os.access(os.path.join(bindir, tool), os.X_OK)
+            for tool in ("initdb", "pg_ctl")
+        ):
+            return bindir
+    return None
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("localhost", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def throwaway_postgres(bindir):
+    """
+    Runs a trust-authenticated cluster without durability in a temporary
+    directory and yields its URL.
+    """
+    with tempfile.TemporaryDirectory(prefix="integration-pg-") as tmp:
+        data_dir = os.path.join(tmp, "data")
+        port = free_port()
+        subprocess.run(
+            [
+                os.path.join(bindir, "initdb"),
+                "-D",
+                data_dir,
+                "-U",
+                "postgres",
+                "-A",
+                "trust",
+                "--no-sync",
+            ],
+            check=True,
+            capture_output=True,
+        )
+        pg_ctl = os.path.join(bindir, "pg_ctl")
+        subprocess.run(
+            [
+                pg_ctl,
+                "-D",
+                data_dir,
+                "-l",
+                os.path.join(tmp, "postgres.log"),
+                "-o",
+                f"-p {port} -k {tmp} -c fsync=off "
+                "-c synchronous_commit=off -c full_page_writes=off",
+                "-w",
+                "start",
+            ],
+            check=True,
+            capture_output=True,
+        )
+        try:
+            yield f"postgresql://postgres@localhost:{port}/postgres"
+        finally:
+            subprocess.run(
+                [pg_ctl, "-D", data_dir, "-m", "immediate", "stop"],
+                capture_output=True,
+            )
+
+
+@pytest.fixture(scope="session")
+def postgres_url():
+    url = os.environ.get("TEST_DATABASE_URL")
+    if url:
+        yield url
+        return
+    bindir = find_pg_bin()
+    if bindir is None:
+        pytest.skip("TEST_DATABASE_URL is not set and initdb was not found")
+    try:
+        with throwaway_postgres(bindir) as url:
+            yield url
+    except subprocess.CalledProcessError as e:
+        pytest.skip(f"Could not start PostgreSQL: {e.stderr.decode().strip()}")
+
+
+@pytest.fixture(scope="session")
+def engine(postgres_url):
+    admin_engine = create_engine(postgres_url)
+    with admin_engine.begin() as connection:
+        connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        connection.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+
+    engine = create_engine(
+        postgres_url,
+        connect_args={"options": f"-csearch_path={SCHEMA}"},
+    )
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+    with admin_engine.begin() as connection:
+        connection.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+    admin_engine.dispose()
+
+
+class IntegrationDB:
+    """
+    The test's connection and transaction, with the statements handlers
+    ran on it.
+    """
+
+    def __init__(self, connection, session_factory):
+        self.connection = connection
+        self.session_factory = session_factory
+        self.statements = []
+
+    def session(self):
+        """
+        Returns a session in the test transaction, for arranging data and
+        checking results. Its commits only release a savepoint.
+        """
+        return self.session_factory()
+
+    def execute(self, sql, params=None):
+        return self.connection.execute(text(sql), params or {})
+
+    @contextmanager
+    def count_queries(self):
+        """
+        Yields a list that collects the statements run inside the block.
+        """
+        start = len(self.statements)
+        captured = []
+        try:
+            yield captured
+        finally:
+            captured.extend(self.statements[start:])
+
+
+@pytest.fixture
+def db(engine, monkeypatch):
+    connection = engine.connect()
+    transaction = connection.begin()
+    session_factory = sessionmaker(
+        bind=connection,
+        autoflush=False,
+        join_transaction_mode="create_savepoint",
+    )
+    monkeypatch.setattr(db_connect, "SessionLocal", session_factory)
+    monkeypatch.setattr(db_connect, "ReplicaSessionLocal", session_factory)
+
+    # Process-wide caches must not carry state between tests.
+    monkeypatch.setattr(prepared, "_disabled", False)
+    connection.connection.info.pop("prepared_statements", None)
+    monkeypatch.setattr(location_index, "locations_version", None)
+    monkeypatch.setattr(location_index, "locations", {})
+    monkeypatch.setattr(location_index, "stock", {})
+
+    integration_db = IntegrationDB(connection, session_factory)
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        integration_db.statements.append(statement)
+
+    event.listen(connection, "before_cursor_execute", before_cursor_execute)
+    yield integration_db
+    event.remove(connection, "before_cursor_execute", before_cursor_execute)
+    if transaction.is_active:
+        transaction.rollback()
+    # Prepared statements outlive transactions; the next test prepares
+    # its own on a fresh token.
+    connection.connection.info.pop("prepared_statements", None)
+    connection.close()
+
+
+@pytest.fixture
+def async_session(postgres_url, db, monkeypatch):
+    """
+    Routes get_async_session() to an asyncpg connection in its own rolled
+    back transaction. The connection lives on the handlers' event loop.
+    """
+    from sqlalchemy.ext.asyncio import (
+        async_sessionmaker,
+        create_async_engine,
+    )
+
+    engine = create_async_engine(
+        postgres_url.replace("postgresql://", "postgresql+asyncpg://", 1),
+        connect_args={"server_settings": {"search_path": SCHEMA}},
+    )
+    loop = async_aws.get_event_loop()
+    connection = loop.run_until_complete(engine.connect())
+    transaction = loop.run_until_complete(connection.begin())
+    session_factory = async_sessionmaker(
+        connection,
+        autoflush=False,
+        expire_on_commit=False,
+        join_transaction_mode="create_savepoint",
+    )
+    monkeypatch.setattr(
+        async_db, "get_async_engine", lambda read_only=False: connection
+    )
+    monkeypatch.setattr(
+        async_db, "_sessionmakers", {connection: session_factory}
+    )
+    yield session_factory
+    loop.run_until_complete(transaction.rollback())
+    loop.run_until_complete(connection.close())
+    loop.run_until_complete(engine.dispose())
+
+
+def install_fakes(monkeypatch, aws, module):
+    """
+    Swaps the boto3 clients and settings a handler module created at
+    import time for the fakes and the HANDLER_SETTINGS.
+    """
+    for name, value in list(vars(module).items()):
+        if isinstance(value, BaseClient):
+            service = value.meta.service_model.service_name
+            monkeypatch.setattr(module, name, aws.client(service))
+        elif isinstance(value, async_aws.AsyncClient):
+            if isinstance(value.client, BaseClient):
+                service = value.client.meta.service_model.service_name
+                monkeypatch.setattr(value, "client", aws.client(service))
+        elif name in HANDLER_SETTINGS:
+            monkeypatch.setattr(module, name, HANDLER_SETTINGS[name])
+
+
+@pytest.fixture
+def aws(monkeypatch):
+    fake = FakeAWS()
+    # Clients created lazily, e.g. by generate_presigned_url().
+    monkeypatch.setattr(boto3, "client", fake.client)
+    return fake
+
+
+@pytest.fixture
+def invoke(db, aws, monkeypatch):
+    """
+    Returns a function that runs the lambda_handler of a src module with
+    an event, against the test database and the AWS fakes.
+    """
+
+    def call(module_name, event, context=None):
+        # Clients created at import time must be real ones, so they are
+        # recognized and swapped, and restored after the test.
+        with monkeypatch.context() as patch:
+            patch.setattr(boto3, "client", BOTO3_CLIENT)
+            module = importlib.import_module(f"src.{module_name}")
+        install_fakes(monkeypatch, aws, module)
+        return module.lambda_handler(event, context)
+
+    return call
+
+
+@pytest.fixture
+def benchmark(request):
+    """
+    Returns a function that times `func` over `rounds` calls after
+    `warmup` calls, prints the timings and returns them in seconds.
+    """
+
+    def run(func, rounds=20, warmup=2):
+        for _ in range(warmup):
+            func()
+        timings = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        stats = {
+            "min": min(timings),
+            "median": statistics.median(timings),
+            "max": max(timings),
+        }
+        print(
+            f"{request.node.name}: "
+            + ", ".join(
+                f"{name} {value * 1000:.2f} ms"
+                for name, value in stats.items()
+            )
+        )
+        return stats
+
+    return run
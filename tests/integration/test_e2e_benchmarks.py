@@ -0,0 +1,80 @@
+"""
+Offline benchmarks of hot handler paths. Timings are printed (run with -s)
+and only compared with each other, never with absolute limits.
+"""
+
+from db_layer.basemodels import Item, ItemStock, Location
+
+
+def seed(db, items=200):
+    session = db.session()
+    session.add_all(
+        Item(
+            name=f"item {n}",
+            description="desc",
+            price=n,
+            s3_key=f"images/sha256/{n}.jpg",
+        )
+        for n in range(items)
+    )
+    location = Location(
+        address="a",
+        zip_code="1000",
+        city="c",
+        street="s",
+        state="st",
+        number=1,
+        type="warehouse",
+    )
+    session.add(location)
+    session.flush()
+    session.add_all(
+        ItemStock(item_id=n, location_id=location.id, quantity=10**6)
+        for n in range(1, 21)
+    )
+    session.commit()
+    location_id = location.id
+    session.close()
+    return location_id
+
+
+def test_listing_revalidation_is_cheaper_than_a_full_page(
+    db, invoke, benchmark
+):
+    seed(db)
+    event = {
+        "resource": "/items",
+        "httpMethod": "GET",
+        "queryStringParameters": {"limit": "100"},
+    }
+    etag = invoke("items_method", event)["headers"]["ETag"]
+    revalidate = dict(event, headers={"If-None-Match": etag})
+
+    full = benchmark(lambda: invoke("items_method", event))
+    cached = benchmark(lambda: invoke("items_method", revalidate))
+
+    assert invoke("items_method", revalidate)["statusCode"] == 304
+    assert cached["median"] < full["median"]
+
+
+def test_update_stock_throughput(db, invoke, benchmark):
+    location_id = seed(db)
+    event = {
+        "data": {
+            "response_body": {
+                "items": [
+                    {"item_id": n, "location_id": location_id, "quantity": 1}
+                    for n in range(1, 21)
+                ]
+            },
+            "operation": "deduct",
+        }
+    }
+
+    with db.count_queries() as statements:
+        stats = benchmark(lambda: invoke("update_stock", event), rounds=10)
+
+    assert stats["min"] > 0
+    # Warm-up included: one PREPARE, then one EXECUTE per line.
+    assert sum(s.startswith("PREPARE") for s in statements) == 1
+    assert sum(s.startswith("EXECUTE") for s in statements) == 12 * 20
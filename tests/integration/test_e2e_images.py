@@ -0,0 +1,226 @@
+"""
+End-to-end test of content-addressed image uploads, shared references and
+garbage collection.
+"""
+
+import base64
+import hashlib
+import json
+
+import pytest
+from sqlalchemy import text
+
+from db_layer.async_aws import get_event_loop
+from db_layer.basemodels import Item
+
+BUCKET = "integration-bucket"
+
+
+def image_event(resource, item_id, body):
+    return {
+        "resource": resource,
+        "httpMethod": "POST",
+        "pathParameters": {"item_id": str(item_id)},
+        "body": json.dumps(body),
+    }
+
+
+def upload(aws, invoke, item_id, data):
+    request = {
+        "sha256": hashlib.sha256(data).hexdigest(),
+        "size": len(data),
+        "content_type": "image/png",
+    }
+    response = invoke(
+        "item_image_methods",
+        image_event("/items/{item_id}/image", item_id, request),
+    )
+    assert response["statusCode"] == 201
+    body = json.loads(response["body"])
+    if not body["exists"]:
+        aws.s3.client_upload(body["url"], data, headers=body["headers"])
+    response = invoke(
+        "item_image_methods",
+        image_event(
+            "/items/{item_id}/image/confirm", item_id, {"key": body["key"]}
+        ),
+    )
+    assert response["statusCode"] == 200
+    return body
+
+
+def test_shared_image_is_uploaded_once_and_collected_after_last_item(
+    db, aws, invoke
+):
+    session = db.session()
+    items = [Item(name=n, description="d", price=1) for n in ("a", "b")]
+    session.add_all(items)
+    session.commit()
+    first, second = (item.id for item in items)
+    session.close()
+    data = b"\x89PNG same image"
+
+    assert upload(aws, invoke, first, data)["exists"] is False
+    shared = upload(aws, invoke, second, data)
+    assert shared["exists"] is True
+    assert (BUCKET, shared["key"]) in aws.s3.objects
+    assert db.execute("SELECT status, ref_count FROM image_objects").one() == (
+        "stored",
+        2,
+    )
+
+    for item_id in (first, second):
+        response = invoke(
+            "items_item_id_methods",
+            {"httpMethod": "DELETE", "pathParameters": {"item_id": item_id}},
+        )
+        assert response["statusCode"] == 200
+
+    assert invoke("image_gc", {"grace_hours": 0})["collected"] == 1
+    assert (BUCKET, shared["key"]) not in aws.s3.objects
+    assert db.execute("SELECT count(*) FROM image_objects").scalar() == 0
+
+
+def test_confirm_rejects_upload_with_other_content(db, aws, invoke):
+    session = db.session()
+    item = Item(name="a", description="d", price=1)
+    session.add(item)
+    session.commit()
+    item_id = item.id
+    session.close()
+    data = b"expected"
+    response = invoke(
+        "item_image_methods",
+        image_event(
+            "/items/{item_id}/image",
+            item_id,
+            {
+                "sha256": hashlib.sha256(data).hexdigest(),
+                "size": len(data),
+                "content_type": "image/png",
+            },
+        ),
+    )
+    key = json.loads(response["body"])["key"]
+    # A client ignoring the signed checksum header.
+    aws.s3.put_object(BUCKET, key, b"tampered")
+
+    response = invoke(
+        "item_image_methods",
+        image_event("/items/{item_id}/image/confirm", item_id, {"key": key}),
+    )
+
+    assert response["statusCode"] == 409
+
+
+def test_deprecated_image_data_is_stored_content_addressed(
+    aws, async_session, invoke
+):
+    data = b"\xff\xd8 inline jpeg"
+    items = [
+        {
+            "name": name,
+            "description": "d",
+            "price": 1,
+            "image_data": base64.b64encode(data).decode(),
+        }
+        for name in ("a", "b")
+    ]
+
+    response = invoke("items_post", {"data": {"items": items}})
+
+    assert response["statusCode"] == 201
+    key = f"images/sha256/{hashlib.sha256(data).hexdigest()}.jpg"
+    assert [item["s3_key"] for item in response["added_items"]] == [key] * 2
+    assert aws.s3.objects[(BUCKET, key)]["Body"] == data
+
+    # The items were written on the async session's connection.
+    async def stored_image():
+        async with async_session() as session:
+            result = await session.execute(
+                text(
+                    "SELECT status, ref_count FROM image_objects "
+                    "WHERE s3_key = :key"
+                ),
+                {"key": key},
+            )
+            return tuple(result.one())
+
+    assert get_event_loop().run_until_complete(stored_image()) == (
+        "stored",
+        2,
+    )
+
+
+def run_async_sql(async_session, sql, params=None):
+    async def run():
+        async with async_session() as session:
+            result = await session.execute(text(sql), params or {})
+            await session.commit()
+            return result.all() if result.returns_rows else None
+
+    return get_event_loop().run_until_complete(run())
+
+
+def test_deprecated_image_data_skips_stored_images(aws, async_session, invoke):
+    data = b"\xff\xd8 stored jpeg"
+    sha256 = hashlib.sha256(data).hexdigest()
+    key = f"images/sha256/{sha256}.jpg"
+    run_async_sql(
+        async_session,
+        "INSERT INTO image_objects (sha256, s3_key, content_type, size, "
+        "status, ref_count, created_at) "
+        "VALUES (:sha256, :key, 'image/jpeg', :size, 'stored', 1, now())",
+        {"sha256": sha256, "key": key, "size": len(data)},
+    )
+    item = {
+        "name": "a",
+        "description": "d",
+        "price": 1,
+        "image_data": base64.b64encode(data).decode(),
+    }
+
+    response = invoke("items_post", {"data": {"items": [item]}})
+
+    assert response["added_items"][0]["s3_key"] == key
+    assert (BUCKET, key) not in aws.s3.objects
+    assert run_async_sql(
+        async_session,
+        "SELECT status, ref_count FROM image_objects WHERE s3_key = :key",
+        {"key": key},
+    ) == [("stored", 2)]
+
+
+def test_deprecated_image_data_failed_upload_stays_tracked(
+    aws, async_session, invoke, monkeypatch
+):
+    data = b"\xff\xd8 failing jpeg"
+    key = f"images/sha256/{hashlib.sha256(data).hexdigest()}.jpg"
+
+    def failing_put(**kwargs):
+        raise RuntimeError("S3 unavailable")
+
+    monkeypatch.setattr(aws.s3, "put_object", failing_put)
+    item = {
+        "name": "lost",
+        "description": "d",
+        "price": 1,
+        "image_data": base64.b64encode(data).decode(),
+    }
+
+    with pytest.raises(RuntimeError):
+        invoke("items_post", {"data": {"items": [item]}})
+
+    # The items are rolled back; the image registered before the upload is
+    # left for the image GC.
+    assert (
+        run_async_sql(
+            async_session, "SELECT id FROM items WHERE name = 'lost'"
+        )
+        == []
+    )
+    assert run_async_sql(
+        async_session,
+        "SELECT status, ref_count FROM image_objects WHERE s3_key = :key",
+        {"key": key},
+    ) == [("pending", 0)]
@@ -0,0 +1,243 @@
+"""
+End-to-end tests of the item listing and image derivative handlers.
+"""
+
+import io
+import json
+
+from PIL import Image
+
+from db_layer.basemodels import ImageDerivative, Item, ItemStockTotal
+
+BUCKET = "integration-bucket"
+
+
+def jpeg_bytes(size=(800, 600)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, (200, 40, 40)).save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+def add_items(db, count, s3_key=None):
+    session = db.session()
+    items = [
+        Item(name=f"item {n}", description="desc", price=n, s3_key=s3_key)
+        for n in range(count)
+    ]
+    session.add_all(items)
+    session.commit()
+    ids = [item.id for item in items]
+    session.close()
+    return ids
+
+
+def list_items_event(headers=None, **query):
+    return {
+        "resource": "/items",
+        "httpMethod": "GET",
+        "headers": headers or {},
+        "queryStringParameters": query or None,
+    }
+
+
+def selects(statements):
+    return [s for s in statements if s.lstrip().upper().startswith("SELECT")]
+
+
+def test_listing_links_derivatives_and_revalidates_without_querying(
+    db, aws, invoke
+):
+    aws.s3.put_object(BUCKET, "images/sha256/a.jpg", jpeg_bytes())
+    add_items(db, 3, s3_key="images/sha256/a.jpg")
+
+    generated = invoke(
+        "item_image_derivatives",
+        {
+            "Records": [
+                {
+                    "s3": {
+                        "bucket": {"name": BUCKET},
+                        "object": {"key": "images/sha256/a.jpg"},
+                    }
+                }
+            ]
+        },
+    )
+    assert set(generated["generated"]["images/sha256/a.jpg"]) == {
+        "thumb",
+        "small",
+        "medium",
+    }
+    small = aws.s3.objects[(BUCKET, "derivatives/images/sha256/a/small.webp")]
+    with Image.open(io.BytesIO(small["Body"])) as image:
+        assert max(image.size) == 480
+
+    response = invoke("items_method", list_items_event())
+    assert response["statusCode"] == 200
+    body = json.loads(response["body"])
+    assert len(body) == 3
+    assert all(
+        "/derivatives/images/sha256/a/small.webp" in i["image_url"]
+        for i in body
+    )
+
+    etag = response["headers"]["ETag"]
+    with db.count_queries() as statements:
+        response = invoke(
+            "items_method", list_items_event({"If-None-Match": etag})
+        )
+    assert response["statusCode"] == 304
+    assert not [s for s in selects(statements) if "FROM items" in s]
+
+
+def test_listing_query_count_does_not_grow_with_page_size(db, invoke):
+    add_items(db, 50, s3_key="images/sha256/b.jpg")
+
+    with db.count_queries() as statements:
+        response = invoke("items_method", list_items_event(limit="50"))
+
+    assert response["statusCode"] == 200
+    assert len(json.loads(response["body"])) == 50
+    # Table versions, the page of items and its derivatives.
+    assert len(selects(statements)) == 3
+
+
+def test_item_image_redirect_renders_missing_size(db, aws, invoke):
+    aws.s3.put_object(BUCKET, "images/sha256/c.jpg", jpeg_bytes((100, 50)))
+    (item_id,) = add_items(db, 1, s3_key="images/sha256/c.jpg")
+
+    response = invoke(
+        "item_image_derivatives",
+        {
+            "resource": "/items/{item_id}/image/{size}",
+            "httpMethod": "GET",
+            "pathParameters": {"item_id": str(item_id), "size": "thumb"},
+        },
+    )
+
+    assert response["statusCode"] == 302
+    assert "derivatives/images/sha256/c/thumb.webp" in (
+        response["headers"]["Location"]
+    )
+    # Smaller images are never upscaled.
+    assert db.execute("SELECT width, height FROM image_derivatives").one() == (
+        100,
+        50,
+    )
+
+
+def test_lookup_by_ids_runs_one_query(db, aws, invoke):
+    ids = add_items(db, 50, s3_key="images/sha256/a.jpg")
+    session = db.session()
+    session.add(
+        ImageDerivative(
+            source_key="images/sha256/a.jpg",
+            name="small",
+            s3_key="derivatives/images/sha256/a/small.webp",
+            width=480,
+            height=360,
+            size=1,
+        )
+    )
+    session.add(ItemStockTotal(item_id=ids[0], total_quantity=4))
+    session.commit()
+    session.close()
+
+    with db.count_queries() as statements:
+        response = invoke(
+            "items_method",
+            list_items_event(ids=",".join(str(i) for i in ids + [0x7FFFFFFF])),
+        )
+    assert response["statusCode"] == 200
+    body = json.loads(response["body"])
+    assert len(body["items"]) == 50
+    assert body["missing"] == [0x7FFFFFFF]
+    assert body["items"][str(ids[0])]["total_quantity"] == 4
+    assert all(
+        "/derivatives/images/sha256/a/small.webp" in item["image_url"]
+        for item in body["items"].values()
+    )
+    assert len(selects(statements)) == 1
+
+
+def test_search_ranks_highlights_and_pages(db, invoke):
+    session = db.session()
+    session.add_all(
+        [
+            Item(name="Red kettle", description="Steel kettle", price=1),
+            Item(name="Blue mug", description="Fits any kettle", price=1),
+            Item(name="Kettle descaler", description="For kettles", price=1),
+            Item(name="Teapot", description="Porcelain", price=1),
+        ]
+    )
+    session.commit()
+    session.close()
+
+    pages = []
+    cursor = None
+    while True:
+        query = {"q": "kettle", "limit": "2"}
+        if cursor:
+            query["cursor"] = cursor
+        response = invoke("items_method", list_items_event(**query))
+        assert response["statusCode"] == 200
+        body = json.loads(response["body"])
+        pages.append([item["name"] for item in body["items"]])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+
+    names = [name for page in pages for name in page]
+    assert len(pages) == 2
+    assert sorted(names) == ["Blue mug", "Kettle descaler", "Red kettle"]
+    # Name matches weigh more than description matches.
+    assert names[-1] == "Blue mug"
+    first = json.loads(
+        invoke("items_method", list_items_event(q='"red kettle"'))["body"]
+    )["items"]
+    assert [item["name"] for item in first] == ["Red kettle"]
+    assert (
+        first[0]["highlights"]["name"]
+        == "<mark>Red</mark> <mark>kettle</mark>"
+    )
+
+
+def test_autocomplete_prefers_names_starting_with_the_prefix(db, invoke):
+    session = db.session()
+    session.add_all(
+        Item(name=name, description="", price=1)
+        for name in ("Red kettle", "Kettle", "Kettle 100%", "Teapot")
+    )
+    session.commit()
+    session.close()
+
+    def autocomplete(q):
+        response = invoke(
+            "items_method",
+            {
+                "resource": "/items/autocomplete",
+                "httpMethod": "GET",
+                "queryStringParameters": {"q": q},
+            },
+        )
+        return [item["name"] for item in json.loads(response["body"])]
+
+    assert autocomplete("KET") == ["Kettle", "Kettle 100%", "Red kettle"]
+    # LIKE wildcards in the prefix match literally.
+    assert autocomplete("00%") == ["Kettle 100%"]
+    with db.count_queries() as statements:
+        assert autocomplete("ket") == ["Kettle", "Kettle 100%", "Red kettle"]
+    assert statements == []
+
+
+def test_listing_fields_prune_columns_and_presigning(db, aws, invoke):
+    add_items(db, 2, s3_key="images/sha256/a.jpg")
+
+    with db.count_queries() as statements:
+        response = invoke("items_method", list_items_event(fields="price"))
+    body = json.loads(response["body"])
+    assert [set(item) for item in body] == [{"id", "price"}] * 2
+    listing = selects(statements)[-1]
+    assert "description" not in listing and "s3_key" not in listing
+    # No derivative lookup without image_url.
+    assert len(selects(statements)) == 2
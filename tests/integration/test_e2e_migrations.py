@@ -0,0 +1,201 @@
+"""
+End-to-end test of scripts/migrate_schema.py on a database created before
+item_stock_totals, table_versions, items.search_vector, sales_daily and the
+listing indexes, and on one created before purchases were partitioned.
+"""
+
+import os
+import sys
+from datetime import date
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(__file__), "..", "..", "scripts")
+)
+import migrate_schema  # noqa: E402
+
+PRE_MIGRATION_SCHEMA = """
+DROP TRIGGER item_stock_totals_trigger ON item_stock;
+DROP TABLE item_stock_totals;
+DROP TRIGGER items_version_trigger ON items;
+DROP TRIGGER locations_version_trigger ON locations;
+DROP TRIGGER image_derivatives_version_trigger ON image_derivatives;
+DROP TABLE table_versions;
+ALTER TABLE items DROP COLUMN search_vector;
+DROP TABLE sales_daily;
+ALTER TABLE reservations DROP COLUMN request_id;
+DROP INDEX ix_item_stock_item_id_location_id;
+DROP INDEX ix_reservations_user_id_id;
+DROP INDEX ix_reservations_status_created_at;
+DROP INDEX ix_purchases_user_id_id;
+DROP INDEX ix_purchases_status_purchase_date;
+DROP INDEX ix_purchases_reservation_id;
+"""
+
+# purchases and purchased_items as plain tables, before partitioning.
+UNPARTITIONED_PURCHASES_SCHEMA = """
+DROP TABLE purchased_items;
+DROP TABLE purchases;
+CREATE TABLE purchases (
+    id SERIAL PRIMARY KEY,
+    user_id VARCHAR NOT NULL,
+    reservation_id INTEGER,
+    payment_token VARCHAR,
+    status VARCHAR DEFAULT 'pending',
+    purchase_date TIMESTAMP,
+    updated_at TIMESTAMP
+);
+CREATE TABLE purchased_items (
+    purchase_id INTEGER NOT NULL REFERENCES purchases (id),
+    item_id INTEGER NOT NULL,
+    quantity INTEGER NOT NULL,
+    location_id INTEGER NOT NULL,
+    PRIMARY KEY (purchase_id, item_id)
+);
+"""
+
+
+def test_migration_creates_and_backfills_derived_tables(db):
+    db.execute(PRE_MIGRATION_SCHEMA)
+    item_id = db.execute(
+        "INSERT INTO items (name, description, price) "
+        "VALUES ('Blue kettle', 'Steel', 10) RETURNING id"
+    ).scalar()
+    db.execute(
+        "INSERT INTO locations "
+        "(address, zip_code, city, street, state, number, type) "
+        "SELECT 'a', zip_code, 'c', 's', 'st', 1, 'warehouse' "
+        "FROM unnest(ARRAY['1000AA', '2000BB']) AS zip_code"
+    )
+    db.execute(
+        "INSERT INTO item_stock (item_id, location_id, quantity) "
+        "SELECT :item_id, id, 2 + row_number() OVER (ORDER BY id) "
+        "FROM locations",
+        {"item_id": item_id},
+    )
+
+    purchase_id = db.execute(
+        "INSERT INTO purchases (user_id, status, purchase_date) "
+        "VALUES ('u', 'completed', '2025-03-04 12:00') RETURNING id"
+    ).scalar()
+    db.execute(
+        "INSERT INTO purchased_items "
+        "(purchase_id, item_id, quantity, location_id, purchase_date) "
+        "VALUES (:purchase_id, :item_id, 2, 1, '2025-03-04 12:00')",
+        {"purchase_id": purchase_id, "item_id": item_id},
+    )
+
+    migrate_schema.upgrade(db.connection)
+    # Re-running is a no-op.
+    migrate_schema.upgrade(db.connection)
+
+    totals = db.execute(
+        "SELECT total_quantity, location_count FROM item_stock_totals "
+        "WHERE item_id = :item_id",
+        {"item_id": item_id},
+    ).one()
+    assert tuple(totals) == (7, 2)
+
+    # The installed triggers keep both tables current.
+    db.execute(
+        "UPDATE item_stock SET quantity = quantity + 1 "
+        "WHERE item_id = :item_id",
+        {"item_id": item_id},
+    )
+    assert (
+        db.execute(
+            "SELECT total_quantity FROM item_stock_totals "
+            "WHERE item_id = :item_id",
+            {"item_id": item_id},
+        ).scalar()
+        == 9
+    )
+    db.execute(
+        "UPDATE items SET price = 11 WHERE id = :item_id", {"item_id": item_id}
+    )
+    assert db.execute(
+        "SELECT version FROM table_versions WHERE table_name = 'items'"
+    ).scalar()
+
+    assert (
+        db.execute(
+            "SELECT id FROM items "
+            "WHERE search_vector @@ plainto_tsquery('english', 'kettles')"
+        ).scalar()
+        == item_id
+    )
+    assert db.execute(
+        "SELECT 1 FROM pg_indexes WHERE indexname = 'ix_items_search_vector'"
+    ).scalar()
+
+    assert db.execute(
+        "SELECT 1 FROM pg_indexes "
+        "WHERE indexname = 'ix_reservations_request_id'"
+    ).scalar()
+    listing_indexes = db.execute(
+        "SELECT indexname FROM pg_indexes "
+        "WHERE tablename IN ('item_stock', 'reservations', 'purchases')"
+    ).scalars()
+    assert set(listing_indexes) >= {
+        "ix_item_stock_item_id_location_id",
+        "ix_reservations_user_id_id",
+        "ix_reservations_status_created_at",
+        "ix_purchases_user_id_id",
+        "ix_purchases_status_purchase_date",
+        "ix_purchases_reservation_id",
+    }
+
+    sales = db.execute(
+        "SELECT day, units_sold, order_lines FROM sales_daily "
+        "WHERE item_id = :item_id",
+        {"item_id": item_id},
+    ).all()
+    assert [tuple(row) for row in sales] == [(date(2025, 3, 4), 2, 1)]
+
+
+def test_migration_partitions_plain_purchase_tables(db):
+    db.execute(UNPARTITIONED_PURCHASES_SCHEMA)
+    db.execute(
+        "INSERT INTO purchases (user_id, status, purchase_date) VALUES "
+        "('u', 'completed', '2025-03-04 12:00'), "
+        "('v', 'completed', now())"
+    )
+    db.execute(
+        "INSERT INTO purchased_items "
+        "(purchase_id, item_id, quantity, location_id) "
+        "SELECT id, 7, 2, 1 FROM purchases"
+    )
+
+    migrate_schema.upgrade(db.connection)
+    # Re-running leaves the partitioned tables alone.
+    migrate_schema.upgrade(db.connection)
+
+    relkinds = db.execute(
+        "SELECT relkind FROM pg_class WHERE oid IN "
+        "(to_regclass('purchases'), to_regclass('purchased_items'))"
+    ).scalars()
+    assert list(relkinds) == ["p", "p"]
+    assert db.execute(
+        "SELECT to_regclass('purchases_old'), to_regclass('purchases_p202503')"
+    ).one() == (None, "purchases_p202503")
+    # Line items take the date of their purchase and land in its partition.
+    march = db.execute(
+        "SELECT item_id, quantity FROM purchased_items_p202503"
+    ).all()
+    assert [tuple(row) for row in march] == [(7, 2)]
+    assert db.execute("SELECT count(*) FROM purchased_items").scalar() == 2
+    assert db.execute(
+        "SELECT to_regclass('ix_purchases_reservation_id')"
+    ).scalar()
+
+    # New purchases continue after the copied ids.
+    new_id = db.execute(
+        "INSERT INTO purchases (user_id, purchase_date) "
+        "VALUES ('w', now()) RETURNING id"
+    ).scalar()
+    assert new_id == 3
+
+    sales = db.execute(
+        "SELECT day, units_sold FROM sales_daily "
+        "WHERE item_id = 7 AND day = '2025-03-04'"
+    ).all()
+    assert [tuple(row) for row in sales] == [(date(2025, 3, 4), 2)]
@@ -0,0 +1,74 @@
+"""
+End-to-end test of the purchases partition maintenance job.
+"""
+
+from datetime import date, datetime
+
+from db_layer.basemodels import Purchase, PurchasedItem
+
+BUCKET = "integration-bucket"
+
+
+def months_ago(months):
+    total = date.today().year * 12 + date.today().month - 1 - months
+    return date(total // 12, total % 12 + 1, 1)
+
+
+def test_maintenance_archives_and_detaches_old_partitions(db, aws, invoke):
+    db.execute("SELECT ensure_purchase_partitions(0, 26)")
+    old_month = months_ago(26)
+    session = db.session()
+    for month, user_id in ((old_month, "old"), (date.today(), "new")):
+        purchase = Purchase(
+            user_id=user_id,
+            status="completed",
+            purchase_date=datetime(month.year, month.month, 1, 12),
+        )
+        session.add(purchase)
+        session.flush()
+        session.add(
+            PurchasedItem(
+                purchase_id=purchase.id,
+                item_id=1,
+                quantity=2,
+                location_id=1,
+                purchase_date=purchase.purchase_date,
+            )
+        )
+    session.commit()
+    session.close()
+
+    result = invoke(
+        "purchase_partitions",
+        {"months_ahead": 3, "retention_months": 24, "bucket": BUCKET},
+    )
+
+    assert result["statusCode"] == 200
+    suffix = f"{old_month:%Y%m}"
+    assert f"purchases_p{suffix}" in result["detached"]
+    assert f"purchased_items_p{suffix}" in result["detached"]
+    assert len(result["detached"]) == 2 * 2
+    archive = aws.s3.objects[
+        (BUCKET, f"archive/purchases/purchases_p{suffix}.csv")
+    ]["Body"].decode()
+    assert ",old," in archive
+    attached = db.execute(
+        "SELECT count(*) FROM pg_inherits "
+        "WHERE inhrelid = CAST(:name AS regclass)",
+        {"name": f"purchases_p{suffix}"},
+    ).scalar()
+    assert attached == 0
+    users = db.execute("SELECT user_id FROM purchases").scalars().all()
+    assert users == ["new"]
+    # Detached partitions no longer reference the purchases table.
+    foreign_keys = db.execute(
+        "SELECT count(*) FROM pg_constraint "
+        "WHERE conrelid = CAST(:name AS regclass) AND contype = 'f'",
+        {"name": f"purchased_items_p{suffix}"},
+    ).scalar()
+    assert foreign_keys == 0
+    # Detached partitions stay queryable on their own.
+    assert (
+        db.execute(f"SELECT count(*) FROM purchased_items_p{suffix}").scalar()
+        == 1
+    )
@@ -0,0 +1,251 @@
+"""
+End-to-end tests of the stock handlers: prepared statements, low stock
+alerts, allocation and the asyncio item insert.
+"""
+
+import json
+
+import pytest
+from sqlalchemy.exc import MultipleResultsFound, OperationalError
+
+from db_layer import prepared
+from db_layer.basemodels import ItemStock, Location
+
+
+def add_stock(db, rows):
+    """
+    Adds a location per zip code and `rows` of (item_id, zip_code,
+    quantity). Returns the location ids by zip code.
+    """
+    session = db.session()
+    locations = {}
+    for _, zip_code, _ in rows:
+        if zip_code not in locations:
+            location = Location(
+                address="a",
+                zip_code=zip_code,
+                city="c",
+                street="s",
+                state="st",
+                number=1,
+                type="warehouse",
+            )
+            session.add(location)
+            session.flush()
+            locations[zip_code] = location.id
+    session.add_all(
+        ItemStock(
+            item_id=item_id,
+            location_id=locations[zip_code],
+            quantity=quantity,
+        )
+        for item_id, zip_code, quantity in rows
+    )
+    session.commit()
+    session.close()
+    return locations
+
+
+def stock_event(items, operation="deduct"):
+    return {
+        "data": {
+            "response_body": {"items": items},
+            "operation": operation,
+            "purchase_id": 1,
+        }
+    }
+
+
+def test_update_stock_prepares_once_and_alerts_below_threshold(
+    db, aws, invoke
+):
+    locations = add_stock(db, [(1, "1000", 50), (2, "1000", 11)])
+    location_id = locations["1000"]
+    items = [
+        {"item_id": 1, "location_id": location_id, "quantity": 5},
+        {"item_id": 2, "location_id": location_id, "quantity": 1},
+    ]
+
+    with db.count_queries() as first:
+        invoke("update_stock", stock_event(items))
+        assert aws.sns.published == []
+    with db.count_queries() as warm:
+        response = invoke("update_stock", stock_event(items))
+    statements = first + warm
+
+    assert response["statusCode"] == 201
+    assert [i["quantity"] for i in response["updated_items"]] == [40, 9]
+    # The pooled connection prepares the UPDATE once for all four rows.
+    prepares = [s for s in statements if s.startswith("PREPARE")]
+    executes = [s for s in statements if s.startswith("EXECUTE")]
+    assert len(prepares) == 1
+    assert len(executes) == 4
+    # Only the first use runs in a savepoint of its own; warm calls send
+    # the EXECUTE alone.
+    first_savepoints = [s for s in first if s.startswith("SAVEPOINT")]
+    warm_savepoints = [s for s in warm if s.startswith("SAVEPOINT")]
+    assert len(first_savepoints) == len(warm_savepoints) + 1
+    assert [m["Subject"] for m in aws.sns.published] == ["Low Stock Alert"]
+    assert "Current stock: 9" in aws.sns.published[0]["Message"]
+
+
+def test_update_stock_falls_back_when_prepared_statement_is_missing(
+    db, invoke
+):
+    locations = add_stock(db, [(1, "1000", 50)])
+    # As behind a transaction-mode pooler: the connection believes the
+    # statement is prepared, the server connection does not have it.
+    db.connection.connection.info["prepared_statements"] = {
+        "token": "gone",
+        "stock_deduct": True,
+    }
+    items = [{"item_id": 1, "location_id": locations["1000"], "quantity": 5}]
+
+    # The warm EXECUTE aborts the transaction, which is rolled back; the
+    # retry runs the plain SQL.
+    with pytest.raises(OperationalError):
+        invoke("update_stock", stock_event(items))
+    assert prepared.get_prepared_metrics()["enabled"] is False
+    response = invoke("update_stock", stock_event(items))
+
+    assert response["statusCode"] == 201
+    assert [i["quantity"] for i in response["updated_items"]] == [45]
+
+
+def test_update_stock_rejects_duplicate_stock_rows(db, invoke):
+    locations = add_stock(db, [(1, "1000", 50), (1, "1000", 7)])
+    items = [{"item_id": 1, "location_id": locations["1000"], "quantity": 5}]
+
+    with pytest.raises(MultipleResultsFound):
+        invoke("update_stock", stock_event(items))
+
+    quantities = db.execute(
+        "SELECT quantity FROM item_stock ORDER BY quantity"
+    ).scalars()
+    assert list(quantities) == [7, 50]
+
+
+def test_reservation_batch_cancels_only_the_failing_reservation(db, invoke):
+    locations = add_stock(
+        db, [(1, "1000", 50), (2, "1000", 7), (2, "1000", 8)]
+    )
+    location_id = locations["1000"]
+    reservation_ids = (
+        db.execute(
+            "INSERT INTO reservations (user_id, status, request_id) "
+            "VALUES ('u', 'reserved', 'ok'), ('v', 'reserved', 'dup') "
+            "RETURNING id"
+        )
+        .scalars()
+        .all()
+    )
+    items = [
+        {
+            "reservation_id": reservation_id,
+            "item_id": item_id,
+            "location_id": location_id,
+            "quantity": 5,
+        }
+        for reservation_id, item_id in zip(reservation_ids, (1, 2))
+    ]
+    db.execute(
+        "INSERT INTO reserved_items "
+        "(reservation_id, item_id, location_id, quantity) "
+        "VALUES (:reservation_id, :item_id, :location_id, :quantity)",
+        items,
+    )
+    event = stock_event(items)
+    event["data"]["reservation_ids"] = reservation_ids
+
+    response = invoke("update_stock", event)
+
+    # Item 2 has duplicate stock rows: only its reservation is cancelled.
+    ok_id, dup_id = reservation_ids
+    assert response["reservation_ids"] == [ok_id]
+    assert response["failed_reservation_ids"] == [dup_id]
+    quantities = db.execute(
+        "SELECT item_id, quantity FROM item_stock ORDER BY item_id, quantity"
+    ).all()
+    assert [tuple(row) for row in quantities] == [(1, 45), (2, 7), (2, 8)]
+    statuses = db.execute(
+        "SELECT r.id, r.status, count(ri.item_id) FROM reservations r "
+        "LEFT JOIN reserved_items ri ON ri.reservation_id = r.id "
+        "GROUP BY r.id ORDER BY r.id"
+    ).all()
+    assert [tuple(row) for row in statuses] == [
+        (ok_id, "reserved", 1),
+        (dup_id, "cancelled", 0),
+    ]
+
+
+def test_allocation_ships_from_nearest_location_with_stock(db, invoke):
+    locations = add_stock(
+        db, [(1, "1000", 1), (1, "5000", 10), (2, "1000", 5)]
+    )
+    event = {
+        "resource": "/allocations",
+        "httpMethod": "POST",
+        "body": json.dumps(
+            {
+                "zip_code": "1001",
+                "items": [
+                    {"item_id": 1, "quantity": 3},
+                    {"item_id": 2, "quantity": 2},
+                ],
+            }
+        ),
+    }
+
+    response = invoke("allocation_post", event)
+
+    assert response["statusCode"] == 200
+    body = json.loads(response["body"])
+    assert sorted((i["item_id"], i["location_id"]) for i in body["items"]) == [
+        (1, locations["5000"]),
+        (2, locations["1000"]),
+    ]
+    assert body["unallocated"] == []
+
+
+def test_items_post_inserts_on_the_async_session(async_session, invoke):
+    response = invoke(
+        "items_post",
+        {
+            "data": {
+                "items": [
+                    {"name": "a", "description": "d", "price": 1},
+                    {"name": "b", "description": "d", "price": 2},
+                ]
+            }
+        },
+    )
+
+    assert response["statusCode"] == 201
+    ids = [item["id"] for item in response["added_items"]]
+    assert len(set(ids)) == 2
+
+
+def test_availability_checks_a_cart_in_one_query(db, invoke):
+    locations = add_stock(db, [(1, "1000", 5), (1, "1000", 2), (2, "2000", 1)])
+    lines = [
+        {"item_id": 1, "location_id": locations["1000"], "quantity": 6},
+        {"item_id": 2, "location_id": locations["2000"], "quantity": 2},
+        {"item_id": 2, "location_id": locations["1000"], "quantity": 1},
+        {"item_id": 1, "location_id": locations["1000"], "quantity": 1},
+    ]
+    with db.count_queries() as statements:
+        response = invoke(
+            "stock_methods",
+            {
+                "resource": "/stock/availability",
+                "httpMethod": "POST",
+                "body": json.dumps({"lines": lines}),
+            },
+        )
+    assert response["statusCode"] == 200
+    body = json.loads(response["body"])
+    assert body["in_stock"] is False
+    assert [line["shortfall"] for line in body["lines"]] == [0, 1, 1, 0]
+    assert [line["available"] for line in body["lines"]] == [7, 1, 0, 1]
+    # The handler's session adds only savepoints around the one query.
+    assert len([s for s in statements if s.startswith("SELECT")]) == 1
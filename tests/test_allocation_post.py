@@ -0,0 +1,189 @@
+import json
+from unittest.mock import MagicMock, patch
+import numpy as np
+
+from db_layer.allocation_optimizer import optimize_allocation
+from db_layer.location_index import LocationIndex, zip_distance
+from src.allocation_post import lambda_handler
+
+
+def make_index(locations, stock):
+    index = LocationIndex()
+    index.locations = locations
+    index.stock = {item_id: (0, levels) for item_id, levels in stock.items()}
+    return index
+
+
+def make_event(body):
+    return {
+        "resource": "/allocations",
+        "httpMethod": "POST",
+        "body": json.dumps(body),
+    }
+
+
+def test_zip_distance():
+    assert zip_distance("1012 AB", "1012") == 0
+    assert zip_distance("1000", "1012") == 12
+    assert zip_distance("10", "1012") == 12
+    assert zip_distance("", "1012") == float("inf")
+
+
+def test_allocate_prefers_single_location():
+    # The nearby store only has item 1; the far warehouse has both.
+    index = make_index(
+        {1: "1000", 2: "9000"},
+        {10: {1: 5, 2: 5}, 11: {2: 5}},
+    )
+    shipments, unallocated = index.allocate({10: 2, 11: 2}, "1001")
+    assert [s["location_id"] for s in shipments] == [2]
+    assert unallocated == {}
+
+
+def test_allocate_splits_and_prefers_nearest():
+    index = make_index(
+        {1: "1000", 2: "9000", 3: "1100"},
+        {10: {1: 5, 2: 5}, 11: {3: 5}, 12: {2: 1}},
+    )
+    shipments, unallocated = index.allocate({10: 2, 11: 1, 12: 3}, "1001")
+    assert [(s["location_id"], s["items"]) for s in shipments] == [
+        (1, [{"item_id": 10, "quantity": 2}]),
+        (3, [{"item_id": 11, "quantity": 1}]),
+    ]
+    # No location holds 3 units of item 12.
+    assert unallocated == {12: 3}
+
+
+def test_refresh_stock_reloads_only_stale_items():
+    index = LocationIndex(stock_ttl=60)
+    session = MagicMock()
+    row = MagicMock(item_id=1, location_id=2, quantity=4)
+    query = session.query.return_value.filter.return_value.filter
+    query.return_value.all.return_value = [row]
+    index.refresh_stock(session, [1])
+    index.refresh_stock(session, [1])
+    assert session.query.call_count == 1
+    assert index.stock[1][1] == {2: 4}
+
+
+@patch("src.allocation_post.location_index")
+@patch("src.allocation_post.get_session")
+def test_lambda_handler_returns_reservation_items(
+    mock_get_session, mock_index
+):
+    mock_get_session.return_value = MagicMock()
+    mock_index.allocate.return_value = (
+        [
+            {
+                "location_id": 3,
+                "distance": 12,
+                "items": [{"item_id": 10, "quantity": 4}],
+            }
+        ],
+        {},
+    )
+    event = make_event(
+        {
+            "zip_code": "1012",
+            "items": [
+                {"item_id": 10, "quantity": 1},
+                {"item_id": "10", "quantity": 3},
+            ],
+        }
+    )
+
+    response = lambda_handler(event, {})
+
+    assert response["statusCode"] == 200
+    body = json.loads(response["body"])
+    assert body["items"] == [{"item_id": 10, "location_id": 3, "quantity": 4}]
+    # Duplicate lines are merged before allocating.
+    mock_index.allocate.assert_called_once_with({10: 4}, "1012")
+    mock_get_session.return_value.close.assert_called_once()
+
+
+@patch("src.allocation_post.location_index")
+@patch("src.allocation_post.get_session")
+def test_lambda_handler_unallocated_returns_409(mock_get_session, mock_index):
+    mock_get_session.return_value = MagicMock()
+    mock_index.allocate.return_value = ([], {10: 1})
+
+    response = lambda_handler(
+        make_event(
+            {"zip_code": "1012", "items": [{"item_id": 10, "quantity": 1}]}
+        ),
+        {},
+    )
+
+    assert response["statusCode"] == 409
+    body = json.loads(response["body"])
+    assert body["unallocated"] == [{"item_id": 10, "quantity": 1}]
+
+
+def test_lambda_handler_invalid_request():
+    response = lambda_handler(make_event({"items": []}), {})
+    assert response["statusCode"] == 400
+    response = lambda_handler(
+        make_event(
+            {"zip_code": "1012", "items": [{"item_id": 1, "quantity": 0}]}
+        ),
+        {},
+    )
+    assert response["statusCode"] == 400
+
+
+def test_optimize_allocation_improves_greedy_cover():
+    # Greedy opens location 0 (four lines) and then needs 1 and 2 for the
+    # rest; the improvement pass drops 0 since 1 and 2 cover everything.
+    stock = np.array(
+        [
+            [5, 5, 0],
+            [5, 5, 0],
+            [5, 0, 5],
+            [5, 0, 5],
+            [0, 5, 0],
+            [0, 0, 5],
+        ]
+    )
+    assignment = optimize_allocation(stock, np.ones(6), [0, 10, 10])
+    assert assignment.tolist() == [1, 1, 2, 2, 1, 2]
+
+
+def test_optimize_allocation_unallocatable_line():
+    stock = np.array([[5, 1], [0, 0]])
+    assignment = optimize_allocation(stock, [2, 1], [10, float("inf")])
+    assert assignment.tolist() == [0, -1]
+
+
+@patch("src.allocation_post.location_index", new_callable=LocationIndex)
+@patch("src.allocation_post.get_session")
+def test_lambda_handler_optimize_returns_reservation(
+    mock_get_session, mock_index
+):
+    mock_index.refresh = MagicMock()
+    mock_index.locations = {1: "1000", 2: "9000"}
+    mock_index.stock = {10: (0, {1: 5}), 11: (0, {2: 5})}
+    event = make_event(
+        {
+            "zip_code": "1000",
+            "user_id": "b2b-customer",
+            "items": [
+                {"item_id": 10, "quantity": 2},
+                {"item_id": 11, "quantity": 3},
+            ],
+        }
+    )
+    event["resource"] = "/allocations/optimize"
+
+    response = lambda_handler(event, {})
+
+    assert response["statusCode"] == 200
+    body = json.loads(response["body"])
+    assert [s["location_id"] for s in body["shipments"]] == [1, 2]
+    assert body["reservation"] == {
+        "user_id": "b2b-customer",
+        "items": [
+            {"item_id": 10, "location_id": 1, "quantity": 2},
+            {"item_id": 11, "location_id": 2, "quantity": 3},
+        ],
+    }
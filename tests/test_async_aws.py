@@ -0,0 +1,37 @@
+import asyncio
+from unittest.mock import MagicMock
+
+from db_layer.async_aws import AsyncClient, async_handler, get_event_loop
+
+
+def test_async_client_runs_methods_off_the_loop():
+    client = MagicMock()
+    client.publish.return_value = {"MessageId": "1"}
+    async_sns = AsyncClient(client)
+
+    async def publish():
+        return await async_sns.publish(TopicArn="arn", Message="hi")
+
+    assert asyncio.run(publish()) == {"MessageId": "1"}
+    client.publish.assert_called_once_with(TopicArn="arn", Message="hi")
+
+
+def test_async_client_passes_through_attributes():
+    client = MagicMock()
+    client.meta = "meta"
+
+    assert AsyncClient(client).meta == "meta"
+
+
+def test_async_handler_reuses_one_event_loop():
+    loops = []
+
+    @async_handler
+    async def handler(event, context):
+        loops.append(asyncio.get_running_loop())
+        return {"statusCode": 200, "event": event}
+
+    assert handler({"a": 1}, None) == {"statusCode": 200, "event": {"a": 1}}
+    handler({}, None)
+
+    assert loops[0] is loops[1] is get_event_loop()
@@ -28,9 +28,7 @@ def test_reservation_exists(mock_get_session):
     fake_reservation = MagicMock()
     fake_reservation.id = 123
 
-    fake_session.query.return_value.filter.return_value.first.return_value = (
-        fake_reservation
-    )
+    fake_session.execute.return_value.first.return_value = fake_reservation
 
     event = {
         "data": {
@@ -54,10 +52,8 @@ def test_reservation_not_exists(mock_get_session):
     fake_session = MagicMock()
     mock_get_session.return_value = fake_session
 
-    # Simulate session.query(Reservation).filter(...).first() returning None.
-    fake_session.query.return_value.filter.return_value.first.return_value = (
-        None
-    )
+    # Simulate the prepared reservation lookup returning no row.
+    fake_session.execute.return_value.first.return_value = None
 
     event = {"data": {"reservation_id": 456}}
     context = {}
@@ -67,3 +63,28 @@ def test_reservation_not_exists(mock_get_session):
     assert result["reservationExists"] is False
     # Verify that the session was closed.
     fake_session.close.assert_called_once()
+
+
+@patch("src.check_reservation.get_session")
+def test_reservation_batch_returns_existing_items(mock_get_session):
+    fake_session = MagicMock()
+    mock_get_session.return_value = fake_session
+    fake_session.scalars.return_value.all.return_value = [2]
+
+    event = {
+        "data": {
+            "reservation_ids": [1, 2],
+            "response_body": {
+                "items": [
+                    {"reservation_id": 1, "item_id": 10},
+                    {"reservation_id": 2, "item_id": 11},
+                ]
+            },
+        }
+    }
+
+    result = lambda_handler(event, {})
+    assert result["reservationExists"] is True
+    assert result["reservation_ids"] == [2]
+    assert result["items"] == [{"reservation_id": 2, "item_id": 11}]
+    fake_session.close.assert_called_once()
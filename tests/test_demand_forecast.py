@@ -0,0 +1,125 @@
+from datetime import date
+from unittest.mock import MagicMock, patch
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from db_layer.forecasting import (
+    aggregate_daily_demand,
+    compute_reorder_points,
+    exponential_smoothing_forecast,
+)
+from src.demand_forecast import compute_thresholds, lambda_handler
+
+
+def records(demand):
+    """
+    Returns the (series, day, units) records of a dense demand matrix.
+    """
+    series, days = np.nonzero(demand)
+    return series, days, demand[series, days], *demand.shape
+
+
+def test_aggregate_daily_demand_sums_records():
+    series, days, units = aggregate_daily_demand(
+        [1, 0, 0], [2, 1, 1], [4, 2, 3], 3
+    )
+    assert series.tolist() == [0, 1]
+    assert days.tolist() == [1, 2]
+    assert units.tolist() == [5, 4]
+
+
+def test_compute_reorder_points_moving_average():
+    # Constant demand has no variance, so no safety stock is needed.
+    demand = np.full((2, 28), 4, dtype=np.float32)
+    demand[1] = 0
+    forecast, safety_stock, reorder_point = compute_reorder_points(
+        *records(demand), lead_time_days=7, method="moving_average"
+    )
+    assert forecast.tolist() == [4, 0]
+    assert safety_stock.tolist() == [0, 0]
+    assert reorder_point.tolist() == [28, 0]
+
+
+def test_compute_reorder_points_variable_demand_adds_safety_stock():
+    demand = np.tile(np.array([0, 10], dtype=np.float32), (1, 50))
+    _, safety_stock, reorder_point = compute_reorder_points(*records(demand))
+    assert safety_stock[0] > 0
+    assert reorder_point[0] > 5 * 7
+
+
+def test_exponential_smoothing_matches_daily_recursion():
+    """
+    Skipping days without sales gives the same result as smoothing every
+    day of the dense history.
+    """
+    rng = np.random.default_rng(7)
+    demand = rng.poisson(0.3, size=(50, 120)).astype(np.float64)
+    demand[3] = 0
+    alpha = 0.2
+    level = demand[:, 0].copy()
+    variance = np.zeros(len(demand))
+    for day in range(1, demand.shape[1]):
+        error = demand[:, day] - level
+        level += alpha * error
+        variance = (1 - alpha) * (variance + alpha * error * error)
+
+    forecast, sigma = exponential_smoothing_forecast(
+        *records(demand), alpha=alpha
+    )
+
+    np.testing.assert_allclose(forecast, level, atol=1e-12)
+    np.testing.assert_allclose(sigma, np.sqrt(variance), atol=1e-12)
+
+
+def test_compute_reorder_points_invalid_method():
+    with pytest.raises(ValueError):
+        compute_reorder_points([0], [0], [1], 1, 5, method="arima")
+
+
+def test_compute_thresholds_groups_series():
+    thresholds = compute_thresholds(
+        np.array([7, 7, 3]),
+        np.array([1, 1, 2]),
+        np.array([0, 1, 1]),
+        np.array([2, 2, 6]),
+        2,
+        method="moving_average",
+        lead_time_days=1,
+    )
+    by_pair = {(t["item_id"], t["location_id"]): t for t in thresholds}
+    assert set(by_pair) == {(3, 2), (7, 1)}
+    assert by_pair[(7, 1)]["avg_daily_demand"] == 2
+    assert by_pair[(3, 2)]["avg_daily_demand"] == 3
+
+
+@patch("src.demand_forecast.get_session")
+def test_lambda_handler_upserts_thresholds(mock_get_session):
+    fake_session = MagicMock()
+    today = date.today()
+    # First call loads the aggregated history, the second is the upsert.
+    fake_session.execute.return_value.all.return_value = [
+        (1, 1, today, 4),
+        (2, 1, today, 1),
+    ]
+    mock_get_session.return_value = fake_session
+
+    response = lambda_handler({"history_days": 30}, {})
+
+    assert response == {"statusCode": 200, "thresholds": 2}
+    assert fake_session.execute.call_count == 2
+    fake_session.commit.assert_called_once()
+    fake_session.close.assert_called_once()
+
+
+@patch("src.demand_forecast.get_session")
+def test_lambda_handler_error_rolls_back(mock_get_session):
+    fake_session = MagicMock()
+    fake_session.execute.side_effect = Exception("DB error")
+    mock_get_session.return_value = fake_session
+
+    with pytest.raises(Exception) as excinfo:
+        lambda_handler({}, {})
+    assert "DB error" in str(excinfo.value)
+    fake_session.rollback.assert_called_once()
+    fake_session.close.assert_called_once()
@@ -0,0 +1,201 @@
+import io
+import json
+from unittest.mock import MagicMock, patch
+
+from botocore.exceptions import ClientError
+
+from src.export_methods import lambda_handler
+
+EXPORT_ID = "20250301T120000-" + "0" * 32
+
+
+def export_event(resource, export_format="ndjson", **filters):
+    return {
+        "export": {
+            "resource": resource,
+            "export_id": EXPORT_ID,
+            "format": export_format,
+            "filters": filters,
+            "read_only": True,
+        }
+    }
+
+
+def written_status(mock_s3_client):
+    put = mock_s3_client.put_object.call_args.kwargs
+    assert put["Key"].endswith(f"{EXPORT_ID}.json")
+    return json.loads(put["Body"])
+
+
+def make_row(**values):
+    row = MagicMock()
+    row._mapping = values
+    return row
+
+
+def test_lambda_handler_not_found():
+    event = {"httpMethod": "POST", "pathParameters": {"resource": "stock"}}
+    response = lambda_handler(event, {})
+    assert response["statusCode"] == 404
+
+
+def test_unknown_resource():
+    event = {"httpMethod": "GET", "pathParameters": {"resource": "users"}}
+    response = lambda_handler(event, {})
+    assert response["statusCode"] == 404
+    assert "Unknown export" in json.loads(response["body"])["message"]
+
+
+def test_invalid_format():
+    event = {
+        "httpMethod": "GET",
+        "pathParameters": {"resource": "stock"},
+        "queryStringParameters": {"format": "xml"},
+    }
+    response = lambda_handler(event, {})
+    assert response["statusCode"] == 400
+
+
+@patch("src.export_methods.s3_client")
+@patch("src.export_methods.lambda_client")
+def test_export_starts_asynchronously(mock_lambda_client, mock_s3_client):
+    event = {
+        "httpMethod": "GET",
+        "pathParameters": {"resource": "purchases"},
+        "queryStringParameters": {"format": "csv", "user_id": "u1"},
+    }
+
+    response = lambda_handler(event, {})
+
+    assert response["statusCode"] == 202
+    body = json.loads(response["body"])
+    assert body["status_url"] == f"/exports/purchases/{body['export_id']}"
+    assert response["headers"]["Location"] == body["status_url"]
+    # The export is recorded as pending, then run by an asynchronous
+    # invocation of the same function.
+    pending = json.loads(mock_s3_client.put_object.call_args.kwargs["Body"])
+    assert pending == {"status": "pending", "format": "csv"}
+    invoke = mock_lambda_client.invoke.call_args.kwargs
+    assert invoke["InvocationType"] == "Event"
+    job = json.loads(invoke["Payload"])["export"]
+    assert job["export_id"] == body["export_id"]
+    assert job["filters"] == {"user_id": "u1"}
+
+
+@patch("src.export_methods.s3_client")
+@patch("src.export_methods.S3MultipartWriter")
+@patch("src.export_methods.get_session")
+def test_export_stock_ndjson(
+    mock_get_session, mock_writer_class, mock_s3_client
+):
+    fake_session = MagicMock()
+    fake_session.execute.return_value = [
+        make_row(id=1, item_id=10, location_id=2, quantity=5),
+        make_row(id=2, item_id=11, location_id=2, quantity=0),
+    ]
+    mock_get_session.return_value = fake_session
+    writer = mock_writer_class.return_value.__enter__.return_value
+
+    lambda_handler(export_event("stock"), {})
+
+    status = written_status(mock_s3_client)
+    assert status["status"] == "completed"
+    assert status["rows"] == 2
+    assert status["s3_key"] == f"exports/stock/{EXPORT_ID}.ndjson"
+    lines = [call.args[0] for call in writer.write.call_args_list]
+    assert [json.loads(line) for line in lines] == [
+        {"id": 1, "item_id": 10, "location_id": 2, "quantity": 5},
+        {"id": 2, "item_id": 11, "location_id": 2, "quantity": 0},
+    ]
+    # The statement is streamed through a server-side cursor.
+    statement = fake_session.execute.call_args.args[0]
+    assert statement.get_execution_options()["yield_per"] > 0
+    fake_session.close.assert_called_once()
+
+
+@patch("src.export_methods.s3_client")
+@patch("src.export_methods.S3MultipartWriter")
+@patch("src.export_methods.get_session")
+def test_export_purchases_csv(
+    mock_get_session, mock_writer_class, mock_s3_client
+):
+    fake_session = MagicMock()
+    fake_session.execute.return_value = [
+        make_row(purchase_id=1, user_id="u1", item_id=10, quantity=2),
+    ]
+    mock_get_session.return_value = fake_session
+    writer = mock_writer_class.return_value.__enter__.return_value
+
+    lambda_handler(export_event("purchases", "csv", user_id="u1"), {})
+
+    assert written_status(mock_s3_client)["status"] == "completed"
+    written = "".join(call.args[0] for call in writer.write.call_args_list)
+    assert written.splitlines() == [
+        "purchase_id,user_id,item_id,quantity",
+        "1,u1,10,2",
+    ]
+    assert mock_writer_class.call_args.kwargs["content_type"] == "text/csv"
+
+
+@patch("src.export_methods.s3_client")
+@patch("src.export_methods.S3MultipartWriter")
+@patch("src.export_methods.get_session")
+def test_export_error(mock_get_session, mock_writer_class, mock_s3_client):
+    fake_session = MagicMock()
+    fake_session.execute.side_effect = Exception("DB error")
+    mock_get_session.return_value = fake_session
+
+    lambda_handler(export_event("stock"), {})
+
+    status = written_status(mock_s3_client)
+    assert status["status"] == "failed"
+    assert "DB error" in status["error"]
+    fake_session.close.assert_called_once()
+
+
+def poll_event(export_id=EXPORT_ID):
+    return {
+        "httpMethod": "GET",
+        "pathParameters": {"resource": "stock", "export_id": export_id},
+    }
+
+
+@patch("src.export_methods.generate_presigned_url")
+@patch("src.export_methods.s3_client")
+def test_poll_export(mock_s3_client, mock_generate_presigned_url):
+    mock_generate_presigned_url.return_value = "https://example.com/export"
+    statuses = [
+        {"status": "pending", "format": "ndjson"},
+        {
+            "status": "completed",
+            "format": "ndjson",
+            "rows": 2,
+            "s3_key": f"exports/stock/{EXPORT_ID}.ndjson",
+        },
+    ]
+    mock_s3_client.get_object.side_effect = [
+        {"Body": io.BytesIO(json.dumps(status).encode())}
+        for status in statuses
+    ]
+
+    pending = lambda_handler(poll_event(), {})
+    completed = lambda_handler(poll_event(), {})
+
+    assert pending["statusCode"] == 202
+    assert "url" not in json.loads(pending["body"])
+    assert completed["statusCode"] == 200
+    body = json.loads(completed["body"])
+    assert body["rows"] == 2
+    assert body["url"] == "https://example.com/export"
+
+
+@patch("src.export_methods.s3_client")
+def test_poll_unknown_export(mock_s3_client):
+    mock_s3_client.get_object.side_effect = ClientError(
+        {"Error": {"Code": "NoSuchKey"}}, "GetObject"
+    )
+
+    assert lambda_handler(poll_event(), {})["statusCode"] == 404
+    # Ids that start_export cannot have generated are not looked up.
+    assert lambda_handler(poll_event("../x"), {})["statusCode"] == 404
+    mock_s3_client.get_object.assert_called_once()
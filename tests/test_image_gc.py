@@ -0,0 +1,70 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.image_gc import lambda_handler
+
+
+def make_session(batches):
+    """
+    Returns a session whose deletes return the given (image keys,
+    derivative keys) batches in turn.
+    """
+    results = [keys for batch in batches for keys in batch]
+    session = MagicMock()
+    session.execute.return_value.scalars.return_value.all.side_effect = results
+    return session
+
+
+@patch("src.image_gc.s3_client")
+@patch("src.image_gc.get_session")
+def test_collects_in_batches(mock_get_session, mock_s3):
+    session = make_session(
+        [
+            (["a.jpg", "b.jpg"], ["derivatives/a/small.webp"]),
+            (["c.jpg"], []),
+        ]
+    )
+    mock_get_session.return_value = session
+    mock_s3.delete_objects.return_value = {}
+
+    response = lambda_handler({"batch_size": 2}, {})
+
+    assert response == {"statusCode": 200, "collected": 3}
+    deleted = [
+        [obj["Key"] for obj in call.kwargs["Delete"]["Objects"]]
+        for call in mock_s3.delete_objects.call_args_list
+    ]
+    assert deleted == [
+        ["a.jpg", "b.jpg", "derivatives/a/small.webp"],
+        ["c.jpg"],
+    ]
+    assert session.commit.call_count == 2
+    session.close.assert_called_once()
+
+
+@patch("src.image_gc.s3_client")
+@patch("src.image_gc.get_session")
+def test_nothing_to_collect(mock_get_session, mock_s3):
+    mock_get_session.return_value = make_session([([],)])
+
+    response = lambda_handler({}, {})
+
+    assert response["collected"] == 0
+    mock_s3.delete_objects.assert_not_called()
+
+
+@patch("src.image_gc.s3_client")
+@patch("src.image_gc.get_session")
+def test_failed_delete_rolls_back(mock_get_session, mock_s3):
+    session = make_session([(["a.jpg"], [])])
+    mock_get_session.return_value = session
+    mock_s3.delete_objects.return_value = {
+        "Errors": [{"Key": "a.jpg", "Code": "AccessDenied"}]
+    }
+
+    with pytest.raises(RuntimeError):
+        lambda_handler({}, {})
+
+    session.rollback.assert_called()
+    session.commit.assert_not_called()
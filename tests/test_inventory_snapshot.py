@@ -0,0 +1,72 @@
+from datetime import date
+from unittest.mock import MagicMock, patch
+import pytest
+
+pytest.importorskip("pyarrow")
+import pyarrow.dataset as ds
+
+from src.inventory_snapshot import lambda_handler
+
+
+@patch("src.inventory_snapshot.get_session")
+def test_snapshot_item_stock_partitioned(mock_get_session, tmp_path):
+    """
+    Rows read in chunks are written as Parquet partitioned by location and
+    date under a per-run directory of the local target.
+    """
+    fake_session = MagicMock()
+    fake_session.execute.return_value.partitions.return_value = [
+        [(1, 10, 5, 1, date(2025, 1, 1)), (2, 11, 0, 2, date(2025, 1, 1))],
+        [(3, 12, 7, 2, date(2025, 1, 1))],
+    ]
+    mock_get_session.return_value = fake_session
+
+    event = {"target": str(tmp_path), "tables": ["item_stock"]}
+    response = lambda_handler(event, {})
+
+    assert response["statusCode"] == 200
+    assert response["rows"] == {"item_stock": 3}
+    table_path = f"{response['snapshot_path']}/item_stock"
+    assert list(tmp_path.glob("*/item_stock/location_id=2/date=2025-01-01"))
+    rows = (
+        ds.dataset(table_path, partitioning="hive")
+        .to_table()
+        .sort_by("id")
+        .to_pylist()
+    )
+    assert [(row["id"], row["location_id"]) for row in rows] == [
+        (1, 1),
+        (2, 2),
+        (3, 2),
+    ]
+    # The statement is streamed through a server-side cursor.
+    statement = fake_session.execute.call_args.args[0]
+    assert statement.get_execution_options()["yield_per"] > 0
+    fake_session.close.assert_called_once()
+
+
+@patch("src.inventory_snapshot.get_session")
+def test_snapshot_error_is_raised(mock_get_session, tmp_path):
+    fake_session = MagicMock()
+    fake_session.execute.side_effect = Exception("DB error")
+    mock_get_session.return_value = fake_session
+
+    with pytest.raises(Exception) as excinfo:
+        lambda_handler({"target": str(tmp_path)}, {})
+    assert "DB error" in str(excinfo.value)
+    fake_session.close.assert_called_once()
+
+
+@patch("src.inventory_snapshot.get_session")
+def test_snapshot_unknown_table_is_rejected(mock_get_session, tmp_path):
+    """
+    Unknown table names fail before any table is read or written.
+    """
+    event = {"target": str(tmp_path), "tables": ["item_stock", "stock"]}
+
+    with pytest.raises(ValueError) as excinfo:
+        lambda_handler(event, {})
+    assert "stock" in str(excinfo.value)
+    assert "item_stock, purchased_items, reserved_items" in str(excinfo.value)
+    mock_get_session.assert_not_called()
+    assert not list(tmp_path.iterdir())
@@ -38,7 +38,6 @@ def test_state_machine_not_set(mock_sfn_client):
                     "name": "Item One",
                     "description": "First item",
                     "price": 100,
-                    "image_data": "base64string",
                 }
             ]
         ),
@@ -86,8 +85,7 @@ def test_saga_trigger_success(mock_sfn_client):
         "id": { "type": "integer", "format": "int32" },
         "name": { "type": "string" },
         "description": { "type": "string" },
-        "price": { "type": "integer", "format": "int32" },
-        "image_data": { "type": "string" }
+        "price": { "type": "integer", "format": "int32" }
       }
     }
     """
@@ -102,13 +100,11 @@ def test_saga_trigger_success(mock_sfn_client):
             "name": "Item One",
             "description": "First item",
             "price": 100,
-            "image_data": "base64string1",
         },
         {
             "name": "Item Two",
             "description": "Second item",
             "price": 200,
-            "image_data": "base64string2",
         },
     ]
     event = {
@@ -131,3 +127,36 @@ def test_saga_trigger_success(mock_sfn_client):
         stateMachineArn="test-arn",
         input=expected_input,
     )
+
+
+@patch("src.invoke_item_step.sfn_client")
+def test_image_data_still_accepted_with_deprecation(mock_sfn_client):
+    """
+    Test that inline base64 images still start the saga during their
+    deprecation period, with a Deprecation header and a warning.
+    """
+    invoke_item_step.STATE_MACHINE_ARN = "test-arn"
+    mock_sfn_client.start_execution.return_value = {"executionArn": "arn"}
+
+    event = {
+        "httpMethod": "POST",
+        "resource": "/items",
+        "body": json.dumps(
+            [
+                {
+                    "name": "Item One",
+                    "description": "First item",
+                    "price": 100,
+                    "image_data": "base64string",
+                }
+            ]
+        ),
+    }
+    response = invoke_item_step.lambda_handler(event, {})
+
+    assert response["statusCode"] == 200
+    assert response["headers"] == {"Deprecation": "true"}
+    body = json.loads(response["body"])
+    assert body["executionArn"] == "arn"
+    assert "POST /items/{item_id}/image" in body["warning"]
+    mock_sfn_client.start_execution.assert_called_once()
@@ -6,6 +6,12 @@ from unittest.mock import patch
 # Import the lambda handler from your module.
 from src.invoke_purchase_step import lambda_handler
 
+VALID_PURCHASE = {
+    "user_id": "u1",
+    "payment_token": "tok",
+    "items": [{"item_id": 1, "location_id": 2, "quantity": 3}],
+}
+
 
 def test_not_found():
     """
@@ -37,7 +43,7 @@ def test_state_machine_not_set(mock_sfn_client):
     event = {
         "httpMethod": "POST",
         "resource": "/purchases",
-        "body": json.dumps({"item": "test"}),
+        "body": json.dumps(VALID_PURCHASE),
     }
     context = {}
     response = lambda_handler(event, context)
@@ -82,7 +88,7 @@ def test_saga_trigger_success(mock_sfn_client):
     mock_sfn_client.start_execution.return_value = fake_response
 
     # Prepare a valid input body.
-    input_body = {"item": "test"}
+    input_body = VALID_PURCHASE
     event = {
         "httpMethod": "POST",
         "resource": "/purchases",
@@ -104,3 +110,36 @@ def test_saga_trigger_success(mock_sfn_client):
         stateMachineArn="test-arn",
         input=expected_input,
     )
+
+
+@patch("src.invoke_purchase_step.sfn_client")
+def test_invalid_purchase_is_rejected_before_the_saga(mock_sfn_client):
+    """
+    Verify that a body not matching PurchaseRequest is answered with a 400
+    listing the errors, without starting an execution.
+    """
+    from src import invoke_purchase_step
+
+    invoke_purchase_step.STATE_MACHINE_ARN = "test-arn"
+
+    event = {
+        "httpMethod": "POST",
+        "resource": "/purchases",
+        "body": json.dumps(
+            {
+                "user_id": "u1",
+                "items": [{"item_id": "1", "location_id": 0, "quantity": 1}],
+            }
+        ),
+    }
+    response = lambda_handler(event, {})
+
+    assert response["statusCode"] == 400
+    body = json.loads(response["body"])
+    assert body["message"] == "Invalid request body"
+    assert body["errors"] == [
+        "body.payment_token: is required",
+        "body.items[0].item_id: expected integer",
+        "body.items[0].location_id: must be >= 1",
+    ]
+    mock_sfn_client.start_execution.assert_not_called()
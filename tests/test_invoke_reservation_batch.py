@@ -0,0 +1,103 @@
+import json
+import pytest
+from unittest.mock import patch
+
+from src.invoke_reservation_batch import lambda_handler
+
+
+def make_records(count):
+    return [
+        {
+            "messageId": f"msg-{i}",
+            "body": json.dumps({"request_id": f"req-{i}", "user_id": "u1"}),
+        }
+        for i in range(count)
+    ]
+
+
+@patch("src.invoke_reservation_batch.sfn_client")
+def test_state_machine_not_set(mock_sfn_client):
+    from src import invoke_reservation_batch
+
+    invoke_reservation_batch.STATE_MACHINE_ARN = None
+
+    with pytest.raises(ValueError) as excinfo:
+        lambda_handler({"Records": make_records(1)}, {})
+    assert "STATE_MACHINE_ARN" in str(excinfo.value)
+    mock_sfn_client.start_execution.assert_not_called()
+
+
+@patch("src.invoke_reservation_batch.sfn_client")
+def test_records_are_started_in_batches(mock_sfn_client):
+    """
+    Five buffered requests with a batch size of two start three executions,
+    each carrying its requests under data.batch.
+    """
+    from src import invoke_reservation_batch
+
+    invoke_reservation_batch.STATE_MACHINE_ARN = "test-arn"
+    invoke_reservation_batch.MAX_BATCH_SIZE = 2
+    mock_sfn_client.start_execution.return_value = {"executionArn": "arn"}
+
+    response = lambda_handler({"Records": make_records(5)}, {})
+
+    assert response == {"batchItemFailures": []}
+    assert mock_sfn_client.start_execution.call_count == 3
+    first_input = json.loads(
+        mock_sfn_client.start_execution.call_args_list[0].kwargs["input"]
+    )
+    assert first_input["data"]["stock_operation"] == "deduct"
+    assert [r["request_id"] for r in first_input["data"]["batch"]] == [
+        "req-0",
+        "req-1",
+    ]
+
+
+@patch("src.invoke_reservation_batch.sfn_client")
+def test_malformed_record_is_reported_alone(mock_sfn_client):
+    """
+    A record that is not JSON fails on its own; the others are started.
+    """
+    from src import invoke_reservation_batch
+
+    invoke_reservation_batch.STATE_MACHINE_ARN = "test-arn"
+    invoke_reservation_batch.MAX_BATCH_SIZE = 50
+    mock_sfn_client.start_execution.return_value = {"executionArn": "arn"}
+    records = make_records(3)
+    records[1]["body"] = "{not json"
+
+    response = lambda_handler({"Records": records}, {})
+
+    assert response == {"batchItemFailures": [{"itemIdentifier": "msg-1"}]}
+    started = json.loads(
+        mock_sfn_client.start_execution.call_args.kwargs["input"]
+    )
+    assert [r["request_id"] for r in started["data"]["batch"]] == [
+        "req-0",
+        "req-2",
+    ]
+
+
+@patch("src.invoke_reservation_batch.sfn_client")
+def test_failed_batch_is_reported(mock_sfn_client):
+    """
+    Only the records of a batch whose execution could not be started are
+    returned as batch item failures.
+    """
+    from src import invoke_reservation_batch
+
+    invoke_reservation_batch.STATE_MACHINE_ARN = "test-arn"
+    invoke_reservation_batch.MAX_BATCH_SIZE = 2
+    mock_sfn_client.start_execution.side_effect = [
+        {"executionArn": "arn"},
+        Exception("throttled"),
+    ]
+
+    response = lambda_handler({"Records": make_records(4)}, {})
+
+    assert response == {
+        "batchItemFailures": [
+            {"itemIdentifier": "msg-2"},
+            {"itemIdentifier": "msg-3"},
+        ]
+    }
@@ -5,6 +5,8 @@ from unittest.mock import patch
 
 from src.invoke_reservation_step import lambda_handler
 
+VALID_RESERVATION = {"user_id": "u1", "items": [{"item_id": 1, "quantity": 2}]}
+
 
 def test_not_found():
     """
@@ -35,7 +37,7 @@ def test_state_machine_not_set(mock_sfn_client):
     event = {
         "httpMethod": "POST",
         "resource": "/reservations",
-        "body": json.dumps({"reservation": "data"}),
+        "body": json.dumps(VALID_RESERVATION),
     }
     context = {}
     response = lambda_handler(event, context)
@@ -79,7 +81,7 @@ def test_saga_trigger_success(mock_sfn_client):
     mock_sfn_client.start_execution.return_value = fake_response
 
     # Prepare a valid event payload.
-    input_body = {"reservation": "data", "other_field": "value"}
+    input_body = {**VALID_RESERVATION, "other_field": "value"}
     event = {
         "httpMethod": "POST",
         "resource": "/reservations",
@@ -101,3 +103,41 @@ def test_saga_trigger_success(mock_sfn_client):
         stateMachineArn="test-arn",
         input=expected_input,
     )
+
+
+@patch("src.invoke_reservation_step.sqs_client")
+@patch("src.invoke_reservation_step.sfn_client")
+def test_batching_mode_enqueues_request(mock_sfn_client, mock_sqs_client):
+    """
+    Verify that with RESERVATION_QUEUE_URL set the request is queued for the
+    batch starter instead of starting an execution.
+    """
+    from src import invoke_reservation_step
+
+    invoke_reservation_step.STATE_MACHINE_ARN = "test-arn"
+    invoke_reservation_step.RESERVATION_QUEUE_URL = "test-queue-url"
+    try:
+        input_body = VALID_RESERVATION
+        event = {
+            "httpMethod": "POST",
+            "resource": "/reservations",
+            "body": json.dumps(input_body),
+        }
+        response = lambda_handler(event, {})
+    finally:
+        invoke_reservation_step.RESERVATION_QUEUE_URL = None
+
+    assert response["statusCode"] == 202
+    resp_body = json.loads(response["body"])
+    assert resp_body["requestId"]
+    status_url = f"/reservations?request_id={resp_body['requestId']}"
+    assert resp_body["statusUrl"] == status_url
+    assert response["headers"]["Location"] == status_url
+
+    mock_sfn_client.start_execution.assert_not_called()
+    kwargs = mock_sqs_client.send_message.call_args.kwargs
+    assert kwargs["QueueUrl"] == "test-queue-url"
+    assert json.loads(kwargs["MessageBody"]) == {
+        **input_body,
+        "request_id": resp_body["requestId"],
+    }
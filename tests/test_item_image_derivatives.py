@@ -0,0 +1,134 @@
+import io
+import json
+from unittest.mock import MagicMock, patch
+
+from PIL import Image
+
+from src.item_image_derivatives import lambda_handler
+
+SOURCE_KEY = "images/sha256/abc.jpg"
+
+
+def jpeg_bytes(size=(2000, 1000)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, (200, 30, 30)).save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+def make_session(existing=()):
+    session = MagicMock()
+    session.query.return_value.filter.return_value.filter.return_value.all.return_value = list(
+        existing
+    )
+    return session
+
+
+@patch("src.item_image_derivatives.s3_client")
+@patch("src.item_image_derivatives.get_session")
+def test_upload_event_renders_all_sizes(mock_get_session, mock_s3):
+    session = make_session()
+    mock_get_session.return_value = session
+    mock_s3.get_object.return_value = {"Body": io.BytesIO(jpeg_bytes())}
+    event = {
+        "Records": [
+            {
+                "s3": {
+                    "bucket": {"name": "bucket"},
+                    "object": {"key": SOURCE_KEY},
+                }
+            }
+        ]
+    }
+
+    response = lambda_handler(event, {})
+
+    assert response["generated"][SOURCE_KEY] == {
+        "medium": "derivatives/images/sha256/abc/medium.webp",
+        "small": "derivatives/images/sha256/abc/small.webp",
+        "thumb": "derivatives/images/sha256/abc/thumb.webp",
+    }
+    mock_s3.get_object.assert_called_once_with(Bucket="bucket", Key=SOURCE_KEY)
+    puts = {
+        call.kwargs["Key"]: call.kwargs
+        for call in mock_s3.put_object.call_args_list
+    }
+    small = puts["derivatives/images/sha256/abc/small.webp"]
+    assert small["ContentType"] == "image/webp"
+    with Image.open(io.BytesIO(small["Body"])) as image:
+        assert image.format == "WEBP"
+        assert image.size == (480, 240)
+    # One row per derivative, committed once.
+    assert session.execute.call_count == 3
+    session.commit.assert_called_once()
+
+
+@patch("src.item_image_derivatives.s3_client")
+@patch("src.item_image_derivatives.get_session")
+def test_existing_derivatives_are_not_rendered_again(
+    mock_get_session, mock_s3
+):
+    existing = []
+    for name in ("thumb", "small", "medium"):
+        row = MagicMock(s3_key=f"derivatives/images/sha256/abc/{name}.webp")
+        row.name = name
+        existing.append(row)
+    mock_get_session.return_value = make_session(existing)
+
+    lambda_handler(
+        {
+            "Records": [
+                {
+                    "s3": {
+                        "bucket": {"name": "bucket"},
+                        "object": {"key": SOURCE_KEY},
+                    }
+                }
+            ]
+        },
+        {},
+    )
+
+    mock_s3.get_object.assert_not_called()
+    mock_s3.put_object.assert_not_called()
+
+
+@patch("src.item_image_derivatives.generate_presigned_url")
+@patch("src.item_image_derivatives.generate_derivatives")
+@patch("src.item_image_derivatives.get_session")
+def test_get_image_redirects_to_derivative(
+    mock_get_session, mock_generate, mock_presign
+):
+    session = MagicMock()
+    session.get.return_value = MagicMock(s3_key=SOURCE_KEY)
+    mock_get_session.return_value = session
+    mock_generate.return_value = {"thumb": "derivatives/thumb.webp"}
+    mock_presign.return_value = "https://signed/thumb"
+
+    response = lambda_handler(
+        {
+            "httpMethod": "GET",
+            "resource": "/items/{item_id}/image/{size}",
+            "pathParameters": {"item_id": "3", "size": "thumb"},
+        },
+        {},
+    )
+
+    assert response["statusCode"] == 302
+    assert response["headers"]["Location"] == "https://signed/thumb"
+    assert mock_generate.call_args.args[3:] == (SOURCE_KEY, ["thumb"])
+    assert mock_presign.call_args.args[1] == "derivatives/thumb.webp"
+    session.commit.assert_called_once()
+
+
+def test_get_image_invalid_size():
+    response = lambda_handler(
+        {
+            "httpMethod": "GET",
+            "resource": "/items/{item_id}/image/{size}",
+            "pathParameters": {"item_id": "3", "size": "huge"},
+        },
+        {},
+    )
+
+    assert response["statusCode"] == 400
+    assert "Invalid image size" in json.loads(response["body"])["message"]
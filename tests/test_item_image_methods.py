@@ -0,0 +1,210 @@
+import hashlib
+import json
+from unittest.mock import MagicMock, patch
+
+from botocore.exceptions import ClientError
+
+from db_layer.image_store import sha256_base64
+from src import item_image_methods
+from src.item_image_methods import lambda_handler
+
+SHA256 = hashlib.sha256(b"image").hexdigest()
+KEY = f"images/sha256/{SHA256}.png"
+
+
+def make_event(resource, item_id="7", body=None):
+    return {
+        "httpMethod": "POST",
+        "resource": resource,
+        "pathParameters": {"item_id": item_id},
+        "body": json.dumps(body or {}),
+    }
+
+
+def make_image(status):
+    return MagicMock(
+        sha256=SHA256,
+        s3_key=KEY,
+        content_type="image/png",
+        size=1024,
+        status=status,
+    )
+
+
+UPLOAD_REQUEST = {"sha256": SHA256, "size": 1024, "content_type": "image/png"}
+
+
+@patch("src.item_image_methods.reserve_image")
+@patch("src.item_image_methods.s3_client")
+@patch("src.item_image_methods.get_session")
+def test_create_upload_returns_presigned_put(
+    mock_get_session, mock_s3, mock_reserve
+):
+    mock_reserve.return_value = make_image("pending")
+    mock_s3.generate_presigned_url.return_value = "https://bucket/put"
+
+    response = lambda_handler(
+        make_event("/items/{item_id}/image", body=UPLOAD_REQUEST), {}
+    )
+
+    assert response["statusCode"] == 201
+    body = json.loads(response["body"])
+    assert body["key"] == KEY
+    assert body["exists"] is False
+    assert body["url"] == "https://bucket/put"
+    assert body["headers"]["x-amz-checksum-sha256"] == sha256_base64(SHA256)
+    assert mock_reserve.call_args.args[1:] == (
+        SHA256,
+        KEY,
+        "image/png",
+        1024,
+    )
+    params = mock_s3.generate_presigned_url.call_args.kwargs["Params"]
+    assert params["Key"] == KEY
+    assert params["ContentLength"] == 1024
+    assert params["ChecksumSHA256"] == sha256_base64(SHA256)
+    mock_get_session.return_value.commit.assert_called_once()
+
+
+@patch("src.item_image_methods.reserve_image")
+@patch("src.item_image_methods.s3_client")
+@patch("src.item_image_methods.get_session")
+def test_create_upload_skips_stored_duplicate(
+    mock_get_session, mock_s3, mock_reserve
+):
+    mock_reserve.return_value = make_image("stored")
+
+    response = lambda_handler(
+        make_event("/items/{item_id}/image", body=UPLOAD_REQUEST), {}
+    )
+
+    assert response["statusCode"] == 201
+    assert json.loads(response["body"]) == {"key": KEY, "exists": True}
+    mock_s3.generate_presigned_url.assert_not_called()
+
+
+@patch("src.item_image_methods.reserve_image")
+@patch("src.item_image_methods.get_session")
+def test_create_upload_unknown_item(mock_get_session, mock_reserve):
+    mock_get_session.return_value.get.return_value = None
+
+    response = lambda_handler(
+        make_event("/items/{item_id}/image", body=UPLOAD_REQUEST), {}
+    )
+
+    assert response["statusCode"] == 404
+    mock_reserve.assert_not_called()
+
+
+def test_create_upload_validates_request():
+    for body in (
+        {**UPLOAD_REQUEST, "content_type": "text/plain"},
+        {**UPLOAD_REQUEST, "sha256": "abc"},
+        {**UPLOAD_REQUEST, "size": item_image_methods.MAX_IMAGE_BYTES + 1},
+    ):
+        response = lambda_handler(
+            make_event("/items/{item_id}/image", body=body), {}
+        )
+        assert response["statusCode"] == 400
+
+
+@patch("src.item_image_methods.release_image")
+@patch("src.item_image_methods.acquire_image")
+@patch("src.item_image_methods.generate_presigned_url")
+@patch("src.item_image_methods.s3_client")
+@patch("src.item_image_methods.get_session")
+def test_confirm_upload_verifies_and_attaches(
+    mock_get_session,
+    mock_s3,
+    mock_presign,
+    mock_acquire,
+    mock_release,
+):
+    item = MagicMock(id=7, s3_key="images/sha256/old.jpg")
+    image = make_image("pending")
+    session = mock_get_session.return_value
+    session.get.return_value = item
+    session.query.return_value.filter.return_value.first.return_value = image
+    mock_s3.head_object.return_value = {
+        "ChecksumSHA256": sha256_base64(SHA256)
+    }
+    mock_presign.return_value = "https://signed"
+    mock_acquire.return_value = True
+
+    response = lambda_handler(
+        make_event("/items/{item_id}/image/confirm", body={"key": KEY}), {}
+    )
+
+    assert response["statusCode"] == 200
+    assert json.loads(response["body"]) == {
+        "id": 7,
+        "s3_key": KEY,
+        "image_url": "https://signed",
+    }
+    assert image.status == "stored"
+    assert item.s3_key == KEY
+    mock_acquire.assert_called_once_with(session, KEY)
+    mock_release.assert_called_once_with(session, "images/sha256/old.jpg")
+    session.commit.assert_called_once()
+    session.close.assert_called_once()
+
+
+@patch("src.item_image_methods.acquire_image")
+@patch("src.item_image_methods.s3_client")
+@patch("src.item_image_methods.get_session")
+def test_confirm_upload_checksum_mismatch(
+    mock_get_session, mock_s3, mock_acquire
+):
+    session = mock_get_session.return_value
+    session.query.return_value.filter.return_value.first.return_value = (
+        make_image("pending")
+    )
+    mock_s3.head_object.return_value = {"ChecksumSHA256": "other"}
+
+    response = lambda_handler(
+        make_event("/items/{item_id}/image/confirm", body={"key": KEY}), {}
+    )
+
+    assert response["statusCode"] == 409
+    mock_acquire.assert_not_called()
+    session.commit.assert_not_called()
+
+
+@patch("src.item_image_methods.acquire_image")
+@patch("src.item_image_methods.s3_client")
+@patch("src.item_image_methods.get_session")
+def test_confirm_upload_before_upload(mock_get_session, mock_s3, mock_acquire):
+    session = mock_get_session.return_value
+    session.query.return_value.filter.return_value.first.return_value = (
+        make_image("pending")
+    )
+    mock_s3.head_object.side_effect = ClientError(
+        {"Error": {"Code": "404", "Message": "Not Found"}}, "HeadObject"
+    )
+
+    response = lambda_handler(
+        make_event("/items/{item_id}/image/confirm", body={"key": KEY}), {}
+    )
+
+    assert response["statusCode"] == 409
+    mock_acquire.assert_not_called()
+
+
+@patch("src.item_image_methods.get_session")
+def test_confirm_upload_unknown_image(mock_get_session):
+    session = mock_get_session.return_value
+    session.query.return_value.filter.return_value.first.return_value = None
+
+    response = lambda_handler(
+        make_event("/items/{item_id}/image/confirm", body={"key": "x.jpg"}),
+        {},
+    )
+
+    assert response["statusCode"] == 404
+
+
+def test_unknown_route():
+    event = make_event("/items/{item_id}/image")
+    event["httpMethod"] = "GET"
+
+    assert lambda_handler(event, {})["statusCode"] == 404
@@ -32,6 +32,16 @@ def test_lambda_handler_missing_item_id():
     assert "Missing item_id in path" in body["message"]
 
 
+@patch("src.items_item_id_methods.get_session")
+def test_lambda_handler_non_numeric_item_id(mock_get_session):
+    event = {"httpMethod": "GET", "pathParameters": {"item_id": "abc"}}
+    response = lambda_handler(event, {})
+    assert response["statusCode"] == 400
+    body = json.loads(response["body"])
+    assert body["message"] == "Invalid item_id"
+    mock_get_session.assert_not_called()
+
+
 # -----------------------------------------------------------------------------
 # Tests for GET method (get_item)
 # -----------------------------------------------------------------------------
@@ -40,11 +50,10 @@ def test_lambda_handler_missing_item_id():
 def test_get_item_found(mock_get_session, mock_generate_presigned_url):
     # Arrange
     fake_item = create_fake_item()
-    # When get_session() is called, return a fake session with a query chain.
+    # When get_session() is called, return a fake session whose prepared
+    # item lookup returns the fake item.
     fake_session = MagicMock()
-    fake_session.query.return_value.filter.return_value.first.return_value = (
-        fake_item
-    )
+    fake_session.execute.return_value.first.return_value = fake_item
     mock_get_session.return_value = fake_session
     # Let generate_presigned_url return a mocked URL.
     mock_generate_presigned_url.return_value = "https://example.com/test-key"
@@ -71,9 +80,7 @@ def test_get_item_found(mock_get_session, mock_generate_presigned_url):
 def test_get_item_not_found(mock_get_session):
     # Arrange: simulate query returning None.
     fake_session = MagicMock()
-    fake_session.query.return_value.filter.return_value.first.return_value = (
-        None
-    )
+    fake_session.execute.return_value.first.return_value = None
     mock_get_session.return_value = fake_session
 
     event = {
@@ -92,6 +99,34 @@ def test_get_item_not_found(mock_get_session):
     fake_session.close.assert_called_once()
 
 
+@patch("src.items_item_id_methods.get_session")
+def test_get_item_uses_replica_session(mock_get_session):
+    mock_get_session.return_value.query.return_value.filter.return_value.first.return_value = (
+        None
+    )
+
+    event = {"httpMethod": "GET", "pathParameters": {"item_id": "1"}}
+    lambda_handler(event, {})
+
+    mock_get_session.assert_called_once_with(read_only=True)
+
+
+@patch("src.items_item_id_methods.get_session")
+def test_get_item_read_your_writes_uses_primary(mock_get_session):
+    mock_get_session.return_value.query.return_value.filter.return_value.first.return_value = (
+        None
+    )
+
+    event = {
+        "httpMethod": "GET",
+        "pathParameters": {"item_id": "1"},
+        "headers": {"X-Read-Your-Writes": "true"},
+    }
+    lambda_handler(event, {})
+
+    mock_get_session.assert_called_once_with(read_only=False)
+
+
 # -----------------------------------------------------------------------------
 # Tests for DELETE method (delete_item)
 # -----------------------------------------------------------------------------
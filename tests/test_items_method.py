@@ -7,7 +7,7 @@ project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 sys.path.insert(0, project_root)
 sys.path.insert(0, os.path.join(project_root, "python"))
 
-from src.items_method import lambda_handler
+from src.items_method import decode_search_cursor, lambda_handler
 
 
 @patch("src.items_method.generate_presigned_url")
@@ -56,3 +56,369 @@ def test_get_items(mock_get_session, mock_generate_presigned_url):
     assert first_item["image_url"] == "https://mocked_s3_url"
 
     mock_session.close.assert_called_once()
+
+
+@patch("src.items_method.get_table_versions")
+@patch("src.items_method.generate_presigned_url")
+@patch("src.items_method.get_session")
+def test_get_items_not_modified(
+    mock_get_session, mock_generate_presigned_url, mock_get_table_versions
+):
+    """
+    Test that a request with a matching If-None-Match header is answered
+    with 304 without running the items query.
+    """
+    mock_session = MagicMock()
+    mock_get_session.return_value = mock_session
+    mock_get_table_versions.return_value = {"items": 7, "image_derivatives": 0}
+    mock_session.query.return_value.offset.return_value.limit.return_value.all.return_value = (
+        []
+    )
+
+    event = {"httpMethod": "GET", "resource": "/items"}
+    response = lambda_handler(event, {})
+    etag = response["headers"]["ETag"]
+    assert response["headers"]["Cache-Control"].startswith("public")
+
+    mock_session.query.reset_mock()
+    event["headers"] = {"If-None-Match": etag}
+    response = lambda_handler(event, {})
+
+    assert response["statusCode"] == 304
+    assert response["headers"]["ETag"] == etag
+    mock_session.query.assert_not_called()
+
+    # A write to the items table changes the ETag.
+    mock_get_table_versions.return_value = {"items": 8, "image_derivatives": 0}
+    response = lambda_handler(event, {})
+    assert response["statusCode"] == 200
+
+
+@patch("src.items_method.get_derivative_keys")
+@patch("src.items_method.generate_presigned_url")
+@patch("src.items_method.get_session")
+def test_get_items_links_small_derivative(
+    mock_get_session, mock_generate_presigned_url, mock_get_derivative_keys
+):
+    """
+    Listings link to the small derivative by default and fall back to the
+    original for images without one; image_size=original skips the lookup.
+    """
+    mock_session = MagicMock()
+    mock_get_session.return_value = mock_session
+    with_derivative = MagicMock(id=1, description="", price=1, s3_key="a.jpg")
+    with_derivative.name = "A"
+    without_derivative = MagicMock(
+        id=2, description="", price=1, s3_key="b.jpg"
+    )
+    without_derivative.name = "B"
+    query = mock_session.query.return_value.offset.return_value.limit
+    query.return_value.all.return_value = [with_derivative, without_derivative]
+    mock_get_derivative_keys.return_value = {"a.jpg": "a/small.webp"}
+    mock_generate_presigned_url.side_effect = lambda bucket, key, **kw: key
+
+    response = lambda_handler({"httpMethod": "GET", "resource": "/items"}, {})
+
+    urls = [item["image_url"] for item in json.loads(response["body"])]
+    assert urls == ["a/small.webp", "b.jpg"]
+    assert mock_get_derivative_keys.call_args.args[1:] == (
+        ["a.jpg", "b.jpg"],
+        "small",
+    )
+
+    mock_get_derivative_keys.reset_mock()
+    response = lambda_handler(
+        {
+            "httpMethod": "GET",
+            "resource": "/items",
+            "queryStringParameters": {"image_size": "original"},
+        },
+        {},
+    )
+    urls = [item["image_url"] for item in json.loads(response["body"])]
+    assert urls == ["a.jpg", "b.jpg"]
+    mock_get_derivative_keys.assert_not_called()
+
+
+@patch("src.items_method.generate_presigned_url")
+@patch("src.items_method.get_session")
+def test_get_items_by_ids(mock_get_session, mock_generate_presigned_url):
+    """
+    GET /items?ids= answers from one query keyed by id, presigns each
+    image once and lists ids without an item as missing.
+    """
+    mock_session = MagicMock()
+    mock_get_session.return_value = mock_session
+    first = MagicMock(id=1, description="", price=1, s3_key="a.jpg")
+    first.name = "A"
+    second = MagicMock(id=2, description="", price=2, s3_key="a.jpg")
+    second.name = "B"
+    mock_session.query.return_value.outerjoin.return_value.outerjoin.return_value.filter.return_value.all.return_value = [
+        (first, 5, "a/small.webp"),
+        (second, None, "a/small.webp"),
+    ]
+    mock_generate_presigned_url.side_effect = lambda bucket, key, **kw: key
+
+    response = lambda_handler(
+        {
+            "httpMethod": "GET",
+            "resource": "/items",
+            "queryStringParameters": {"ids": "2,1,3,2"},
+        },
+        {},
+    )
+
+    assert response["statusCode"] == 200
+    body = json.loads(response["body"])
+    assert body["missing"] == [3]
+    assert body["items"]["1"]["total_quantity"] == 5
+    assert body["items"]["2"]["total_quantity"] == 0
+    assert body["items"]["2"]["image_url"] == "a/small.webp"
+    mock_session.query.assert_called_once()
+    mock_generate_presigned_url.assert_called_once()
+    mock_session.close.assert_called_once()
+
+
+@patch("src.items_method.get_session")
+def test_get_items_by_ids_rejects_invalid_ids(mock_get_session):
+    """
+    Malformed, non-positive and too many ids are rejected before the
+    database is touched.
+    """
+    for ids in ("1,x", "0", ",".join(str(n) for n in range(1, 502))):
+        response = lambda_handler(
+            {
+                "httpMethod": "GET",
+                "resource": "/items",
+                "queryStringParameters": {"ids": ids},
+            },
+            {},
+        )
+        assert response["statusCode"] == 400
+    mock_get_session.assert_not_called()
+
+
+@patch("src.items_method.generate_presigned_url")
+@patch("src.items_method.get_session")
+def test_lookup_items(mock_get_session, mock_generate_presigned_url):
+    """
+    POST /items/lookup takes the ids in the body and validates it.
+    """
+    mock_session = MagicMock()
+    mock_get_session.return_value = mock_session
+    item = MagicMock(id=7, description="", price=1, s3_key="a.jpg")
+    item.name = "A"
+    mock_session.query.return_value.outerjoin.return_value.outerjoin.return_value.filter.return_value.all.return_value = [
+        (item, 3, None)
+    ]
+    mock_generate_presigned_url.side_effect = lambda bucket, key, **kw: key
+
+    response = lambda_handler(
+        {
+            "httpMethod": "POST",
+            "resource": "/items/lookup",
+            "body": json.dumps({"ids": [7, 8], "image_size": "original"}),
+        },
+        {},
+    )
+    assert response["statusCode"] == 200
+    body = json.loads(response["body"])
+    assert body["items"]["7"]["image_url"] == "a.jpg"
+    assert body["missing"] == [8]
+
+    response = lambda_handler(
+        {
+            "httpMethod": "POST",
+            "resource": "/items/lookup",
+            "body": json.dumps({"ids": []}),
+        },
+        {},
+    )
+    assert response["statusCode"] == 400
+    assert json.loads(response["body"])["errors"] == [
+        "body.ids: expected at least 1 items"
+    ]
+
+
+@patch("src.items_method.get_derivative_keys")
+@patch("src.items_method.query_search_page")
+@patch("src.items_method.get_table_versions")
+@patch("src.items_method.generate_presigned_url")
+@patch("src.items_method.get_session")
+def test_search_items(
+    mock_get_session,
+    mock_generate_presigned_url,
+    mock_get_table_versions,
+    mock_query_search_page,
+    mock_get_derivative_keys,
+):
+    """
+    GET /items?q= returns ranked matches with highlights and a cursor
+    that continues after the last returned row.
+    """
+    mock_get_session.return_value = MagicMock()
+    mock_get_table_versions.return_value = {"items": 1, "image_derivatives": 1}
+    mock_get_derivative_keys.return_value = {}
+    mock_generate_presigned_url.side_effect = lambda bucket, key, **kw: key
+    rows = []
+    for item_id, rank in ((9, 0.5), (4, 0.25), (2, 0.125)):
+        item = MagicMock(id=item_id, description="", price=1, s3_key="a.jpg")
+        item.name = f"Item {item_id}"
+        rows.append((item, rank, f"<mark>Item</mark> {item_id}", ""))
+    mock_query_search_page.return_value = rows
+
+    response = lambda_handler(
+        {
+            "httpMethod": "GET",
+            "resource": "/items",
+            "queryStringParameters": {"q": "item", "limit": "2"},
+        },
+        {},
+    )
+
+    assert response["statusCode"] == 200
+    body = json.loads(response["body"])
+    assert [item["id"] for item in body["items"]] == [9, 4]
+    assert body["items"][0]["highlights"]["name"] == "<mark>Item</mark> 9"
+    assert decode_search_cursor(body["next_cursor"]) == (0.25, 4)
+    assert mock_query_search_page.call_args.args[1:] == ("item", 3, None)
+
+    lambda_handler(
+        {
+            "httpMethod": "GET",
+            "resource": "/items",
+            "queryStringParameters": {
+                "q": "item",
+                "limit": "2",
+                "cursor": body["next_cursor"],
+            },
+        },
+        {},
+    )
+    assert mock_query_search_page.call_args.args[3] == (0.25, 4)
+
+
+@patch("src.items_method.get_session")
+def test_search_items_rejects_bad_input(mock_get_session):
+    for params in ({"q": " "}, {"q": "item", "cursor": "not a cursor"}):
+        response = lambda_handler(
+            {
+                "httpMethod": "GET",
+                "resource": "/items",
+                "queryStringParameters": params,
+            },
+            {},
+        )
+        assert response["statusCode"] == 400
+    mock_get_session.assert_not_called()
+
+
+@patch.dict("src.items_method.autocomplete_cache", clear=True)
+@patch("src.items_method.time.monotonic")
+@patch("src.items_method.get_session")
+def test_autocomplete_items(mock_get_session, mock_monotonic):
+    """
+    Suggestions are cached per normalized prefix until the TTL expires;
+    prefixes that are too short skip the database.
+    """
+    mock_session = MagicMock()
+    mock_get_session.return_value = mock_session
+    mock_session.query.return_value.filter.return_value.order_by.return_value.limit.return_value.all.return_value = [
+        (3, "Kettle"),
+        (8, "Red kettle"),
+    ]
+    mock_monotonic.return_value = 100.0
+
+    def autocomplete(q):
+        return lambda_handler(
+            {
+                "httpMethod": "GET",
+                "resource": "/items/autocomplete",
+                "queryStringParameters": {"q": q},
+            },
+            {},
+        )
+
+    response = autocomplete("Ket")
+    assert response["statusCode"] == 200
+    assert json.loads(response["body"]) == [
+        {"id": 3, "name": "Kettle"},
+        {"id": 8, "name": "Red kettle"},
+    ]
+    assert response["headers"]["Cache-Control"] == "public, max-age=30"
+
+    autocomplete(" ket ")
+    mock_get_session.assert_called_once()
+
+    mock_monotonic.return_value = 131.0
+    autocomplete("ket")
+    assert mock_get_session.call_count == 2
+
+    assert json.loads(autocomplete("ke")["body"]) == []
+    assert mock_get_session.call_count == 2
+
+
+@patch("src.items_method.get_derivative_keys")
+@patch("src.items_method.get_table_versions")
+@patch("src.items_method.generate_presigned_url")
+@patch("src.items_method.get_session")
+def test_get_items_fields(
+    mock_get_session,
+    mock_generate_presigned_url,
+    mock_get_table_versions,
+    mock_get_derivative_keys,
+):
+    """
+    fields= selects only the columns of the requested fields and skips
+    image lookups and presigning unless image_url is requested.
+    """
+    mock_session = MagicMock()
+    mock_get_session.return_value = mock_session
+    mock_get_table_versions.return_value = {"items": 1, "image_derivatives": 1}
+    row = MagicMock(id=1, price=5)
+    mock_session.query.return_value.offset.return_value.limit.return_value.all.return_value = [
+        row
+    ]
+
+    response = lambda_handler(
+        {
+            "httpMethod": "GET",
+            "resource": "/items",
+            "queryStringParameters": {"fields": "price"},
+        },
+        {},
+    )
+
+    assert response["statusCode"] == 200
+    assert json.loads(response["body"]) == [{"id": 1, "price": 5}]
+    columns = [c.key for c in mock_session.query.call_args.args]
+    assert columns == ["id", "price"]
+    mock_get_derivative_keys.assert_not_called()
+    mock_generate_presigned_url.assert_not_called()
+
+    lambda_handler(
+        {
+            "httpMethod": "GET",
+            "resource": "/items",
+            "queryStringParameters": {"fields": "name,image_url"},
+        },
+        {},
+    )
+    columns = [c.key for c in mock_session.query.call_args.args]
+    assert columns == ["id", "name", "s3_key"]
+    mock_generate_presigned_url.assert_called_once()
+
+
+@patch("src.items_method.get_session")
+def test_get_items_unknown_field(mock_get_session):
+    response = lambda_handler(
+        {
+            "httpMethod": "GET",
+            "resource": "/items",
+            "queryStringParameters": {"fields": "id,secret"},
+        },
+        {},
+    )
+    assert response["statusCode"] == 400
+    assert "secret" in json.loads(response["body"])["error"]
+    mock_get_session.assert_not_called()
@@ -1,10 +1,9 @@
-import os
 import base64
-from unittest.mock import MagicMock, patch
+import hashlib
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
 from src.items_post import lambda_handler
 
-os.environ["S3_BUCKET"] = "test-bucket"
-
 
 def test_lambda_handler_invalid_items():
     """
@@ -19,96 +18,165 @@ def test_lambda_handler_invalid_items():
     assert "Expected 'items' to be a list" in body["error"]
 
 
-@patch("src.items_post.get_session")
-@patch("src.items_post.s3_client.put_object")
-@patch("src.items_post.uuid.uuid4")
+def make_session():
+    fake_session = MagicMock()
+    fake_session.flush = AsyncMock()
+    fake_session.execute = AsyncMock(return_value=MagicMock())
+    fake_session.commit = AsyncMock()
+    fake_session.rollback = AsyncMock()
+    fake_session.close = AsyncMock()
+    return fake_session
+
+
+@patch("src.items_post.get_async_session")
 @patch("src.items_post.Item")
-def test_lambda_handler_success(
-    mock_Item, mock_uuid, mock_put_object, mock_get_session
-):
+def test_lambda_handler_success(mock_Item, mock_get_session):
     """
     Test a successful call to the Lambda with a valid list of items.
 
-    The input list contains:
-      - One item without image_data.
-      - One item with image_data.
-
     The test verifies:
-      - The S3 client is called for the item with image_data.
-      - The DB session's commit, refresh, and close methods are called.
+      - The items are added and committed in one transaction.
       - The Lambda returns a 201 response with an 'added_items' list.
     """
-    # Arrange
-    # Patch uuid.uuid4 to return a fixed hex value.
-    fake_uuid_obj = MagicMock()
-    fake_uuid_obj.hex = "fakehex"
-    mock_uuid.return_value = fake_uuid_obj
+    fake_session = make_session()
+    mock_get_session.return_value = fake_session
 
-    # Prepare a fake DB session.
-    fake_session = MagicMock()
+    fake_item_a = MagicMock()
+    fake_item_a.id = 1
+    fake_item_a.name = "Item A"
+    fake_item_a.description = "Desc A"
+    fake_item_a.price = 50
+    fake_item_a.s3_key = None
+
+    fake_item_b = MagicMock()
+    fake_item_b.id = 2
+    fake_item_b.name = "Item B"
+    fake_item_b.description = "Desc B"
+    fake_item_b.price = 100
+    fake_item_b.s3_key = None
+
+    mock_Item.side_effect = [fake_item_a, fake_item_b]
+
+    items_list = [
+        {"name": "Item A", "price": 50, "description": "Desc A"},
+        {"name": "Item B", "price": 100, "description": "Desc B"},
+    ]
+    event = {"data": {"items": items_list}}
+
+    response = lambda_handler(event, {})
+
+    assert response["statusCode"] == 201
+    assert response["added_items"] == [
+        {"id": 1, "name": "Item A", "description": "Desc A", "price": 50},
+        {"id": 2, "name": "Item B", "description": "Desc B", "price": 100},
+    ]
+    mock_Item.assert_any_call(
+        name="Item A", description="Desc A", price=50, s3_key=None
+    )
+    assert fake_session.add.call_count == 2
+    fake_session.execute.assert_not_awaited()
+    fake_session.commit.assert_awaited_once()
+    fake_session.rollback.assert_not_awaited()
+    fake_session.close.assert_awaited_once()
+
+
+@patch("src.items_post.get_async_session")
+def test_lambda_handler_commit_failure_rolls_back(mock_get_session):
+    """
+    A failed commit is rolled back and re-raised so the saga can
+    compensate.
+    """
+    fake_session = make_session()
+    fake_session.commit.side_effect = Exception("DB unavailable")
     mock_get_session.return_value = fake_session
 
-    fake_item_without = MagicMock()
-    fake_item_without.id = 1
-    fake_item_without.name = "Item A"
-    fake_item_without.description = ["description"]
-    fake_item_without.price = 50
-
-    fake_item_with = MagicMock()
-    fake_item_with.id = 2
-    fake_item_with.name = "Item B"
-    fake_item_with.description = "Desc B"
-    fake_item_with.price = 100
-    # After processing, s3_key is assigned.
-    fake_item_with.s3_key = "items/item_fakehex.jpg"
-
-    # Configure the Item constructor to return our fake items in order.
-    mock_Item.side_effect = [fake_item_without, fake_item_with]
-
-    # Define two test items:
-    # - First item has no image_data.
-    item1 = {"name": "Item A", "price": 50}
-    item2 = {
-        "name": "Item B",
-        "price": 100,
-        "description": "Desc B",
-        "image_data": "dGVzdA==",
+    event = {
+        "data": {
+            "items": [{"name": "Item A", "price": 50, "description": "A"}]
+        }
     }
-    items_list = [item1, item2]
 
-    # Build the event as expected by the Lambda handler.
-    event = {"data": {"items": items_list}}
-    context = {}
+    with pytest.raises(Exception, match="DB unavailable"):
+        lambda_handler(event, {})
 
-    # Act
-    response = lambda_handler(event, context)
+    fake_session.rollback.assert_awaited_once()
+    fake_session.close.assert_awaited_once()
+
+
+@patch("src.items_post.upload_image", new_callable=AsyncMock)
+@patch("src.items_post.get_async_session")
+def test_lambda_handler_deprecated_image_data(
+    mock_get_session, mock_upload_image
+):
+    """
+    Deprecated inline images are registered as pending, uploaded once per
+    content hash under their content-addressed key and registered with
+    one reference per item.
+    """
+    fake_session = make_session()
+    mock_get_session.return_value = fake_session
+    image = b"jpeg bytes"
+    s3_key = f"images/sha256/{hashlib.sha256(image).hexdigest()}.jpg"
+    image_data = base64.b64encode(image).decode()
+
+    event = {
+        "data": {
+            "items": [
+                {
+                    "name": name,
+                    "price": 1,
+                    "description": "d",
+                    "image_data": image_data,
+                }
+                for name in ("Item A", "Item B")
+            ]
+        }
+    }
+
+    response = lambda_handler(event, {})
 
-    # Assert
     assert response["statusCode"] == 201
-    added_items = response["added_items"]
-    assert len(added_items) == 2
-
-    resp_item1 = added_items[0]
-    assert resp_item1["id"] == fake_item_without.id
-    assert resp_item1["name"] == fake_item_without.name
-    assert resp_item1["description"] == fake_item_without.description
-    assert resp_item1["price"] == fake_item_without.price
-    assert "s3_key" not in resp_item1
-
-    resp_item2 = added_items[1]
-    assert resp_item2["id"] == fake_item_with.id
-    assert resp_item2["name"] == fake_item_with.name
-    assert resp_item2["description"] == fake_item_with.description
-    assert resp_item2["price"] == fake_item_with.price
-    assert resp_item2["s3_key"] == "items/item_fakehex.jpg"
-
-    mock_put_object.assert_called_once_with(
-        Bucket="test-bucket",
-        Key="items/item_fakehex.jpg",
-        Body=base64.b64decode("dGVzdA=="),
-        ContentType="image/jpeg",
+    assert [i["s3_key"] for i in response["added_items"]] == [s3_key] * 2
+    mock_upload_image.assert_awaited_once_with(s3_key, image)
+    pending, lookup, upsert = (
+        call.args[0] for call in fake_session.execute.await_args_list
     )
+    assert pending.compile().params["status_m0"] == "pending"
+    assert upsert.compile().params["ref_count_m0"] == 2
+    # The pending image is committed before the upload, the items after.
+    assert fake_session.commit.await_count == 2
+
 
-    assert fake_session.commit.call_count == 2
-    assert fake_session.refresh.call_count == 2
-    fake_session.close.assert_called_once()
+@patch("src.items_post.upload_image", new_callable=AsyncMock)
+@patch("src.items_post.get_async_session")
+def test_lambda_handler_stored_image_data_is_not_uploaded(
+    mock_get_session, mock_upload_image
+):
+    fake_session = make_session()
+    mock_get_session.return_value = fake_session
+    image = b"jpeg bytes"
+    sha256 = hashlib.sha256(image).hexdigest()
+    fake_session.execute.return_value.scalars.return_value = [sha256]
+
+    event = {
+        "data": {
+            "items": [
+                {
+                    "name": "Item A",
+                    "price": 1,
+                    "description": "d",
+                    "image_data": base64.b64encode(image).decode(),
+                }
+            ]
+        }
+    }
+
+    response = lambda_handler(event, {})
+
+    assert response["statusCode"] == 201
+    assert response["added_items"][0]["s3_key"] == (
+        f"images/sha256/{sha256}.jpg"
+    )
+    mock_upload_image.assert_not_awaited()
+    (upsert,) = fake_session.execute.await_args.args
+    assert upsert.compile().params["ref_count_m0"] == 1
@@ -81,6 +81,28 @@ def test_get_location_not_found(mock_get_session):
     fake_session.close.assert_called_once()
 
 
+@patch("src.location_location_id_method.get_table_versions")
+@patch("src.location_location_id_method.get_session")
+def test_get_location_not_modified(mock_get_session, mock_get_table_versions):
+    fake_session = MagicMock()
+    fake_session.query.return_value.filter.return_value.first.return_value = (
+        create_fake_location()
+    )
+    mock_get_session.return_value = fake_session
+    mock_get_table_versions.return_value = {"locations": 3}
+
+    event = {"httpMethod": "GET", "pathParameters": {"location_id": "1"}}
+    etag = lambda_handler(event, {})["headers"]["ETag"]
+
+    fake_session.query.reset_mock()
+    event["headers"] = {"if-none-match": f'{etag}, W/"other"'}
+    response = lambda_handler(event, {})
+
+    assert response["statusCode"] == 304
+    assert response["body"] == ""
+    fake_session.query.assert_not_called()
+
+
 # ------------------------------------------------------------------------------
 # Tests for DELETE method (delete_location)
 # ------------------------------------------------------------------------------
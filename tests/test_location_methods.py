@@ -109,7 +109,7 @@ def test_post_invalid_location_type(mock_get_session):
         "city": "CityX",
         "street": "Oak St",
         "state": "StateX",
-        "number": "303",
+        "number": 303,
         "addition": "Suite 3",
         "type": "invalid-type",  # Invalid type
     }
@@ -157,7 +157,7 @@ def test_post_add_location_success(mock_get_session):
             "city": "CityX",
             "street": "Oak St",
             "state": "StateX",
-            "number": "303",
+            "number": 303,
             "addition": "Suite 3",
             "type": "warehouse",
         }
@@ -187,3 +187,29 @@ def test_post_add_location_success(mock_get_session):
         fake_session.commit.assert_called_once()
         fake_session.refresh.assert_called_once_with(fake_location)
         fake_session.close.assert_called_once()
+
+
+@patch("src.location_methods.get_table_versions")
+@patch("src.location_methods.get_session")
+def test_get_locations_fields(mock_get_session, mock_get_table_versions):
+    """
+    fields= prunes both the selected columns and the response.
+    """
+    fake_session = MagicMock()
+    mock_get_session.return_value = fake_session
+    mock_get_table_versions.return_value = {"locations": 1}
+    fake_session.query.return_value.offset.return_value.limit.return_value.all.return_value = [
+        MagicMock(id=1, zip_code="12345")
+    ]
+
+    event = {
+        "httpMethod": "GET",
+        "resource": "/locations",
+        "queryStringParameters": {"fields": "zip_code"},
+    }
+    response = get_locations(event)
+
+    assert response["statusCode"] == 200
+    assert json.loads(response["body"]) == [{"id": 1, "zip_code": "12345"}]
+    columns = [c.key for c in fake_session.query.call_args.args]
+    assert columns == ["id", "zip_code"]
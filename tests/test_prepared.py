@@ -0,0 +1,123 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy import exc
+
+from db_layer import prepared
+
+
+def make_session():
+    session = MagicMock()
+    session.connection.return_value.connection.info = {}
+    # Let exceptions leave the savepoint block.
+    session.begin_nested.return_value.__exit__.return_value = False
+    return session
+
+
+def executed_sql(session):
+    return [str(call.args[0]) for call in session.execute.call_args_list]
+
+
+@patch.object(prepared, "_disabled", False)
+def test_prepares_once_per_connection():
+    session = make_session()
+
+    prepared.execute_prepared(session, "item_by_id", 1)
+    prepared.execute_prepared(session, "item_by_id", 2)
+
+    sql = executed_sql(session)
+    assert len(sql) == 3
+    assert sql[0].startswith("PREPARE item_by_id_")
+    assert sql[1].startswith("EXECUTE item_by_id_")
+    assert session.execute.call_args.args[1] == {"p1": 2}
+
+    # A new pooled connection prepares again under its own name.
+    other = make_session()
+    prepared.execute_prepared(other, "item_by_id", 3)
+    other_sql = executed_sql(other)
+    assert other_sql[0].startswith("PREPARE")
+    assert other_sql[0].split()[1] != sql[0].split()[1]
+
+
+@patch.object(prepared, "_disabled", False)
+def test_warm_call_sends_a_single_execute():
+    session = make_session()
+    prepared.execute_prepared(session, "stock_add", 1, 2, 3)
+    session.reset_mock()
+
+    prepared.execute_prepared(session, "stock_add", 1, 2, 4)
+
+    # No savepoint around the EXECUTE of a prepared statement.
+    (sql,) = executed_sql(session)
+    assert sql.startswith("EXECUTE stock_add_")
+    session.begin_nested.assert_not_called()
+
+
+@patch.object(prepared, "_disabled", True)
+def test_disabled_runs_plain_sql():
+    session = make_session()
+
+    prepared.execute_prepared(session, "stock_deduct", 1, 2, 3)
+
+    (sql,) = executed_sql(session)
+    assert sql.startswith("UPDATE item_stock SET quantity = quantity - :p3")
+    assert session.execute.call_args.args[1] == {"p1": 1, "p2": 2, "p3": 3}
+
+
+@patch.object(prepared, "_disabled", False)
+def test_missing_statement_falls_back_to_plain_sql():
+    session = make_session()
+    orig = MagicMock(pgcode="26000")
+    plain_result = MagicMock()
+    session.execute.side_effect = [
+        None,
+        exc.OperationalError("EXECUTE", {}, orig),
+        plain_result,
+    ]
+
+    result = prepared.execute_prepared(session, "reservation_by_id", 1)
+
+    # The failed first use is rolled back to its savepoint and the plain
+    # SQL runs in the same call.
+    assert result is plain_result
+    assert executed_sql(session)[2].startswith(
+        "SELECT id, user_id, status FROM reservations WHERE id = :p1"
+    )
+    session.begin_nested.return_value.__exit__.assert_called_once()
+    assert prepared.get_prepared_metrics()["enabled"] is False
+    assert session.connection.return_value.connection.info == {}
+
+
+@patch.object(prepared, "_disabled", False)
+def test_missing_statement_on_warm_call_is_raised():
+    session = make_session()
+    prepared.execute_prepared(session, "reservation_by_id", 1)
+    session.reset_mock()
+    orig = MagicMock(pgcode="26000")
+    session.execute.side_effect = exc.OperationalError("EXECUTE", {}, orig)
+
+    # The failed EXECUTE aborted the caller's transaction, so it is raised
+    # and the caller's retry runs the plain SQL.
+    with pytest.raises(exc.OperationalError):
+        prepared.execute_prepared(session, "reservation_by_id", 1)
+
+    assert prepared.get_prepared_metrics()["enabled"] is False
+    assert session.connection.return_value.connection.info == {}
+    session.execute.side_effect = None
+    prepared.execute_prepared(session, "reservation_by_id", 1)
+    assert executed_sql(session)[-1].startswith("SELECT id, user_id")
+
+
+@patch.object(prepared, "_disabled", False)
+def test_other_errors_are_raised():
+    session = make_session()
+    orig = MagicMock(pgcode="23505")
+    session.execute.side_effect = [
+        None,
+        exc.IntegrityError("EXECUTE", {}, orig),
+    ]
+
+    with pytest.raises(exc.IntegrityError):
+        prepared.execute_prepared(session, "reservation_by_id", 1)
+
+    assert prepared.get_prepared_metrics()["enabled"] is True
@@ -46,3 +46,26 @@ def test_lambda_handler_cancel_success(mock_get_session):
 
     fake_session.commit.assert_called_once()
     fake_session.close.assert_called_once()
+
+
+@patch("src.purchase_error.apply_sales")
+@patch("src.purchase_error.get_session")
+def test_cancel_purchase_subtracts_sales(mock_get_session, mock_apply_sales):
+    """
+    Cancelling a purchase subtracts its items from the sales rollup.
+    """
+    fake_session = MagicMock()
+    mock_get_session.return_value = fake_session
+    fake_purchase = MagicMock()
+    fake_items = [MagicMock(item_id=1, location_id=2, quantity=3)]
+    fake_query = fake_session.query.return_value.filter.return_value
+    fake_query.first.return_value = fake_purchase
+    fake_query.all.return_value = fake_items
+
+    response = lambda_handler({"data": {"purchase_id": 42}}, {})
+
+    assert response["statusCode"] == 200
+    mock_apply_sales.assert_called_once_with(
+        fake_session, fake_purchase.purchase_date, fake_items, sign=-1
+    )
+    fake_session.commit.assert_called_once()
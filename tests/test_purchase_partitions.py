@@ -0,0 +1,49 @@
+from datetime import date
+from unittest.mock import MagicMock, patch
+
+from src.purchase_partitions import lambda_handler, retention_cutoff
+
+
+def test_retention_cutoff():
+    assert retention_cutoff(date(2026, 1, 15), 1) == date(2025, 12, 1)
+    assert retention_cutoff(date(2026, 10, 19), 24) == date(2024, 10, 1)
+
+
+@patch("src.purchase_partitions.ARCHIVE_BUCKET", "archive-bucket")
+@patch("src.purchase_partitions.detach_partition")
+@patch("src.purchase_partitions.archive_partition")
+@patch("src.purchase_partitions.list_partitions")
+@patch("src.purchase_partitions.ensure_partitions")
+@patch("src.purchase_partitions.get_session")
+def test_lambda_handler_archives_old_partitions(
+    mock_get_session,
+    mock_ensure,
+    mock_list,
+    mock_archive,
+    mock_detach,
+):
+    fake_session = MagicMock()
+    mock_get_session.return_value = fake_session
+    mock_list.return_value = [date(2000, 1, 1), date.today().replace(day=1)]
+    mock_archive.side_effect = lambda session, table, month, bucket, prefix: (
+        f"{prefix}{table}.csv"
+    )
+
+    response = lambda_handler({"retention_months": 12}, {})
+
+    assert response["statusCode"] == 200
+    mock_ensure.assert_called_once_with(fake_session, months_ahead=3)
+    # Only the old month is archived, items before purchases.
+    assert [call.args[1] for call in mock_archive.call_args_list] == [
+        "purchased_items",
+        "purchases",
+    ]
+    assert [call.args[1:3] for call in mock_detach.call_args_list] == [
+        ("purchased_items", date(2000, 1, 1)),
+        ("purchases", date(2000, 1, 1)),
+    ]
+    assert response["detached"] == [
+        "purchased_items_p200001",
+        "purchases_p200001",
+    ]
+    fake_session.close.assert_called_once()
@@ -1,5 +1,7 @@
 from unittest.mock import MagicMock, patch
 
+import pytest
+
 from src.purchase_post import lambda_handler
 
 
@@ -33,7 +35,7 @@ def test_lambda_handler_with_reservation(
 
     # Build purchase data with a reservation_id.
     purchase_data = {
-        "user_id": 1,
+        "user_id": "1",
         "payment_token": "abc",
         "status": "pending",
         "reservation_id": 50,
@@ -97,7 +99,7 @@ def test_lambda_handler_without_reservation_with_items(
 
     # Build purchase data with items (and no reservation_id).
     purchase_data = {
-        "user_id": 2,
+        "user_id": "2",
         "payment_token": "def",
         "status": "completed",
         "items": [
@@ -138,3 +140,20 @@ def test_lambda_handler_without_reservation_with_items(
     assert fake_session.commit.call_count == 2
     fake_session.refresh.assert_called_once_with(fake_purchase)
     fake_session.close.assert_called_once()
+
+
+@patch("src.purchase_post.get_session")
+def test_lambda_handler_rejects_invalid_items_before_inserting(
+    mock_get_session,
+):
+    purchase_data = {
+        "user_id": "2",
+        "payment_token": "def",
+        "items": [{"item_id": 10, "quantity": 3}],
+    }
+
+    with pytest.raises(ValueError) as excinfo:
+        lambda_handler({"data": purchase_data}, {})
+
+    assert "data.items[0].location_id: is required" in str(excinfo.value)
+    mock_get_session.assert_not_called()
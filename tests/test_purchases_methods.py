@@ -1,4 +1,5 @@
 import json
+from datetime import datetime
 from unittest.mock import MagicMock, patch
 
 # Import the lambda_handler and get_purchases functions from your module.
@@ -49,8 +50,8 @@ def test_get_purchases_without_user_id(mock_get_session):
     fake_query = fake_session.query.return_value
     # .options(joinedload(...))
     fake_options = fake_query.options.return_value
-    # .offset(skip)
-    fake_offset = fake_options.offset.return_value
+    # .order_by(Purchase.id).offset(skip)
+    fake_offset = fake_options.order_by.return_value.offset.return_value
     # .limit(limit)
     fake_limit = fake_offset.limit.return_value
     # .all() returns our list of fake purchases.
@@ -111,7 +112,7 @@ def test_get_purchases_with_user_id(mock_get_session):
     fake_query = fake_session.query.return_value
     fake_options = fake_query.options.return_value
     fake_filter = fake_options.filter.return_value
-    fake_offset = fake_filter.offset.return_value
+    fake_offset = fake_filter.order_by.return_value.offset.return_value
     fake_limit = fake_offset.limit.return_value
     fake_limit.all.return_value = [fake_purchase]
     mock_get_session.return_value = fake_session
@@ -132,5 +133,134 @@ def test_get_purchases_with_user_id(mock_get_session):
     assert len(p["items"]) == 1
     assert p["items"][0]["item_id"] == 103
     assert p["items"][0]["quantity"] == 7
+    # No implicit date bound hides older purchases.
+    assert len(fake_options.filter.call_args.args) == 1
 
     fake_session.close.assert_called_once()
+
+
+def make_purchases(count):
+    purchases = []
+    for i in range(count):
+        fake_purchase = MagicMock()
+        fake_purchase.id = i
+        fake_purchase.user_id = "user"
+        fake_item = MagicMock()
+        fake_item.item_id = i
+        fake_item.quantity = 1
+        fake_purchase.purchased_items = [fake_item]
+        purchases.append(fake_purchase)
+    return purchases
+
+
+@patch("src.purchases_methods.get_session")
+def test_get_purchases_large_page_not_compressed(mock_get_session):
+    """
+    Large pages are returned as plain JSON; API Gateway compresses them
+    for clients that accept it.
+    """
+    fake_session = MagicMock()
+    fake_query = fake_session.query.return_value.options.return_value
+    fake_page = fake_query.order_by.return_value.offset.return_value
+    fake_page.limit.return_value.all.return_value = make_purchases(200)
+    mock_get_session.return_value = fake_session
+
+    event = {
+        "httpMethod": "GET",
+        "resource": "/purchases",
+        "headers": {"Accept-Encoding": "gzip, br"},
+    }
+    response = get_purchases(event)
+
+    assert response["statusCode"] == 200
+    assert "isBase64Encoded" not in response
+    assert "Content-Encoding" not in response["headers"]
+    assert len(json.loads(response["body"])) == 200
+
+
+@patch("src.purchases_methods.get_session")
+def test_get_purchases_small_page_not_compressed(mock_get_session):
+    fake_session = MagicMock()
+    fake_query = fake_session.query.return_value.options.return_value
+    fake_page = fake_query.order_by.return_value.offset.return_value
+    fake_page.limit.return_value.all.return_value = make_purchases(1)
+    mock_get_session.return_value = fake_session
+
+    event = {
+        "httpMethod": "GET",
+        "resource": "/purchases",
+        "headers": {"Accept-Encoding": "gzip"},
+    }
+    response = get_purchases(event)
+
+    assert "isBase64Encoded" not in response
+    assert "Content-Encoding" not in response["headers"]
+    assert len(json.loads(response["body"])) == 1
+
+
+@patch("src.purchases_methods.get_session")
+def test_get_purchases_date_range(mock_get_session):
+    """
+    "since" and "until" bound purchase_date so partitions can be pruned;
+    invalid dates are rejected.
+    """
+    fake_session = MagicMock()
+    fake_filter = fake_session.query.return_value.options.return_value.filter
+    fake_page = fake_filter.return_value.order_by.return_value
+    fake_page.offset.return_value.limit.return_value.all.return_value = []
+    mock_get_session.return_value = fake_session
+
+    event = {
+        "httpMethod": "GET",
+        "resource": "/purchases",
+        "queryStringParameters": {
+            "since": "2025-01-01",
+            "until": "2025-02-01",
+        },
+    }
+    response = get_purchases(event)
+    assert response["statusCode"] == 200
+    conditions = fake_filter.call_args.args
+    assert len(conditions) == 2
+    assert "purchase_date" in str(conditions[0])
+    # A date-only "until" includes that day.
+    assert conditions[1].right.value == datetime(2025, 2, 2)
+
+    event["queryStringParameters"] = {"until": "2025-02-01T12:00:00"}
+    get_purchases(event)
+    assert fake_filter.call_args.args[0].right.value == datetime(
+        2025, 2, 1, 12
+    )
+
+    event["queryStringParameters"] = {"since": "yesterday"}
+    response = get_purchases(event)
+    assert response["statusCode"] == 400
+
+
+@patch("src.purchases_methods.get_session")
+def test_get_purchases_fields_without_items(mock_get_session):
+    """
+    Without "items" in fields, purchased items are not joined.
+    """
+    fake_session = MagicMock()
+    fake_query = fake_session.query.return_value.options.return_value
+    fake_page = fake_query.order_by.return_value.offset.return_value
+    fake_page.limit.return_value.all.return_value = [
+        MagicMock(id=1, user_id="user-1")
+    ]
+    mock_get_session.return_value = fake_session
+
+    event = {
+        "httpMethod": "GET",
+        "resource": "/purchases",
+        "queryStringParameters": {"fields": "user_id"},
+    }
+    response = get_purchases(event)
+
+    assert response["statusCode"] == 200
+    assert json.loads(response["body"]) == [{"id": 1, "user_id": "user-1"}]
+    options = fake_session.query.return_value.options.call_args.args
+    assert len(options) == 1
+
+    event["queryStringParameters"] = {"fields": "items,total"}
+    assert get_purchases(event)["statusCode"] == 400
@@ -133,6 +133,32 @@ def test_delete_purchase_found(mock_get_session):
     fake_session.close.assert_called_once()
 
 
+@patch("src.purchases_purchase_id_method.apply_sales")
+@patch("src.purchases_purchase_id_method.get_session")
+def test_delete_purchase_subtracts_sales(mock_get_session, mock_apply_sales):
+    """
+    Deleting a purchase subtracts its items from the sales rollup.
+    """
+    fake_purchase = create_fake_purchase(
+        purchase_id=2, user_id=20, payment_token="def"
+    )
+    fake_items = [MagicMock(item_id=1, location_id=2, quantity=3)]
+    fake_session = MagicMock()
+    fake_query = fake_session.query.return_value.filter.return_value
+    fake_query.first.return_value = fake_purchase
+    fake_query.all.return_value = fake_items
+    mock_get_session.return_value = fake_session
+
+    event = {"httpMethod": "DELETE", "pathParameters": {"purchase_id": "2"}}
+    response = lambda_handler(event, {})
+
+    assert response["statusCode"] == 200
+    mock_apply_sales.assert_called_once_with(
+        fake_session, fake_purchase.purchase_date, fake_items, sign=-1
+    )
+    fake_session.commit.assert_called_once()
+
+
 # -------------------------------------------------------------------------
 # DELETE purchase: when purchase is not found.
 # -------------------------------------------------------------------------
@@ -0,0 +1,89 @@
+import json
+from datetime import date
+from unittest.mock import MagicMock, patch
+
+from src.reports_methods import lambda_handler
+
+
+def make_event(resource, query_params=None):
+    return {
+        "resource": resource,
+        "httpMethod": "GET",
+        "queryStringParameters": query_params,
+    }
+
+
+@patch("src.reports_methods.get_session")
+def test_sales_report_grouped(mock_get_session):
+    fake_session = MagicMock()
+    mock_get_session.return_value = fake_session
+    row = MagicMock()
+    row.__iter__.return_value = iter([date(2025, 3, 1), 7])
+    row.units_sold = 12
+    row.order_lines = 4
+    query = fake_session.query.return_value.filter.return_value
+    grouped = query.filter.return_value.group_by.return_value
+    grouped.having.return_value.order_by.return_value.all.return_value = [row]
+
+    response = lambda_handler(
+        make_event(
+            "/reports/sales",
+            {
+                "from": "2025-03-01",
+                "to": "2025-03-31",
+                "location_id": "3",
+                "group_by": "day,item",
+            },
+        ),
+        {},
+    )
+
+    assert response["statusCode"] == 200
+    assert json.loads(response["body"]) == [
+        {"day": "2025-03-01", "item": 7, "units_sold": 12, "order_lines": 4}
+    ]
+    fake_session.close.assert_called_once()
+
+
+@patch("src.reports_methods.get_session")
+def test_turnover_report(mock_get_session):
+    fake_session = MagicMock()
+    mock_get_session.return_value = fake_session
+    row = MagicMock(item_id=1, location_id=2, units_sold=30, quantity=15)
+    outer = fake_session.query.return_value.outerjoin.return_value
+    outer.order_by.return_value.all.return_value = [row]
+
+    response = lambda_handler(
+        make_event(
+            "/reports/turnover", {"from": "2025-03-01", "to": "2025-03-30"}
+        ),
+        {},
+    )
+
+    assert response["statusCode"] == 200
+    assert json.loads(response["body"]) == [
+        {
+            "item_id": 1,
+            "location_id": 2,
+            "units_sold": 30,
+            "quantity": 15,
+            "turnover": 2.0,
+            "days_of_cover": 15.0,
+        }
+    ]
+
+
+def test_invalid_parameters():
+    response = lambda_handler(
+        make_event(
+            "/reports/sales", {"from": "2025-04-01", "to": "2025-03-01"}
+        ),
+        {},
+    )
+    assert response["statusCode"] == 400
+    response = lambda_handler(
+        make_event("/reports/sales", {"group_by": "week"}), {}
+    )
+    assert response["statusCode"] == 400
+    response = lambda_handler(make_event("/reports/unknown"), {})
+    assert response["statusCode"] == 404
@@ -48,3 +48,21 @@ def test_lambda_handler_cancel_success(mock_get_session):
 
     fake_session.commit.assert_called_once()
     fake_session.close.assert_called_once()
+
+
+@patch("src.reservation_error.get_session")
+def test_lambda_handler_cancel_batch(mock_get_session):
+    """
+    Test that a batch of reservation_ids is cancelled in one transaction.
+    """
+    fake_session = MagicMock()
+    mock_get_session.return_value = fake_session
+
+    event = {"data": {"reservation_ids": [1, 2]}}
+    response = lambda_handler(event, {})
+
+    assert response["statusCode"] == 200
+    assert response["data"] == event["data"]
+    assert fake_session.query.return_value.filter.return_value.delete.call_count == 2
+    fake_session.commit.assert_called_once()
+    fake_session.close.assert_called_once()
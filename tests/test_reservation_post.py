@@ -34,7 +34,7 @@ def test_lambda_handler_success(
 
     # Build a valid event payload.
     purchase_data = {
-        "user_id": 42,
+        "user_id": "42",
         "items": [
             {"item_id": 10, "location_id": 5, "quantity": 2},
             {"item_id": 11, "location_id": 6, "quantity": 3},
@@ -90,3 +90,95 @@ def test_lambda_handler_no_items():
     with pytest.raises(ValueError) as excinfo:
         lambda_handler(event, context)
     assert "No items provided to update" in str(excinfo.value)
+
+
+@patch("src.reservation_post.get_session")
+def test_lambda_handler_batch(mock_get_session):
+    fake_session = MagicMock()
+    mock_get_session.return_value = fake_session
+    fake_session.scalars.return_value.all.return_value = [7, 8]
+
+    event = {
+        "data": {
+            "batch": [
+                {
+                    "request_id": "a",
+                    "user_id": "u1",
+                    "items": [{"item_id": 1, "location_id": 2, "quantity": 3}],
+                },
+                {"request_id": "b", "user_id": "u2", "items": []},
+                {
+                    "request_id": "c",
+                    "user_id": "u3",
+                    "items": [{"item_id": 4, "location_id": 5, "quantity": 6}],
+                },
+            ]
+        }
+    }
+
+    response = lambda_handler(event, {})
+
+    assert response["statusCode"] == 201
+    assert response["reservation_ids"] == [7, 8]
+    results = {
+        r["request_id"]: r for r in response["response_body"]["reservations"]
+    }
+    assert results["a"]["reservation"]["id"] == 7
+    assert results["c"]["reservation"]["id"] == 8
+    assert results["b"]["error"] == "No items provided to update"
+    assert response["response_body"]["items"] == [
+        {"reservation_id": 7, "item_id": 1, "location_id": 2, "quantity": 3},
+        {"reservation_id": 8, "item_id": 4, "location_id": 5, "quantity": 6},
+    ]
+
+    # One multi-row insert per table and a single commit.
+    fake_session.scalars.assert_called_once()
+    fake_session.execute.assert_called_once()
+    fake_session.commit.assert_called_once()
+    fake_session.close.assert_called_once()
+
+
+@patch("src.reservation_post.get_session")
+def test_lambda_handler_batch_rejects_malformed_entries(mock_get_session):
+    """
+    Malformed entries fail on their own; the request id is stored with
+    each reservation.
+    """
+    fake_session = MagicMock()
+    mock_get_session.return_value = fake_session
+    fake_session.scalars.return_value.all.return_value = [7]
+
+    event = {
+        "data": {
+            "batch": [
+                "not a request",
+                {"request_id": "a", "user_id": "u1", "items": [{"qty": 1}]},
+                {
+                    "request_id": "b",
+                    "user_id": "u2",
+                    "items": [{"item_id": 1, "quantity": 3}],
+                },
+            ]
+        }
+    }
+
+    response = lambda_handler(event, {})
+
+    assert response["reservation_ids"] == [7]
+    errors = [
+        (r["request_id"], r["error"])
+        for r in response["response_body"]["reservations"]
+        if "error" in r
+    ]
+    assert errors == [
+        (None, "request: expected object"),
+        (
+            "a",
+            "request.items[0].item_id: is required; "
+            "request.items[0].quantity: is required",
+        ),
+    ]
+    inserted = fake_session.scalars.call_args.args[1]
+    assert inserted == [
+        {"user_id": "u2", "status": "reserved", "request_id": "b"}
+    ]
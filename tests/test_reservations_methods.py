@@ -42,7 +42,7 @@ def test_get_reservations_without_user_id(mock_get_session):
     fake_session = MagicMock()
     fake_query = fake_session.query.return_value
     fake_options = fake_query.options.return_value
-    fake_offset = fake_options.offset.return_value
+    fake_offset = fake_options.order_by.return_value.offset.return_value
     fake_limit = fake_offset.limit.return_value
     fake_limit.all.return_value = [fake_res1, fake_res2]
     mock_get_session.return_value = fake_session
@@ -101,7 +101,7 @@ def test_get_reservations_with_user_id(mock_get_session):
     fake_query = fake_session.query.return_value
     fake_options = fake_query.options.return_value
     fake_filter = fake_options.filter.return_value
-    fake_offset = fake_filter.offset.return_value
+    fake_offset = fake_filter.order_by.return_value.offset.return_value
     fake_limit = fake_offset.limit.return_value
     fake_limit.all.return_value = [fake_res]
     mock_get_session.return_value = fake_session
@@ -126,3 +126,30 @@ def test_get_reservations_with_user_id(mock_get_session):
     assert res["items"][0]["quantity"] == 7
 
     fake_session.close.assert_called_once()
+
+
+@patch("src.reservations_methods.get_session")
+def test_get_reservations_by_request_id(mock_get_session):
+    """
+    GET /reservations?request_id= looks up the reservation of a request
+    queued in batching mode.
+    """
+    fake_session = MagicMock()
+    fake_options = fake_session.query.return_value.options.return_value
+    fake_filter = fake_options.filter.return_value
+    fake_offset = fake_filter.order_by.return_value.offset.return_value
+    fake_offset.limit.return_value.all.return_value = []
+    mock_get_session.return_value = fake_session
+
+    event = {
+        "httpMethod": "GET",
+        "resource": "/reservations",
+        "queryStringParameters": {"request_id": "abc"},
+    }
+    response = get_reservations(event)
+
+    assert response["statusCode"] == 200
+    assert json.loads(response["body"]) == []
+    (condition,) = fake_options.filter.call_args.args
+    assert str(condition) == "reservations.request_id = :request_id_1"
+    assert condition.right.value == "abc"
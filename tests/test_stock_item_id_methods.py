@@ -169,7 +169,7 @@ def test_put_update_stock_reset(mock_get_session):
     fake_session.query.return_value = fake_query
     mock_get_session.return_value = fake_session
 
-    payload = {"item_id": "1", "location_id": "loc1", "quantity": 80}
+    payload = {"item_id": 1, "location_id": 2, "quantity": 80}
     event = {
         "httpMethod": "PUT",
         "pathParameters": {"item_id": "1"},
@@ -205,8 +205,8 @@ def test_put_update_stock_deduct(mock_get_session):
     mock_get_session.return_value = fake_session
 
     payload = {
-        "item_id": "1",
-        "location_id": "loc1",
+        "item_id": 1,
+        "location_id": 2,
         "quantity": 30,
         "stock_operation": "deduct",
     }
@@ -244,8 +244,8 @@ def test_put_update_stock_add(mock_get_session):
     mock_get_session.return_value = fake_session
 
     payload = {
-        "item_id": "1",
-        "location_id": "loc1",
+        "item_id": 1,
+        "location_id": 2,
         "quantity": 20,
         "stock_operation": "add",
     }
@@ -74,6 +74,43 @@ def test_get_items_empty(mock_get_session):
     fake_session.close.assert_called_once()
 
 
+# ---------------------- Helper Tests for GET /stock/totals ---------------
+
+
+@patch("src.stock_methods.get_stock_totals")
+@patch("src.stock_methods.get_session")
+def test_get_totals_success(mock_get_session, mock_get_stock_totals):
+    fake_session = MagicMock()
+    mock_get_session.return_value = fake_session
+    mock_get_stock_totals.return_value = {1: 12}
+
+    event = {
+        "httpMethod": "GET",
+        "resource": "/stock/totals",
+        "queryStringParameters": {"item_ids": "1,2"},
+    }
+    response = lambda_handler(event, {})
+
+    assert response["statusCode"] == 200
+    assert json.loads(response["body"]) == [
+        {"item_id": 1, "total_quantity": 12},
+        {"item_id": 2, "total_quantity": 0},
+    ]
+    mock_get_stock_totals.assert_called_once_with(fake_session, [1, 2])
+    fake_session.close.assert_called_once()
+
+
+def test_get_totals_invalid_item_ids():
+    event = {
+        "httpMethod": "GET",
+        "resource": "/stock/totals",
+        "queryStringParameters": {"item_ids": "1,abc"},
+    }
+    response = lambda_handler(event, {})
+    assert response["statusCode"] == 400
+    assert "Invalid item_ids" in json.loads(response["body"])["message"]
+
+
 # ---------------------- Helper Tests for POST ---------------------------
 
 
@@ -108,8 +145,8 @@ def test_add_items_success(mock_ItemStock, mock_get_session):
     # Prepare payload with a list of items.
     payload = {
         "items": [
-            {"item_id": "item1", "location_id": "loc1", "quantity": 50},
-            {"item_id": "item2", "location_id": "loc2", "quantity": 75},
+            {"item_id": 1, "location_id": 1, "quantity": 50},
+            {"item_id": 2, "location_id": 2, "quantity": 75},
         ]
     }
     event = {
@@ -150,6 +187,58 @@ def test_add_items_success(mock_ItemStock, mock_get_session):
     fake_session.close.assert_called_once()
 
 
+@patch("src.stock_methods.get_session")
+def test_check_availability(mock_get_session):
+    """
+    Lines are answered from one query; lines for the same item and
+    location share its stock in request order.
+    """
+    fake_session = MagicMock()
+    fake_session.execute.return_value.all.return_value = [
+        (1, 10, 5),
+        (2, 10, 0),
+    ]
+    mock_get_session.return_value = fake_session
+    lines = [
+        {"item_id": 1, "location_id": 10, "quantity": 3},
+        {"item_id": 2, "location_id": 10, "quantity": 1},
+        {"item_id": 1, "location_id": 10, "quantity": 3},
+    ]
+    event = {
+        "httpMethod": "POST",
+        "resource": "/stock/availability",
+        "body": json.dumps({"lines": lines}),
+    }
+    response = lambda_handler(event, {})
+    assert response["statusCode"] == 200
+    body_resp = json.loads(response["body"])
+    assert body_resp["in_stock"] is False
+    assert [
+        (line["available"], line["shortfall"]) for line in body_resp["lines"]
+    ] == [(5, 0), (0, 1), (2, 1)]
+    fake_session.execute.assert_called_once()
+    params = fake_session.execute.call_args.args[0].compile().params
+    assert params["item_ids"] == [1, 2]
+    assert params["location_ids"] == [10, 10]
+    fake_session.close.assert_called_once()
+
+
+@patch("src.stock_methods.get_session")
+def test_check_availability_invalid_body(mock_get_session):
+    event = {
+        "httpMethod": "POST",
+        "resource": "/stock/availability",
+        "body": json.dumps({"lines": [{"item_id": 1, "quantity": 0}]}),
+    }
+    response = lambda_handler(event, {})
+    assert response["statusCode"] == 400
+    assert json.loads(response["body"])["errors"] == [
+        "body.lines[0].location_id: is required",
+        "body.lines[0].quantity: must be >= 1",
+    ]
+    mock_get_session.assert_not_called()
+
+
 def test_lambda_handler_invalid_json():
     event = {
         "httpMethod": "POST",
@@ -1,5 +1,8 @@
+import asyncio
+import threading
 import pytest
 from unittest.mock import MagicMock, patch
+from sqlalchemy.exc import MultipleResultsFound
 
 from src.update_stock import lambda_handler
 
@@ -24,11 +27,11 @@ def test_lambda_handler_success_deduct(
             "response_body": {
                 "items": [
                     {
-                        "item_id": "item1",
-                        "location_id": "loc1",
+                        "item_id": "1",
+                        "location_id": "11",
                         "quantity": 10,
                     },
-                    {"item_id": "item2", "location_id": "loc2", "quantity": 5},
+                    {"item_id": "2", "location_id": "12", "quantity": 5},
                 ]
             },
             "operation": "deduct",
@@ -76,7 +79,7 @@ def test_lambda_handler_success_non_deduct(
         "data": {
             "response_body": {
                 "items": [
-                    {"item_id": "item3", "location_id": "loc3", "quantity": 30}
+                    {"item_id": "3", "location_id": "13", "quantity": 30}
                 ]
             },
             "operation": "add",
@@ -104,3 +107,134 @@ def test_lambda_handler_no_items():
     with pytest.raises(ValueError) as excinfo:
         lambda_handler(event, context)
     assert "No items provided in the event input." in str(excinfo.value)
+
+
+@patch("src.update_stock.get_reorder_points")
+@patch("src.update_stock.send_stock_alert")
+@patch("src.update_stock.update_stock_for_item")
+@patch("src.update_stock.get_session")
+def test_lambda_handler_deduct_uses_reorder_points(
+    mock_get_session, mock_update_stock, mock_send_alert, mock_reorder
+):
+    # Items with a forecast reorder point alert below it instead of 10,
+    # also when the event carries the ids as strings.
+    mock_get_session.return_value = MagicMock()
+    mock_update_stock.side_effect = [
+        {"id": 1, "quantity": 15},
+        {"id": 2, "quantity": 5},
+    ]
+    mock_reorder.return_value = {(1, 1): 20, (2, 1): 3}
+
+    event = {
+        "data": {
+            "response_body": {
+                "items": [
+                    {"item_id": "1", "location_id": "1", "quantity": 5},
+                    {"item_id": 2, "location_id": 1, "quantity": 5},
+                ]
+            },
+            "operation": "deduct",
+        }
+    }
+    lambda_handler(event, {})
+
+    mock_reorder.assert_called_once()
+    assert mock_reorder.call_args.args[1] == [(1, 1), (2, 1)]
+    mock_send_alert.assert_called_once_with(1, 15)
+
+
+@patch("src.update_stock.sns_client.publish")
+@patch("src.update_stock.get_reorder_points")
+@patch("src.update_stock.update_stock_for_item")
+@patch("src.update_stock.get_session")
+def test_lambda_handler_publishes_alerts_concurrently(
+    mock_get_session, mock_update_stock, mock_reorder, mock_publish
+):
+    # Both publishes wait on a barrier, which only opens if they overlap.
+    barrier = threading.Barrier(2, timeout=5)
+
+    def publish(**kwargs):
+        barrier.wait()
+        return {"MessageId": kwargs["Message"]}
+
+    def update_stock(session, item, operation):
+        # The database work runs outside the event loop.
+        with pytest.raises(RuntimeError):
+            asyncio.get_running_loop()
+        return {"id": item["item_id"], "quantity": item["item_id"] + 1}
+
+    mock_get_session.return_value = MagicMock()
+    mock_update_stock.side_effect = update_stock
+    mock_reorder.return_value = {}
+    mock_publish.side_effect = publish
+
+    event = {
+        "data": {
+            "response_body": {
+                "items": [
+                    {"item_id": 1, "location_id": 1, "quantity": 5},
+                    {"item_id": 2, "location_id": 1, "quantity": 5},
+                ]
+            },
+            "operation": "deduct",
+        }
+    }
+    response = lambda_handler(event, {})
+
+    assert response["statusCode"] == 201
+    assert mock_publish.call_count == 2
+
+
+@patch("src.update_stock.get_reorder_points", return_value={})
+@patch("src.update_stock.update_stock_for_item")
+@patch("src.update_stock.get_session")
+def test_lambda_handler_batch_cancels_only_failing_reservation(
+    mock_get_session, mock_update_stock, mock_reorder_points
+):
+    """
+    In a reservation batch a failing line rolls back and cancels only its
+    own reservation; the rest of the batch is committed.
+    """
+    fake_session = MagicMock()
+    fake_session.begin_nested.return_value.__exit__.return_value = False
+    mock_get_session.return_value = fake_session
+    mock_update_stock.side_effect = [
+        {"id": 1, "quantity": 40},
+        MultipleResultsFound("duplicate stock rows"),
+    ]
+    event = {
+        "data": {
+            "response_body": {
+                "items": [
+                    {
+                        "reservation_id": 7,
+                        "item_id": "1",
+                        "location_id": "11",
+                        "quantity": 5,
+                    },
+                    {
+                        "reservation_id": 8,
+                        "item_id": "2",
+                        "location_id": "11",
+                        "quantity": 5,
+                    },
+                ]
+            },
+            "operation": "deduct",
+            "reservation_ids": [7, 8],
+        }
+    }
+
+    response = lambda_handler(event, {})
+
+    assert response["reservation_ids"] == [7]
+    assert response["failed_reservation_ids"] == [8]
+    assert response["updated_items"] == [{"id": 1, "quantity": 40}]
+    assert fake_session.begin_nested.call_count == 2
+    cancel_sql = [
+        str(call.args[0]) for call in fake_session.execute.call_args_list
+    ]
+    assert cancel_sql[0].startswith("DELETE FROM reserved_items")
+    assert cancel_sql[1].startswith("UPDATE reservations")
+    fake_session.commit.assert_called_once()
+    fake_session.rollback.assert_not_called()
@@ -0,0 +1,70 @@
+import json
+import os
+import sys
+
+import pytest
+
+from db_layer import validators
+from db_layer.validators import (
+    MAX_REPORTED_ERRORS,
+    validate_request_body,
+    validate_stock_item,
+    validate_update_stock,
+)
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def test_generated_module_is_up_to_date():
+    """
+    Fails when the API definition changed without re-running
+    scripts/generate_validators.py.
+    """
+    pytest.importorskip("yaml")
+    sys.path.insert(0, os.path.join(REPO_ROOT, "scripts"))
+    try:
+        import generate_validators
+    finally:
+        sys.path.pop(0)
+
+    with open(generate_validators.SWAGGER_PATH) as f:
+        expected = generate_validators.generate(
+            generate_validators.yaml.safe_load(f)
+        )
+    with open(validators.__file__) as f:
+        assert f.read() == expected
+
+
+def test_valid_body_passes():
+    body = {"items": [{"item_id": 1, "location_id": 2, "quantity": 3}]}
+    assert validate_request_body("POST", "/stock", body) is None
+
+
+def test_routes_without_body_schema_are_not_validated():
+    assert validate_request_body("GET", "/stock", None) is None
+
+
+def test_booleans_and_out_of_range_integers_are_rejected():
+    body = {"item_id": True, "location_id": 2, "quantity": 2**31}
+    assert validate_update_stock(body) == [
+        "body.quantity: must be <= 2147483647",
+        "body.item_id: expected integer",
+    ]
+
+
+def test_nested_errors_carry_their_path():
+    body = {"items": [{"item_id": 1, "location_id": 2}, "not an object"]}
+    assert validate_stock_item(body) == [
+        "body.items[0].quantity: is required",
+        "body.items[1]: expected object",
+    ]
+
+
+def test_reported_errors_are_capped():
+    body = {"items": [{} for _ in range(MAX_REPORTED_ERRORS)]}
+    response = validate_request_body("POST", "/stock", body)
+
+    assert response["statusCode"] == 400
+    errors = json.loads(response["body"])["errors"]
+    assert len(errors) == MAX_REPORTED_ERRORS
+    assert errors[0] == "body.items[0].item_id: is required"